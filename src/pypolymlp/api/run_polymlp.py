@@ -4,6 +4,7 @@ import signal
 import time
 
 from pypolymlp.mlp_dev.core.accuracy import PolymlpDevAccuracy
+from pypolymlp.mlp_dev.core.features_cache import FeaturesCache
 from pypolymlp.mlp_dev.core.mlpdev_data import PolymlpDevData
 from pypolymlp.mlp_dev.standard.learning_curve import learning_curve
 from pypolymlp.mlp_dev.standard.mlpdev_dataxy import (
@@ -36,6 +37,29 @@ def run():
         action="store_true",
         help="Learning curve calculations",
     )
+    parser.add_argument(
+        "--cache_dir",
+        type=str,
+        default=None,
+        help="Directory of persistent cache of features",
+    )
+    parser.add_argument(
+        "--cache_size",
+        type=float,
+        default=10.0,
+        help="Maximum size of cache of features in GB",
+    )
+    parser.add_argument(
+        "--memmap_dir",
+        type=str,
+        default=None,
+        help="Directory of memory-mapped X used with --no_sequential",
+    )
+    parser.add_argument(
+        "--binary",
+        action="store_true",
+        help="Save precompiled binary potential (polymlp.bin) in addition",
+    )
     args = parser.parse_args()
 
     verbose = True
@@ -44,10 +68,16 @@ def run():
     polymlp_in.parse_datasets()
     polymlp_in.write_polymlp_params_yaml(filename="polymlp_params.yaml")
 
+    cache = None
+    if args.cache_dir is not None:
+        cache = FeaturesCache(args.cache_dir, max_size=args.cache_size)
+
     if args.learning_curve:
         if len(polymlp_in.train_dict) == 1:
             args.no_sequential = True
-            polymlp = PolymlpDevDataXY(polymlp_in).run()
+            polymlp = PolymlpDevDataXY(
+                polymlp_in, feature_cache=cache, memmap_dir=args.memmap_dir
+            ).run()
             learning_curve(polymlp)
         else:
             raise ValueError(
@@ -57,14 +87,16 @@ def run():
     t1 = time.time()
     if args.no_sequential:
         if not args.learning_curve:
-            polymlp = PolymlpDevDataXY(polymlp_in).run()
+            polymlp = PolymlpDevDataXY(
+                polymlp_in, feature_cache=cache, memmap_dir=args.memmap_dir
+            ).run()
         polymlp.print_data_shape()
     else:
-        polymlp = PolymlpDevDataXYSequential(polymlp_in).run()
+        polymlp = PolymlpDevDataXYSequential(polymlp_in, feature_cache=cache).run()
     t2 = time.time()
 
     reg = Regression(polymlp).fit(seq=not args.no_sequential)
-    reg.save_mlp_lammps(filename="polymlp.lammps")
+    reg.save_mlp_lammps(filename="polymlp.lammps", binary=args.binary)
     t3 = time.time()
 
     if verbose:
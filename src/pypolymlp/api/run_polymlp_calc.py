@@ -10,6 +10,7 @@ from pypolymlp.calculator.compute_features import (
     compute_from_polymlp_lammps,
 )
 from pypolymlp.calculator.properties import Properties
+from pypolymlp.calculator.properties_stream import PropertiesStreamWriter
 from pypolymlp.core.interface_vasp import (
     Poscar,
     parse_structures_from_poscars,
@@ -112,6 +113,14 @@ def run():
         help="Structure range in phono3py.yaml file",
     )
 
+    parser.add_argument(
+        "--chunk_size",
+        type=int,
+        default=None,
+        help="Properties of POSCAR files are computed in chunks "
+        "and appended to files.",
+    )
+
     parser.add_argument("--poscar", type=str, default=None, help="poscar")
     parser.add_argument(
         "--supercell",
@@ -182,7 +191,19 @@ def run():
     parser.add_argument("--ph_pdos", action="store_true", help="Compute phonon PDOS")
     args = parser.parse_args()
 
-    if args.properties:
+    if args.properties and args.chunk_size is not None:
+        print("Mode: Property calculations (stream)")
+        structures = (Poscar(p).get_structure() for p in args.poscars)
+        prop = Properties(pot=args.pot)
+        t1 = time.time()
+        with PropertiesStreamWriter() as writer:
+            prop.eval_stream(
+                structures, chunk_size=args.chunk_size, writer=writer, verbose=True
+            )
+        t2 = time.time()
+        print("Elapsed time:", t2 - t1, "(s)")
+
+    elif args.properties:
         print("Mode: Property calculations")
         structures = set_structures(args)
         prop = Properties(pot=args.pot)
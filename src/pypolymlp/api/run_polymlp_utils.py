@@ -2,6 +2,7 @@
 import argparse
 import signal
 
+from pypolymlp.core.io_polymlp import convert_mlp_lammps_to_binary
 from pypolymlp.mlp_opt.optimal import find_optimal_mlps
 from pypolymlp.utils.atomic_energies.atomic_energies import (
     get_atomic_energies_polymlp_in,
@@ -24,6 +25,20 @@ def run():
         default=None,
         help="Compression of vasprun.xml files",
     )
+    parser.add_argument(
+        "--vasprun_compress_format",
+        type=str,
+        default="npz",
+        choices=["npz", "xml"],
+        help="Format of compressed vasprun.xml files, binary record or XML",
+    )
+    parser.add_argument(
+        "--binary_pot",
+        nargs="*",
+        type=str,
+        default=None,
+        help="polymlp.lammps files converted into precompiled binaries",
+    )
     parser.add_argument("--n_jobs", type=int, default=1, help="Number of parallel jobs")
 
     parser.add_argument(
@@ -116,14 +131,19 @@ def run():
     if args.vasprun_compress is not None:
         if args.n_jobs == 1:
             for vasp in args.vasprun_compress:
-                convert(vasp)
+                convert(vasp, output_format=args.vasprun_compress_format)
         else:
             from joblib import Parallel, delayed
 
             _ = Parallel(n_jobs=args.n_jobs)(
-                delayed(convert)(vasp) for vasp in args.vasprun_compress
+                delayed(convert)(vasp, output_format=args.vasprun_compress_format)
+                for vasp in args.vasprun_compress
             )
 
+    elif args.binary_pot is not None:
+        for pot in args.binary_pot:
+            print(pot, "->", convert_mlp_lammps_to_binary(pot))
+
     elif args.auto_dataset is not None:
         auto_divide(args.auto_dataset)
 
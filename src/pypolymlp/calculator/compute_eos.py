@@ -90,7 +90,7 @@ class PolymlpEOS:
             isotropic_volume_change(self.__unitcell_dict, eps=eps) for eps in eps_list
         ]
 
-        energies, _, _ = self.prop.eval_multiple(st_dicts)
+        energies, _, _ = self.prop.eval_multiple(st_dicts, mode="energy")
         volumes = np.array([st["volume"] for st in st_dicts])
         print(" eps =", np.array(eps_list))
         self.__eos_data = np.array([volumes, energies]).T
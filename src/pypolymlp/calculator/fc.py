@@ -15,6 +15,7 @@ from pypolymlp.core.displacements import (
     get_structures_from_displacements,
 )
 from pypolymlp.core.interface_phono3py_ver3 import parse_phono3py_yaml_fcs
+from pypolymlp.core.structure import Structure
 from pypolymlp.utils.phonopy_utils import (
     phonopy_cell_to_st_dict,
     phonopy_supercell,
@@ -72,7 +73,7 @@ class PolymlpFC:
     ):
 
         if supercell is not None:
-            if isinstance(supercell, dict):
+            if isinstance(supercell, (dict, Structure)):
                 self.__supercell_dict = supercell
                 self.__supercell_ph = st_dict_to_phonopy_cell(supercell)
             elif isinstance(supercell, phonopy.structure.cells.Supercell):
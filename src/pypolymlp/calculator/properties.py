@@ -2,60 +2,262 @@
 import numpy as np
 
 from pypolymlp.calculator.compute_features import update_types
-from pypolymlp.core.io_polymlp import load_mlp_lammps
+from pypolymlp.calculator.properties_cache import PropertiesCache, potential_hash
+from pypolymlp.calculator.properties_stream import iterate_chunks
+from pypolymlp.core.io_polymlp import (
+    find_mlp_binary,
+    is_mlp_binary,
+    load_mlp_binary,
+    load_mlp_lammps,
+)
+from pypolymlp.core.structure import StructureBatch
 from pypolymlp.cxx.lib import libmlpcpp
 
 
-def convert_stresses_in_gpa(stresses, st_dicts):
+def convert_stresses_in_gpa(stresses, st_dicts=None, volumes=None):
 
-    volumes = np.array([st["volume"] for st in st_dicts])
+    if volumes is None and isinstance(st_dicts, StructureBatch):
+        volumes = st_dicts.volumes
+    elif volumes is None:
+        volumes = np.array([st["volume"] for st in st_dicts])
     stresses_gpa = np.zeros(stresses.shape)
     for i in range(6):
         stresses_gpa[:, i] = stresses[:, i] / volumes * 160.21766208
     return stresses_gpa
 
 
+def check_eval_mode(mode):
+    """Check evaluation mode.
+
+    mode: "all": energy, forces, and stress tensors are computed.
+          "energy_force": energy and forces are computed.
+          "energy": only energy is computed. Derivatives are skipped.
+    """
+    if mode not in ("all", "energy_force", "energy"):
+        raise ValueError("mode must be 'all', 'energy_force', or 'energy'.")
+    return mode
+
+
+def check_neighbor_method(neighbor_method):
+    """Check algorithm for neighbor search."""
+    if neighbor_method not in ("brute_force", "linked_cell"):
+        raise ValueError("neighbor_method must be 'brute_force' or 'linked_cell'.")
+    return neighbor_method
+
+
+def check_offsets(offsets):
+    """Check offsets of structures in concatenated arrays.
+
+    offsets: (n_str + 1), starting with zero and non-decreasing.
+    """
+    if offsets.ndim != 1 or len(offsets) == 0 or offsets[0] != 0:
+        raise ValueError("offsets must be a 1D array starting with zero.")
+    if np.any(np.diff(offsets) < 0):
+        raise ValueError("offsets must be non-decreasing.")
+    return offsets
+
+
+def split_results(res, offsets):
+    """Split concatenated per-atom results into those of structures.
+
+    res: (energies, forces, stresses) or
+         (energies, forces, stresses, energies_atom, virials_atom)
+         with forces (3, n_atom_total), energies_atom (n_atom_total),
+         and virials_atom (6, n_atom_total).
+    """
+    res = list(res)
+    sections = offsets[1:-1]
+    if res[1] is not None:
+        res[1] = np.split(res[1], sections, axis=1)
+    if len(res) > 3:
+        res[3] = np.split(res[3], sections)
+        if res[4] is not None:
+            res[4] = np.split(res[4], sections, axis=1)
+    return tuple(res)
+
+
+def structures_to_arrays(st_dicts):
+    """Concatenate structures into contiguous arrays.
+
+    Arrays of StructureBatch are used directly. Types of structures
+    must follow the element order of the potential.
+
+    Return
+    ------
+    axis_array: (n_str, 3, 3)
+    positions_c: Cartesian positions, (3, n_atom_total)
+    types: (n_atom_total), int32
+    offsets: (n_str + 1), int32
+             Atoms of structure i are in [offsets[i], offsets[i+1]).
+    """
+    if isinstance(st_dicts, StructureBatch):
+        return st_dicts.to_arrays()
+
+    axis_array = np.array([st["axis"] for st in st_dicts], dtype=np.float64)
+    positions_c = np.concatenate(
+        [st["axis"] @ st["positions"] for st in st_dicts], axis=1
+    )
+    types = np.concatenate([st["types"] for st in st_dicts]).astype(np.int32)
+
+    offsets = np.zeros(len(st_dicts) + 1, dtype=np.int32)
+    offsets[1:] = np.cumsum([len(st["types"]) for st in st_dicts])
+    return axis_array, positions_c, types, offsets
+
+
+def find_binary_pot(pot):
+    """Return precompiled binary for a potential file if available."""
+    if is_mlp_binary(pot):
+        return pot
+    return find_mlp_binary(pot)
+
+
+def load_pot(pot):
+    """Load potential from a text or a precompiled binary file."""
+    pot_binary = find_binary_pot(pot)
+    if pot_binary is not None:
+        return load_mlp_binary(filename=pot_binary)
+    return load_mlp_lammps(filename=pot)
+
+
 class PropertiesSingle:
 
-    def __init__(self, pot=None, params_dict=None, coeffs=None):
+    def __init__(
+        self,
+        pot=None,
+        params_dict=None,
+        coeffs=None,
+        neighbor_method="brute_force",
+        verlet_skin=0.0,
+        mmap=False,
+    ):
+        """
+        Parameters
+        ----------
+        pot: Potential file or list of potential files of a hybrid
+             potential. If pot is a precompiled binary or its binary
+             generated by save_mlp_binary is found, the potential is
+             loaded from the binary without constructing the mappings.
+        neighbor_method: Algorithm for neighbor search,
+                         "brute_force" or "linked_cell".
+                         "linked_cell" is efficient for large structures.
+        verlet_skin: Skin distance of neighbor list (in angstrom).
+                     If verlet_skin > 0, a neighbor list is constructed
+                     with cutoff + verlet_skin and reused until the cell
+                     changes or an atom moves more than verlet_skin / 2.
+        mmap: Binary potential file is memory-mapped instead of being read.
+
+        If a list of pot or lists of params_dict and coeffs are given,
+        components of a hybrid potential are evaluated together in a single pass
+        using a neighbor list with the largest cutoff.
+        The components must share the same element order.
+        """
 
+        check_neighbor_method(neighbor_method)
+        pot_binaries = None
         if pot is not None:
-            self.__params_dict, mlp_dict = load_mlp_lammps(filename=pot)
-            self.__coeffs = mlp_dict["coeffs"] / mlp_dict["scales"]
+            pots = pot if isinstance(pot, list) else [pot]
+            pot_binaries = [find_binary_pot(p) for p in pots]
+            params_dicts, coeffs, offsets = [], [], []
+            for p, pot_binary in zip(pots, pot_binaries):
+                if pot_binary is not None:
+                    params, mlp_dict, offset = load_mlp_binary(
+                        filename=pot_binary, mmap=mmap, return_offset=True
+                    )
+                    offsets.append(offset)
+                else:
+                    params, mlp_dict = load_mlp_lammps(filename=p)
+                params_dicts.append(params)
+                coeffs.append(mlp_dict["coeffs"] / mlp_dict["scales"])
+
+            if any(b is None for b in pot_binaries):
+                pot_binaries = None
+            if isinstance(pot, list):
+                self.__params_dict, self.__coeffs = params_dicts, coeffs
+            else:
+                self.__params_dict, self.__coeffs = params_dicts[0], coeffs[0]
         else:
             self.__params_dict = params_dict
             self.__coeffs = coeffs
 
-        self.__params_dict["element_swap"] = False
-        self.obj = libmlpcpp.PotentialPropertiesFast(self.__params_dict, self.__coeffs)
+        if isinstance(self.__params_dict, list):
+            for params in self.__params_dict:
+                params["element_swap"] = False
+                params["neighbor_method"] = neighbor_method
+            self.__element_order = self.__params_dict[0]["elements"]
+        else:
+            self.__params_dict["element_swap"] = False
+            self.__params_dict["neighbor_method"] = neighbor_method
+            self.__element_order = self.__params_dict["elements"]
+
+        if pot_binaries is not None and isinstance(pot, list):
+            self.obj = libmlpcpp.PotentialPropertiesFast(
+                pot_binaries, offsets, mmap, self.__params_dict[0]
+            )
+        elif pot_binaries is not None:
+            self.obj = libmlpcpp.PotentialPropertiesFast(
+                pot_binaries[0], offsets[0], mmap, self.__params_dict
+            )
+        else:
+            self.obj = libmlpcpp.PotentialPropertiesFast(
+                self.__params_dict, self.__coeffs
+            )
+        self.obj.set_skin(verlet_skin)
 
-    def eval(self, st_dict):
+    def eval(self, st_dict, mode="all", per_atom=False):
         """
+        Parameters
+        ----------
+        mode: "all", "energy_force", or "energy".
+              Quantities that are not computed are returned as None.
+        per_atom: Return per-atom energies and per-atom virials in addition.
+
         Return
         ------
         energy: unit: eV/supercell
         force: unit: eV/angstrom (3, n_atom)
         stress: unit: eV/supercell: (6) in the order of xx, yy, zz, xy, yz, zx
+        energy_atom: unit: eV/atom (n_atom), only if per_atom = True.
+        virial_atom: unit: eV/atom (6, n_atom), only if per_atom = True.
+                     The order is the same as that of stress.
+                     Sum over atoms is equal to stress.
         """
-        element_order = self.__params_dict["elements"]
-        st_dict = update_types([st_dict], element_order)[0]
+        check_eval_mode(mode)
+        st_dict = update_types([st_dict], self.__element_order)[0]
 
         positions_c = st_dict["axis"] @ st_dict["positions"]
-        self.obj.eval(st_dict["axis"], positions_c, st_dict["types"])
+        self.obj.eval(st_dict["axis"], positions_c, st_dict["types"], mode, per_atom)
 
         energy = self.obj.get_e()
-        force = np.array(self.obj.get_f()).T
-        stress = np.array(self.obj.get_s())
-        return energy, force, stress
-
-    def eval_multiple(self, st_dicts, verbose=False):
+        force, stress = None, None
+        if mode != "energy":
+            force = np.array(self.obj.get_f()).T
+        if mode == "all":
+            stress = np.array(self.obj.get_s())
+        if not per_atom:
+            return energy, force, stress
+
+        energy_atom = np.array(self.obj.get_e_atom())
+        virial_atom = None
+        if mode == "all":
+            virial_atom = np.array(self.obj.get_v_atom()).T
+        return energy, force, stress, energy_atom, virial_atom
+
+    def eval_multiple(self, st_dicts, verbose=False, mode="all", per_atom=False):
         """
+        Parameters
+        ----------
+        mode: "all", "energy_force", or "energy".
+              Quantities that are not computed are returned as None.
+        per_atom: Return per-atom energies and per-atom virials in addition.
+
         Return
         ------
         energies: unit: eV/supercell (n_str)
         forces: unit: eV/angstrom (n_str, 3, n_atom)
         stresses: (n_str, 6) in the order of xx, yy, zz, xy, yz, zx
                     unit: eV/supercell
+        energies_atom: unit: eV/atom (n_str, n_atom), if per_atom = True.
+        virials_atom: unit: eV/atom (n_str, 6, n_atom), if per_atom = True.
         """
         if verbose:
             print(
@@ -63,117 +265,498 @@ class PropertiesSingle:
                 len(st_dicts),
                 "structures: Using a fast algorithm",
             )
-        element_order = self.__params_dict["elements"]
-        st_dicts = update_types(st_dicts, element_order)
-
-        axis_array = [st["axis"] for st in st_dicts]
-        types_array = [st["types"] for st in st_dicts]
-        positions_c_array = [st["axis"] @ st["positions"] for st in st_dicts]
-
-        """
-        PotentialProperties.eval_multiple: Return
-        ------------------------------------------
-        energies = obj.get_e(), (n_str)
-        forces = obj.get_f(), (n_str, n_atom, 3)
-        stresses = obj.get_s(), (n_str, 6)
-                    in the order of xx, yy, zz, xy, yz, zx
+        check_eval_mode(mode)
+        if len(st_dicts) == 0:
+            forces = [] if mode != "energy" else None
+            stresses = np.zeros((0, 6)) if mode == "all" else None
+            if per_atom:
+                virials_atom = [] if mode == "all" else None
+                return np.zeros(0), forces, stresses, [], virials_atom
+            return np.zeros(0), forces, stresses
+
+        if isinstance(st_dicts, StructureBatch):
+            arrays = st_dicts.to_arrays(element_order=self.__element_order)
+            axis_array, positions_c, types, offsets = arrays
+        else:
+            st_dicts = update_types(st_dicts, self.__element_order)
+            axis_array, positions_c, types, offsets = structures_to_arrays(st_dicts)
+        res = self.eval_multiple_arrays(
+            axis_array, positions_c, types, offsets, mode=mode, per_atom=per_atom
+        )
+        return split_results(res, offsets)
+
+    def eval_multiple_arrays(
+        self,
+        axis_array,
+        positions_c,
+        types,
+        offsets,
+        energies=None,
+        forces=None,
+        stresses=None,
+        mode="all",
+        per_atom=False,
+        energies_atom=None,
+        virials_atom=None,
+    ):
         """
-        self.obj.eval_multiple(axis_array, positions_c_array, types_array)
+        Parameters
+        ----------
+        axis_array: (n_str, 3, 3)
+        positions_c: Concatenated cartesian positions, (3, n_atom_total)
+        types: Concatenated types, (n_atom_total)
+               Types must follow the element order of the potential.
+        offsets: (n_str + 1)
+                 Atoms of structure i are in [offsets[i], offsets[i+1]).
+        energies, forces, stresses: Preallocated output arrays (optional).
+                 Results are written to them in place.
+        mode: "all", "energy_force", or "energy".
+              Quantities that are not computed are returned as None.
+        per_atom: Return per-atom energies and per-atom virials in addition.
+        energies_atom, virials_atom: Preallocated output arrays (optional)
+                 of per-atom energies and virials.
 
-        energies = np.array(self.obj.get_e_array())
-        stresses = np.array(self.obj.get_s_array())
-        forces = [np.array(f).T for f in self.obj.get_f_array()]
-        return energies, forces, stresses
+        Return
+        ------
+        energies: unit: eV/supercell (n_str)
+        forces: unit: eV/angstrom (3, n_atom_total)
+        stresses: (n_str, 6) in the order of xx, yy, zz, xy, yz, zx
+                    unit: eV/supercell
+        energies_atom: unit: eV/atom (n_atom_total), if per_atom = True.
+        virials_atom: unit: eV/atom (6, n_atom_total), if per_atom = True.
+        """
+        check_eval_mode(mode)
+        axis_array = np.ascontiguousarray(axis_array, dtype=np.float64)
+        positions_c = np.ascontiguousarray(positions_c, dtype=np.float64)
+        types = np.ascontiguousarray(types, dtype=np.int32)
+        offsets = check_offsets(np.ascontiguousarray(offsets, dtype=np.int32))
+
+        n_str, n_atom_total = len(offsets) - 1, offsets[-1]
+        if axis_array.shape != (n_str, 3, 3):
+            raise ValueError("Inconsistent shape of axis_array.")
+        if positions_c.shape != (3, n_atom_total) or types.shape != (n_atom_total,):
+            raise ValueError("Inconsistent shape of positions_c or types.")
+
+        energies = self.__check_output(energies, (n_str,))
+        if mode != "energy":
+            forces = self.__check_output(forces, (3, n_atom_total))
+        if mode == "all":
+            stresses = self.__check_output(stresses, (n_str, 6))
+        if per_atom:
+            energies_atom = self.__check_output(energies_atom, (n_atom_total,))
+            if mode == "all":
+                virials_atom = self.__check_output(virials_atom, (6, n_atom_total))
+
+        self.obj.eval_multiple_arrays(
+            axis_array,
+            positions_c,
+            types,
+            offsets,
+            energies,
+            forces if mode != "energy" else np.zeros((3, 0)),
+            stresses if mode == "all" else np.zeros((0, 6)),
+            energies_atom if per_atom else np.zeros(0),
+            virials_atom if per_atom and mode == "all" else np.zeros((6, 0)),
+            mode,
+            per_atom,
+        )
+        res = [
+            energies,
+            forces if mode != "energy" else None,
+            stresses if mode == "all" else None,
+        ]
+        if per_atom:
+            res.append(energies_atom)
+            res.append(virials_atom if mode == "all" else None)
+        return tuple(res)
+
+    def __check_output(self, array, shape):
+
+        if array is None:
+            return np.zeros(shape)
+        if (
+            array.shape != shape
+            or array.dtype != np.float64
+            or not array.flags.c_contiguous
+        ):
+            raise ValueError(
+                "Output array must be a C-contiguous float64 array "
+                "with shape " + str(shape) + "."
+            )
+        return array
 
     @property
     def params_dict(self):
         return self.__params_dict
 
+    @property
+    def potential_id(self):
+        """Hash of potential parameters and coefficients."""
+        if isinstance(self.__params_dict, list):
+            return potential_hash(self.__params_dict, self.__coeffs)
+        return potential_hash([self.__params_dict], [self.__coeffs])
+
+    @property
+    def n_neighbor_builds(self):
+        """Number of neighbor list constructions with Verlet skin."""
+        return self.obj.get_n_neighbor_builds()
+
 
 class PropertiesHybrid:
 
-    def __init__(self, pot=None, params_dict=None, coeffs=None):
+    def __init__(
+        self,
+        pot=None,
+        params_dict=None,
+        coeffs=None,
+        neighbor_method="brute_force",
+        verlet_skin=0.0,
+        fused=True,
+        mmap=False,
+    ):
+        """
+        Parameters
+        ----------
+        pot: List of potential files. Precompiled binaries are used
+             for loading potentials if available.
+        fused: If True and all components share the same element order,
+               the hybrid potential is evaluated in a single pass,
+               in which the neighbor list and structure conversion
+               are shared by all components.
+        mmap: Binary potential files are memory-mapped instead of being read.
+        """
 
+        check_neighbor_method(neighbor_method)
+        kwargs = {"neighbor_method": neighbor_method, "verlet_skin": verlet_skin}
         if pot is not None:
             if not isinstance(pot, list):
                 raise ValueError("Parameters in PropertiesHybrid must be lists.")
-            self.props = [PropertiesSingle(pot=p) for p in pot]
+            params_dict, coeffs = [], []
+            for p in pot:
+                params, mlp_dict = load_pot(p)
+                params_dict.append(params)
+                coeffs.append(mlp_dict["coeffs"] / mlp_dict["scales"])
         else:
             if not isinstance(params_dict, list) or not isinstance(coeffs, list):
                 raise ValueError("Parameters in PropertiesHybrid must be lists.")
+
+        self.__params_dicts = params_dict
+        elements = [list(p["elements"]) for p in params_dict]
+        fused = fused and all(e == elements[0] for e in elements)
+        if pot is not None:
+            kwargs["mmap"] = mmap
+            if fused:
+                self.props = [PropertiesSingle(pot=pot, **kwargs)]
+            else:
+                self.props = [PropertiesSingle(pot=p, **kwargs) for p in pot]
+        elif fused:
+            self.props = [
+                PropertiesSingle(params_dict=params_dict, coeffs=coeffs, **kwargs)
+            ]
+        else:
             self.props = [
-                PropertiesSingle(params_dict=p, coeffs=c)
+                PropertiesSingle(params_dict=p, coeffs=c, **kwargs)
                 for p, c in zip(params_dict, coeffs)
             ]
 
-    def eval(self, st_dict):
+    def eval(self, st_dict, mode="all", per_atom=False):
 
-        energy, force, stress = self.props[0].eval(st_dict)
+        res = self.props[0].eval(st_dict, mode=mode, per_atom=per_atom)
         for prop in self.props[1:]:
-            e_single, f_single, s_single = prop.eval(st_dict)
-            energy += e_single
-            force += f_single
-            stress += s_single
-
-        return energy, force, stress
+            res_single = prop.eval(st_dict, mode=mode, per_atom=per_atom)
+            res = self.__add_results(res, res_single)
+        return res
 
-    def eval_multiple(self, st_dicts):
+    def eval_multiple(self, st_dicts, mode="all", per_atom=False):
 
-        energies, forces, stresses = self.props[0].eval_multiple(st_dicts)
+        res = self.props[0].eval_multiple(st_dicts, mode=mode, per_atom=per_atom)
         for prop in self.props[1:]:
-            e_single, f_single, s_single = prop.eval_multiple(st_dicts)
-            energies += e_single
-            for i, f1 in enumerate(f_single):
-                forces[i] += f1
-            stresses += s_single
-
-        return energies, forces, stresses
+            res_single = prop.eval_multiple(st_dicts, mode=mode, per_atom=per_atom)
+            res = self.__add_results(res, res_single)
+        return res
+
+    def eval_multiple_arrays(
+        self,
+        axis_array,
+        positions_c,
+        types,
+        offsets,
+        energies=None,
+        forces=None,
+        stresses=None,
+        mode="all",
+        per_atom=False,
+        energies_atom=None,
+        virials_atom=None,
+    ):
+        """Results of components are summed up in output arrays.
+
+        See PropertiesSingle.eval_multiple_arrays.
+        """
+        args = (axis_array, positions_c, types, offsets)
+        res = self.props[0].eval_multiple_arrays(
+            *args,
+            energies=energies,
+            forces=forces,
+            stresses=stresses,
+            mode=mode,
+            per_atom=per_atom,
+            energies_atom=energies_atom,
+            virials_atom=virials_atom,
+        )
+        for prop in self.props[1:]:
+            res_single = prop.eval_multiple_arrays(*args, mode=mode, per_atom=per_atom)
+            res = self.__add_results(res, res_single)
+        return res
+
+    def __add_results(self, res, res_single):
+
+        res = list(res)
+        for i, val in enumerate(res_single):
+            if val is None:
+                continue
+            if isinstance(val, list):
+                for k, v1 in enumerate(val):
+                    res[i][k] += v1
+            else:
+                res[i] += val
+        return tuple(res)
 
     @property
     def params_dict(self):
-        return [prop.params_dict for prop in self.props]
+        return self.__params_dicts
+
+    @property
+    def potential_id(self):
+        return b"".join(prop.potential_id for prop in self.props)
+
+    @property
+    def n_neighbor_builds(self):
+        return self.props[0].n_neighbor_builds
 
 
 class Properties:
 
-    def __init__(self, pot=None, params_dict=None, coeffs=None):
+    def __init__(
+        self,
+        pot=None,
+        params_dict=None,
+        coeffs=None,
+        neighbor_method="brute_force",
+        verlet_skin=0.0,
+        cache_size=0,
+        mmap=False,
+    ):
+        """
+        Parameters
+        ----------
+        pot: Potential file or list of potential files.
+             Precompiled binary potentials (polymlp.bin) are used
+             if available. See save_mlp_binary.
+        neighbor_method: Algorithm for neighbor search,
+                         "brute_force" or "linked_cell".
+                         "linked_cell" is efficient for large structures.
+        verlet_skin: Skin distance of neighbor list (in angstrom).
+                     If verlet_skin > 0, a neighbor list is constructed
+                     with cutoff + verlet_skin and reused until the cell
+                     changes or an atom moves more than verlet_skin / 2.
+                     Useful for repeated evaluations of a structure,
+                     such as relaxations and displaced supercells.
+        cache_size: Maximum number of structures in the result cache.
+                    If cache_size > 0, results of eval, eval_multiple,
+                    and eval_phonopy are stored in an LRU cache keyed by
+                    axis, positions, elements, and the potential.
+                    Identical structures are then returned without
+                    computation. Hits and misses are available from
+                    cache_info.
+        mmap: Binary potential file is memory-mapped instead of being read.
+        """
 
+        check_neighbor_method(neighbor_method)
+        kwargs = {"neighbor_method": neighbor_method, "verlet_skin": verlet_skin}
         if pot is not None:
             if isinstance(pot, list):
                 if len(pot) > 1:
-                    self.prop = PropertiesHybrid(pot=pot)
+                    self.prop = PropertiesHybrid(pot=pot, mmap=mmap, **kwargs)
                 else:
-                    self.prop = PropertiesSingle(pot=pot[0])
+                    self.prop = PropertiesSingle(pot=pot[0], mmap=mmap, **kwargs)
             else:
-                self.prop = PropertiesSingle(pot=pot)
+                self.prop = PropertiesSingle(pot=pot, mmap=mmap, **kwargs)
         else:
             if isinstance(params_dict, list) and isinstance(coeffs, list):
                 if len(params_dict) > 1 and len(coeffs) > 1:
-                    self.prop = PropertiesHybrid(params_dict=params_dict, coeffs=coeffs)
+                    self.prop = PropertiesHybrid(
+                        params_dict=params_dict, coeffs=coeffs, **kwargs
+                    )
                 else:
                     self.prop = PropertiesSingle(
-                        params_dict=params_dict[0], coeffs=coeffs[0]
+                        params_dict=params_dict[0], coeffs=coeffs[0], **kwargs
                     )
             else:
-                self.prop = PropertiesSingle(params_dict=params_dict, coeffs=coeffs)
+                self.prop = PropertiesSingle(
+                    params_dict=params_dict, coeffs=coeffs, **kwargs
+                )
+
+        self.__cache = None
+        if cache_size > 0:
+            self.__cache = PropertiesCache(
+                maxsize=cache_size, potential_id=self.prop.potential_id
+            )
 
-    def eval(self, st_dict):
-        e, f, s = self.prop.eval(st_dict)
-        self.__e, self.__f, self.__s = [e], [f], [s]
+    def eval(self, st_dict, mode="all", per_atom=False):
+        """
+        Parameters
+        ----------
+        mode: "all": energy, forces, and stress tensors are computed.
+              "energy_force": energy and forces are computed.
+              "energy": only energy is computed.
+              Quantities that are not computed are returned as None.
+              "energy" is efficient for energy-only tasks
+              such as EOS and structure screening.
+        per_atom: If True, per-atom energies (n_atom) and per-atom virials
+                  (6, n_atom) are returned in addition to energy, force,
+                  and stress. Per-atom virials are computed if mode = "all".
+                  They are also available from energies_atom and
+                  virials_atom.
+        """
+        res = self.__eval_cached(st_dict, mode=mode, per_atom=per_atom)
+        self.__e, self.__f, self.__s = [res[0]], [res[1]], [res[2]]
+        self.__e_atom, self.__v_atom = None, None
+        if per_atom:
+            self.__e_atom, self.__v_atom = [res[3]], [res[4]]
         self.__st_dicts = [st_dict]
-        return e, f, s
+        return res
 
-    def eval_multiple(self, st_dicts):
-        self.__e, self.__f, self.__s = self.prop.eval_multiple(st_dicts)
+    def eval_multiple(self, st_dicts, mode="all", per_atom=False):
+        """
+        Parameters
+        ----------
+        mode: "all", "energy_force", or "energy". See eval.
+        per_atom: Return per-atom energies and virials. See eval.
+        """
+        res = self.__eval_multiple_cached(st_dicts, mode=mode, per_atom=per_atom)
+        self.__e, self.__f, self.__s = res[:3]
+        self.__e_atom, self.__v_atom = res[3:] if per_atom else (None, None)
         self.__st_dicts = st_dicts
-        return self.__e, self.__f, self.__s
+        return res
+
+    def eval_stream(
+        self,
+        st_dicts,
+        chunk_size=1000,
+        mode="all",
+        per_atom=False,
+        writer=None,
+        verbose=False,
+    ):
+        """Evaluate structures from an iterable in chunks.
+
+        Structures in each chunk are evaluated in parallel, so that memory
+        is bounded by chunk_size.
+        Results are not stored in energies, forces, and stresses.
+
+        If writer is given, all structures are evaluated in this call
+        and results of each chunk are appended to writer.
+        Otherwise, a generator yielding results of chunks is returned,
+        and structures are evaluated only while the generator is iterated.
+
+        Parameters
+        ----------
+        st_dicts: Iterable of structures, such as a generator.
+        chunk_size: Number of structures evaluated at once.
+        mode: "all", "energy_force", or "energy". See eval.
+        per_atom: Return per-atom energies and virials. See eval.
+        writer: PropertiesStreamWriter to which results are appended.
+
+        Return
+        ------
+        writer if writer is given. Otherwise, generator of results of
+        eval_multiple for each chunk.
+        """
+        chunks = self.__eval_chunks(st_dicts, chunk_size, mode, per_atom)
+        if writer is None:
+            return (res for res, _ in chunks)
+
+        for res, chunk in chunks:
+            writer.write(res, chunk)
+            if verbose:
+                print("Number of structures:", writer.n_structures, flush=True)
+        return writer
+
+    def __eval_chunks(self, st_dicts, chunk_size, mode, per_atom):
+        """Yield results and structures of chunks."""
+        for chunk in iterate_chunks(st_dicts, chunk_size=chunk_size):
+            res = self.__eval_multiple_cached(chunk, mode=mode, per_atom=per_atom)
+            yield res, chunk
+
+    def eval_multiple_arrays(
+        self,
+        axis_array,
+        positions_c,
+        types,
+        offsets,
+        energies=None,
+        forces=None,
+        stresses=None,
+        mode="all",
+        per_atom=False,
+        energies_atom=None,
+        virials_atom=None,
+    ):
+        """
+        Parameters
+        ----------
+        axis_array: (n_str, 3, 3)
+        positions_c: Concatenated cartesian positions, (3, n_atom_total)
+        types: Concatenated types, (n_atom_total)
+               Types must follow the element order of the potential.
+        offsets: (n_str + 1)
+                 Atoms of structure i are in [offsets[i], offsets[i+1]).
+        energies: Preallocated output array (optional), (n_str).
+        forces: Preallocated output array (optional), (3, n_atom_total).
+        stresses: Preallocated output array (optional), (n_str, 6).
+        mode: "all", "energy_force", or "energy". See eval.
+        per_atom: Return per-atom energies and virials. See eval.
+        energies_atom: Preallocated output array (optional), (n_atom_total).
+        virials_atom: Preallocated output array (optional), (6, n_atom_total).
+
+        Output arrays must be C-contiguous float64 arrays, to which results
+        are written in place. The result cache is not used for array inputs.
+
+        Return
+        ------
+        Results of structures in the same form as eval_multiple.
+        Forces, per-atom energies, and per-atom virials of structures
+        are views of the concatenated output arrays.
+        They are also available from energies, forces, and stresses.
+        """
+        res = self.prop.eval_multiple_arrays(
+            axis_array,
+            positions_c,
+            types,
+            offsets,
+            energies=energies,
+            forces=forces,
+            stresses=stresses,
+            mode=mode,
+            per_atom=per_atom,
+            energies_atom=energies_atom,
+            virials_atom=virials_atom,
+        )
+        res = split_results(res, offsets)
+        self.__e, self.__f, self.__s = res[:3]
+        self.__e_atom, self.__v_atom = res[3:] if per_atom else (None, None)
+        self.__st_dicts = None
+        self.__volumes = np.abs(np.linalg.det(axis_array))
+        return res
 
     def eval_phonopy(self, str_ph):
         from pypolymlp.utils.phonopy_utils import phonopy_cell_to_st_dict
 
         st_dict = phonopy_cell_to_st_dict(str_ph)
-        e, f, s = self.prop.eval(st_dict)
+        e, f, s = self.__eval_cached(st_dict)
         self.__e, self.__f, self.__s = [e], [f], [s]
+        self.__e_atom, self.__v_atom = None, None
         self.__st_dicts = [st_dict]
         return e, f, s
 
@@ -181,10 +764,63 @@ class Properties:
         from pypolymlp.utils.phonopy_utils import phonopy_cell_to_st_dict
 
         st_dicts = [phonopy_cell_to_st_dict(str_ph) for str_ph in str_ph_list]
-        self.__e, self.__f, self.__s = self.prop.eval_multiple(st_dicts)
+        self.__e, self.__f, self.__s = self.__eval_multiple_cached(st_dicts)
+        self.__e_atom, self.__v_atom = None, None
         self.__st_dicts = st_dicts
         return self.__e, self.__f, self.__s
 
+    def __eval_cached(self, st_dict, mode="all", per_atom=False):
+
+        if self.__cache is None:
+            return self.prop.eval(st_dict, mode=mode, per_atom=per_atom)
+
+        check_eval_mode(mode)
+        key = self.__cache.key(st_dict)
+        res = self.__cache.get(key, mode=mode, per_atom=per_atom)
+        if res is None:
+            res = self.prop.eval(st_dict, mode=mode, per_atom=per_atom)
+            self.__cache.put(key, res, mode=mode, per_atom=per_atom)
+        return res
+
+    def __eval_multiple_cached(self, st_dicts, mode="all", per_atom=False):
+
+        if self.__cache is None:
+            return self.prop.eval_multiple(st_dicts, mode=mode, per_atom=per_atom)
+
+        check_eval_mode(mode)
+        keys = [self.__cache.key(st) for st in st_dicts]
+        results = [self.__cache.get(k, mode=mode, per_atom=per_atom) for k in keys]
+        ids = [i for i, r in enumerate(results) if r is None]
+        if len(ids) > 0:
+            if isinstance(st_dicts, StructureBatch):
+                st_missing = st_dicts[ids]
+            else:
+                st_missing = [st_dicts[i] for i in ids]
+            res = self.prop.eval_multiple(st_missing, mode=mode, per_atom=per_atom)
+            for j, i in enumerate(ids):
+                results[i] = tuple(None if v is None else v[j] for v in res)
+                self.__cache.put(keys[i], results[i], mode=mode, per_atom=per_atom)
+
+        res = [list(v) for v in zip(*results)]
+        if len(res) == 0:
+            return self.prop.eval_multiple(st_dicts, mode=mode, per_atom=per_atom)
+        res[0] = np.array(res[0])
+        if mode == "energy":
+            res[1] = None
+        if mode == "all":
+            res[2] = np.array(res[2])
+        else:
+            res[2] = None
+            if per_atom:
+                res[4] = None
+        return tuple(res)
+
+    def clear_cache(self):
+        """Remove results in the cache and reset hit/miss counters."""
+        if self.__cache is not None:
+            self.__cache.clear()
+        return self
+
     def save(self, verbose=False):
         np.save("polymlp_energies.npy", self.energies)
         np.save("polymlp_forces.npy", self.forces)
@@ -216,6 +852,17 @@ class Properties:
     def params_dict(self):
         return self.prop.params_dict
 
+    @property
+    def n_neighbor_builds(self):
+        return self.prop.n_neighbor_builds
+
+    @property
+    def cache_info(self):
+        """Hits, misses, size, and maxsize of the result cache."""
+        if self.__cache is None:
+            return None
+        return self.__cache.info
+
     @property
     def energies(self):
         return self.__e
@@ -228,8 +875,27 @@ class Properties:
     def stresses(self):
         return self.__s
 
+    @property
+    def energies_atom(self):
+        """Per-atom energies (n_str, n_atom), if evaluated with per_atom."""
+        return self.__e_atom
+
+    @property
+    def virials_atom(self):
+        """Per-atom virials (n_str, 6, n_atom), if evaluated with per_atom."""
+        return self.__v_atom
+
     @property
     def stresses_gpa(self):
+        """Stress tensors in GPa (n_str, 6).
+
+        None is returned if stress tensors were not computed,
+        i.e., mode = "energy" or "energy_force".
+        """
+        if self.__s is None or any(s is None for s in self.__s):
+            return None
+        if self.__st_dicts is None:
+            return convert_stresses_in_gpa(self.__s, volumes=self.__volumes)
         return convert_stresses_in_gpa(self.__s, self.__st_dicts)
 
 
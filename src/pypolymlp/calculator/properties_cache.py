@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+
+# Evaluation modes in order of increasing content.
+# A result computed with a mode can be reused for modes on its left.
+_MODE_RANK = {"energy": 0, "energy_force": 1, "all": 2}
+
+
+def potential_hash(params_dicts, coeffs):
+    """Hash of potential parameters and coefficients.
+
+    params_dicts: List of parameters of potential components.
+    coeffs: List of coefficients of potential components.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for params, c in zip(params_dicts, coeffs):
+        h.update(repr(params["model"]).encode())
+        h.update(repr(list(params["elements"])).encode())
+        h.update(np.ascontiguousarray(c, dtype=np.float64).tobytes())
+    return h.digest()
+
+
+class PropertiesCache:
+    """Size-bounded LRU cache of energies, forces, and stress tensors.
+
+    Results are stored with keys computed from a hash of axis,
+    positions, elements of a structure, and the potential identity.
+    A result computed with mode = "all" is reused for requests
+    with mode = "energy_force" and "energy", and a result computed
+    with per_atom = True is reused for requests without per-atom values.
+    """
+
+    def __init__(self, maxsize=128, potential_id=b""):
+        """
+        Parameters
+        ----------
+        maxsize: Maximum number of stored structures.
+        potential_id: Bytes identifying the potential, used in keys.
+        """
+        if maxsize < 1:
+            raise ValueError("maxsize must be a positive integer.")
+
+        self.__maxsize = maxsize
+        self.__potential_id = potential_id
+        self.__data = OrderedDict()
+        self.__hits = 0
+        self.__misses = 0
+
+    def key(self, st_dict):
+        """Compute the key of a structure."""
+        h = hashlib.blake2b(self.__potential_id, digest_size=16)
+        h.update(np.ascontiguousarray(st_dict["axis"], dtype=np.float64).tobytes())
+        h.update(np.ascontiguousarray(st_dict["positions"], dtype=np.float64).tobytes())
+        h.update("\0".join(st_dict["elements"]).encode())
+        return h.digest()
+
+    def get(self, key, mode="all", per_atom=False):
+        """Return a stored result or None.
+
+        Return
+        ------
+        (energy, force, stress) or
+        (energy, force, stress, energy_atom, virial_atom) if per_atom = True.
+        Quantities that are not computed with mode are set to None.
+        """
+        entry = self.__data.get(key)
+        if entry is None or not self.__covers(entry, mode, per_atom):
+            self.__misses += 1
+            return None
+
+        self.__data.move_to_end(key)
+        self.__hits += 1
+        res = [_copy(v) for v in entry[2]]
+        if mode == "energy":
+            res[1] = None
+        if mode != "all":
+            res[2] = None
+            if entry[1]:
+                res[4] = None
+        if not per_atom:
+            return tuple(res[:3])
+        return tuple(res)
+
+    def put(self, key, res, mode="all", per_atom=False):
+        """Store a result of a structure computed with mode and per_atom."""
+        entry = self.__data.get(key)
+        if entry is not None and self.__covers(entry, mode, per_atom):
+            self.__data.move_to_end(key)
+            return self
+
+        self.__data[key] = (mode, per_atom, tuple(_copy(v) for v in res))
+        self.__data.move_to_end(key)
+        if len(self.__data) > self.__maxsize:
+            self.__data.popitem(last=False)
+        return self
+
+    def clear(self):
+        """Remove stored results and reset counters."""
+        self.__data.clear()
+        self.__hits = 0
+        self.__misses = 0
+        return self
+
+    def __covers(self, entry, mode, per_atom):
+        mode_stored, per_atom_stored, _ = entry
+        if _MODE_RANK[mode_stored] < _MODE_RANK[mode]:
+            return False
+        return per_atom_stored or not per_atom
+
+    @property
+    def hits(self):
+        return self.__hits
+
+    @property
+    def misses(self):
+        return self.__misses
+
+    @property
+    def info(self):
+        return {
+            "hits": self.__hits,
+            "misses": self.__misses,
+            "size": len(self.__data),
+            "maxsize": self.__maxsize,
+        }
+
+
+def _copy(v):
+    if isinstance(v, np.ndarray):
+        return v.copy()
+    return v
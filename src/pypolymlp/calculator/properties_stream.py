@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+import itertools
+import struct
+
+import numpy as np
+
+
+def iterate_chunks(iterable, chunk_size=1000):
+    """Yield lists of at most chunk_size elements from iterable."""
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be a positive integer.")
+
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if len(chunk) == 0:
+            return
+        yield chunk
+
+
+class NpyAppendWriter:
+    """Append-only writer of a .npy file growing along the first axis.
+
+    The header has a fixed length and is rewritten when the file is closed,
+    so that data are written without keeping them in memory.
+    """
+
+    header_size = 128
+
+    def __init__(self, filename, shape_tail=(), dtype="<f8"):
+        """
+        Parameters
+        ----------
+        shape_tail: Shape of array except for the first axis.
+        """
+        self.__filename = filename
+        self.__dtype = np.dtype(dtype)
+        self.__shape_tail = tuple(shape_tail)
+        self.__n_rows = 0
+
+        self.__f = open(filename, "wb")
+        self.__write_header()
+
+    def __write_header(self):
+
+        header = {
+            "descr": np.lib.format.dtype_to_descr(self.__dtype),
+            "fortran_order": False,
+            "shape": (self.__n_rows,) + self.__shape_tail,
+        }
+        header = repr(header).encode("latin1")
+        n_pad = self.header_size - 10 - len(header) - 1
+        if n_pad < 0:
+            raise ValueError("Header of " + self.__filename + " is too long.")
+
+        self.__f.seek(0)
+        self.__f.write(np.lib.format.MAGIC_PREFIX + bytes([1, 0]))
+        self.__f.write(struct.pack("<H", self.header_size - 10))
+        self.__f.write(header + b" " * n_pad + b"\n")
+        self.__f.seek(0, 2)
+
+    def append(self, array):
+        """Append array with shape (n, *shape_tail)."""
+        array = np.ascontiguousarray(array, dtype=self.__dtype)
+        if array.shape[1:] != self.__shape_tail:
+            raise ValueError("Inconsistent shape of array.")
+
+        self.__f.write(array.tobytes())
+        self.__n_rows += array.shape[0]
+        return self
+
+    def close(self):
+        if not self.__f.closed:
+            self.__write_header()
+            self.__f.close()
+        return self
+
+    @property
+    def n_rows(self):
+        return self.__n_rows
+
+
+class PropertiesStreamWriter:
+    """Append-only sink of results from Properties.eval_stream.
+
+    Files
+    -----
+    polymlp_energies.npy: (n_str), unit: eV/supercell
+    polymlp_n_atoms.npy: (n_str), number of atoms in structures
+    polymlp_forces.npy: (n_atom_total, 3), unit: eV/angstrom
+    polymlp_stress_tensors.npy: (n_str, 6), unit: GPa
+    polymlp_energies_atom.npy: (n_atom_total), if per_atom = True.
+    polymlp_virials_atom.npy: (n_atom_total, 6), if per_atom = True.
+
+    Forces of structure i are in rows [offsets[i], offsets[i+1]),
+    where offsets is the cumulative sum of polymlp_n_atoms.npy.
+    Files are created with the first chunk. Quantities that are
+    not computed are not written.
+    """
+
+    def __init__(self, prefix="polymlp"):
+
+        self.__prefix = prefix
+        self.__writers = None
+
+    def __open(self, res):
+
+        attrs = [
+            ("energies", (), True),
+            ("n_atoms", (), True),
+            ("forces", (3,), res[1] is not None),
+            ("stress_tensors", (6,), res[2] is not None),
+        ]
+        if len(res) > 3:
+            attrs.append(("energies_atom", (), True))
+            attrs.append(("virials_atom", (6,), res[4] is not None))
+
+        self.__writers = dict()
+        for name, shape_tail, active in attrs:
+            if active:
+                filename = self.__prefix + "_" + name + ".npy"
+                dtype = "<i8" if name == "n_atoms" else "<f8"
+                self.__writers[name] = NpyAppendWriter(
+                    filename, shape_tail=shape_tail, dtype=dtype
+                )
+
+    def write(self, res, st_dicts):
+        """Append results of structures.
+
+        Parameters
+        ----------
+        res: Results of Properties.eval_multiple for st_dicts.
+        """
+        from pypolymlp.calculator.properties import convert_stresses_in_gpa
+
+        if self.__writers is None:
+            self.__open(res)
+
+        w = self.__writers
+        w["energies"].append(res[0])
+        w["n_atoms"].append([len(st["types"]) for st in st_dicts])
+        if "forces" in w:
+            w["forces"].append(np.concatenate(res[1], axis=1).T)
+        if "stress_tensors" in w:
+            volumes = np.abs(np.linalg.det([st["axis"] for st in st_dicts]))
+            stresses = convert_stresses_in_gpa(res[2], volumes=volumes)
+            w["stress_tensors"].append(stresses)
+        if "energies_atom" in w:
+            w["energies_atom"].append(np.concatenate(res[3]))
+        if "virials_atom" in w:
+            w["virials_atom"].append(np.concatenate(res[4], axis=1).T)
+        return self
+
+    def close(self):
+        if self.__writers is not None:
+            for writer in self.__writers.values():
+                writer.close()
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def n_structures(self):
+        if self.__writers is None:
+            return 0
+        return self.__writers["energies"].n_rows
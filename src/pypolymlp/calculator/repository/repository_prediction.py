@@ -93,7 +93,9 @@ class PolymlpRepositoryPrediction:
         for pot_id, pot_info in self.__pot_dict.items():
             print("Polymlp:", pot_id)
             st_dicts = [target["structure"] for _, target in self.__icsd_list.items()]
-            energies, _, _ = pot_info["properties_obj"].eval_multiple(st_dicts)
+            energies, _, _ = pot_info["properties_obj"].eval_multiple(
+                st_dicts, mode="energy"
+            )
             energies = [
                 e / sum(v["structure"]["n_atoms"])
                 for e, v in zip(energies, self.__icsd_list.values())
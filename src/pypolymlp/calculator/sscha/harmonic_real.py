@@ -195,7 +195,7 @@ class HarmonicReal:
 
         ids = np.array(list(ids))
         self.__disps = self.__disps[ids]
-        self.__supercells = [self.__supercells[i] for i in ids]
+        self.__supercells = self.__supercells[ids]
         self.__forces = self.__forces[ids]
         self.__energies_full = self.__energies_full[ids]
         return self
@@ -102,7 +102,9 @@ class MinimizeSym:
     def fun_fix_cell(self, x, args=None):
 
         self.to_st_dict_fix_cell(x)
-        self.__energy, self.__force, _ = self.prop.eval(self.st_dict)
+        self.__energy, self.__force, _ = self.prop.eval(
+            self.st_dict, mode="energy_force"
+        )
 
         if self.__energy < -1e3 * self.__n_atom:
             print("Energy =", self.__energy)
@@ -0,0 +1,282 @@
+#!/usr/bin/env python
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from contextlib import contextmanager
+
+import numpy as np
+
+from pypolymlp.core.interface_vasp import read_vasprun
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+STORE_VERSION = 1
+CHUNK_KEYS = (
+    "energy",
+    "stress",
+    "axis",
+    "volume",
+    "atom_offsets",
+    "positions",
+    "force",
+    "types",
+    "elements",
+    "species_offsets",
+    "n_atoms",
+)
+
+
+def file_fingerprint(filename, content_hash=False):
+    """Fingerprint of a source file.
+
+    Parameters
+    ----------
+    content_hash: If True, hash of file content is used. Otherwise,
+                  size and modification time of file are used,
+                  which are obtained without reading the file.
+    """
+    if not content_hash:
+        stat = os.stat(filename)
+        return str(stat.st_size) + ":" + str(stat.st_mtime_ns)
+
+    sha = hashlib.sha1()
+    with open(filename, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def pack_records(records):
+    """Concatenate properties and structures of files into arrays.
+
+    Parameters
+    ----------
+    records: List of (property_dict, structure_dict) from read_vasprun.
+    """
+    properties = [p for p, _ in records]
+    structures = [st for _, st in records]
+    n_atoms_total = [len(st["types"]) for st in structures]
+    n_species = [len(st["n_atoms"]) for st in structures]
+    return {
+        "energy": np.array([p["energy"] for p in properties], dtype=float),
+        "stress": np.array([p["stress"] for p in properties], dtype=float),
+        "axis": np.array([st["axis"] for st in structures], dtype=float),
+        "volume": np.array([st["volume"] for st in structures], dtype=float),
+        "atom_offsets": np.concatenate([[0], np.cumsum(n_atoms_total)]),
+        "positions": np.concatenate([st["positions"].T for st in structures]),
+        "force": np.concatenate([p["force"].T for p in properties]),
+        "types": np.concatenate([st["types"] for st in structures]).astype(int),
+        "elements": np.concatenate([st["elements"] for st in structures]),
+        "species_offsets": np.concatenate([[0], np.cumsum(n_species)]),
+        "n_atoms": np.concatenate([st["n_atoms"] for st in structures]).astype(int),
+    }
+
+
+def unpack_record(arrays, i):
+    """Return (property_dict, structure_dict) of i-th file in arrays."""
+    begin, end = arrays["atom_offsets"][i : i + 2]
+    sbegin, send = arrays["species_offsets"][i : i + 2]
+    property_dict = {
+        "energy": float(arrays["energy"][i]),
+        "force": np.array(arrays["force"][begin:end].T),
+        "stress": np.array(arrays["stress"][i]),
+    }
+    structure_dict = {
+        "axis": np.array(arrays["axis"][i]),
+        "positions": np.array(arrays["positions"][begin:end].T),
+        "volume": float(arrays["volume"][i]),
+        "n_atoms": arrays["n_atoms"][sbegin:send].tolist(),
+        "elements": arrays["elements"][begin:end].tolist(),
+        "types": arrays["types"][begin:end].tolist(),
+    }
+    return property_dict, structure_dict
+
+
+class DatasetStore:
+    """Persistent store of parsed vasprun.xml files in a directory.
+
+    Energies, forces, stress tensors, and structures of files are stored
+    as concatenated arrays with offset arrays in chunks of .npy files.
+    meta.json is a manifest of fingerprints of source files and their
+    locations in chunks. Only new or modified files are parsed, and
+    parsed files are added to the store as a new chunk.
+
+    Stores on the same directory can be used by multiple processes.
+    Chunks and meta.json are written under an exclusive lock of
+    meta.lock, and meta.json on disk is merged with new files before
+    it is replaced. Chunks are read under a shared lock.
+    Locking is not available on platforms without fcntl.
+    """
+
+    def __init__(self, store_dir="polymlp_datasets", content_hash=False, verbose=True):
+        """
+        Parameters
+        ----------
+        store_dir: Directory of store.
+        content_hash: Use hashes of file contents as fingerprints instead of
+                      sizes and modification times of files.
+        """
+        self.__store_dir = store_dir
+        self.__content_hash = content_hash
+        self.__verbose = verbose
+
+        self.__files = dict()
+        self.__chunks = dict()
+        self.__load_meta()
+
+    def __path(self, name):
+        return os.path.join(self.__store_dir, name)
+
+    @contextmanager
+    def __lock(self, shared=False):
+
+        os.makedirs(self.__store_dir, exist_ok=True)
+        with open(self.__path("meta.lock"), "a") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            # Lock is released when the file is closed.
+            yield
+
+    def __read_meta(self):
+        """Return entries of files in meta.json on disk."""
+        try:
+            with open(self.__path("meta.json")) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return dict()
+
+        if meta.get("version") != STORE_VERSION:
+            return dict()
+        if meta.get("content_hash") != self.__content_hash:
+            return dict()
+        return meta["files"]
+
+    def __load_meta(self):
+
+        self.__files = self.__read_meta()
+        return self
+
+    def __load_chunk(self, name):
+
+        if name not in self.__chunks:
+            path = self.__path(name)
+            self.__chunks[name] = {
+                key: np.load(os.path.join(path, key + ".npy")) for key in CHUNK_KEYS
+            }
+        return self.__chunks[name]
+
+    def __save(self, records, filenames, fingerprints):
+
+        with self.__lock():
+            name = "chunk-" + uuid.uuid4().hex
+            os.makedirs(self.__path(name))
+            for key, array in pack_records(records).items():
+                np.save(os.path.join(self.__path(name), key + ".npy"), array)
+
+            # Files added by other stores after meta.json was loaded are kept.
+            self.__load_meta()
+            for i, (filename, fp) in enumerate(zip(filenames, fingerprints)):
+                self.__files[filename] = {"fingerprint": fp, "chunk": name, "index": i}
+
+            meta = {
+                "version": STORE_VERSION,
+                "content_hash": self.__content_hash,
+                "files": self.__files,
+            }
+            tmp_file = self.__path("meta.json.tmp-" + uuid.uuid4().hex)
+            with open(tmp_file, "w") as f:
+                json.dump(meta, f)
+            os.replace(tmp_file, self.__path("meta.json"))
+            self.__remove_unused_chunks()
+        return self
+
+    def __remove_unused_chunks(self):
+        """Remove chunks not found in meta.json.
+
+        This must be called under the exclusive lock, where all chunks
+        except for those of interrupted processes are found in meta.json.
+        """
+        used = set(entry["chunk"] for entry in self.__files.values())
+        for name in os.listdir(self.__store_dir):
+            if name.startswith("chunk-") and name not in used:
+                shutil.rmtree(self.__path(name), ignore_errors=True)
+                self.__chunks.pop(name, None)
+        return self
+
+    def read_vaspruns(self, vaspruns, n_jobs=1, streaming=None):
+        """Return properties and structures of vasprun.xml files.
+
+        Files not found in the store or modified after they were stored
+        are parsed and added to the store.
+
+        Parameters
+        ----------
+        n_jobs: Number of processes parsing files in parallel.
+        streaming: Use VasprunStream. See read_vasprun.
+
+        Return
+        ------
+        records: List of (property_dict, structure_dict) in the order
+                 of vaspruns, the same as those returned from read_vasprun.
+        """
+        filenames = [os.path.abspath(f) for f in vaspruns]
+        with self.__lock(shared=True):
+            self.__load_meta()
+        fingerprints = [
+            file_fingerprint(f, content_hash=self.__content_hash) for f in filenames
+        ]
+        new_ids = dict()
+        for i, (f, fp) in enumerate(zip(filenames, fingerprints)):
+            if self.__files.get(f, dict()).get("fingerprint") != fp:
+                # a file given more than once is parsed once.
+                new_ids[f] = i
+        new_ids = list(new_ids.values())
+
+        if len(new_ids) > 0:
+            if self.__verbose:
+                print("Number of files parsed and stored:", len(new_ids), flush=True)
+            if n_jobs == 1:
+                new_records = [
+                    read_vasprun(filenames[i], streaming=streaming) for i in new_ids
+                ]
+            else:
+                from joblib import Parallel, delayed
+
+                new_records = Parallel(n_jobs=n_jobs)(
+                    delayed(read_vasprun)(filenames[i], streaming=streaming)
+                    for i in new_ids
+                )
+            self.__save(
+                new_records,
+                [filenames[i] for i in new_ids],
+                [fingerprints[i] for i in new_ids],
+            )
+
+        records = []
+        with self.__lock(shared=True):
+            self.__load_meta()
+            for f in filenames:
+                entry = self.__files[f]
+                arrays = self.__load_chunk(entry["chunk"])
+                records.append(unpack_record(arrays, entry["index"]))
+        return records
+
+    def clear(self):
+        """Remove all files from store."""
+        self.__files = dict()
+        self.__chunks = dict()
+        shutil.rmtree(self.__store_dir, ignore_errors=True)
+        return self
+
+    @property
+    def store_dir(self):
+        return self.__store_dir
+
+    @property
+    def n_files(self):
+        return len(self.__files)
@@ -3,7 +3,7 @@ from collections import defaultdict
 
 import numpy as np
 
-from pypolymlp.core.utils import permute_atoms
+from pypolymlp.core.structure import StructureBatch
 
 
 def convert_disps_to_positions(disps, axis, positions):
@@ -14,6 +14,26 @@ def convert_disps_to_positions(disps, axis, positions):
     return positions_all
 
 
+def permute_reference_atoms(st_dict, element_order):
+    """Sort atoms of st_dict in element_order.
+
+    Return
+    ------
+    st_dict: Structure with sorted atoms. Positions are not included.
+    ids: Indices of atoms in st_dict in the sorted order.
+    """
+    elements = np.array(st_dict["elements"])
+    ids = [np.where(elements == ele)[0] for ele in element_order]
+    st_permute = {
+        "axis": st_dict["axis"],
+        "n_atoms": [len(i) for i in ids],
+        "elements": [ele for ele, i in zip(element_order, ids) for _ in i],
+        "types": [t for t, i in enumerate(ids) for _ in i],
+        "volume": st_dict["volume"],
+    }
+    return st_permute, np.concatenate(ids).astype(int)
+
+
 def set_dft_dict(forces, energies, positions_all, st_dict, element_order=None):
     """
     Parameters
@@ -25,58 +45,49 @@ def set_dft_dict(forces, energies, positions_all, st_dict, element_order=None):
 
     Return
     ------
-    dft_dict: DFT training or test dataset in pypolymlp format
+    dft_dict: DFT training or test dataset in pypolymlp format.
+              Structures are given as StructureBatch.
     """
+    if element_order is not None:
+        st_dict, ids = permute_reference_atoms(st_dict, element_order)
+        positions_all = np.asarray(positions_all)[:, :, ids]
+        forces = np.asarray(forces)[:, :, ids]
+
     dft_dict = defaultdict(list)
     dft_dict["energy"] = energies
     dft_dict["stress"] = np.zeros(forces.shape[0] * 6)
-    for positions_iter, forces_iter in zip(positions_all, forces):
-        st = dict()
-        st["axis"] = st_dict["axis"]
-        st["positions"] = positions_iter
-        st["n_atoms"] = st_dict["n_atoms"]
-        st["elements"] = st_dict["elements"]
-        st["types"] = st_dict["types"]
-        st["volume"] = st_dict["volume"]
-
-        if element_order is not None:
-            st, forces_iter = permute_atoms(st, forces_iter, element_order)
-
-        dft_dict["force"].extend(forces_iter.T.reshape(-1))
-        dft_dict["structures"].append(st)
-    dft_dict["force"] = np.array(dft_dict["force"])
+    dft_dict["force"] = np.asarray(forces).transpose((0, 2, 1)).reshape(-1)
+    dft_dict["structures"] = StructureBatch.from_positions(st_dict, positions_all)
 
     if element_order is not None:
         dft_dict["elements"] = element_order
     else:
-        elements_rep = dft_dict["structures"][0]["elements"]
+        elements_rep = list(st_dict["elements"])
         dft_dict["elements"] = sorted(set(elements_rep), key=elements_rep.index)
 
-    dft_dict["total_n_atoms"] = np.array(
-        [sum(st["n_atoms"]) for st in dft_dict["structures"]]
-    )
     n_data = len(dft_dict["structures"])
+    dft_dict["total_n_atoms"] = np.full(n_data, sum(st_dict["n_atoms"]), dtype=int)
     dft_dict["filenames"] = ["disp-" + str(i + 1).zfill(5) for i in range(n_data)]
     return dft_dict
 
 
 def get_structures_from_multiple_positions(st_dict, positions_all):
-    """positions_all: (n_str, 3, n_atom)"""
-    st_dicts = []
-    for positions_iter in positions_all:
-        st = dict()
-        st["axis"] = st_dict["axis"]
-        st["positions"] = positions_iter
-        st["n_atoms"] = st_dict["n_atoms"]
-        st["elements"] = st_dict["elements"]
-        st["types"] = st_dict["types"]
-        st["volume"] = st_dict["volume"]
-        st_dicts.append(st)
-    return st_dicts
+    """positions_all: (n_str, 3, n_atom)
+
+    Return
+    ------
+    st_dicts: StructureBatch, which behaves as a list of structures.
+    """
+    return StructureBatch.from_positions(st_dict, positions_all)
 
 
 def get_structures_from_displacements(disps, st_dict):
-    """disps: (n_str, 3, n_atoms)"""
+    """disps: (n_str, 3, n_atoms)
+
+    Return
+    ------
+    st_dicts: StructureBatch, which behaves as a list of structures.
+    """
     positions_all = convert_disps_to_positions(
         disps, st_dict["axis"], st_dict["positions"]
     )
@@ -62,7 +62,7 @@ def parse_structures_from_phono3py_yaml(phono3py_yaml, select_ids=None):
     st_dict, positions_all = ph3.get_structure_dataset()
     st_dicts = get_structures_from_multiple_positions(st_dict, positions_all)
     if select_ids is not None:
-        st_dicts = [st_dicts[i] for i in select_ids]
+        st_dicts = st_dicts[select_ids]
     return st_dicts
 
 
@@ -1,22 +1,117 @@
 #!/usr/bin/env python
+import os
 import re
 import xml.etree.ElementTree as ET
 from collections import defaultdict
 
 import numpy as np
 
+from pypolymlp.core.io_compressed import open_compressed, strip_compression_suffix
 from pypolymlp.core.utils import permute_atoms
 
+# Elements read by VasprunStream, {name: tag}.
+VASPRUN_STREAM_ELEMENTS = {
+    "energy": "energy",
+    "forces": "varray",
+    "stress": "varray",
+    "finalpos": "structure",
+    "atomtypes": "array",
+    "atoms": "array",
+}
+
+
+def load_vasprun(name, streaming=None):
+    """Return reader of vasprun.xml.
+
+    vasprun.xml compressed by gzip, xz, or zstd is decompressed while
+    it is parsed. A record written by vasprun_compress (.npz) is loaded
+    using VasprunRecord.
+
+    Parameters
+    ----------
+    streaming: Use VasprunStream, which reads only required elements.
+               If None, VasprunStream is used for files larger than 1 MB
+               (100 kB for compressed files). Small files such as those
+               from vasprun_compress are parsed faster at once.
+    """
+    if is_vasprun_record(name):
+        return VasprunRecord(name)
+
+    if streaming is None:
+        threshold = 1e6 if strip_compression_suffix(name) == name else 1e5
+        streaming = os.path.getsize(name) > threshold
+    return VasprunStream(name) if streaming else Vasprun(name)
+
+
+def read_vasprun(name, streaming=None):
+    """Return properties and structure in vasprun.xml.
+
+    Parameters
+    ----------
+    streaming: Use VasprunStream. See load_vasprun.
+    """
+    v = load_vasprun(name, streaming=streaming)
+    return v.get_properties(), v.get_structure()
+
+
+def is_vasprun_record(name):
+    return name.endswith(".npz")
+
+
+def save_vasprun_record(filename, property_dict, structure_dict):
+    """Save properties and structure in vasprun.xml into a compressed .npz file.
+
+    Parameters
+    ----------
+    property_dict, structure_dict: Return values of read_vasprun.
+    """
+    np.savez_compressed(
+        filename,
+        energy=property_dict["energy"],
+        force=property_dict["force"],
+        stress=property_dict["stress"],
+        axis=structure_dict["axis"],
+        positions=structure_dict["positions"],
+        volume=structure_dict["volume"],
+        n_atoms=structure_dict["n_atoms"],
+        elements=structure_dict["elements"],
+        types=structure_dict["types"],
+    )
+
+
+def parse_vaspruns(
+    vaspruns,
+    element_order=None,
+    n_jobs=1,
+    streaming=None,
+    dataset_store=None,
+):
+    """Parse vasprun.xml files into a dataset.
+
+    Parameters
+    ----------
+    n_jobs: Number of processes reading files in parallel.
+            -1 uses all processors.
+    streaming: Use VasprunStream. See read_vasprun.
+    dataset_store: DatasetStore object. If given, files are loaded from
+                   the store and only new or modified files are parsed.
+    """
+    if dataset_store is not None:
+        res = dataset_store.read_vaspruns(
+            vaspruns, n_jobs=n_jobs, streaming=streaming
+        )
+    elif n_jobs == 1:
+        res = [read_vasprun(vasp, streaming=streaming) for vasp in vaspruns]
+    else:
+        from joblib import Parallel, delayed
 
-def parse_vaspruns(vaspruns, element_order=None):
+        res = Parallel(n_jobs=n_jobs)(
+            delayed(read_vasprun)(vasp, streaming=streaming) for vasp in vaspruns
+        )
 
     kbar_to_eV = 1 / 1602.1766208
     dft_dict = defaultdict(list)
-    for vasp in vaspruns:
-        v = Vasprun(vasp)
-        property_dict = v.get_properties()
-        structure_dict = v.get_structure()
-
+    for property_dict, structure_dict in res:
         if element_order is not None:
             structure_dict, property_dict["force"] = permute_atoms(
                 structure_dict, property_dict["force"], element_order
@@ -60,7 +155,7 @@ def parse_vaspruns(vaspruns, element_order=None):
 
 
 def parse_structures_from_vaspruns(vaspruns):
-    return [Vasprun(f).get_structure() for f in vaspruns]
+    return [load_vasprun(f, streaming=False).get_structure() for f in vaspruns]
 
 
 def parse_structures_from_poscars(poscars):
@@ -70,7 +165,8 @@ def parse_structures_from_poscars(poscars):
 class Vasprun:
 
     def __init__(self, name):
-        self._root = ET.parse(name).getroot()
+        with open_compressed(name) as f:
+            self._root = ET.parse(f).getroot()
 
     def get_energy(self):
         e = self._root.find("calculation").find("energy")
@@ -149,6 +245,113 @@ class Vasprun:
         return rc_set
 
 
+class VasprunStream(Vasprun):
+
+    def __init__(self, name):
+        """Reader of vasprun.xml keeping only elements required for datasets.
+
+        vasprun.xml is parsed incrementally using iterparse. Only energy,
+        forces, and stress of the first calculation, atomtypes, atoms,
+        and finalpos are kept, and the other elements are discarded
+        as soon as they are parsed. Parsing stops once all of them are
+        found. The kept elements are rearranged into the format
+        of vasprun_compress, so that methods of Vasprun except for
+        get_scstep are available.
+        """
+        found = self.__iterparse(name)
+        missing = [key for key in VASPRUN_STREAM_ELEMENTS if key not in found]
+        if len(missing) > 0:
+            raise ValueError("Elements not found in " + name + ": " + str(missing))
+
+        self._root = ET.Element("modeling")
+        calc = ET.SubElement(self._root, "calculation")
+        for key in VASPRUN_STREAM_ELEMENTS:
+            calc.append(found[key])
+
+    def __iterparse(self, name):
+        """Return required elements, {name: element}."""
+        with open_compressed(name) as f:
+            return self.__iterparse_file(f)
+
+    def __iterparse_file(self, f):
+
+        found = dict()
+        depth, calc_depth = 0, None
+        key, key_depth = None, None
+        for event, elem in ET.iterparse(f, events=("start", "end")):
+            if event == "start":
+                depth += 1
+                if key is not None:
+                    continue
+                tag = elem.tag
+                if tag == "energy":
+                    if calc_depth is not None and depth == calc_depth + 1:
+                        key, key_depth = "energy", depth
+                elif tag == "calculation":
+                    if "energy" not in found:
+                        calc_depth = depth
+                else:
+                    name_attr = elem.get("name")
+                    if VASPRUN_STREAM_ELEMENTS.get(name_attr) == tag:
+                        key, key_depth = name_attr, depth
+                if key in found:
+                    key = None
+                continue
+
+            if key is None:
+                if elem.tag == "calculation":
+                    calc_depth = None
+                elem.clear()
+            elif depth == key_depth:
+                found[key] = elem
+                key = None
+                if len(found) == len(VASPRUN_STREAM_ELEMENTS):
+                    break
+            depth -= 1
+        return found
+
+
+class VasprunRecord:
+
+    def __init__(self, name):
+        """Reader of a record written by save_vasprun_record.
+
+        Methods of Vasprun except for get_scstep and get_structure
+        with valence are available.
+        """
+        with np.load(name) as data:
+            self.__data = {key: data[key] for key in data.files}
+
+    def get_energy(self):
+        return float(self.__data["energy"])
+
+    def get_forces(self):
+        return np.array(self.__data["force"])
+
+    def get_stress(self):  # unit: kbar
+        return np.array(self.__data["stress"])
+
+    def get_properties(self):
+        property_dict = dict()
+        property_dict["energy"] = self.get_energy()
+        property_dict["force"] = self.get_forces()
+        property_dict["stress"] = self.get_stress()
+        return property_dict
+
+    def get_structure(self, key=None):
+        structure_dict = dict()
+        structure_dict["axis"] = np.array(self.__data["axis"])
+        structure_dict["positions"] = np.array(self.__data["positions"])
+        structure_dict["volume"] = float(self.__data["volume"])
+        structure_dict["n_atoms"] = self.__data["n_atoms"].tolist()
+        structure_dict["elements"] = self.__data["elements"].tolist()
+        structure_dict["types"] = self.__data["types"].tolist()
+
+        if key is not None:
+            return structure_dict[key]
+        return structure_dict
+
+
 class Poscar:
 
     def __init__(self, filename, selective_dynamics=False):
@@ -245,7 +448,7 @@ def parse_energy_volume(vaspruns):
 
     ev_data = []
     for vasprun_file in vaspruns:
-        vasp = Vasprun(vasprun_file)
+        vasp = load_vasprun(vasprun_file, streaming=False)
         energy = vasp.get_energy()
         vol = vasp.get_structure()["volume"]
         ev_data.append([vol, energy])
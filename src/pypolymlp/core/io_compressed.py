@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+"""Reading compressed files with streaming decompression."""
+import glob
+import gzip
+import lzma
+
+# Compression formats, {name: (suffix, magic bytes)}.
+COMPRESSION_FORMATS = {
+    "gzip": (".gz", b"\x1f\x8b"),
+    "xz": (".xz", b"\xfd7zXZ\x00"),
+    "zstd": (".zst", b"\x28\xb5\x2f\xfd"),
+}
+
+# Suffix of binary records of vasprun.xml written by vasprun_compress.
+RECORD_SUFFIX = ".npz"
+
+
+def compression_format(filename):
+    """Return compression format of a file detected by its magic bytes.
+
+    Return
+    ------
+    "gzip", "xz", "zstd", or None for an uncompressed file.
+    """
+    with open(filename, "rb") as f:
+        head = f.read(8)
+    for name, (_, magic) in COMPRESSION_FORMATS.items():
+        if head.startswith(magic):
+            return name
+    return None
+
+
+def open_zstd(filename):
+
+    try:
+        from compression import zstd
+
+        return zstd.open(filename, "rb")
+    except ImportError:
+        pass
+
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("zstandard is required for reading " + filename)
+
+    return zstandard.ZstdDecompressor().stream_reader(
+        open(filename, "rb"), read_across_frames=True, closefd=True
+    )
+
+
+def open_compressed(filename):
+    """Open a file in binary mode, decompressing it while it is read.
+
+    gzip, xz, and zstd files are detected by their contents and read
+    without decompressing them into memory or temporary files at once.
+    Uncompressed files are opened as they are.
+    """
+    fmt = compression_format(filename)
+    if fmt == "gzip":
+        return gzip.open(filename, "rb")
+    if fmt == "xz":
+        return lzma.open(filename, "rb")
+    if fmt == "zstd":
+        return open_zstd(filename)
+    return open(filename, "rb")
+
+
+def strip_compression_suffix(filename):
+    """Return filename without suffix of compression format."""
+    for suffix, _ in COMPRESSION_FORMATS.values():
+        if filename.endswith(suffix):
+            return filename[: -len(suffix)]
+    return filename
+
+
+def glob_compressed(pattern):
+    """Return sorted files matching pattern or its compressed files.
+
+    Files matching pattern + ".gz", ".xz", or ".zst" and binary records
+    written by vasprun_compress (pattern + ".npz") are also returned.
+    If several files are found for a file, a binary record is preferred
+    to an uncompressed file, which is preferred to compressed ones.
+    """
+    suffixes = [RECORD_SUFFIX, ""] + [s for s, _ in COMPRESSION_FORMATS.values()]
+    files = dict()
+    for suffix in suffixes:
+        for f in glob.glob(pattern + suffix):
+            key = strip_compression_suffix(f)
+            if key.endswith(RECORD_SUFFIX):
+                key = key[: -len(RECORD_SUFFIX)]
+            files.setdefault(key, f)
+    return sorted(files.values())
@@ -1,4 +1,8 @@
 #!/usr/bin/env python
+import hashlib
+import json
+import os
+import struct
 from distutils.util import strtobool
 
 import numpy as np
@@ -193,6 +197,149 @@ def load_mlp_lammps(filename="polymlp.lammps"):
     return params_dict, mlp_dict
 
 
+MLP_BINARY_MAGIC = b"POLYMLP\x01"
+
+
+def __file_hash(filename):
+
+    with open(filename, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def mlp_binary_filename(filename):
+    """Return file name of precompiled binary for a text potential file.
+
+    polymlp.lammps and polymlp.lammps.1 are converted into polymlp.bin
+    and polymlp.bin.1, respectively, so that the binaries are not matched
+    by polymlp.lammps*. For other names, ".bin" is appended.
+    """
+    dirname, basename = os.path.split(filename)
+    if basename.startswith("polymlp.lammps"):
+        basename = "polymlp.bin" + basename[len("polymlp.lammps") :]
+    else:
+        basename += ".bin"
+    return os.path.join(dirname, basename)
+
+
+def save_mlp_binary(params_dict, coeffs, scales, filename="polymlp.bin", source=None):
+    """Save potential in a precompiled binary format.
+
+    The binary contains parameters, coefficients, scales, and the mappings
+    of the potential constructed for evaluation, so that the potential
+    can be loaded without parsing and constructing the mappings.
+
+    Format
+    ------
+    magic (8 bytes), header length (uint64), header (json),
+    coeffs (float64), scales (float64), and potential data.
+
+    Parameters
+    ----------
+    source: Text file of the potential. Its hash is stored in the binary
+            so that the binary is used instead of the text file only if
+            they are consistent.
+    """
+    params = dict(params_dict)
+    params.pop("element_swap", None)
+    params.pop("neighbor_method", None)
+    header = {
+        "params_dict": params,
+        "n_coeffs": len(coeffs),
+        "source_hash": __file_hash(source) if source is not None else None,
+    }
+    header = json.dumps(header, default=lambda x: np.asarray(x).tolist()).encode()
+    header += b" " * (-len(header) % 8)
+
+    params["element_swap"] = False
+    obj = libmlpcpp.PotentialPropertiesFast(
+        params, np.asarray(coeffs) / np.asarray(scales)
+    )
+    with open(filename, "wb") as f:
+        f.write(MLP_BINARY_MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        f.write(np.ascontiguousarray(coeffs, dtype="<f8").tobytes())
+        f.write(np.ascontiguousarray(scales, dtype="<f8").tobytes())
+    obj.write_binary(filename)
+    return filename
+
+
+def convert_mlp_lammps_to_binary(filename="polymlp.lammps", filename_binary=None):
+    """Convert polymlp.lammps into polymlp.bin."""
+    if filename_binary is None:
+        filename_binary = mlp_binary_filename(filename)
+    params_dict, mlp_dict = load_mlp_lammps(filename=filename)
+    return save_mlp_binary(
+        params_dict,
+        mlp_dict["coeffs"],
+        mlp_dict["scales"],
+        filename=filename_binary,
+        source=filename,
+    )
+
+
+def is_mlp_binary(filename):
+    """Return True if file is a precompiled binary potential."""
+    with open(filename, "rb") as f:
+        return f.read(len(MLP_BINARY_MAGIC)) == MLP_BINARY_MAGIC
+
+
+def find_mlp_binary(filename):
+    """Return precompiled binary of a text potential file if available.
+
+    The binary given by mlp_binary_filename is returned if it exists
+    and was generated from the current content of filename.
+    """
+    filename_binary = mlp_binary_filename(filename)
+    if not os.path.exists(filename_binary) or not is_mlp_binary(filename_binary):
+        return None
+    header, _ = __read_mlp_binary_header(filename_binary)
+    if header["source_hash"] != __file_hash(filename):
+        return None
+    return filename_binary
+
+
+def __read_mlp_binary_header(filename):
+
+    with open(filename, "rb") as f:
+        if f.read(len(MLP_BINARY_MAGIC)) != MLP_BINARY_MAGIC:
+            raise ValueError(filename + " is not a binary potential file.")
+        (n_header,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(n_header))
+    offset = len(MLP_BINARY_MAGIC) + 8 + n_header
+    return header, offset
+
+
+def load_mlp_binary(filename="polymlp.bin", mmap=False, return_offset=False):
+    """
+    params_dict, mlp_dict = load_mlp_binary(filename='polymlp.bin')
+
+    Parameters
+    ----------
+    mmap: If True, coeffs and scales are memory-mapped arrays.
+    return_offset: If True, the position of the potential data
+                   in the file is also returned.
+    """
+    header, offset = __read_mlp_binary_header(filename)
+    params_dict = header["params_dict"]
+    n_coeffs = header["n_coeffs"]
+
+    if mmap:
+        arrays = np.memmap(
+            filename, dtype="<f8", mode="r", offset=offset, shape=(2, n_coeffs)
+        )
+    else:
+        with open(filename, "rb") as f:
+            f.seek(offset)
+            arrays = np.fromfile(f, dtype="<f8", count=2 * n_coeffs)
+        arrays = arrays.reshape((2, n_coeffs))
+    mlp_dict = {"coeffs": arrays[0], "scales": arrays[1]}
+
+    if return_offset:
+        return params_dict, mlp_dict, offset + 16 * n_coeffs
+    return params_dict, mlp_dict
+
+
 def load_mlp_lammps_flexible(file_list_or_file):
 
     if isinstance(file_list_or_file, list):
@@ -1,10 +1,10 @@
 #!/usr/bin/env python
-import glob
 import itertools
 from distutils.util import strtobool
 
 import numpy as np
 
+from pypolymlp.core.io_compressed import glob_compressed
 from pypolymlp.core.parser_infile import InputParser
 from pypolymlp.cxx.lib import libmlpcpp
 
@@ -146,6 +146,13 @@ class ParamsParser:
         reg["method"] = "ridge"
         d_alpha = [-3, 1, 5]
         reg["alpha"] = self.parser.get_sequence("reg_alpha_params", default=d_alpha)
+        reg["solver"] = self.parser.get_params("reg_solver", default="cholesky")
+        if reg["solver"] not in ("cholesky", "eigen", "cg"):
+            raise ValueError("reg_solver must be cholesky, eigen, or cg.")
+        reg["cv"] = self.parser.get_params("reg_cv", default=None)
+        if reg["cv"] not in (None, "kfold", "gcv"):
+            raise ValueError("reg_cv must be kfold or gcv.")
+        reg["n_folds"] = self.parser.get_params("reg_cv_folds", default=5, dtype=int)
         return reg
 
     def __get_single_vasprun_set(self):
@@ -154,8 +161,8 @@ class ParamsParser:
         test = self.parser.get_params("test_data", default=None)
 
         data = dict()
-        data["train"] = sorted(glob.glob(train))
-        data["test"] = sorted(glob.glob(test))
+        data["train"] = glob_compressed(train)
+        data["test"] = glob_compressed(test)
         return data
 
     def __get_multiple_vasprun_sets(self):
@@ -190,13 +197,13 @@ class ParamsParser:
         for params in train:
             set_id = params[0]
             data["train"][set_id] = dict()
-            data["train"][set_id]["vaspruns"] = sorted(glob.glob(set_id))
+            data["train"][set_id]["vaspruns"] = glob_compressed(set_id)
             data["train"][set_id]["include_force"] = strtobool(params[1])
             data["train"][set_id]["weight"] = float(params[2])
         for params in test:
             set_id = params[0]
             data["test"][set_id] = dict()
-            data["test"][set_id]["vaspruns"] = sorted(glob.glob(set_id))
+            data["test"][set_id]["vaspruns"] = glob_compressed(set_id)
             data["test"][set_id]["include_force"] = strtobool(params[1])
             data["test"][set_id]["weight"] = float(params[2])
         return data
@@ -0,0 +1,459 @@
+#!/usr/bin/env python
+"""Array-backed structures.
+
+Structure holds a single structure with the same keys as st_dict,
+i.e., axis, positions, n_atoms, elements, types, and volume, and can be
+used wherever st_dict is used. StructureBatch stores many structures in
+contiguous arrays. Atoms of structure i are in [offsets[i], offsets[i+1])
+of the concatenated positions, types, and element indices. Per-atom
+element lists are not allocated for structures in StructureBatch.
+"""
+import numpy as np
+
+STRUCTURE_KEYS = ("axis", "positions", "n_atoms", "elements", "types", "volume")
+CHUNK_SIZE = 65536
+
+
+class Structure:
+    """Structure with attributes accessible also as st["axis"]."""
+
+    __slots__ = (
+        "axis",
+        "positions",
+        "n_atoms",
+        "types",
+        "volume",
+        "__elements",
+        "__element_codes",
+        "__attrs",
+    )
+
+    def __init__(
+        self,
+        axis,
+        positions,
+        n_atoms,
+        elements=None,
+        types=None,
+        volume=None,
+        element_codes=None,
+    ):
+        """
+        Parameters
+        ----------
+        axis: (3, 3), Lattice vectors in columns.
+        positions: (3, n_atom), Fractional coordinates.
+        n_atoms: Numbers of atoms of types.
+        elements: Element names of atoms, (n_atom).
+        types: Types of atoms, (n_atom).
+        volume: Volume of cell. Computed from axis if None.
+        element_codes: (element_names, element_ids) used instead of elements.
+                       Element names of atoms are element_names[element_ids]
+                       and their list is generated only if it is requested.
+        """
+        if elements is None and element_codes is None:
+            raise ValueError("elements or element_codes is required.")
+
+        self.axis = axis
+        self.positions = positions
+        self.n_atoms = n_atoms
+        self.types = types
+        self.volume = volume
+        if volume is None:
+            self.volume = float(np.linalg.det(axis))
+        self.__elements = elements
+        self.__element_codes = element_codes
+        self.__attrs = None
+
+    @classmethod
+    def from_dict(cls, st_dict):
+        """Convert st_dict into Structure.
+
+        Keys other than STRUCTURE_KEYS, such as comment, are also kept.
+        """
+        st = cls(
+            st_dict["axis"],
+            st_dict["positions"],
+            st_dict["n_atoms"],
+            elements=st_dict["elements"],
+            types=st_dict["types"],
+            volume=st_dict.get("volume"),
+        )
+        for key, value in st_dict.items():
+            if key not in STRUCTURE_KEYS:
+                st[key] = value
+        return st
+
+    def to_dict(self):
+        """Convert Structure into st_dict."""
+        return {key: self[key] for key in self.keys()}
+
+    def copy(self):
+        """Return a shallow copy, as dict.copy does."""
+        return Structure.from_dict(self)
+
+    @property
+    def elements(self):
+        if self.__elements is None:
+            names, ids = self.__element_codes
+            self.__elements = np.asarray(names)[ids].tolist()
+        return self.__elements
+
+    @elements.setter
+    def elements(self, elements):
+        self.__elements = elements
+        self.__element_codes = None
+
+    @property
+    def positions_cartesian(self):
+        return self.axis @ self.positions
+
+    def keys(self):
+        if self.__attrs is None:
+            return list(STRUCTURE_KEYS)
+        return list(STRUCTURE_KEYS) + list(self.__attrs.keys())
+
+    def values(self):
+        return [self[key] for key in self.keys()]
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
+
+    def __getitem__(self, key):
+        if key in STRUCTURE_KEYS:
+            return getattr(self, key)
+        if self.__attrs is None or key not in self.__attrs:
+            raise KeyError(key)
+        return self.__attrs[key]
+
+    def __setitem__(self, key, value):
+        if key in STRUCTURE_KEYS:
+            setattr(self, key, value)
+        else:
+            if self.__attrs is None:
+                self.__attrs = dict()
+            self.__attrs[key] = value
+
+    def __contains__(self, key):
+        if key in STRUCTURE_KEYS:
+            return True
+        return self.__attrs is not None and key in self.__attrs
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+
+def encode_elements(elements_list):
+    """Encode element names of atoms into unique names and their indices.
+
+    Parameters
+    ----------
+    elements_list: List of element names of atoms in structures.
+
+    Return
+    ------
+    element_names: Unique element names in the order of appearance.
+    element_ids: Concatenated indices of element names of atoms.
+    """
+    element_names, table = [], dict()
+    ids = []
+    for elements in elements_list:
+        for ele in elements:
+            if ele not in table:
+                table[ele] = len(element_names)
+                element_names.append(ele)
+        ids.extend(table[ele] for ele in elements)
+    return element_names, np.array(ids, dtype=np.int32)
+
+
+class StructureBatch:
+    """Structures stored in contiguous arrays.
+
+    StructureBatch behaves as a sequence of structures.
+    batch[i] returns Structure whose arrays are views of those in batch,
+    and batch[begin:end] or batch[ids] returns StructureBatch.
+    """
+
+    def __init__(
+        self,
+        axis_array,
+        positions,
+        offsets,
+        types,
+        element_names,
+        element_ids,
+        n_atoms,
+        n_atoms_offsets,
+        volumes=None,
+    ):
+        """
+        Parameters
+        ----------
+        axis_array: (n_str, 3, 3)
+        positions: Concatenated fractional coordinates, (3, n_atom_total)
+        offsets: (n_str + 1)
+                 Atoms of structure i are in [offsets[i], offsets[i+1]).
+        types: Concatenated types of atoms, (n_atom_total)
+        element_names: Element names indexed by element_ids.
+        element_ids: Concatenated element indices of atoms, (n_atom_total)
+        n_atoms: Concatenated numbers of atoms of types.
+        n_atoms_offsets: (n_str + 1)
+                 n_atoms of structure i are in
+                 [n_atoms_offsets[i], n_atoms_offsets[i+1]).
+        volumes: (n_str), Computed from axis_array if None.
+        """
+        self.__axis_array = np.asarray(axis_array, dtype=np.float64)
+        self.__positions = np.asarray(positions, dtype=np.float64)
+        self.__offsets = np.asarray(offsets, dtype=np.int64)
+        self.__types = np.asarray(types, dtype=np.int32)
+        self.__element_names = list(element_names)
+        self.__element_ids = np.asarray(element_ids, dtype=np.int32)
+        self.__n_atoms = np.asarray(n_atoms, dtype=np.int64)
+        self.__n_atoms_offsets = np.asarray(n_atoms_offsets, dtype=np.int64)
+        if volumes is None:
+            volumes = np.linalg.det(self.__axis_array)
+        self.__volumes = np.asarray(volumes, dtype=np.float64)
+
+        n_str, n_atom_total = len(self.__offsets) - 1, self.__offsets[-1]
+        if self.__axis_array.shape != (n_str, 3, 3):
+            raise ValueError("Inconsistent shape of axis_array.")
+        if self.__positions.shape != (3, n_atom_total):
+            raise ValueError("Inconsistent shape of positions.")
+        if self.__types.shape != (n_atom_total,):
+            raise ValueError("Inconsistent shape of types.")
+        if self.__element_ids.shape != (n_atom_total,):
+            raise ValueError("Inconsistent shape of element_ids.")
+
+    @classmethod
+    def from_structures(cls, st_dicts):
+        """Convert a list of st_dict or Structure into StructureBatch."""
+        st_dicts = list(st_dicts)
+        n_atoms_total = [len(st["types"]) for st in st_dicts]
+        n_types = [len(st["n_atoms"]) for st in st_dicts]
+        element_names, element_ids = encode_elements(
+            [st["elements"] for st in st_dicts]
+        )
+        if len(st_dicts) == 0:
+            positions = np.zeros((3, 0))
+            types = n_atoms = np.zeros(0, dtype=int)
+        else:
+            positions = np.concatenate([st["positions"] for st in st_dicts], axis=1)
+            types = np.concatenate([st["types"] for st in st_dicts])
+            n_atoms = np.concatenate([st["n_atoms"] for st in st_dicts])
+        return cls(
+            np.array([st["axis"] for st in st_dicts]).reshape((-1, 3, 3)),
+            positions,
+            np.concatenate([[0], np.cumsum(n_atoms_total, dtype=int)]),
+            types,
+            element_names,
+            element_ids,
+            n_atoms,
+            np.concatenate([[0], np.cumsum(n_types, dtype=int)]),
+            volumes=[st["volume"] for st in st_dicts],
+        )
+
+    @classmethod
+    def from_positions(cls, st_dict, positions_all):
+        """Structures with the same cell and atoms as st_dict.
+
+        Parameters
+        ----------
+        st_dict: Reference structure.
+        positions_all: Fractional coordinates of structures, (n_str, 3, n_atom)
+        """
+        positions_all = np.asarray(positions_all, dtype=np.float64)
+        n_str, n_atom = positions_all.shape[0], positions_all.shape[2]
+        if positions_all.shape[1] != 3 or n_atom != len(st_dict["types"]):
+            raise ValueError("positions_all must have a shape of (n_str, 3, n_atom).")
+
+        element_names, element_ids = encode_elements([st_dict["elements"]])
+        n_types = len(st_dict["n_atoms"])
+        return cls(
+            np.repeat(np.array(st_dict["axis"])[np.newaxis], n_str, axis=0),
+            positions_all.transpose((1, 0, 2)).reshape((3, -1)),
+            np.arange(n_str + 1) * n_atom,
+            np.tile(st_dict["types"], n_str),
+            element_names,
+            np.tile(element_ids, n_str),
+            np.tile(st_dict["n_atoms"], n_str),
+            np.arange(n_str + 1) * n_types,
+            volumes=np.full(n_str, st_dict["volume"]),
+        )
+
+    def to_dicts(self):
+        """Convert structures into a list of st_dict."""
+        return [st.to_dict() for st in self]
+
+    def get_types(self, element_order):
+        """Return types of atoms following element_order, (n_atom_total)."""
+        table = np.array(
+            [
+                element_order.index(ele) if ele in element_order else -1
+                for ele in self.__element_names
+            ],
+            dtype=np.int32,
+        )
+        types = table[self.__element_ids]
+        if np.any(types < 0):
+            raise ValueError(
+                "Elements in structures "
+                + str(self.__element_names)
+                + " are not found in "
+                + str(list(element_order))
+            )
+        return types
+
+    def to_arrays(self, element_order=None):
+        """Return arrays used in Properties.eval_multiple_arrays.
+
+        Parameters
+        ----------
+        element_order: Types of atoms are reassigned following element_order.
+
+        Return
+        ------
+        axis_array: (n_str, 3, 3)
+        positions_c: Cartesian positions, (3, n_atom_total)
+        types: (n_atom_total), int32
+        offsets: (n_str + 1), int32
+        """
+        if element_order is None:
+            types = self.__types
+        else:
+            types = self.get_types(element_order)
+        return (
+            self.__axis_array,
+            self.positions_cartesian,
+            types,
+            self.__offsets.astype(np.int32),
+        )
+
+    def __select(self, ids):
+
+        ids = np.asarray(ids, dtype=np.int64)
+        counts = self.__offsets[ids + 1] - self.__offsets[ids]
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        atom_ids = np.repeat(self.__offsets[ids] - offsets[:-1], counts)
+        atom_ids += np.arange(offsets[-1])
+
+        n_counts = self.__n_atoms_offsets[ids + 1] - self.__n_atoms_offsets[ids]
+        n_atoms_offsets = np.concatenate([[0], np.cumsum(n_counts)])
+        type_ids = np.repeat(
+            self.__n_atoms_offsets[ids] - n_atoms_offsets[:-1], n_counts
+        )
+        type_ids += np.arange(n_atoms_offsets[-1])
+
+        return StructureBatch(
+            self.__axis_array[ids],
+            self.__positions[:, atom_ids],
+            offsets,
+            self.__types[atom_ids],
+            self.__element_names,
+            self.__element_ids[atom_ids],
+            self.__n_atoms[type_ids],
+            n_atoms_offsets,
+            volumes=self.__volumes[ids],
+        )
+
+    def __slice(self, begin, end):
+
+        begin_a, end_a = self.__offsets[begin], self.__offsets[end]
+        begin_t, end_t = self.__n_atoms_offsets[begin], self.__n_atoms_offsets[end]
+        return StructureBatch(
+            self.__axis_array[begin:end],
+            self.__positions[:, begin_a:end_a],
+            self.__offsets[begin : end + 1] - begin_a,
+            self.__types[begin_a:end_a],
+            self.__element_names,
+            self.__element_ids[begin_a:end_a],
+            self.__n_atoms[begin_t:end_t],
+            self.__n_atoms_offsets[begin : end + 1] - begin_t,
+            volumes=self.__volumes[begin:end],
+        )
+
+    def __getitem__(self, key):
+
+        if isinstance(key, slice):
+            begin, end, step = key.indices(len(self))
+            if step == 1:
+                return self.__slice(begin, max(begin, end))
+            return self.__select(range(begin, end, step))
+        if not np.isscalar(key):
+            return self.__select(key)
+
+        i = range(len(self))[key]
+        begin, end = self.__offsets[i], self.__offsets[i + 1]
+        begin_t, end_t = self.__n_atoms_offsets[i], self.__n_atoms_offsets[i + 1]
+        return Structure(
+            self.__axis_array[i],
+            self.__positions[:, begin:end],
+            self.__n_atoms[begin_t:end_t].tolist(),
+            types=self.__types[begin:end],
+            volume=float(self.__volumes[i]),
+            element_codes=(self.__element_names, self.__element_ids[begin:end]),
+        )
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __len__(self):
+        return len(self.__offsets) - 1
+
+    @property
+    def axis_array(self):
+        return self.__axis_array
+
+    @property
+    def positions(self):
+        """Concatenated fractional coordinates, (3, n_atom_total)."""
+        return self.__positions
+
+    @property
+    def positions_cartesian(self):
+        """Concatenated cartesian coordinates, (3, n_atom_total).
+
+        They are computed in chunks of atoms to bound temporary memory.
+        """
+        str_ids = np.repeat(np.arange(len(self)), np.diff(self.__offsets))
+        positions_c = np.zeros(self.__positions.shape)
+        for begin in range(0, len(str_ids), CHUNK_SIZE):
+            end = min(begin + CHUNK_SIZE, len(str_ids))
+            positions_c[:, begin:end] = np.einsum(
+                "aij,ja->ia",
+                self.__axis_array[str_ids[begin:end]],
+                self.__positions[:, begin:end],
+            )
+        return positions_c
+
+    @property
+    def offsets(self):
+        return self.__offsets
+
+    @property
+    def types(self):
+        return self.__types
+
+    @property
+    def element_names(self):
+        return self.__element_names
+
+    @property
+    def element_ids(self):
+        return self.__element_ids
+
+    @property
+    def volumes(self):
+        return self.__volumes
+
+    @property
+    def total_n_atoms(self):
+        return np.diff(self.__offsets)
@@ -0,0 +1,62 @@
+/****************************************************************************
+
+        Copyright (C) 2024 Atsuto Seko
+                seko@cms.mtl.kyoto-u.ac.jp
+
+****************************************************************************/
+
+#ifndef __ATOM_LOCKS
+#define __ATOM_LOCKS
+
+#include "mlpcpp.h"
+
+#ifdef _OPENMP
+#include <omp.h>
+#endif
+
+/* Atom-parallel regions are active only outside of parallel regions,
+   e.g., structure-parallel loops over many structures. */
+inline bool atom_parallel_enabled(){
+    #ifdef _OPENMP
+    return not omp_in_parallel();
+    #else
+    return false;
+    #endif
+}
+
+/* Striped locks of atoms used for accumulating contributions of neighbor
+   atoms in atom-parallel loops. Atom i is guarded by lock i % n_stripes,
+   so that the number of locks is bounded for large structures and
+   does not depend on the number of threads. */
+class AtomLocks {
+
+    #ifdef _OPENMP
+    std::vector<omp_lock_t> locks;
+    #endif
+
+    public:
+
+    AtomLocks(const int n_atom, const int n_stripes = 1024){
+        #ifdef _OPENMP
+        locks.resize(std::min(n_atom, n_stripes));
+        for (auto& l: locks) omp_init_lock(&l);
+        #endif
+    }
+    ~AtomLocks(){
+        #ifdef _OPENMP
+        for (auto& l: locks) omp_destroy_lock(&l);
+        #endif
+    }
+    void set(const int i){
+        #ifdef _OPENMP
+        omp_set_lock(&locks[i % locks.size()]);
+        #endif
+    }
+    void unset(const int i){
+        #ifdef _OPENMP
+        omp_unset_lock(&locks[i % locks.size()]);
+        #endif
+    }
+};
+
+#endif
@@ -40,8 +40,225 @@ ModelFast::ModelFast(const vector3d& dis_array,
         gtinv(dis_array, diff_array, atom2_array, fp, modelp, features);
 }
 
+ModelFast::ModelFast(const vector3d& dis_array,
+                     const vector4d& diff_array,
+                     const vector3i& atom2_array,
+                     const vector1i& types_i,
+                     const struct feature_params& fp,
+                     const ModelParams& modelp,
+                     const FunctionFeatures& features,
+                     MatrixStrideRef x,
+                     const int row_e,
+                     const int row_s,
+                     const int row_f,
+                     const int col_begin,
+                     const bool atom_parallel){
+
+    types = types_i;
+
+    n_atom = dis_array.size();
+    n_type = fp.n_type;
+    force = fp.force;
+    model_type = fp.model_type;
+    maxp = fp.maxp;
+
+    n_linear_features = modelp.get_n_des();
+
+    compute_direct(dis_array, diff_array, atom2_array, fp, modelp, features,
+                   x, row_e, row_s, row_f, col_begin, atom_parallel);
+}
+
 ModelFast::~ModelFast(){}
 
+void ModelFast::local_features(const int atom1,
+                               const vector3d& dis_array,
+                               const vector4d& diff_array,
+                               const vector3i& atom2_array,
+                               const struct feature_params& fp,
+                               const ModelParams& modelp,
+                               const FunctionFeatures& features,
+                               vector1d& de,
+                               vector2d& dfx,
+                               vector2d& dfy,
+                               vector2d& dfz,
+                               vector2d& ds){
+
+    LocalFast local(n_atom, atom1, types[atom1], fp, modelp);
+    if (fp.des_type == "pair"){
+        if (force == false) local.pair(dis_array[atom1], de);
+        else {
+            local.pair_d(
+                dis_array[atom1], diff_array[atom1], atom2_array[atom1],
+                de, dfx, dfy, dfz, ds
+            );
+        }
+    }
+    else if (fp.des_type == "gtinv"){
+        if (force == false) {
+            local.gtinv(
+                dis_array[atom1], diff_array[atom1], features, de
+            );
+        }
+        else {
+            local.gtinv_d(
+                dis_array[atom1], diff_array[atom1], atom2_array[atom1],
+                features, de, dfx, dfy, dfz, ds
+            );
+        }
+    }
+}
+
+void ModelFast::model_terms(const vector1d& de,
+                            const FunctionFeatures& features,
+                            const int type1,
+                            vector1d& xe,
+                            std::vector<DerivTerm>& terms){
+
+    terms.clear();
+    const auto& poly1 = features.get_polynomial1(type1);
+    for (size_t tlocal = 0; tlocal < poly1.size(); ++tlocal){
+        const int col = poly1[tlocal].seq_id;
+        xe[col] += de[tlocal];
+        terms.emplace_back(DerivTerm{col, int(tlocal), 1.0});
+    }
+
+    if (model_type == 1 and maxp > 1) {
+        for (int p = 2; p < maxp + 1; ++p){
+            for (size_t tlocal = 0; tlocal < poly1.size(); ++tlocal){
+                const int col = n_linear_features * (p - 1)
+                              + poly1[tlocal].seq_id;
+                xe[col] += pow(de[tlocal], p);
+                terms.emplace_back(
+                    DerivTerm{col, int(tlocal), p * pow(de[tlocal], p-1)}
+                );
+            }
+        }
+    }
+    else if (model_type > 1){
+        if (maxp > 1){
+            for (const auto& pterm: features.get_polynomial2(type1)){
+                const int col = pterm.seq_id;
+                const int c1 = pterm.comb_tlocal[0], c2 = pterm.comb_tlocal[1];
+                xe[col] += de[c1] * de[c2];
+                terms.emplace_back(DerivTerm{col, c1, de[c2]});
+                terms.emplace_back(DerivTerm{col, c2, de[c1]});
+            }
+        }
+        if (maxp > 2){
+            for (const auto& pterm: features.get_polynomial3(type1)){
+                const int col = pterm.seq_id;
+                const int c1 = pterm.comb_tlocal[0];
+                const int c2 = pterm.comb_tlocal[1];
+                const int c3 = pterm.comb_tlocal[2];
+                xe[col] += de[c1] * de[c2] * de[c3];
+                terms.emplace_back(DerivTerm{col, c1, de[c2] * de[c3]});
+                terms.emplace_back(DerivTerm{col, c2, de[c1] * de[c3]});
+                terms.emplace_back(DerivTerm{col, c3, de[c1] * de[c2]});
+            }
+        }
+    }
+}
+
+void ModelFast::compute_direct(const vector3d& dis_array,
+                               const vector4d& diff_array,
+                               const vector3i& atom2_array,
+                               const struct feature_params& fp,
+                               const ModelParams& modelp,
+                               const FunctionFeatures& features,
+                               MatrixStrideRef x,
+                               const int row_e,
+                               const int row_s,
+                               const int row_f,
+                               const int col_begin,
+                               const bool atom_parallel){
+
+    const int size = modelp.get_n_coeff_all();
+    x.block(row_e, col_begin, 1, size).setZero();
+    if (force == true){
+        x.block(row_s, col_begin, 6, size).setZero();
+        x.block(row_f, col_begin, 3 * n_atom, size).setZero();
+    }
+    /* Force rows of atom k receive contributions of all neighbors of k.
+       They are updated with locks only if threads share them, because
+       thread-local copies would be as large as the force rows of x. */
+    const bool parallel = atom_parallel and atom_parallel_enabled();
+    #ifdef _OPENMP
+    const bool use_locks = parallel and force and omp_get_max_threads() > 1;
+    #else
+    const bool use_locks = false;
+    #endif
+    AtomLocks locks(use_locks ? n_atom : 0);
+
+    #ifdef _OPENMP
+    #pragma omp parallel if(parallel)
+    #endif
+    {
+        #ifdef _OPENMP
+        const bool lock = use_locks and omp_get_num_threads() > 1;
+        #else
+        const bool lock = false;
+        #endif
+        vector1d xe_local(size, 0.0);
+        vector2d xs_local;
+        if (force == true) xs_local = vector2d(6, vector1d(size, 0.0));
+
+        vector1d de;
+        vector2d dfx, dfy, dfz, ds;
+        std::vector<DerivTerm> terms;
+        vector1i neighbors;
+
+        #ifdef _OPENMP
+        #pragma omp for schedule(dynamic,1)
+        #endif
+        for (int atom1 = 0; atom1 < n_atom; ++atom1){
+            local_features(atom1, dis_array, diff_array, atom2_array,
+                           fp, modelp, features, de, dfx, dfy, dfz, ds);
+            model_terms(de, features, types[atom1], xe_local, terms);
+            if (force == false) continue;
+
+            for (const auto& t: terms){
+                for (int k = 0; k < 6; ++k)
+                    xs_local[k][t.col] += t.coef * ds[t.c][k];
+            }
+
+            /* derivatives are non-zero only for atom1 and its neighbors */
+            neighbors = {atom1};
+            for (const auto& atom2_type: atom2_array[atom1])
+                neighbors.insert(neighbors.end(),
+                                 atom2_type.begin(), atom2_type.end());
+            std::sort(neighbors.begin(), neighbors.end());
+            neighbors.erase(std::unique(neighbors.begin(), neighbors.end()),
+                            neighbors.end());
+
+            for (const auto k: neighbors){
+                const int row = row_f + 3 * k;
+                if (lock) locks.set(k);
+                for (const auto& t: terms){
+                    const int col = col_begin + t.col;
+                    x(row, col) += t.coef * dfx[t.c][k];
+                    x(row+1, col) += t.coef * dfy[t.c][k];
+                    x(row+2, col) += t.coef * dfz[t.c][k];
+                }
+                if (lock) locks.unset(k);
+            }
+        }
+
+        #ifdef _OPENMP
+        #pragma omp critical (model_fast_reduction)
+        #endif
+        {
+            for (int j = 0; j < size; ++j)
+                x(row_e, col_begin + j) += xe_local[j];
+            if (force == true){
+                for (int k = 0; k < 6; ++k){
+                    for (int j = 0; j < size; ++j)
+                        x(row_s + k, col_begin + j) += xs_local[k][j];
+                }
+            }
+        }
+    }
+}
+
 void ModelFast::pair(const vector3d& dis_array,
                      const vector4d& diff_array,
                      const vector3i& atom2_array,
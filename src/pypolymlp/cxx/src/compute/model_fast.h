@@ -12,9 +12,27 @@
 #include "polymlp/polymlp_model_params.h"
 #include "compute/local_fast.h"
 #include "compute/features.h"
+#include "compute/atom_locks.h"
+
+#include <Eigen/Core>
+
+/* Output matrix of features with arbitrary strides.
+   Both column-major Eigen matrices and row-major numpy buffers can be
+   used without copies. */
+typedef Eigen::Stride<Eigen::Dynamic, Eigen::Dynamic> MatrixStride;
+typedef Eigen::Map<Eigen::MatrixXd, 0, MatrixStride> MatrixStrideMap;
+typedef Eigen::Ref<Eigen::MatrixXd, 0, MatrixStride> MatrixStrideRef;
 
 class ModelFast{
 
+    /* Chain-rule term: derivative of feature col
+       is accumulated as coef * derivative of linear feature c. */
+    struct DerivTerm {
+        int col;
+        int c;
+        double coef;
+    };
+
     int n_atom, n_type, model_type, maxp, n_linear_features;
     bool force;
 
@@ -87,6 +105,44 @@ class ModelFast{
         const int type1
     );
 
+    void local_features(
+        const int atom1,
+        const vector3d& dis_array,
+        const vector4d& diff_array,
+        const vector3i& atom2_array,
+        const struct feature_params& fp,
+        const ModelParams& modelp,
+        const FunctionFeatures& features,
+        vector1d& de,
+        vector2d& dfx,
+        vector2d& dfy,
+        vector2d& dfz,
+        vector2d& ds
+    );
+
+    void model_terms(
+        const vector1d& de,
+        const FunctionFeatures& features,
+        const int type1,
+        vector1d& xe,
+        std::vector<DerivTerm>& terms
+    );
+
+    void compute_direct(
+        const vector3d& dis_array,
+        const vector4d& diff_array,
+        const vector3i& atom2_array,
+        const struct feature_params& fp,
+        const ModelParams& modelp,
+        const FunctionFeatures& features,
+        MatrixStrideRef x,
+        const int row_e,
+        const int row_s,
+        const int row_f,
+        const int col_begin,
+        const bool atom_parallel
+    );
+
     public:
 
     ModelFast();
@@ -99,6 +155,31 @@ class ModelFast{
         const ModelParams& modelp,
         const FunctionFeatures& features
     );
+
+    /* Rows of a structure are written directly into x.
+       x(row_e, col_begin:col_begin+n_features): energy features
+       x(row_s:row_s+6, ...): stress features, used if fp.force = true
+       x(row_f:row_f+3*n_atom, ...): force features, used if fp.force = true
+
+       If atom_parallel = true, atoms are distributed over threads and
+       contributions are accumulated using thread-local energy and stress
+       features and locks of atoms for force features.
+       xe_sum, xf_sum, and xs_sum are not allocated. */
+    ModelFast(
+        const vector3d& dis_array_all,
+        const vector4d& diff_array_all,
+        const vector3i& atom2_array_all,
+        const vector1i& types_i,
+        const struct feature_params& fp,
+        const ModelParams& modelp,
+        const FunctionFeatures& features,
+        MatrixStrideRef x,
+        const int row_e,
+        const int row_s,
+        const int row_f,
+        const int col_begin,
+        const bool atom_parallel
+    );
     ~ModelFast();
 
     const vector1d& get_xe_sum() const;
@@ -13,8 +13,33 @@ Neighbor::Neighbor(const vector2d& axis,
                    const int& n_type,
                    const double& cutoff){
 
+    find_neighbors_translation(axis, positions_c, types, n_type, cutoff);
+}
+
+Neighbor::Neighbor(const vector2d& axis,
+                   const vector2d& positions_c,
+                   const vector1i& types,
+                   const int& n_type,
+                   const double& cutoff,
+                   const bool linked_cell){
+
+    if (linked_cell == true){
+        find_neighbors_linked_cell(axis, positions_c, types, n_type, cutoff);
+    }
+    else {
+        find_neighbors_translation(axis, positions_c, types, n_type, cutoff);
+    }
+}
+
+void Neighbor::find_neighbors_translation(const vector2d& axis,
+                                          const vector2d& positions_c,
+                                          const vector1i& types,
+                                          const int& n_type,
+                                          const double& cutoff){
+
     NeighborCell neigh_cell(axis, positions_c, cutoff);
     const auto& trans = neigh_cell.get_translations();
+    const auto& positions_c_rev = neigh_cell.get_positions_cartesian();
 
     const int n_total_atom = types.size();
     dis_array = vector3d(n_total_atom, vector2d(n_type));
@@ -24,9 +49,9 @@ Neighbor::Neighbor(const vector2d& axis,
     double dx, dy, dz, dx_ij, dy_ij, dz_ij;
     for (int i = 0; i < n_total_atom; ++i){
         for (int j = 0; j < n_total_atom; ++j){
-            dx_ij = positions_c[0][j] - positions_c[0][i];
-            dy_ij = positions_c[1][j] - positions_c[1][i];
-            dz_ij = positions_c[2][j] - positions_c[2][i];
+            dx_ij = positions_c_rev[0][j] - positions_c_rev[0][i];
+            dy_ij = positions_c_rev[1][j] - positions_c_rev[1][i];
+            dz_ij = positions_c_rev[2][j] - positions_c_rev[2][i];
             for (const auto& tr: trans){
                 dx = dx_ij + tr[0];
                 dy = dy_ij + tr[1];
@@ -53,6 +78,36 @@ Neighbor::Neighbor(const vector2d& axis,
 */
 }
 
+void Neighbor::find_neighbors_linked_cell(const vector2d& axis,
+                                          const vector2d& positions_c,
+                                          const vector1i& types,
+                                          const int& n_type,
+                                          const double& cutoff){
+
+    vector2i neighbor_list;
+    vector3d diff_list;
+    NeighborLinkedCell neigh_lc(axis, positions_c, cutoff);
+    neigh_lc.find_neighbors(false, neighbor_list, diff_list);
+
+    const int n_total_atom = types.size();
+    dis_array = vector3d(n_total_atom, vector2d(n_type));
+    diff_array = vector4d(n_total_atom, vector3d(n_type));
+    atom2_array = vector3i(n_total_atom, vector2i(n_type));
+
+    double dis;
+    for (int i = 0; i < n_total_atom; ++i){
+        for (size_t jj = 0; jj < neighbor_list[i].size(); ++jj){
+            const int j = neighbor_list[i][jj];
+            const auto& diff = diff_list[i][jj];
+            dis = sqrt(diff[0]*diff[0] + diff[1]*diff[1] + diff[2]*diff[2]);
+            int type2 = types[j];
+            dis_array[i][type2].emplace_back(dis);
+            diff_array[i][type2].emplace_back(diff);
+            atom2_array[i][type2].emplace_back(j);
+        }
+    }
+}
+
 Neighbor::~Neighbor(){}
 
 
@@ -10,6 +10,7 @@
 
 #include "mlpcpp.h"
 #include "neighbor_cell.h"
+#include "neighbor_linked_cell.h"
 
 class Neighbor{
 
@@ -17,6 +18,18 @@ class Neighbor{
     vector4d diff_array;
     vector3i atom2_array;
 
+    void find_neighbors_translation(const vector2d& axis,
+                                    const vector2d& positions_c,
+                                    const vector1i& types,
+                                    const int& n_type,
+                                    const double& cutoff);
+
+    void find_neighbors_linked_cell(const vector2d& axis,
+                                    const vector2d& positions_c,
+                                    const vector1i& types,
+                                    const int& n_type,
+                                    const double& cutoff);
+
     public:
 
     Neighbor(const vector2d& axis,
@@ -25,6 +38,13 @@ class Neighbor{
              const int& n_type,
              const double& cutoff);
 
+    Neighbor(const vector2d& axis,
+             const vector2d& positions_c,
+             const vector1i& types,
+             const int& n_type,
+             const double& cutoff,
+             const bool linked_cell);
+
     ~Neighbor();
 
     const vector3d& get_dis_array() const;
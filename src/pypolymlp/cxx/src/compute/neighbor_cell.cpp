@@ -72,15 +72,17 @@ vector1d NeighborCell::dot_prod(const vector2d& mat, const vector1d& vec2){
 
 double NeighborCell::find_maximum_diagonal_in_cell(){
 
-    vector2i vertices_comb = {{0,0,1}, {0,1,0}, {0,1,1},
-                              {1,0,0}, {1,0,1}, {1,1,0}, {1,1,1},
-                              {0,0,-1}, {0,-1,0}, {0,-1,-1},
-                              {-1,0,0}, {-1,0,-1}, {-1,-1,0}, {-1,-1,-1}};
-
+    /* maximum distance between two points in the cell, given by
+       differences of vertices (i, j, k), i, j, k = -1, 0, 1.
+       Mixed signs such as (1, -1, 0) are required for obtuse cells. */
     double max_length(0.0);
-    for (const auto& ver: vertices_comb){
-        double dis = distance(ver[0], ver[1], ver[2]);
-        if (max_length < dis) max_length = dis;
+    for (int i = -1; i < 2; ++i){
+        for (int j = -1; j < 2; ++j){
+            for (int k = -1; k < 2; ++k){
+                double dis = distance(i, j, k);
+                if (max_length < dis) max_length = dis;
+            }
+        }
     }
 
     return max_length;
@@ -164,30 +166,6 @@ int NeighborCell::refine_axis(){
     return 0;
 }
 
-int NeighborCell::calc_inverse_axis(){
-
-    axis_inv = vector2d(3, vector1d(3));
-    double det = axis[0][0] * axis[1][1] * axis[2][2]
-               + axis[0][1] * axis[1][2] * axis[2][0]
-               + axis[0][2] * axis[1][0] * axis[2][1]
-               - axis[0][2] * axis[1][1] * axis[2][0]
-               - axis[0][1] * axis[1][0] * axis[2][2]
-               - axis[0][0] * axis[1][2] * axis[2][1];
-    axis_inv[0][0] = axis[1][1] * axis[2][2] - axis[1][2] * axis[2][1];
-    axis_inv[0][1] = - (axis[0][1] * axis[2][2] - axis[0][2] * axis[2][1]);
-    axis_inv[0][2] = axis[0][1] * axis[1][2] - axis[0][2] * axis[1][1];
-    axis_inv[1][0] = - (axis[1][0] * axis[2][2] - axis[1][2] * axis[2][0]);
-    axis_inv[1][1] = axis[0][0] * axis[2][2] - axis[0][2] * axis[2][0];
-    axis_inv[1][2] = - (axis[0][0] * axis[1][2] - axis[0][2] * axis[1][0]);
-    axis_inv[2][0] = axis[1][0] * axis[2][1] - axis[1][1] * axis[2][0];
-    axis_inv[2][1] = - (axis[0][0] * axis[2][1] - axis[0][1] * axis[2][0]);
-    axis_inv[2][2] = axis[0][0] * axis[1][1] - axis[0][1] * axis[1][0];
-    for (int i = 0; i < 3; ++i){
-        for (int j = 0; j < 3; ++j) axis_inv[i][j] /= det;
-    }
-    return 0;
-}
-
 int NeighborCell::standardize_positions(vector2d& positions){
 
     for (auto& pos: positions){
@@ -199,37 +177,29 @@ int NeighborCell::standardize_positions(vector2d& positions){
 
 int NeighborCell::find_trans(){
 
-    if (ref_sum > 0){
-        refine_axis();
-        calc_inverse_axis();
-        /*
-            for (int i = 0; i < 3; ++i){
-                for (int j = 0; j < 3; ++j){
-                    std::cout << axis[i][j] << ", ";
-                }
-                std::cout << std::endl;
-            }
-        */
-        int n_atom = positions_c[0].size();
-        vector2d positions(3, vector1d(n_atom));
-        vector1d pos_c(3), pos(3);
-        for (int j = 0; j < n_atom; ++j){
-            pos_c[0] = positions_c[0][j];
-            pos_c[1] = positions_c[1][j];
-            pos_c[2] = positions_c[2][j];
-            pos = dot_prod(axis_inv, pos_c);
-            positions[0][j] = pos[0];
-            positions[1][j] = pos[1];
-            positions[2][j] = pos[2];
-        }
-        standardize_positions(positions);
-        for (int j = 0; j < n_atom; ++j){
-            pos_c = to_cartesian(
-                positions[0][j], positions[1][j], positions[2][j]);
-            positions_c[0][j] = pos_c[0];
-            positions_c[1][j] = pos_c[1];
-            positions_c[2][j] = pos_c[2];
-        }
+    /* positions are always standardized into the (refined) cell,
+       since translations are found only for points inside the cell. */
+    if (ref_sum > 0) refine_axis();
+    calc_inverse_axis(axis, axis_inv);
+
+    int n_atom = positions_c[0].size();
+    vector2d positions(3, vector1d(n_atom));
+    vector1d pos_c(3), pos(3);
+    for (int j = 0; j < n_atom; ++j){
+        pos_c[0] = positions_c[0][j];
+        pos_c[1] = positions_c[1][j];
+        pos_c[2] = positions_c[2][j];
+        pos = dot_prod(axis_inv, pos_c);
+        positions[0][j] = pos[0];
+        positions[1][j] = pos[1];
+        positions[2][j] = pos[2];
+    }
+    standardize_positions(positions);
+    for (int j = 0; j < n_atom; ++j){
+        pos_c = to_cartesian(positions[0][j], positions[1][j], positions[2][j]);
+        positions_c[0][j] = pos_c[0];
+        positions_c[1][j] = pos_c[1];
+        positions_c[2][j] = pos_c[2];
     }
 
     vector1i max_exp = {int(ceil(cutoff / distance(1, 0, 0)) + 1),
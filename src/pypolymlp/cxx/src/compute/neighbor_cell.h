@@ -9,6 +9,7 @@
 #define __NEIGHBOR_CELL
 
 #include "mlpcpp.h"
+#include "compute/neighbor_utils.h"
 
 
 class NeighborCell{
@@ -32,7 +33,6 @@ class NeighborCell{
     double optimize_1d_axis1(const int val1, const int val2, vector1i& vec);
     double optimize_1d_axis2(const int val1, const int val2, vector1i& vec);
 
-    int calc_inverse_axis();
     int standardize_positions(vector2d& positions);
     int refine_axis();
     double find_maximum_diagonal_in_cell();
@@ -14,6 +14,29 @@ NeighborHalf::NeighborHalf(const vector2d& axis,
                            const vector1i& types,
                            const double& cutoff){
 
+    find_neighbors_translation(axis, positions_c, types, cutoff);
+}
+
+NeighborHalf::NeighborHalf(const vector2d& axis,
+                           const vector2d& positions_c,
+                           const vector1i& types,
+                           const double& cutoff,
+                           const bool linked_cell){
+
+    if (linked_cell == true){
+        NeighborLinkedCell neigh_lc(axis, positions_c, cutoff);
+        neigh_lc.find_neighbors(true, half_list, diff_list);
+    }
+    else {
+        find_neighbors_translation(axis, positions_c, types, cutoff);
+    }
+}
+
+void NeighborHalf::find_neighbors_translation(const vector2d& axis,
+                                              const vector2d& positions_c,
+                                              const vector1i& types,
+                                              const double& cutoff){
+
 //    auto t1 = std::chrono::system_clock::now();
 
     NeighborCell neigh_cell(axis, positions_c, cutoff);
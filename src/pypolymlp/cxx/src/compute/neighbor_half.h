@@ -10,12 +10,18 @@
 
 #include "mlpcpp.h"
 #include "neighbor_cell.h"
+#include "neighbor_linked_cell.h"
 
 class NeighborHalf{
 
     vector2i half_list;
     vector3d diff_list;
 
+    void find_neighbors_translation(const vector2d& axis,
+                                    const vector2d& positions_c,
+                                    const vector1i& types,
+                                    const double& cutoff);
+
     public:
 
     NeighborHalf(const vector2d& axis,
@@ -23,6 +29,12 @@ class NeighborHalf{
                  const vector1i& types,
                  const double& cutoff);
 
+    NeighborHalf(const vector2d& axis,
+                 const vector2d& positions_c,
+                 const vector1i& types,
+                 const double& cutoff,
+                 const bool linked_cell);
+
     ~NeighborHalf();
 
     const vector2i& get_half_list() const;
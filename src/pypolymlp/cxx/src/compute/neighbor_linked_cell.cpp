@@ -0,0 +1,196 @@
+/****************************************************************************
+
+        Copyright (C) 2024 Atsuto Seko
+                seko@cms.mtl.kyoto-u.ac.jp
+
+*****************************************************************************/
+
+#include "compute/neighbor_linked_cell.h"
+
+
+NeighborLinkedCell::NeighborLinkedCell(const vector2d& axis,
+                                       const vector2d& positions_c,
+                                       const double& cutoff_i)
+:cutoff(cutoff_i){
+
+    n_atom = positions_c[0].size();
+    if (n_atom == 0) return;
+
+    vector2d axis_inv;
+    calc_inverse_axis(axis, axis_inv);
+
+    // wrapped positions (fractional and cartesian)
+    vector2d frac(3, vector1d(n_atom));
+    pos = vector2d(3, vector1d(n_atom));
+    for (int j = 0; j < n_atom; ++j){
+        for (int a = 0; a < 3; ++a){
+            double f = axis_inv[a][0] * positions_c[0][j]
+                     + axis_inv[a][1] * positions_c[1][j]
+                     + axis_inv[a][2] * positions_c[2][j];
+            frac[a][j] = f - floor(f);
+        }
+        for (int a = 0; a < 3; ++a){
+            pos[a][j] = axis[a][0] * frac[0][j]
+                      + axis[a][1] * frac[1][j]
+                      + axis[a][2] * frac[2][j];
+        }
+    }
+
+    // ghost atoms within cutoff from the cell
+    const double tol_frac = 1e-8;
+    const auto& heights = calc_heights(axis);
+    vector1d margin(3);
+    vector1i max_exp(3);
+    for (int a = 0; a < 3; ++a){
+        margin[a] = cutoff / heights[a] + tol_frac;
+        max_exp[a] = int(ceil(margin[a]));
+    }
+
+    vector2d ghost_pos;
+    for (int i = - max_exp[0]; i < max_exp[0] + 1; ++i){
+        for (int j = - max_exp[1]; j < max_exp[1] + 1; ++j){
+            for (int k = - max_exp[2]; k < max_exp[2] + 1; ++k){
+                const vector1d tr = {
+                    axis[0][0] * i + axis[0][1] * j + axis[0][2] * k,
+                    axis[1][0] * i + axis[1][1] * j + axis[1][2] * k,
+                    axis[2][0] * i + axis[2][1] * j + axis[2][2] * k,
+                };
+                const int n_trans = ghost_trans.size();
+                bool used = false;
+                for (int l = 0; l < n_atom; ++l){
+                    const double f0 = frac[0][l] + i;
+                    const double f1 = frac[1][l] + j;
+                    const double f2 = frac[2][l] + k;
+                    if (f0 > - margin[0] and f0 < 1.0 + margin[0]
+                        and f1 > - margin[1] and f1 < 1.0 + margin[1]
+                        and f2 > - margin[2] and f2 < 1.0 + margin[2]){
+                        ghost_atom.emplace_back(l);
+                        ghost_trans_id.emplace_back(n_trans);
+                        ghost_pos.emplace_back(vector1d{pos[0][l] + tr[0],
+                                                        pos[1][l] + tr[1],
+                                                        pos[2][l] + tr[2]});
+                        used = true;
+                    }
+                }
+                if (used == true) ghost_trans.emplace_back(tr);
+            }
+        }
+    }
+
+    // binning of ghost atoms
+    pmin = vector1d(3);
+    vector1d pmax(3);
+    for (int a = 0; a < 3; ++a){
+        pmin[a] = pmax[a] = ghost_pos[0][a];
+    }
+    for (const auto& g: ghost_pos){
+        for (int a = 0; a < 3; ++a){
+            if (g[a] < pmin[a]) pmin[a] = g[a];
+            if (g[a] > pmax[a]) pmax[a] = g[a];
+        }
+    }
+
+    n_bins = vector1i(3);
+    bin_size = vector1d(3);
+    for (int a = 0; a < 3; ++a){
+        const double extent = pmax[a] - pmin[a];
+        n_bins[a] = std::max(1, int(floor(extent / cutoff)));
+        bin_size[a] = std::max(extent / n_bins[a], cutoff);
+    }
+
+    const int n_ghost = ghost_atom.size();
+    const int n_bins_all = n_bins[0] * n_bins[1] * n_bins[2];
+    vector1i ghost_bin(n_ghost);
+    bin_begin = vector1i(n_bins_all + 1, 0);
+    for (int g = 0; g < n_ghost; ++g){
+        const auto& gp = ghost_pos[g];
+        ghost_bin[g] = (bin_index(gp[0], 0) * n_bins[1]
+                        + bin_index(gp[1], 1)) * n_bins[2]
+                        + bin_index(gp[2], 2);
+        ++bin_begin[ghost_bin[g] + 1];
+    }
+    for (int b = 0; b < n_bins_all; ++b) bin_begin[b + 1] += bin_begin[b];
+
+    bin_ghosts = vector1i(n_ghost);
+    vector1i bin_fill(bin_begin.begin(), bin_begin.end());
+    for (int g = 0; g < n_ghost; ++g){
+        bin_ghosts[bin_fill[ghost_bin[g]]] = g;
+        ++bin_fill[ghost_bin[g]];
+    }
+}
+
+NeighborLinkedCell::~NeighborLinkedCell(){}
+
+int NeighborLinkedCell::bin_index(const double& x, const int a) const {
+
+    int b = int(floor((x - pmin[a]) / bin_size[a]));
+    return std::min(std::max(b, 0), n_bins[a] - 1);
+}
+
+void NeighborLinkedCell::find_neighbors(const bool half,
+                                        vector2i& neighbor_list,
+                                        vector3d& diff_list) const {
+
+    neighbor_list = vector2i(n_atom);
+    diff_list = vector3d(n_atom);
+
+    const double tol = 1e-12;
+    double dx, dy, dz, dis;
+    bool bool_half;
+    for (int i = 0; i < n_atom; ++i){
+        const int b0 = bin_index(pos[0][i], 0);
+        const int b1 = bin_index(pos[1][i], 1);
+        const int b2 = bin_index(pos[2][i], 2);
+        for (int i0 = std::max(b0 - 1, 0);
+             i0 < std::min(b0 + 2, n_bins[0]); ++i0){
+        for (int i1 = std::max(b1 - 1, 0);
+             i1 < std::min(b1 + 2, n_bins[1]); ++i1){
+        for (int i2 = std::max(b2 - 1, 0);
+             i2 < std::min(b2 + 2, n_bins[2]); ++i2){
+            const int b = (i0 * n_bins[1] + i1) * n_bins[2] + i2;
+            for (int ig = bin_begin[b]; ig < bin_begin[b + 1]; ++ig){
+                const int g = bin_ghosts[ig];
+                const int j = ghost_atom[g];
+                if (half == true and j > i) continue;
+
+                const auto& tr = ghost_trans[ghost_trans_id[g]];
+                dx = pos[0][j] - pos[0][i] + tr[0];
+                dy = pos[1][j] - pos[1][i] + tr[1];
+                dz = pos[2][j] - pos[2][i] + tr[2];
+                dis = sqrt(dx*dx + dy*dy + dz*dz);
+                if (dis < cutoff and dis > 1e-10){
+                    if (half == true and j == i){
+                        if (dz >= tol) bool_half = true;
+                        else if (fabs(dz) < tol and dy >= tol)
+                            bool_half = true;
+                        else if (fabs(dz) < tol and fabs(dy) < tol
+                                 and dx >= tol) bool_half = true;
+                        else bool_half = false;
+                        if (bool_half == false) continue;
+                    }
+                    neighbor_list[i].emplace_back(j);
+                    diff_list[i].emplace_back(vector1d({dx, dy, dz}));
+                }
+            }
+        }
+        }
+        }
+    }
+}
+
+vector1d NeighborLinkedCell::calc_heights(const vector2d& axis){
+
+    /* heights[a] = volume / |axis_b x axis_c| */
+    vector1d heights(3);
+    for (int a = 0; a < 3; ++a){
+        const int b = (a + 1) % 3, c = (a + 2) % 3;
+        const double cx = axis[1][b] * axis[2][c] - axis[2][b] * axis[1][c];
+        const double cy = axis[2][b] * axis[0][c] - axis[0][b] * axis[2][c];
+        const double cz = axis[0][b] * axis[1][c] - axis[1][b] * axis[0][c];
+        const double vol = fabs(axis[0][a] * cx
+                                + axis[1][a] * cy
+                                + axis[2][a] * cz);
+        heights[a] = vol / sqrt(cx*cx + cy*cy + cz*cz);
+    }
+    return heights;
+}
@@ -0,0 +1,60 @@
+/****************************************************************************
+
+        Copyright (C) 2024 Atsuto Seko
+                seko@cms.mtl.kyoto-u.ac.jp
+
+****************************************************************************/
+
+#ifndef __NEIGHBOR_LINKED_CELL
+#define __NEIGHBOR_LINKED_CELL
+
+#include "mlpcpp.h"
+#include "compute/neighbor_utils.h"
+
+/*
+    Linked-cell (binning) neighbor search.
+
+    Periodic images of atoms located within the cutoff distance from
+    the unit cell are generated as ghost atoms. Ghost atoms are then
+    assigned to bins with edge lengths >= cutoff, so that neighbors
+    of each atom are found only in 27 adjacent bins.
+    The cost scales as O(N) for large cells.
+
+    find_neighbors
+    --------------
+    neighbor_list[i]: Atom indices j of neighbors of atom i.
+                      If half = true, only pairs with j < i and
+                      half of the self-images are included,
+                      following the convention of NeighborHalf.
+    diff_list[i]: (x_j + T - x_i) for each neighbor,
+                  where T is a lattice translation.
+*/
+
+class NeighborLinkedCell{
+
+    int n_atom;
+    double cutoff;
+    vector2d pos, ghost_trans;
+    vector1i ghost_atom, ghost_trans_id;
+
+    vector1i n_bins, bin_begin, bin_ghosts;
+    vector1d pmin, bin_size;
+
+    vector1d calc_heights(const vector2d& axis);
+    int bin_index(const double& x, const int a) const;
+
+    public:
+
+    NeighborLinkedCell(const vector2d& axis,
+                       const vector2d& positions_c,
+                       const double& cutoff_i);
+
+    ~NeighborLinkedCell();
+
+    void find_neighbors(const bool half,
+                        vector2i& neighbor_list,
+                        vector3d& diff_list) const;
+
+};
+
+#endif
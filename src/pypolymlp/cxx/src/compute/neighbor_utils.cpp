@@ -0,0 +1,44 @@
+/****************************************************************************
+
+        Copyright (C) 2024 Atsuto Seko
+                seko@cms.mtl.kyoto-u.ac.jp
+
+*****************************************************************************/
+
+#include "compute/neighbor_utils.h"
+
+#include <stdexcept>
+
+
+int calc_inverse_axis(const vector2d& axis, vector2d& axis_inv){
+
+    axis_inv = vector2d(3, vector1d(3));
+    double det = axis[0][0] * axis[1][1] * axis[2][2]
+               + axis[0][1] * axis[1][2] * axis[2][0]
+               + axis[0][2] * axis[1][0] * axis[2][1]
+               - axis[0][2] * axis[1][1] * axis[2][0]
+               - axis[0][1] * axis[1][0] * axis[2][2]
+               - axis[0][0] * axis[1][2] * axis[2][1];
+    axis_inv[0][0] = axis[1][1] * axis[2][2] - axis[1][2] * axis[2][1];
+    axis_inv[0][1] = - (axis[0][1] * axis[2][2] - axis[0][2] * axis[2][1]);
+    axis_inv[0][2] = axis[0][1] * axis[1][2] - axis[0][2] * axis[1][1];
+    axis_inv[1][0] = - (axis[1][0] * axis[2][2] - axis[1][2] * axis[2][0]);
+    axis_inv[1][1] = axis[0][0] * axis[2][2] - axis[0][2] * axis[2][0];
+    axis_inv[1][2] = - (axis[0][0] * axis[1][2] - axis[0][2] * axis[1][0]);
+    axis_inv[2][0] = axis[1][0] * axis[2][1] - axis[1][1] * axis[2][0];
+    axis_inv[2][1] = - (axis[0][0] * axis[2][1] - axis[0][1] * axis[2][0]);
+    axis_inv[2][2] = axis[0][0] * axis[1][1] - axis[0][1] * axis[1][0];
+    for (int i = 0; i < 3; ++i){
+        for (int j = 0; j < 3; ++j) axis_inv[i][j] /= det;
+    }
+    return 0;
+}
+
+bool is_linked_cell(const std::string& method){
+
+    if (method == "linked_cell") return true;
+    else if (method == "brute_force") return false;
+    throw std::invalid_argument(
+        "neighbor_method must be 'brute_force' or 'linked_cell'."
+    );
+}
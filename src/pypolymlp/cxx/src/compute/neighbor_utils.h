@@ -0,0 +1,20 @@
+/****************************************************************************
+
+        Copyright (C) 2024 Atsuto Seko
+                seko@cms.mtl.kyoto-u.ac.jp
+
+****************************************************************************/
+
+#ifndef __NEIGHBOR_UTILS
+#define __NEIGHBOR_UTILS
+
+#include "mlpcpp.h"
+
+/* Inverse of axis (column vectors of lattice). */
+int calc_inverse_axis(const vector2d& axis, vector2d& axis_inv);
+
+/* Return true for "linked_cell" and false for "brute_force".
+   std::invalid_argument is thrown for other methods. */
+bool is_linked_cell(const std::string& method);
+
+#endif
@@ -24,8 +24,48 @@ PolymlpEval::PolymlpEval(const feature_params& fp, const vector1d& coeffs){
 
 }
 
+PolymlpEval::PolymlpEval(BinaryReader& reader){
+
+    reader.read(pot.fp.n_type);
+    reader.read(pot.fp.force);
+    reader.read(pot.fp.params);
+    reader.read(pot.fp.cutoff);
+    reader.read(pot.fp.pair_type);
+    reader.read(pot.fp.des_type);
+    reader.read(pot.fp.model_type);
+    reader.read(pot.fp.maxp);
+    reader.read(pot.fp.maxl);
+    reader.read(pot.fp.lm_array);
+    reader.read(pot.fp.l_comb);
+    reader.read(pot.fp.lm_coeffs);
+    reader.read(type_comb);
+    pot.p_obj.read(reader);
+}
+
 PolymlpEval::~PolymlpEval(){}
 
+void PolymlpEval::write(std::ostream& os) const {
+
+    binary_write(os, pot.fp.n_type);
+    binary_write(os, pot.fp.force);
+    binary_write(os, pot.fp.params);
+    binary_write(os, pot.fp.cutoff);
+    binary_write(os, pot.fp.pair_type);
+    binary_write(os, pot.fp.des_type);
+    binary_write(os, pot.fp.model_type);
+    binary_write(os, pot.fp.maxp);
+    binary_write(os, pot.fp.maxl);
+    binary_write(os, pot.fp.lm_array);
+    binary_write(os, pot.fp.l_comb);
+    binary_write(os, pot.fp.lm_coeffs);
+    binary_write(os, type_comb);
+    pot.p_obj.write(os);
+}
+
+const struct feature_params& PolymlpEval::get_fp() const {
+    return pot.fp;
+}
+
 void PolymlpEval::set_type_comb(){
 
     type_comb = vector2i(pot.fp.n_type, vector1i(pot.fp.n_type));
@@ -50,15 +90,112 @@ void PolymlpEval::eval(const vector2d& positions_c,
                        vector2d& forces,
                        vector1d& stress){
 
+    vector1d energy_atom;
+    vector2d virial_atom;
+    if (pot.fp.des_type == "pair"){
+        eval_pair(positions_c, types, neighbor_half, neighbor_diff,
+                  energy, forces, stress, true,
+                  false, false, energy_atom, virial_atom);
+    }
+    else if (pot.fp.des_type == "gtinv"){
+        eval_gtinv(positions_c, types, neighbor_half, neighbor_diff,
+                   energy, forces, stress, true,
+                   false, false, energy_atom, virial_atom);
+    }
+
+}
+
+void PolymlpEval::eval(const vector2d& positions_c,
+                       const vector1i& types,
+                       const vector2i& neighbor_half,
+                       const vector3d& neighbor_diff,
+                       double& energy,
+                       vector2d& forces){
+
+    vector1d stress, energy_atom;
+    vector2d virial_atom;
+    if (pot.fp.des_type == "pair"){
+        eval_pair(positions_c, types, neighbor_half, neighbor_diff,
+                  energy, forces, stress, false,
+                  false, false, energy_atom, virial_atom);
+    }
+    else if (pot.fp.des_type == "gtinv"){
+        eval_gtinv(positions_c, types, neighbor_half, neighbor_diff,
+                   energy, forces, stress, false,
+                   false, false, energy_atom, virial_atom);
+    }
+}
+
+void PolymlpEval::eval(const vector2d& positions_c,
+                       const vector1i& types,
+                       const vector2i& neighbor_half,
+                       const vector3d& neighbor_diff,
+                       double& energy){
+
+    vector1d energy_atom;
+    eval_atom(positions_c, types, neighbor_half, neighbor_diff, energy_atom);
+    energy = 0.0;
+    for (const auto& e: energy_atom) energy += e;
+}
+
+void PolymlpEval::eval_atom(const vector2d& positions_c,
+                            const vector1i& types,
+                            const vector2i& neighbor_half,
+                            const vector3d& neighbor_diff,
+                            vector1d& energy_atom,
+                            vector2d& forces,
+                            vector2d& virial_atom){
+
+    double energy;
+    vector1d stress;
     if (pot.fp.des_type == "pair"){
         eval_pair(positions_c, types, neighbor_half, neighbor_diff,
-                  energy, forces, stress);
+                  energy, forces, stress, false,
+                  true, true, energy_atom, virial_atom);
     }
     else if (pot.fp.des_type == "gtinv"){
         eval_gtinv(positions_c, types, neighbor_half, neighbor_diff,
-                   energy, forces, stress);
+                   energy, forces, stress, false,
+                   true, true, energy_atom, virial_atom);
     }
+}
+
+void PolymlpEval::eval_atom(const vector2d& positions_c,
+                            const vector1i& types,
+                            const vector2i& neighbor_half,
+                            const vector3d& neighbor_diff,
+                            vector1d& energy_atom,
+                            vector2d& forces){
 
+    double energy;
+    vector1d stress;
+    vector2d virial_atom;
+    if (pot.fp.des_type == "pair"){
+        eval_pair(positions_c, types, neighbor_half, neighbor_diff,
+                  energy, forces, stress, false,
+                  true, false, energy_atom, virial_atom);
+    }
+    else if (pot.fp.des_type == "gtinv"){
+        eval_gtinv(positions_c, types, neighbor_half, neighbor_diff,
+                   energy, forces, stress, false,
+                   true, false, energy_atom, virial_atom);
+    }
+}
+
+void PolymlpEval::eval_atom(const vector2d& positions_c,
+                            const vector1i& types,
+                            const vector2i& neighbor_half,
+                            const vector3d& neighbor_diff,
+                            vector1d& energy_atom){
+
+    if (pot.fp.des_type == "pair"){
+        eval_pair_energy(positions_c, types, neighbor_half, neighbor_diff,
+                         energy_atom);
+    }
+    else if (pot.fp.des_type == "gtinv"){
+        eval_gtinv_energy(positions_c, types, neighbor_half, neighbor_diff,
+                          energy_atom);
+    }
 }
 
 /*--- feature_type = pair ----------------------------------------------*/
@@ -69,23 +206,45 @@ void PolymlpEval::eval_pair(const vector2d& positions_c,
                             const vector3d& neighbor_diff,
                             double& energy,
                             vector2d& forces,
-                            vector1d& stress){
+                            vector1d& stress,
+                            const bool compute_stress,
+                            const bool per_atom,
+                            const bool per_atom_virial,
+                            vector1d& energy_atom,
+                            vector2d& virial_atom){
 
     const auto& ntc_map = pot.p_obj.get_ntc_map();
 
     const int n_atom = types.size();
     vector2d antc, prod_sum_e, prod_sum_f;
     compute_antc(positions_c, types, neighbor_half, neighbor_diff, antc);
-    compute_sum_of_prod_antc(types, antc, prod_sum_e, prod_sum_f);
+    compute_sum_of_prod_antc(types, antc, prod_sum_e, prod_sum_f, true);
+    if (per_atom == true){
+        compute_energy_atom_antc(antc, prod_sum_e, energy_atom);
+    }
+    if (per_atom_virial == true){
+        virial_atom = vector2d(n_atom, vector1d(6, 0.0));
+    }
 
-    energy = 0.0;
+    double energy_sum(0.0);
     forces.resize(n_atom);
     for (int i = 0; i < n_atom; ++i) forces[i] = vector1d(3, 0.0);
     stress = vector1d(6, 0.0);
 
+    /* atom-parallel with thread-local forces and stress */
+    #ifdef _OPENMP
+    #pragma omp parallel reduction(+:energy_sum) if(atom_parallel_enabled())
+    #endif
+    {
     int type1,type2;
     double dx, dy, dz, dis, e_ij, f_ij, fx, fy, fz;
     vector1d fn, fn_d;
+    vector1d forces_t(3 * n_atom, 0.0), stress_t(6, 0.0), virial_t;
+    if (per_atom_virial == true) virial_t = vector1d(6 * n_atom, 0.0);
+
+    #ifdef _OPENMP
+    #pragma omp for schedule(guided,1) nowait
+    #endif
     for (int i = 0; i < n_atom; ++i) {
         type1 = types[i];
         const vector1i& neighbor_i = neighbor_half[i];
@@ -117,18 +276,80 @@ void PolymlpEval::eval_pair(const vector2d& positions_c,
                 fy = f_ij * dy;
                 fz = f_ij * dz;
 
-                energy += e_ij;
-                forces[i][0] += fx, forces[i][1] += fy, forces[i][2] += fz;
-                forces[j][0] -= fx, forces[j][1] -= fy, forces[j][2] -= fz;
-                stress[0] += dx * fx;
-                stress[1] += dy * fy;
-                stress[2] += dz * fz;
-                stress[3] += dx * fy;
-                stress[4] += dy * fz;
-                stress[5] += dz * fx;
+                energy_sum += e_ij;
+                forces_t[3*i] += fx;
+                forces_t[3*i+1] += fy;
+                forces_t[3*i+2] += fz;
+                forces_t[3*j] -= fx;
+                forces_t[3*j+1] -= fy;
+                forces_t[3*j+2] -= fz;
+                if (compute_stress == true){
+                    stress_t[0] += dx * fx;
+                    stress_t[1] += dy * fy;
+                    stress_t[2] += dz * fz;
+                    stress_t[3] += dx * fy;
+                    stress_t[4] += dy * fz;
+                    stress_t[5] += dz * fx;
+                }
+                if (per_atom_virial == true){
+                    const double v[6] = {0.5 * dx * fx, 0.5 * dy * fy,
+                                         0.5 * dz * fz, 0.5 * dx * fy,
+                                         0.5 * dy * fz, 0.5 * dz * fx};
+                    for (int a = 0; a < 6; ++a){
+                        virial_t[6*i+a] += v[a];
+                        virial_t[6*j+a] += v[a];
+                    }
+                }
             }
         }
     }
+
+    #ifdef _OPENMP
+    #pragma omp critical
+    #endif
+    {
+    for (int i = 0; i < n_atom; ++i){
+        for (int a = 0; a < 3; ++a) forces[i][a] += forces_t[3*i+a];
+    }
+    for (int a = 0; a < 6; ++a) stress[a] += stress_t[a];
+    if (per_atom_virial == true){
+        for (int i = 0; i < n_atom; ++i){
+            for (int a = 0; a < 6; ++a) virial_atom[i][a] += virial_t[6*i+a];
+        }
+    }
+    }
+    }
+    energy = energy_sum;
+}
+
+void PolymlpEval::eval_pair_energy(const vector2d& positions_c,
+                                   const vector1i& types,
+                                   const vector2i& neighbor_half,
+                                   const vector3d& neighbor_diff,
+                                   vector1d& energy_atom){
+
+    vector2d antc, prod_sum_e, prod_sum_f;
+    compute_antc(positions_c, types, neighbor_half, neighbor_diff, antc);
+    compute_sum_of_prod_antc(types, antc, prod_sum_e, prod_sum_f, false);
+    compute_energy_atom_antc(antc, prod_sum_e, energy_atom);
+}
+
+void PolymlpEval::compute_energy_atom_antc(const vector2d& antc,
+                                           const vector2d& prod_sum_e,
+                                           vector1d& energy_atom){
+
+    /* sum of pair energies e_ij is equal to sum_i antc_i * prod_sum_e_i,
+       where antc_i * prod_sum_e_i is the energy of atom i. */
+    const int n_atom = antc.size();
+    energy_atom = vector1d(n_atom, 0.0);
+    #ifdef _OPENMP
+    #pragma omp parallel for if(atom_parallel_enabled())
+    #endif
+    for (int i = 0; i < n_atom; ++i){
+        for (size_t idx = 0; idx < antc[i].size(); ++idx){
+            energy_atom[i] += antc[i][idx] * prod_sum_e[i][idx];
+        }
+    }
 }
 
 void PolymlpEval::compute_antc(const vector2d& positions_c,
@@ -140,13 +361,41 @@ void PolymlpEval::compute_antc(const vector2d& positions_c,
     const int n_atom = types.size();
     const auto& ntc_map = pot.p_obj.get_ntc_map();
 
-    antc = vector2d(n_atom, vector1d(ntc_map.size(), 0.0));
-
+    const int n_keys = ntc_map.size();
+    antc = vector2d(n_atom, vector1d(n_keys, 0.0));
+
+    /* atom-parallel: contributions to atom i are accumulated in a
+       thread-local row and those to atom j are added with striped locks.
+       Thread-local memory is O(n_keys), independent of n_atom. */
+    const bool parallel = atom_parallel_enabled();
+    #ifdef _OPENMP
+    const bool use_locks = parallel and omp_get_max_threads() > 1;
+    #else
+    const bool use_locks = false;
+    #endif
+    AtomLocks locks(use_locks ? n_atom : 0);
+
+    #ifdef _OPENMP
+    #pragma omp parallel if(parallel)
+    #endif
+    {
+    #ifdef _OPENMP
+    const bool lock = use_locks and omp_get_num_threads() > 1;
+    #else
+    const bool lock = false;
+    #endif
     int type1, type2;
     double dx, dy, dz, dis;
-    vector1d fn;
+    vector1d fn, antc_i(n_keys);
+    vector1i keys_j;
+    vector1d vals_j;
+
+    #ifdef _OPENMP
+    #pragma omp for schedule(guided,1)
+    #endif
     for (int i = 0; i < n_atom; ++i) {
         type1 = types[i];
+        std::fill(antc_i.begin(), antc_i.end(), 0.0);
         const vector1i& neighbor_i = neighbor_half[i];
         for (size_t jj = 0; jj < neighbor_i.size(); ++jj){
             int j = neighbor_i[jj];
@@ -158,30 +407,47 @@ void PolymlpEval::compute_antc(const vector2d& positions_c,
             if (dis < pot.fp.cutoff){
                 type2 = types[j];
                 get_fn_(dis, pot.fp, fn);
+                keys_j.clear();
+                vals_j.clear();
                 int idx(0);
                 for (const auto& ntc: ntc_map){
                     if (type_comb[type1][type2] == ntc.tc){
-                        antc[i][idx] += fn[ntc.n];
-                        antc[j][idx] += fn[ntc.n];
+                        antc_i[idx] += fn[ntc.n];
+                        keys_j.emplace_back(idx);
+                        vals_j.emplace_back(fn[ntc.n]);
                     }
                     ++idx;
                 }
+                if (lock) locks.set(j);
+                for (size_t k = 0; k < keys_j.size(); ++k){
+                    antc[j][keys_j[k]] += vals_j[k];
+                }
+                if (lock) locks.unset(j);
             }
         }
+        if (lock) locks.set(i);
+        for (int idx = 0; idx < n_keys; ++idx) antc[i][idx] += antc_i[idx];
+        if (lock) locks.unset(i);
+    }
     }
 }
 
 void PolymlpEval::compute_sum_of_prod_antc(const vector1i& types,
                                            const vector2d& antc,
                                            vector2d& prod_antc_sum_e,
-                                           vector2d& prod_antc_sum_f){
+                                           vector2d& prod_antc_sum_f,
+                                           const bool force){
 
     const auto& ntc_map = pot.p_obj.get_ntc_map();
 
     const int n_atom = antc.size();
     prod_antc_sum_e = vector2d(n_atom, vector1d(ntc_map.size(), 0.0));
-    prod_antc_sum_f = vector2d(n_atom, vector1d(ntc_map.size(), 0.0));
+    if (force == true)
+        prod_antc_sum_f = vector2d(n_atom, vector1d(ntc_map.size(), 0.0));
 
+    #ifdef _OPENMP
+    #pragma omp parallel for schedule(guided,1) if(atom_parallel_enabled())
+    #endif
     for (int i = 0; i < n_atom; ++i) {
         int type1 = types[i];
         const auto& linear_features = pot.p_obj.get_linear_features(type1);
@@ -218,10 +484,10 @@ void PolymlpEval::compute_sum_of_prod_antc(const vector1i& types,
                 prod = prod_antc[pterm.prod_key]
                      * prod_features[pterm.prod_features_key];
                 sum_e += pterm.coeff_e * prod;
-                sum_f += pterm.coeff_f * prod;
+                if (force == true) sum_f += pterm.coeff_f * prod;
             }
             prod_antc_sum_e[i][idx] = 0.5 * sum_e;
-            prod_antc_sum_f[i][idx] = 0.5 * sum_f;
+            if (force == true) prod_antc_sum_f[i][idx] = 0.5 * sum_f;
             ++idx;
         }
     }
@@ -235,7 +501,12 @@ void PolymlpEval::eval_gtinv(const vector2d& positions_c,
                              const vector3d& neighbor_diff,
                              double& energy,
                              vector2d& forces,
-                             vector1d& stress){
+                             vector1d& stress,
+                             const bool compute_stress,
+                             const bool per_atom,
+                             const bool per_atom_virial,
+                             vector1d& energy_atom,
+                             vector2d& virial_atom){
 
     const int n_atom = types.size();
 
@@ -243,23 +514,39 @@ void PolymlpEval::eval_gtinv(const vector2d& positions_c,
     clock_t t1 = clock();
     compute_anlmtc(positions_c, types, neighbor_half, neighbor_diff, anlmtc);
     clock_t t2 = clock();
-    compute_sum_of_prod_anlmtc(types, anlmtc, prod_sum_e, prod_sum_f);
+    compute_sum_of_prod_anlmtc(types, anlmtc, prod_sum_e, prod_sum_f, true);
+    if (per_atom == true){
+        compute_energy_atom_anlmtc(anlmtc, prod_sum_e, energy_atom);
+    }
+    if (per_atom_virial == true){
+        virial_atom = vector2d(n_atom, vector1d(6, 0.0));
+    }
     clock_t t3 = clock();
 
     const auto& nlmtc_map_no_conj = pot.p_obj.get_nlmtc_map_no_conjugate();
 
-    energy = 0.0;
+    double energy_sum(0.0);
     forces.resize(n_atom);
     for (int i = 0; i < n_atom; ++i) forces[i] = vector1d(3, 0.0);
     stress = vector1d(6, 0.0);
 
+    /* atom-parallel with thread-local forces and stress */
+    #ifdef _OPENMP
+    #pragma omp parallel reduction(+:energy_sum) if(atom_parallel_enabled())
+    #endif
+    {
     int type1,type2;
     double dx, dy, dz, dis;
     double e_ij, fx, fy, fz;
     dc val, valx, valy, valz, d1;
     vector1d fn, fn_d;
     vector1dc ylm, ylm_dx, ylm_dy, ylm_dz;
+    vector1d forces_t(3 * n_atom, 0.0), stress_t(6, 0.0), virial_t;
+    if (per_atom_virial == true) virial_t = vector1d(6 * n_atom, 0.0);
 
+    #ifdef _OPENMP
+    #pragma omp for schedule(guided,1) nowait
+    #endif
     for (int i = 0; i < n_atom; ++i) {
         type1 = types[i];
         const vector1i& neighbor_i = neighbor_half[i];
@@ -310,18 +597,50 @@ void PolymlpEval::eval_gtinv(const vector2d& positions_c,
                         }
                     }
                 }
-                energy += e_ij;
-                forces[i][0] += fx, forces[i][1] += fy, forces[i][2] += fz;
-                forces[j][0] -= fx, forces[j][1] -= fy, forces[j][2] -= fz;
-                stress[0] += dx * fx;
-                stress[1] += dy * fy;
-                stress[2] += dz * fz;
-                stress[3] += dx * fy;
-                stress[4] += dy * fz;
-                stress[5] += dz * fx;
+                energy_sum += e_ij;
+                forces_t[3*i] += fx;
+                forces_t[3*i+1] += fy;
+                forces_t[3*i+2] += fz;
+                forces_t[3*j] -= fx;
+                forces_t[3*j+1] -= fy;
+                forces_t[3*j+2] -= fz;
+                if (compute_stress == true){
+                    stress_t[0] += dx * fx;
+                    stress_t[1] += dy * fy;
+                    stress_t[2] += dz * fz;
+                    stress_t[3] += dx * fy;
+                    stress_t[4] += dy * fz;
+                    stress_t[5] += dz * fx;
+                }
+                if (per_atom_virial == true){
+                    const double v[6] = {0.5 * dx * fx, 0.5 * dy * fy,
+                                         0.5 * dz * fz, 0.5 * dx * fy,
+                                         0.5 * dy * fz, 0.5 * dz * fx};
+                    for (int a = 0; a < 6; ++a){
+                        virial_t[6*i+a] += v[a];
+                        virial_t[6*j+a] += v[a];
+                    }
+                }
             }
         }
     }
+
+    #ifdef _OPENMP
+    #pragma omp critical
+    #endif
+    {
+    for (int i = 0; i < n_atom; ++i){
+        for (int a = 0; a < 3; ++a) forces[i][a] += forces_t[3*i+a];
+    }
+    for (int a = 0; a < 6; ++a) stress[a] += stress_t[a];
+    if (per_atom_virial == true){
+        for (int i = 0; i < n_atom; ++i){
+            for (int a = 0; a < 6; ++a) virial_atom[i][a] += virial_t[6*i+a];
+        }
+    }
+    }
+    }
+    energy = energy_sum;
     /*
     clock_t t4 = clock();
     std::cout << "all"
@@ -333,6 +652,42 @@ void PolymlpEval::eval_gtinv(const vector2d& positions_c,
 
 }
 
+void PolymlpEval::eval_gtinv_energy(const vector2d& positions_c,
+                                    const vector1i& types,
+                                    const vector2i& neighbor_half,
+                                    const vector3d& neighbor_diff,
+                                    vector1d& energy_atom){
+
+    /* The second loop over neighbors and derivatives of fn and ylm
+       are not required for energy. */
+    vector2dc anlmtc, prod_sum_e, prod_sum_f;
+    compute_anlmtc(positions_c, types, neighbor_half, neighbor_diff, anlmtc);
+    compute_sum_of_prod_anlmtc(types, anlmtc, prod_sum_e, prod_sum_f, false);
+    compute_energy_atom_anlmtc(anlmtc, prod_sum_e, energy_atom);
+}
+
+void PolymlpEval::compute_energy_atom_anlmtc(const vector2dc& anlmtc,
+                                             const vector2dc& prod_sum_e,
+                                             vector1d& energy_atom){
+
+    /* sum of pair energies e_ij is equal to sum_i Re(anlmtc_i * prod_sum_e_i),
+       where Re(anlmtc_i * prod_sum_e_i) is the energy of atom i. */
+    const auto& nlmtc_map_no_conj = pot.p_obj.get_nlmtc_map_no_conjugate();
+
+    const int n_atom = anlmtc.size();
+    energy_atom = vector1d(n_atom, 0.0);
+    #ifdef _OPENMP
+    #pragma omp parallel for if(atom_parallel_enabled())
+    #endif
+    for (int i = 0; i < n_atom; ++i){
+        for (const auto& nlmtc: nlmtc_map_no_conj){
+            const double e = prod_real(anlmtc[i][nlmtc.nlmtc_key],
+                                       prod_sum_e[i][nlmtc.nlmtc_noconj_key]);
+            if (nlmtc.lm.m == 0) energy_atom[i] += 0.5 * e;
+            else energy_atom[i] += e;
+        }
+    }
+}
 
 void PolymlpEval::compute_anlmtc(const vector2d& positions_c,
                                  const vector1i& types,
@@ -343,14 +698,44 @@ void PolymlpEval::compute_anlmtc(const vector2d& positions_c,
     const auto& nlmtc_map_no_conj = pot.p_obj.get_nlmtc_map_no_conjugate();
 
     const int n_atom = types.size();
-    vector2d anlmtc_r(n_atom, vector1d(nlmtc_map_no_conj.size(), 0.0));
-    vector2d anlmtc_i(n_atom, vector1d(nlmtc_map_no_conj.size(), 0.0));
-
+    const int n_keys = nlmtc_map_no_conj.size();
+    vector2d anlmtc_r(n_atom, vector1d(n_keys, 0.0));
+    vector2d anlmtc_i(n_atom, vector1d(n_keys, 0.0));
+
+    /* atom-parallel: contributions to atom i are accumulated in
+       thread-local rows and those to atom j are added with striped locks.
+       Thread-local memory is O(n_keys), independent of n_atom. */
+    const bool parallel = atom_parallel_enabled();
+    #ifdef _OPENMP
+    const bool use_locks = parallel and omp_get_max_threads() > 1;
+    #else
+    const bool use_locks = false;
+    #endif
+    AtomLocks locks(use_locks ? n_atom : 0);
+
+    #ifdef _OPENMP
+    #pragma omp parallel if(parallel)
+    #endif
+    {
+    #ifdef _OPENMP
+    const bool lock = use_locks and omp_get_num_threads() > 1;
+    #else
+    const bool lock = false;
+    #endif
     int type1, type2;
     double dx, dy, dz, dis;
     vector1d fn; vector1dc ylm; dc val;
+    vector1d anlmtc_r_i(n_keys), anlmtc_i_i(n_keys);
+    vector1i keys_j;
+    vector1dc vals_j;
+
+    #ifdef _OPENMP
+    #pragma omp for schedule(guided,1)
+    #endif
     for (int i = 0; i < n_atom; ++i) {
         type1 = types[i];
+        std::fill(anlmtc_r_i.begin(), anlmtc_r_i.end(), 0.0);
+        std::fill(anlmtc_i_i.begin(), anlmtc_i_i.end(), 0.0);
         const vector1i& neighbor_i = neighbor_half[i];
         for (size_t jj = 0; jj < neighbor_i.size(); ++jj){
             int j = neighbor_i[jj];
@@ -365,19 +750,34 @@ void PolymlpEval::compute_anlmtc(const vector2d& positions_c,
                 get_fn_(dis, pot.fp, fn);
                 get_ylm_(sph[0], sph[1], pot.fp.maxl, ylm);
                 const int tc12 = type_comb[type1][type2];
+                keys_j.clear();
+                vals_j.clear();
                 for (const auto& nlmtc: nlmtc_map_no_conj){
                     const auto& lm_attr = nlmtc.lm;
                     const int idx = nlmtc.nlmtc_noconj_key;
                     if (tc12 == nlmtc.tc){
                         val = fn[nlmtc.n] * ylm[lm_attr.ylmkey];
-                        anlmtc_r[i][idx] += val.real();
-                        anlmtc_r[j][idx] += val.real() * lm_attr.sign_j;
-                        anlmtc_i[i][idx] += val.imag();
-                        anlmtc_i[j][idx] += val.imag() * lm_attr.sign_j;
+                        anlmtc_r_i[idx] += val.real();
+                        anlmtc_i_i[idx] += val.imag();
+                        keys_j.emplace_back(idx);
+                        vals_j.emplace_back(val * lm_attr.sign_j);
                     }
                 }
+                if (lock) locks.set(j);
+                for (size_t k = 0; k < keys_j.size(); ++k){
+                    anlmtc_r[j][keys_j[k]] += vals_j[k].real();
+                    anlmtc_i[j][keys_j[k]] += vals_j[k].imag();
+                }
+                if (lock) locks.unset(j);
             }
         }
+        if (lock) locks.set(i);
+        for (int idx = 0; idx < n_keys; ++idx){
+            anlmtc_r[i][idx] += anlmtc_r_i[idx];
+            anlmtc_i[i][idx] += anlmtc_i_i[idx];
+        }
+        if (lock) locks.unset(i);
+    }
     }
     compute_anlmtc_conjugate(anlmtc_r, anlmtc_i, anlmtc);
 }
@@ -392,9 +792,9 @@ void PolymlpEval::compute_anlmtc_conjugate(const vector2d& anlmtc_r,
     const int n_atom = anlmtc_r.size();
     anlmtc = vector2dc(n_atom, vector1dc(n_nlmtc_all, 0.0));
 
-//    #ifdef _OPENMP
-//    #pragma omp parallel for schedule(guided)
-//    #endif
+    #ifdef _OPENMP
+    #pragma omp parallel for schedule(guided) if(atom_parallel_enabled())
+    #endif
     for (int i = 0; i < n_atom; ++i) {
         int idx(0);
         for (const auto& nlmtc: nlmtc_map_no_conj){
@@ -411,14 +811,18 @@ void PolymlpEval::compute_anlmtc_conjugate(const vector2d& anlmtc_r,
 void PolymlpEval::compute_sum_of_prod_anlmtc(const vector1i& types,
                                              const vector2dc& anlmtc,
                                              vector2dc& prod_sum_e,
-                                             vector2dc& prod_sum_f){
+                                             vector2dc& prod_sum_f,
+                                             const bool force){
 
     const auto& nlmtc_map_no_conj = pot.p_obj.get_nlmtc_map_no_conjugate();
     const int n_head_keys = nlmtc_map_no_conj.size();
     const int n_atom = types.size();
     prod_sum_e = vector2dc(n_atom, vector1dc(n_head_keys));
-    prod_sum_f = vector2dc(n_atom, vector1dc(n_head_keys));
+    if (force == true) prod_sum_f = vector2dc(n_atom, vector1dc(n_head_keys));
 
+    #ifdef _OPENMP
+    #pragma omp parallel for schedule(guided,1) if(atom_parallel_enabled())
+    #endif
     for (int i = 0; i < n_atom; ++i) {
         int type1 = types[i];
 
@@ -455,9 +859,11 @@ void PolymlpEval::compute_sum_of_prod_anlmtc(const vector1i& types,
                     sum_e += pterm.coeff_e
                            * prod_features[pterm.prod_features_key]
                            * prod_anlmtc_erased[pterm.prod_key];
-                    sum_f += pterm.coeff_f
-                           * prod_features[pterm.prod_features_key]
-                           * prod_anlmtc_erased[pterm.prod_key];
+                    if (force == true){
+                        sum_f += pterm.coeff_f
+                               * prod_features[pterm.prod_features_key]
+                               * prod_anlmtc_erased[pterm.prod_key];
+                    }
                     /*
                     prod = prod_anlmtc_erased[pterm.prod_key]
                           * prod_features[pterm.prod_features_key];
@@ -467,7 +873,7 @@ void PolymlpEval::compute_sum_of_prod_anlmtc(const vector1i& types,
                 }
             }
             prod_sum_e[i][key] = sum_e;
-            prod_sum_f[i][key] = sum_f;
+            if (force == true) prod_sum_f[i][key] = sum_f;
         }
 
         clock_t t5 = clock();
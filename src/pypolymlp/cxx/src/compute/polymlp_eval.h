@@ -14,6 +14,7 @@
 #include "polymlp/polymlp_model_params.h"
 #include "polymlp/polymlp_features.h"
 #include "polymlp/polymlp_potential.h"
+#include "compute/atom_locks.h"
 
 class PolymlpEval {
 
@@ -37,7 +38,8 @@ class PolymlpEval {
     void compute_sum_of_prod_antc(const vector1i& types,
                                   const vector2d& antc,
                                   vector2d& prod_antc_sum_e,
-                                  vector2d& prod_antc_sum_f);
+                                  vector2d& prod_antc_sum_f,
+                                  const bool force);
 
     void eval_pair(const vector2d& positions_c,
                    const vector1i& types,
@@ -45,7 +47,22 @@ class PolymlpEval {
                    const vector3d& neighbor_diff,
                    double& energy,
                    vector2d& forces,
-                   vector1d& stress);
+                   vector1d& stress,
+                   const bool compute_stress,
+                   const bool per_atom,
+                   const bool per_atom_virial,
+                   vector1d& energy_atom,
+                   vector2d& virial_atom);
+
+    void eval_pair_energy(const vector2d& positions_c,
+                          const vector1i& types,
+                          const vector2i& neighbor_half,
+                          const vector3d& neighbor_diff,
+                          vector1d& energy_atom);
+
+    void compute_energy_atom_antc(const vector2d& antc,
+                                  const vector2d& prod_sum_e,
+                                  vector1d& energy_atom);
 
     /* for feature_type = gtinv */
     void compute_anlmtc(const vector2d& positions_c,
@@ -59,7 +76,8 @@ class PolymlpEval {
     void compute_sum_of_prod_anlmtc(const vector1i& types,
                                     const vector2dc& anlmtc,
                                     vector2dc& prod_sum_e,
-                                    vector2dc& prod_sum_f);
+                                    vector2dc& prod_sum_f,
+                                    const bool force);
 
     void compute_linear_features(const vector1d& prod_anlmtc,
                                  const int type1,
@@ -82,14 +100,35 @@ class PolymlpEval {
                     const vector3d& neighbor_diff,
                     double& energy,
                     vector2d& forces,
-                    vector1d& stress);
+                    vector1d& stress,
+                    const bool compute_stress,
+                    const bool per_atom,
+                    const bool per_atom_virial,
+                    vector1d& energy_atom,
+                    vector2d& virial_atom);
+
+    void eval_gtinv_energy(const vector2d& positions_c,
+                           const vector1i& types,
+                           const vector2i& neighbor_half,
+                           const vector3d& neighbor_diff,
+                           vector1d& energy_atom);
+
+    void compute_energy_atom_anlmtc(const vector2dc& anlmtc,
+                                    const vector2dc& prod_sum_e,
+                                    vector1d& energy_atom);
 
     public:
 
     PolymlpEval();
     PolymlpEval(const feature_params& fp, const vector1d& coeffs);
+    /* potential constructed from a binary written by write */
+    PolymlpEval(BinaryReader& reader);
     ~PolymlpEval();
 
+    /* binary serialization of feature parameters and potential mappings */
+    void write(std::ostream& os) const;
+    const struct feature_params& get_fp() const;
+
     void eval(const vector2d& positions_c,
               const vector1i& types,
               const vector2i& neighbor_half,
@@ -97,6 +136,48 @@ class PolymlpEval {
               double& energy,
               vector2d& forces,
               vector1d& stress);
+
+    /* energy and forces (stress is not computed) */
+    void eval(const vector2d& positions_c,
+              const vector1i& types,
+              const vector2i& neighbor_half,
+              const vector3d& neighbor_diff,
+              double& energy,
+              vector2d& forces);
+
+    /* energy only (derivatives are not computed) */
+    void eval(const vector2d& positions_c,
+              const vector1i& types,
+              const vector2i& neighbor_half,
+              const vector3d& neighbor_diff,
+              double& energy);
+
+    /* per-atom energies (n_atom), forces, and per-atom virials (n_atom, 6).
+       Virial of each pair is equally divided into the two atoms,
+       in the order of xx, yy, zz, xy, yz, zx. */
+    void eval_atom(const vector2d& positions_c,
+                   const vector1i& types,
+                   const vector2i& neighbor_half,
+                   const vector3d& neighbor_diff,
+                   vector1d& energy_atom,
+                   vector2d& forces,
+                   vector2d& virial_atom);
+
+    /* per-atom energies (n_atom) and forces (per-atom virials are not
+       computed) */
+    void eval_atom(const vector2d& positions_c,
+                   const vector1i& types,
+                   const vector2i& neighbor_half,
+                   const vector3d& neighbor_diff,
+                   vector1d& energy_atom,
+                   vector2d& forces);
+
+    /* per-atom energies only */
+    void eval_atom(const vector2d& positions_c,
+                   const vector1i& types,
+                   const vector2i& neighbor_half,
+                   const vector3d& neighbor_diff,
+                   vector1d& energy_atom);
 };
 
 #endif
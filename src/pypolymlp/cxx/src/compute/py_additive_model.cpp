@@ -15,14 +15,50 @@ PyAdditiveModel::PyAdditiveModel(const std::vector<py::dict>& params_dict_array,
                                  const std::vector<bool>& force_dataset,
                                  const vector1i& n_atoms_all){
 
+    compute(params_dict_array, axis, positions_c, types,
+            n_st_dataset, force_dataset, n_atoms_all, nullptr);
+}
+
+PyAdditiveModel::PyAdditiveModel(const std::vector<py::dict>& params_dict_array,
+                                 const vector3d& axis,
+                                 const vector3d& positions_c,
+                                 const vector2i& types,
+                                 const vector1i& n_st_dataset,
+                                 const std::vector<bool>& force_dataset,
+                                 const vector1i& n_atoms_all,
+                                 py::array_t<double, py::array::c_style>& x_out){
+
+    compute(params_dict_array, axis, positions_c, types,
+            n_st_dataset, force_dataset, n_atoms_all, &x_out);
+}
+
+void PyAdditiveModel::compute(const std::vector<py::dict>& params_dict_array,
+                              const vector3d& axis,
+                              const vector3d& positions_c,
+                              const vector2i& types,
+                              const vector1i& n_st_dataset,
+                              const std::vector<bool>& force_dataset,
+                              const vector1i& n_atoms_all,
+                              py::array_t<double, py::array::c_style>* x_out){
+
     std::vector<struct feature_params> fp_array;
     std::vector<ModelParams> modelp_array;
     std::vector<FunctionFeatures> features_array;
-    bool element_swap, print_memory;
+    bool element_swap, print_memory, linked_cell(false);
+    int atom_parallel_threshold = 256;
     for (const auto& params_dict: params_dict_array){
         const int n_type = params_dict["n_type"].cast<int>();
         element_swap = params_dict["element_swap"].cast<bool>();
         print_memory = params_dict["print_memory"].cast<bool>();
+        if (params_dict.contains("neighbor_method")){
+            const auto& method
+                = params_dict["neighbor_method"].cast<std::string>();
+            linked_cell = is_linked_cell(method);
+        }
+        if (params_dict.contains("atom_parallel_threshold")){
+            atom_parallel_threshold
+                = params_dict["atom_parallel_threshold"].cast<int>();
+        }
 
         const py::dict& model = params_dict["model"].cast<py::dict>();
         const auto& pair_params = model["pair_params"].cast<vector2d>();
@@ -85,7 +121,7 @@ PyAdditiveModel::PyAdditiveModel(const std::vector<py::dict>& params_dict_array,
                                           fp.n_type);
 
         Neighbor neigh(axis[0], positions_c[0], types_mod,
-                       fp.n_type, fp.cutoff);
+                       fp.n_type, fp.cutoff, linked_cell);
         ModelFast mod(neigh.get_dis_array(),
                       neigh.get_diff_array(),
                       neigh.get_atom2_array(),
@@ -101,17 +137,42 @@ PyAdditiveModel::PyAdditiveModel(const std::vector<py::dict>& params_dict_array,
         std::cout << " matrix shape (X) = ("
             << total_n_data << "," << n_features << ")" << std::endl;
         std::cout << std::fixed << std::setprecision(2);
-        std::cout << " Estimated memory allocation = "
-            << double(total_n_data) * double(n_features) * 8e-9
+        if (x_out == nullptr) std::cout << " Estimated memory allocation = ";
+        else std::cout << " Size of X in output buffer = ";
+        std::cout << double(total_n_data) * double(n_features) * 8e-9
             << " (GB)" << std::endl;
         std::cout << std::fixed << std::setprecision(10);
     }
 
-    x_all = Eigen::MatrixXd(total_n_data, n_features);
-    #ifdef _OPENMP
-    #pragma omp parallel for schedule(guided,1)
-    #endif
+    /* Structures with many atoms are computed one by one
+       using atom-parallel loops. */
+    vector1i st_small, st_large;
     for (int i = 0; i < n_st; ++i){
+        if (int(types[i].size()) < atom_parallel_threshold)
+            st_small.emplace_back(i);
+        else st_large.emplace_back(i);
+    }
+
+    /* X is written into x_all or into the row-major buffer x_out. */
+    double* x_ptr;
+    int outer_stride(total_n_data), inner_stride(1);
+    if (x_out == nullptr){
+        x_all = Eigen::MatrixXd(total_n_data, n_features);
+        x_ptr = x_all.data();
+    }
+    else {
+        if (x_out->ndim() != 2 or x_out->shape(0) != total_n_data
+            or x_out->shape(1) != n_features)
+            throw std::runtime_error("Inconsistent shape of output X.");
+        if (not x_out->writeable())
+            throw std::runtime_error("Output X is not writeable.");
+        x_ptr = x_out->mutable_data();
+        outer_stride = 1, inner_stride = n_features;
+    }
+    MatrixStrideMap x(x_ptr, total_n_data, n_features,
+                      MatrixStride(outer_stride, inner_stride));
+
+    auto compute_structure = [&](const int i, const bool atom_parallel){
         std::set<int> uniq_types(types[i].begin(), types[i].end());
         for (size_t n = 0; n < cumulative_n_features.size(); ++n){
             struct feature_params fp1 = fp_array[n];
@@ -130,33 +191,25 @@ PyAdditiveModel::PyAdditiveModel(const std::vector<py::dict>& params_dict_array,
                            positions_c[i],
                            types_mod,
                            fp1.n_type,
-                           fp1.cutoff);
+                           fp1.cutoff,
+                           linked_cell);
             ModelFast mod(neigh.get_dis_array(),
                           neigh.get_diff_array(),
                           neigh.get_atom2_array(),
                           types_mod, fp1,
-                          modelp1, features1);
-
-            const auto &xe = mod.get_xe_sum();
-            for (size_t j = 0; j < xe.size(); ++j)
-                x_all(i,first_index+j) = xe[j];
-
-            if (force_st[i] == true){
-                const auto &xf = mod.get_xf_sum();
-                const auto &xs = mod.get_xs_sum();
-                for (size_t j = 0; j < xf.size(); ++j) {
-                    for (size_t k = 0; k < xf[j].size(); ++k){
-                        x_all(xf_begin[i]+j, first_index+k) = xf[j][k];
-                    }
-                }
-                for (size_t j = 0; j < xs.size(); ++j) {
-                    for (size_t k = 0; k < xs[j].size(); ++k){
-                        x_all(xs_begin[i]+j, first_index+k) = xs[j][k];
-                    }
-                }
-            }
+                          modelp1, features1,
+                          x, i, xs_begin[i], xf_begin[i], first_index,
+                          atom_parallel);
         }
+    };
+
+    #ifdef _OPENMP
+    #pragma omp parallel for schedule(guided,1)
+    #endif
+    for (size_t ii = 0; ii < st_small.size(); ++ii){
+        compute_structure(st_small[ii], false);
     }
+    for (const auto i: st_large) compute_structure(i, true);
 }
 
 PyAdditiveModel::~PyAdditiveModel(){}
@@ -17,6 +17,7 @@
 
 #include <Eigen/Core>
 #include <pybind11/pybind11.h>
+#include <pybind11/numpy.h>
 #include <pybind11/stl.h>
 
 namespace py = pybind11;
@@ -37,6 +38,16 @@ class PyAdditiveModel {
     vector1i modify_types(const std::vector<int>& types_orig,
                           const int n_type_orig,
                           const int n_type);
+
+    void compute(const std::vector<py::dict>& params_dict_array,
+                 const vector3d& axis,
+                 const vector3d& positions_c,
+                 const vector2i& types,
+                 const vector1i& n_st_dataset,
+                 const std::vector<bool>& force_dataset,
+                 const vector1i& n_atoms_all,
+                 py::array_t<double, py::array::c_style>* x_out);
+
     public:
 
     PyAdditiveModel(const std::vector<py::dict>& params_dict_array,
@@ -47,6 +58,17 @@ class PyAdditiveModel {
                     const std::vector<bool>& force_dataset,
                     const vector1i& n_atoms_all);
 
+    /* X is written into x_out with shape (total_n_data, n_features),
+       such as a numpy memmap, instead of get_x(). */
+    PyAdditiveModel(const std::vector<py::dict>& params_dict_array,
+                    const vector3d& axis,
+                    const vector3d& positions_c,
+                    const vector2i& types,
+                    const vector1i& n_st_dataset,
+                    const std::vector<bool>& force_dataset,
+                    const vector1i& n_atoms_all,
+                    py::array_t<double, py::array::c_style>& x_out);
+
     ~PyAdditiveModel();
 
     Eigen::MatrixXd& get_x();
@@ -42,6 +42,7 @@ PyFeaturesAttr::PyFeaturesAttr(const py::dict& params_dict){
 
     ModelParams modelp(fp, element_swap);
     type_comb_pair = modelp.get_type_comb_pair();
+    n_features = modelp.get_n_coeff_all();
     const int n_fn = pair_params.size();
     const int n_tc = type_comb_pair.size();
 
@@ -89,3 +90,6 @@ const vector2i& PyFeaturesAttr::get_polynomial_ids() const{
 const vector3i& PyFeaturesAttr::get_type_comb_pair() const{
     return type_comb_pair;
 }
+const int& PyFeaturesAttr::get_n_features() const{
+    return n_features;
+}
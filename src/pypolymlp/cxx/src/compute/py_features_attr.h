@@ -22,6 +22,7 @@ class PyFeaturesAttr {
     vector1i radial_ids, gtinv_ids;
     vector2i tcomb_ids, polynomial_ids;
     vector3i type_comb_pair;
+    int n_features;
 
     public:
 
@@ -33,6 +34,7 @@ class PyFeaturesAttr {
     const vector2i& get_tcomb_ids() const;
     const vector2i& get_polynomial_ids() const;
     const vector3i& get_type_comb_pair() const;
+    const int& get_n_features() const;
 
 };
 
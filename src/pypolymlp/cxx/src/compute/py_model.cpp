@@ -15,9 +15,40 @@ PyModel::PyModel(const py::dict& params_dict,
                  const std::vector<bool>& force_dataset,
                  const vector1i& n_atoms_all){
 
+    compute(params_dict, axis, positions_c, types,
+            n_st_dataset, force_dataset, n_atoms_all, nullptr);
+}
+
+PyModel::PyModel(const py::dict& params_dict,
+                 const vector3d& axis,
+                 const vector3d& positions_c,
+                 const vector2i& types,
+                 const vector1i& n_st_dataset,
+                 const std::vector<bool>& force_dataset,
+                 const vector1i& n_atoms_all,
+                 py::array_t<double, py::array::c_style>& x_out){
+
+    compute(params_dict, axis, positions_c, types,
+            n_st_dataset, force_dataset, n_atoms_all, &x_out);
+}
+
+void PyModel::compute(const py::dict& params_dict,
+                      const vector3d& axis,
+                      const vector3d& positions_c,
+                      const vector2i& types,
+                      const vector1i& n_st_dataset,
+                      const std::vector<bool>& force_dataset,
+                      const vector1i& n_atoms_all,
+                      py::array_t<double, py::array::c_style>* x_out){
+
     const int n_type = params_dict["n_type"].cast<int>();
     const bool& element_swap = params_dict["element_swap"].cast<bool>();
     const bool& print_memory = params_dict["print_memory"].cast<bool>();
+    bool linked_cell = false;
+    if (params_dict.contains("neighbor_method")){
+        const auto& method = params_dict["neighbor_method"].cast<std::string>();
+        linked_cell = is_linked_cell(method);
+    }
 
     const py::dict& model = params_dict["model"].cast<py::dict>();
     const auto& pair_params = model["pair_params"].cast<vector2d>();
@@ -60,7 +91,8 @@ PyModel::PyModel(const py::dict& params_dict,
         xf_begin, xs_begin, force_st
     );
 
-    Neighbor neigh(axis[0], positions_c[0], types[0], fp.n_type, fp.cutoff);
+    Neighbor neigh(axis[0], positions_c[0], types[0],
+                   fp.n_type, fp.cutoff, linked_cell);
     ModelFast mod(
         neigh.get_dis_array(), neigh.get_diff_array(), neigh.get_atom2_array(),
         types[0], fp, modelp, features_obj
@@ -74,17 +106,47 @@ PyModel::PyModel(const py::dict& params_dict,
         std::cout << " matrix shape (X) = ("
             << total_n_data << "," << n_features << ")" << std::endl;
         std::cout << std::fixed << std::setprecision(2);
-        std::cout << " Estimated memory allocation = "
-            << double(total_n_data) * double(n_features) * 8e-9
+        if (x_out == nullptr) std::cout << " Estimated memory allocation = ";
+        else std::cout << " Size of X in output buffer = ";
+        std::cout << double(total_n_data) * double(n_features) * 8e-9
             << " (GB)" << std::endl;
         std::cout << std::fixed << std::setprecision(10);
     }
 
-    x_all = Eigen::MatrixXd(total_n_data, n_features);
-    #ifdef _OPENMP
-    #pragma omp parallel for schedule(guided,1)
-    #endif
+    /* Structures with many atoms are computed one by one
+       using atom-parallel loops. */
+    int atom_parallel_threshold = 256;
+    if (params_dict.contains("atom_parallel_threshold")){
+        atom_parallel_threshold
+            = params_dict["atom_parallel_threshold"].cast<int>();
+    }
+    vector1i st_small, st_large;
     for (int i = 0; i < n_st; ++i){
+        if (int(types[i].size()) < atom_parallel_threshold)
+            st_small.emplace_back(i);
+        else st_large.emplace_back(i);
+    }
+
+    /* X is written into x_all or into the row-major buffer x_out. */
+    double* x_ptr;
+    int outer_stride(total_n_data), inner_stride(1);
+    if (x_out == nullptr){
+        x_all = Eigen::MatrixXd(total_n_data, n_features);
+        x_ptr = x_all.data();
+    }
+    else {
+        if (x_out->ndim() != 2 or x_out->shape(0) != total_n_data
+            or x_out->shape(1) != n_features)
+            throw std::runtime_error("Inconsistent shape of output X.");
+        if (not x_out->writeable())
+            throw std::runtime_error("Output X is not writeable.");
+        x_ptr = x_out->mutable_data();
+        outer_stride = 1, inner_stride = n_features;
+    }
+    MatrixStrideMap x(x_ptr, total_n_data, n_features,
+                      MatrixStride(outer_stride, inner_stride));
+
+    auto compute_structure = [&](const int i, const bool atom_parallel){
         struct feature_params fp1 = fp;
         fp1.force = force_st[i];
 
@@ -92,40 +154,35 @@ PyModel::PyModel(const py::dict& params_dict,
                        positions_c[i],
                        types[i],
                        fp1.n_type,
-                       fp1.cutoff);
+                       fp1.cutoff,
+                       linked_cell);
         ModelFast mod(neigh.get_dis_array(),
                       neigh.get_diff_array(),
                       neigh.get_atom2_array(),
-                      types[i], fp1, modelp, features_obj);
-
-        const auto &xe = mod.get_xe_sum();
-        for (size_t j = 0; j < xe.size(); ++j) x_all(i,j) = xe[j];
-
-        if (force_st[i] == true){
-            const auto &xf = mod.get_xf_sum();
-            const auto &xs = mod.get_xs_sum();
-            for (size_t j = 0; j < xf.size(); ++j) {
-                for (size_t k = 0; k < xf[j].size(); ++k){
-                    x_all(xf_begin[i]+j, k) = xf[j][k];
-                }
-            }
-            for (size_t j = 0; j < xs.size(); ++j) {
-                for (size_t k = 0; k < xs[j].size(); ++k){
-                    x_all(xs_begin[i]+j, k) = xs[j][k];
-                }
-            }
-        }
+                      types[i], fp1, modelp, features_obj,
+                      x, i, xs_begin[i], xf_begin[i], 0, atom_parallel);
+    };
+
+    #ifdef _OPENMP
+    #pragma omp parallel for schedule(guided,1)
+    #endif
+    for (size_t ii = 0; ii < st_small.size(); ++ii){
+        compute_structure(st_small[ii], false);
     }
+    for (const auto i: st_large) compute_structure(i, true);
 }
 
 PyModel::~PyModel(){}
 
-void PyModel::set_index(const std::vector<int>& n_data_dataset,
-                        const std::vector<bool>& force_dataset,
-                        const std::vector<int>& n_atoms_st,
-                        std::vector<int>& xf_begin,
-                        std::vector<int>& xs_begin,
-                        std::vector<bool>& force){
+void set_model_index(const std::vector<int>& n_data_dataset,
+                     const std::vector<bool>& force_dataset,
+                     const std::vector<int>& n_atoms_st,
+                     std::vector<int>& xf_begin,
+                     std::vector<int>& xs_begin,
+                     std::vector<bool>& force,
+                     vector1i& xf_begin_dataset,
+                     vector1i& xs_begin_dataset,
+                     vector1i& n_data){
 
     const int n_st = std::accumulate(n_data_dataset.begin(),
                                      n_data_dataset.end(), 0);
@@ -170,6 +227,18 @@ void PyModel::set_index(const std::vector<int>& n_data_dataset,
     }
 }
 
+void PyModel::set_index(const std::vector<int>& n_data_dataset,
+                        const std::vector<bool>& force_dataset,
+                        const std::vector<int>& n_atoms_st,
+                        std::vector<int>& xf_begin,
+                        std::vector<int>& xs_begin,
+                        std::vector<bool>& force){
+
+    set_model_index(n_data_dataset, force_dataset, n_atoms_st,
+                    xf_begin, xs_begin, force,
+                    xf_begin_dataset, xs_begin_dataset, n_data);
+}
+
 Eigen::MatrixXd& PyModel::get_x(){ return x_all; }
 const vector1i& PyModel::get_fbegin() const{ return xf_begin_dataset; }
 const vector1i& PyModel::get_sbegin() const{ return xs_begin_dataset; }
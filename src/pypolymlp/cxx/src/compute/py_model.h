@@ -17,10 +17,23 @@
 
 #include <Eigen/Core>
 #include <pybind11/pybind11.h>
+#include <pybind11/numpy.h>
 #include <pybind11/stl.h>
 
 namespace py = pybind11;
 
+/* Row indices of structures in X.
+   Rows are ordered as energies, stresses, and forces. */
+void set_model_index(const std::vector<int>& n_data_dataset,
+                     const std::vector<bool>& force_dataset,
+                     const std::vector<int>& n_atoms_st,
+                     std::vector<int>& xf_begin,
+                     std::vector<int>& xs_begin,
+                     std::vector<bool>& force,
+                     vector1i& xf_begin_dataset,
+                     vector1i& xs_begin_dataset,
+                     vector1i& n_data);
+
 class PyModel {
 
     Eigen::MatrixXd x_all;
@@ -34,6 +47,15 @@ class PyModel {
                    std::vector<int>& xs_begin,
                    std::vector<bool>& force);
 
+    void compute(const py::dict& params_dict,
+                 const vector3d& axis,
+                 const vector3d& positions_c,
+                 const vector2i& types,
+                 const vector1i& n_st_dataset,
+                 const std::vector<bool>& force_dataset,
+                 const vector1i& n_atoms_all,
+                 py::array_t<double, py::array::c_style>* x_out);
+
     public:
 
     PyModel(const py::dict& params_dict,
@@ -44,6 +66,17 @@ class PyModel {
             const std::vector<bool>& force_dataset,
             const vector1i& n_atoms_all);
 
+    /* X is written into x_out with shape (total_n_data, n_features),
+       such as a numpy memmap, instead of get_x(). */
+    PyModel(const py::dict& params_dict,
+            const vector3d& axis,
+            const vector3d& positions_c,
+            const vector2i& types,
+            const vector1i& n_st_dataset,
+            const std::vector<bool>& force_dataset,
+            const vector1i& n_atoms_all,
+            py::array_t<double, py::array::c_style>& x_out);
+
     ~PyModel();
 
     Eigen::MatrixXd& get_x();
@@ -0,0 +1,259 @@
+/****************************************************************************
+
+        Copyright (C) 2024 Atsuto Seko
+                seko@cms.mtl.kyoto-u.ac.jp
+
+****************************************************************************/
+
+#include "py_model_products.h"
+
+PyModelProducts::PyModelProducts(const py::dict& params_dict,
+                                 const vector3d& axis_i,
+                                 const vector3d& positions_c_i,
+                                 const vector2i& types_i,
+                                 const vector1i& n_st_dataset,
+                                 const std::vector<bool>& force_dataset,
+                                 const vector1i& n_atoms_all)
+    :axis(axis_i), positions_c(positions_c_i), types(types_i){
+
+    const int n_type = params_dict["n_type"].cast<int>();
+    const bool& element_swap = params_dict["element_swap"].cast<bool>();
+    const bool& print_memory = params_dict["print_memory"].cast<bool>();
+    linked_cell = false;
+    if (params_dict.contains("neighbor_method")){
+        const auto& method = params_dict["neighbor_method"].cast<std::string>();
+        linked_cell = is_linked_cell(method);
+    }
+
+    const py::dict& model = params_dict["model"].cast<py::dict>();
+    const auto& pair_params = model["pair_params"].cast<vector2d>();
+    const double& cutoff = model["cutoff"].cast<double>();
+    const std::string& pair_type = model["pair_type"].cast<std::string>();
+    const std::string& feature_type = model["feature_type"].cast<std::string>();
+    const int& model_type = model["model_type"].cast<int>();
+    const int& maxp = model["max_p"].cast<int>();
+    const int& maxl = model["max_l"].cast<int>();
+
+    const py::dict& gtinv = model["gtinv"].cast<py::dict>();
+    const auto& lm_array = gtinv["lm_seq"].cast<vector3i>();
+    const auto& l_comb = gtinv["l_comb"].cast<vector2i>();
+    const auto& lm_coeffs = gtinv["lm_coeffs"].cast<vector2d>();
+
+    const bool force = false;
+    fp = {n_type,
+          force,
+          pair_params,
+          cutoff,
+          pair_type,
+          feature_type,
+          model_type,
+          maxp,
+          maxl,
+          lm_array,
+          l_comb,
+          lm_coeffs};
+
+    modelp = ModelParams(fp, element_swap);
+    const Features f_obj(fp, modelp);
+    features_obj = FunctionFeatures(fp, modelp, f_obj);
+
+    set_model_index(
+        n_st_dataset, force_dataset, n_atoms_all,
+        xf_begin, xs_begin, force_st,
+        xf_begin_dataset, xs_begin_dataset, n_data
+    );
+
+    Neighbor neigh(axis[0], positions_c[0], types[0],
+                   fp.n_type, fp.cutoff, linked_cell);
+    ModelFast mod(
+        neigh.get_dis_array(), neigh.get_diff_array(), neigh.get_atom2_array(),
+        types[0], fp, modelp, features_obj
+    );
+    n_features = mod.get_xe_sum().size();
+    max_block_rows = 4096;
+    atom_parallel_threshold = 256;
+    if (params_dict.contains("atom_parallel_threshold")){
+        atom_parallel_threshold
+            = params_dict["atom_parallel_threshold"].cast<int>();
+    }
+
+    if (print_memory == true){
+        std::cout << std::fixed << std::setprecision(2);
+        std::cout << " Estimated memory allocation (X.T @ X) = "
+            << double(n_features) * double(n_features) * 8e-9
+            << " (GB)" << std::endl;
+        std::cout << std::fixed << std::setprecision(10);
+    }
+}
+
+PyModelProducts::~PyModelProducts(){}
+
+int PyModelProducts::n_rows(const int i) const {
+
+    if (force_st[i] == true) return 7 + 3 * types[i].size();
+    return 1;
+}
+
+void PyModelProducts::compute_rows(const int i,
+                                   const double* weights,
+                                   Eigen::MatrixXd& x_block,
+                                   const int row_begin,
+                                   vector1d& xe,
+                                   const bool atom_parallel) const {
+
+    struct feature_params fp1 = fp;
+    fp1.force = force_st[i];
+
+    Neighbor neigh(axis[i],
+                   positions_c[i],
+                   types[i],
+                   fp1.n_type,
+                   fp1.cutoff,
+                   linked_cell);
+    ModelFast mod(neigh.get_dis_array(),
+                  neigh.get_diff_array(),
+                  neigh.get_atom2_array(),
+                  types[i], fp1, modelp, features_obj,
+                  x_block, row_begin, row_begin + 1, row_begin + 7, 0,
+                  atom_parallel);
+
+    xe.resize(n_features);
+    for (int j = 0; j < n_features; ++j) xe[j] = x_block(row_begin, j);
+    x_block.row(row_begin) *= weights[i];
+
+    if (force_st[i] == true){
+        for (int j = 0; j < 6; ++j)
+            x_block.row(row_begin + 1 + j) *= weights[xs_begin[i] + j];
+        const int n_force = 3 * types[i].size();
+        for (int j = 0; j < n_force; ++j)
+            x_block.row(row_begin + 7 + j) *= weights[xf_begin[i] + j];
+    }
+}
+
+void PyModelProducts::accumulate(
+    const py::array_t<double, py::array::c_style>& weights,
+    const py::array_t<double, py::array::c_style>& y,
+    py::array_t<double, py::array::c_style>& xtx,
+    py::array_t<double, py::array::c_style>& xty,
+    py::array_t<double, py::array::c_style>& xe_sum,
+    py::array_t<double, py::array::c_style>& xe_sq_sum
+){
+    const int total_n_data = n_data[0] + n_data[1] + n_data[2];
+    if (weights.size() != total_n_data or y.size() != total_n_data)
+        throw std::runtime_error("Inconsistent size of weights or y.");
+    /* one-dimensional xtx is X.T @ X in upper packed storage */
+    const bool packed = (xtx.ndim() == 1);
+    const size_t xtx_size = packed
+        ? size_t(n_features) * (n_features + 1) / 2
+        : size_t(n_features) * n_features;
+    if (xtx.size() != xtx_size
+        or xty.size() != n_features
+        or xe_sum.size() != n_features
+        or xe_sq_sum.size() != n_features)
+        throw std::runtime_error("Inconsistent size of output arrays.");
+
+    const double* w_ptr = weights.data();
+    const double* y_ptr = y.data();
+
+    /* xtx is symmetric, so its row-major buffer can be mapped directly. */
+    double* xtx_ptr = xtx.mutable_data();
+    Eigen::Map<Eigen::MatrixXd> xtx_map(xtx_ptr, packed ? 0 : n_features,
+                                        packed ? 0 : n_features);
+    Eigen::Map<Eigen::VectorXd> xty_map(xty.mutable_data(), n_features);
+    Eigen::Map<Eigen::VectorXd> xe_sum_map(xe_sum.mutable_data(), n_features);
+    Eigen::Map<Eigen::VectorXd> xe_sq_sum_map(xe_sq_sum.mutable_data(),
+                                              n_features);
+
+    py::gil_scoped_release release;
+
+    const int n_st = axis.size();
+    const int tile_size = 256;
+    int begin = 0;
+    while (begin < n_st){
+        /* block of structures with at most max_block_rows rows */
+        int end = begin, rows = 0;
+        vector1i row_begin;
+        while (end < n_st
+               and (end == begin or rows + n_rows(end) <= max_block_rows)){
+            row_begin.emplace_back(rows);
+            rows += n_rows(end);
+            ++end;
+        }
+
+        Eigen::MatrixXd x_block(rows, n_features);
+        Eigen::MatrixXd xe_block(end - begin, n_features);
+        Eigen::VectorXd y_block(rows);
+
+        auto compute_structure = [&](const int i, const bool atom_parallel){
+            const int row = row_begin[i - begin];
+            vector1d xe;
+            compute_rows(i, w_ptr, x_block, row, xe, atom_parallel);
+            for (int j = 0; j < n_features; ++j) xe_block(i - begin, j) = xe[j];
+
+            y_block(row) = y_ptr[i];
+            if (force_st[i] == true){
+                const int n_force = 3 * types[i].size();
+                for (int j = 0; j < 6; ++j)
+                    y_block(row + 1 + j) = y_ptr[xs_begin[i] + j];
+                for (int j = 0; j < n_force; ++j)
+                    y_block(row + 7 + j) = y_ptr[xf_begin[i] + j];
+            }
+        };
+
+        vector1i st_small, st_large;
+        for (int i = begin; i < end; ++i){
+            if (int(types[i].size()) < atom_parallel_threshold)
+                st_small.emplace_back(i);
+            else st_large.emplace_back(i);
+        }
+
+        #ifdef _OPENMP
+        #pragma omp parallel for schedule(guided,1)
+        #endif
+        for (size_t ii = 0; ii < st_small.size(); ++ii){
+            compute_structure(st_small[ii], false);
+        }
+        for (const auto i: st_large) compute_structure(i, true);
+
+        /* lower triangle (full) or upper triangle (packed) of X.T @ X
+           computed for tiles of columns, distributed over threads */
+        #ifdef _OPENMP
+        #pragma omp parallel for schedule(dynamic,1)
+        #endif
+        for (int c0 = 0; c0 < n_features; c0 += tile_size){
+            const int nc = std::min(tile_size, n_features - c0);
+            if (packed){
+                const int c1 = c0 + nc;
+                const Eigen::MatrixXd tile = x_block.leftCols(c1).transpose()
+                                           * x_block.middleCols(c0, nc);
+                for (int j = c0; j < c1; ++j){
+                    const size_t offset = size_t(j) * (j + 1) / 2;
+                    Eigen::Map<Eigen::VectorXd>(xtx_ptr + offset, j + 1)
+                        += tile.col(j - c0).head(j + 1);
+                }
+            }
+            else {
+                const int nr = n_features - c0;
+                xtx_map.block(c0, c0, nr, nc).noalias()
+                    += x_block.rightCols(nr).transpose()
+                     * x_block.middleCols(c0, nc);
+            }
+        }
+        xty_map.noalias() += x_block.transpose() * y_block;
+        xe_sum_map += xe_block.colwise().sum().transpose();
+        xe_sq_sum_map += xe_block.array().square().colwise().sum()
+                                 .matrix().transpose();
+        begin = end;
+    }
+    if (not packed)
+        xtx_map.triangularView<Eigen::StrictlyUpper>() = xtx_map.transpose();
+}
+
+void PyModelProducts::set_max_block_rows(const int max_block_rows_i){
+    max_block_rows = max_block_rows_i;
+}
+
+const int& PyModelProducts::get_n_features() const{ return n_features; }
+const vector1i& PyModelProducts::get_fbegin() const{ return xf_begin_dataset; }
+const vector1i& PyModelProducts::get_sbegin() const{ return xs_begin_dataset; }
+const vector1i& PyModelProducts::get_n_data() const{ return n_data; }
@@ -0,0 +1,100 @@
+/****************************************************************************
+
+        Copyright (C) 2024 Atsuto Seko
+                seko@cms.mtl.kyoto-u.ac.jp
+
+****************************************************************************/
+
+#ifndef __PYMODEL_PRODUCTS
+#define __PYMODEL_PRODUCTS
+
+#include "mlpcpp.h"
+#include "polymlp/polymlp_model_params.h"
+#include "polymlp/polymlp_features.h"
+#include "compute/neighbor.h"
+#include "compute/model_fast.h"
+#include "compute/features.h"
+#include "compute/py_model.h"
+
+#include <Eigen/Core>
+#include <pybind11/pybind11.h>
+#include <pybind11/numpy.h>
+#include <pybind11/stl.h>
+
+namespace py = pybind11;
+
+/*
+    Products of weighted X accumulated without constructing the whole X.
+
+    Feature rows are computed for blocks of structures and accumulated
+    into X.T @ X, X.T @ y, and sums of energy rows used for scales.
+    Memory for X is bounded by the block size.
+*/
+class PyModelProducts {
+
+    struct feature_params fp;
+    ModelParams modelp;
+    FunctionFeatures features_obj;
+    bool linked_cell;
+    int n_features;
+
+    vector3d axis, positions_c;
+    vector2i types;
+    vector1i xf_begin, xs_begin;
+    std::vector<bool> force_st;
+    vector1i xf_begin_dataset, xs_begin_dataset;
+    vector1i n_data;
+
+    /* maximum number of rows of X in a block */
+    int max_block_rows;
+
+    /* structures with at least this number of atoms are computed
+       using atom-parallel loops */
+    int atom_parallel_threshold;
+
+    int n_rows(const int i) const;
+    void compute_rows(const int i,
+                      const double* weights,
+                      Eigen::MatrixXd& x_block,
+                      const int row_begin,
+                      vector1d& xe,
+                      const bool atom_parallel) const;
+
+    public:
+
+    PyModelProducts(const py::dict& params_dict,
+                    const vector3d& axis_i,
+                    const vector3d& positions_c_i,
+                    const vector2i& types_i,
+                    const vector1i& n_st_dataset,
+                    const std::vector<bool>& force_dataset,
+                    const vector1i& n_atoms_all);
+
+    ~PyModelProducts();
+
+    /* Accumulate products of weighted X in place.
+       weights, y: (total_n_data), rows ordered as X of PyModel.
+                   y must be already weighted.
+       xtx: (n_features, n_features), symmetric, or
+            (n_features * (n_features + 1) / 2) in upper packed storage.
+       xty, xe_sum, xe_sq_sum: (n_features)
+       xe_sum and xe_sq_sum are computed from unweighted energy rows. */
+    void accumulate(
+        const py::array_t<double, py::array::c_style>& weights,
+        const py::array_t<double, py::array::c_style>& y,
+        py::array_t<double, py::array::c_style>& xtx,
+        py::array_t<double, py::array::c_style>& xty,
+        py::array_t<double, py::array::c_style>& xe_sum,
+        py::array_t<double, py::array::c_style>& xe_sq_sum
+    );
+
+    void set_max_block_rows(const int max_block_rows_i);
+
+    const int& get_n_features() const;
+    const vector1i& get_fbegin() const;
+    const vector1i& get_sbegin() const;
+    const vector1i& get_n_data() const;
+
+};
+
+#endif
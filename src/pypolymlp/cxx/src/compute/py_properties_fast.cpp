@@ -7,14 +7,151 @@
 
 #include "py_properties_fast.h"
 
+#if defined(__unix__) || defined(__APPLE__)
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
+#include <stdexcept>
+#define POLYMLP_USE_MMAP
+#endif
+
+/* Identifier of binary potential data. Layout of structures is included
+   so that data written on an incompatible platform are rejected. */
+static std::string binary_signature(){
+    return "polymlp-eval-1:"
+        + std::to_string(sizeof(PotentialTerm)) + ","
+        + std::to_string(sizeof(MappedSingleTerm)) + ","
+        + std::to_string(sizeof(lmAttribute)) + ","
+        + std::to_string(sizeof(nlmtcAttribute)) + ","
+        + std::to_string(sizeof(ntcAttribute)) + ","
+        + std::to_string(sizeof(int)) + "," + std::to_string(sizeof(bool));
+}
+
 PyPropertiesFast::PyPropertiesFast(const py::dict& params_dict,
                                    const vector1d& coeffs){
 
+    cutoff = 0.0;
+    set_neighbor_method(params_dict);
+    add_potential(params_dict, coeffs);
+    set_skin(0.0);
+}
+
+PyPropertiesFast::PyPropertiesFast(const py::list& params_dicts,
+                                   const vector2d& coeffs){
+
+    /* hybrid potential: all components must share the element order. */
+    cutoff = 0.0;
+    set_neighbor_method(params_dicts[0].cast<py::dict>());
+    for (size_t i = 0; i < coeffs.size(); ++i){
+        add_potential(params_dicts[i].cast<py::dict>(), coeffs[i]);
+    }
+    set_skin(0.0);
+}
+
+PyPropertiesFast::PyPropertiesFast(const std::string& filename,
+                                   const size_t offset,
+                                   const bool use_mmap,
+                                   const py::dict& params_dict){
+
+    cutoff = 0.0;
+    set_neighbor_method(params_dict);
+    add_binary(filename, offset, use_mmap);
+    set_skin(0.0);
+}
+
+PyPropertiesFast::PyPropertiesFast(const std::vector<std::string>& filenames,
+                                   const std::vector<size_t>& offsets,
+                                   const bool use_mmap,
+                                   const py::dict& params_dict){
+
+    /* hybrid potential: all components must share the element order. */
+    cutoff = 0.0;
+    set_neighbor_method(params_dict);
+    for (size_t i = 0; i < filenames.size(); ++i){
+        add_binary(filenames[i], offsets[i], use_mmap);
+    }
+    set_skin(0.0);
+}
+
+void PyPropertiesFast::add_binary(const std::string& filename,
+                                  const size_t offset,
+                                  const bool use_mmap){
+
+    #ifdef POLYMLP_USE_MMAP
+    if (use_mmap == true){
+        const int fd = open(filename.c_str(), O_RDONLY);
+        if (fd < 0) throw std::runtime_error("Cannot open " + filename);
+        struct stat st;
+        fstat(fd, &st);
+        const size_t size = st.st_size;
+        void* data = mmap(nullptr, size, PROT_READ, MAP_PRIVATE, fd, 0);
+        close(fd);
+        if (data == MAP_FAILED)
+            throw std::runtime_error("Cannot map " + filename);
+
+        BinaryReader reader(static_cast<const char*>(data), size, offset);
+        try { read_binary(reader); }
+        catch (...) { munmap(data, size); throw; }
+        munmap(data, size);
+        return;
+    }
+    #endif
+
+    std::ifstream ifs(filename, std::ios::binary | std::ios::ate);
+    if (not ifs) throw std::runtime_error("Cannot open " + filename);
+    const size_t size = ifs.tellg();
+    std::vector<char> data(size);
+    ifs.seekg(0);
+    ifs.read(data.data(), size);
+
+    BinaryReader reader(data.data(), size, offset);
+    read_binary(reader);
+}
+
+void PyPropertiesFast::read_binary(BinaryReader& reader){
+
+    std::string signature;
+    reader.read(signature);
+    if (signature != binary_signature())
+        throw std::runtime_error("Incompatible binary potential.");
+
+    uint64_t n_pot;
+    reader.read(n_pot);
+    for (uint64_t i = 0; i < n_pot; ++i){
+        polymlps.emplace_back(PolymlpEval(reader));
+        cutoff = std::max(cutoff, polymlps.back().get_fp().cutoff);
+    }
+}
+
+void PyPropertiesFast::write_binary(const std::string& filename) const {
+
+    std::ofstream ofs(filename, std::ios::binary | std::ios::app);
+    if (not ofs) throw std::runtime_error("Cannot open " + filename);
+
+    binary_write(ofs, binary_signature());
+    const uint64_t n_pot = polymlps.size();
+    binary_write(ofs, n_pot);
+    for (const auto& polymlp: polymlps) polymlp.write(ofs);
+}
+
+void PyPropertiesFast::set_neighbor_method(const py::dict& params_dict){
+
+    linked_cell = false;
+    if (params_dict.contains("neighbor_method")){
+        const auto& method = params_dict["neighbor_method"].cast<std::string>();
+        linked_cell = is_linked_cell(method);
+    }
+}
+
+void PyPropertiesFast::add_potential(const py::dict& params_dict,
+                                     const vector1d& coeffs){
+
     const int n_type = params_dict["n_type"].cast<int>();
 
     const py::dict& model = params_dict["model"].cast<py::dict>();
     const auto& pair_params = model["pair_params"].cast<vector2d>();
-    const double& cutoff = model["cutoff"].cast<double>();
+    const double& cutoff_pot = model["cutoff"].cast<double>();
     const std::string& pair_type = model["pair_type"].cast<std::string>();
     const std::string& feature_type = model["feature_type"].cast<std::string>();
     const int& model_type = model["model_type"].cast<int>();
@@ -27,68 +164,447 @@ PyPropertiesFast::PyPropertiesFast(const py::dict& params_dict,
     const auto& lm_coeffs = gtinv["lm_coeffs"].cast<vector2d>();
 
     const bool force = true;
-    fp = {n_type,
-          force,
-          pair_params,
-          cutoff,
-          pair_type,
-          feature_type,
-          model_type,
-          maxp,
-          maxl,
-          lm_array,
-          l_comb,
-          lm_coeffs};
-    polymlp = PolymlpEval(fp, coeffs);
+    struct feature_params fp = {n_type,
+                                force,
+                                pair_params,
+                                cutoff_pot,
+                                pair_type,
+                                feature_type,
+                                model_type,
+                                maxp,
+                                maxl,
+                                lm_array,
+                                l_comb,
+                                lm_coeffs};
+    polymlps.emplace_back(PolymlpEval(fp, coeffs));
+    cutoff = std::max(cutoff, cutoff_pot);
 }
 
 PyPropertiesFast::~PyPropertiesFast(){}
 
 void PyPropertiesFast::eval(const vector2d& axis,
                             const vector2d& positions_c,
-                            const vector1i& types){
-    /* positions_c: (3, n_atom) */
-    NeighborHalf neigh(axis, positions_c, types, fp.cutoff);
-    polymlp.eval(positions_c,
+                            const vector1i& types,
+                            const std::string& mode,
+                            const bool per_atom){
+    /* positions_c: (3, n_atom)
+       mode: "all", "energy_force", or "energy"
+       per_atom: per-atom energies and per-atom virials (if mode = "all")
+                 are also computed. */
+    const int mode_id = get_mode_id(mode);
+    if (skin > 0.0){
+        vector2d disp;
+        if (check_neighbor_list(axis, positions_c, types, disp) == false){
+            build_neighbor_list(axis, positions_c, types);
+            diff_list_skin = diff_list_ref;
+        }
+        else update_diff_list(disp, diff_list_skin);
+
+        eval_polymlp(positions_c,
+                     types,
+                     half_list_ref,
+                     diff_list_skin,
+                     mode_id,
+                     per_atom,
+                     energy,
+                     force,
+                     stress,
+                     energy_atom,
+                     virial_atom);
+        return;
+    }
+
+    NeighborHalf neigh(axis, positions_c, types, cutoff, linked_cell);
+    eval_polymlp(positions_c,
                  types,
                  neigh.get_half_list(),
                  neigh.get_diff_list(),
+                 mode_id,
+                 per_atom,
                  energy,
                  force,
-                 stress);
+                 stress,
+                 energy_atom,
+                 virial_atom);
 }
 
-void PyPropertiesFast::eval_multiple(const vector3d& axis_array,
-                                     const vector3d& positions_c_array,
-                                     const vector2i& types_array){
-    const int n_st = axis_array.size();
-    e_array = vector1d(n_st);
-    f_array = vector3d(n_st);
-    s_array = vector2d(n_st);
+void PyPropertiesFast::eval_multiple_arrays(
+    const py::array_t<double, py::array::c_style>& axis_array,
+    const py::array_t<double, py::array::c_style>& positions_c,
+    const py::array_t<int, py::array::c_style>& types,
+    const py::array_t<int, py::array::c_style>& offsets,
+    py::array_t<double, py::array::c_style>& energies,
+    py::array_t<double, py::array::c_style>& forces,
+    py::array_t<double, py::array::c_style>& stresses,
+    py::array_t<double, py::array::c_style>& energies_atom,
+    py::array_t<double, py::array::c_style>& virials_atom,
+    const std::string& mode,
+    const bool per_atom
+){
+    /*
+        axis_array: (n_st, 3, 3)
+        positions_c: (3, n_atom_total), concatenated cartesian positions
+        types: (n_atom_total)
+        offsets: (n_st + 1), atoms of structure i are in
+                 [offsets[i], offsets[i+1]).
+
+        Results are written to preallocated arrays.
+        energies: (n_st)
+        forces: (3, n_atom_total)
+        stresses: (n_st, 6) in the order of xx, yy, zz, xy, yz, zx
+
+        energies_atom: (n_atom_total), used if per_atom = true.
+        virials_atom: (6, n_atom_total), used if per_atom = true
+                      and mode = "all".
+
+        mode: "all", "energy_force", or "energy".
+              Forces (stresses) are not written if they are not computed.
+    */
+    const int mode_id = get_mode_id(mode);
+    check_arrays(axis_array, positions_c, types, offsets, energies, forces,
+                 stresses, energies_atom, virials_atom, mode_id, per_atom);
+    const int n_st = offsets.shape(0) - 1;
+    const int n_atom_total = types.shape(0);
+
+    const double* axis_ptr = axis_array.data();
+    const double* pos_ptr = positions_c.data();
+    const int* types_ptr = types.data();
+    const int* offsets_ptr = offsets.data();
+    double* e_ptr = energies.mutable_data();
+    double* f_ptr = forces.mutable_data();
+    double* s_ptr = stresses.mutable_data();
+    double* ea_ptr = energies_atom.mutable_data();
+    double* va_ptr = virials_atom.mutable_data();
+
+    py::gil_scoped_release release;
+
+    /* neighbor list with skin is constructed from the first structure
+       and reused for structures close to it,
+       e.g., displaced supercells. */
+    if (skin > 0.0 and n_st > 0){
+        const int n_atom = offsets_ptr[1];
+        vector2d axis(3, vector1d(3)), pos(3, vector1d(n_atom)), disp;
+        for (int a = 0; a < 3; ++a){
+            for (int b = 0; b < 3; ++b) axis[a][b] = axis_ptr[3*a + b];
+            const double* p = pos_ptr + a * n_atom_total;
+            std::copy(p, p + n_atom, pos[a].begin());
+        }
+        vector1i types_st(types_ptr, types_ptr + n_atom);
+        if (check_neighbor_list(axis, pos, types_st, disp) == false){
+            build_neighbor_list(axis, pos, types_st);
+        }
+    }
 
     #ifdef _OPENMP
-    #pragma omp parallel for schedule(guided,1)
+    #pragma omp parallel for schedule(guided,1) if(n_st > 1)
     #endif
     for (int i = 0; i < n_st; ++i){
-        NeighborHalf neigh(axis_array[i],
-                           positions_c_array[i],
-                           types_array[i],
-                           fp.cutoff);
-        polymlp.eval(positions_c_array[i],
-                     types_array[i],
-                     neigh.get_half_list(),
-                     neigh.get_diff_list(),
-                     e_array[i],
-                     f_array[i],
-                     s_array[i]);
+        const int begin = offsets_ptr[i];
+        const int n_atom = offsets_ptr[i+1] - begin;
+
+        vector2d axis(3, vector1d(3));
+        for (int a = 0; a < 3; ++a){
+            for (int b = 0; b < 3; ++b) axis[a][b] = axis_ptr[9*i + 3*a + b];
+        }
+        vector2d pos(3, vector1d(n_atom));
+        for (int a = 0; a < 3; ++a){
+            const double* p = pos_ptr + a * n_atom_total + begin;
+            std::copy(p, p + n_atom, pos[a].begin());
+        }
+        vector1i types_st(types_ptr + begin, types_ptr + begin + n_atom);
+
+        double e;
+        vector2d f, disp, v_atom;
+        vector1d st, e_atom;
+        if (skin > 0.0 and check_neighbor_list(axis, pos, types_st, disp)){
+            vector3d diff_list;
+            update_diff_list(disp, diff_list);
+            eval_polymlp(pos, types_st, half_list_ref, diff_list,
+                         mode_id, per_atom, e, f, st, e_atom, v_atom);
+        }
+        else {
+            NeighborHalf neigh(axis, pos, types_st, cutoff, linked_cell);
+            eval_polymlp(pos,
+                         types_st,
+                         neigh.get_half_list(),
+                         neigh.get_diff_list(),
+                         mode_id, per_atom, e, f, st, e_atom, v_atom);
+        }
+
+        e_ptr[i] = e;
+        if (per_atom == true){
+            std::copy(e_atom.begin(), e_atom.end(), ea_ptr + begin);
+        }
+        if (mode_id == 2) continue;
+        for (int j = 0; j < n_atom; ++j){
+            for (int a = 0; a < 3; ++a){
+                f_ptr[a * n_atom_total + begin + j] = f[j][a];
+            }
+        }
+        if (mode_id == 1) continue;
+        for (int a = 0; a < 6; ++a) s_ptr[6*i + a] = st[a];
+        if (per_atom == false) continue;
+        for (int j = 0; j < n_atom; ++j){
+            for (int a = 0; a < 6; ++a){
+                va_ptr[a * n_atom_total + begin + j] = v_atom[j][a];
+            }
+        }
+    }
+}
+
+void PyPropertiesFast::check_arrays(
+    const py::array_t<double, py::array::c_style>& axis_array,
+    const py::array_t<double, py::array::c_style>& positions_c,
+    const py::array_t<int, py::array::c_style>& types,
+    const py::array_t<int, py::array::c_style>& offsets,
+    const py::array_t<double, py::array::c_style>& energies,
+    const py::array_t<double, py::array::c_style>& forces,
+    const py::array_t<double, py::array::c_style>& stresses,
+    const py::array_t<double, py::array::c_style>& energies_atom,
+    const py::array_t<double, py::array::c_style>& virials_atom,
+    const int mode_id,
+    const bool per_atom
+) const {
+
+    /* Arrays are accessed through raw pointers in eval_multiple_arrays,
+       so that inconsistent arrays are rejected here. */
+    if (offsets.ndim() != 1 or offsets.shape(0) < 1)
+        throw std::invalid_argument("offsets must be (n_str + 1) array.");
+    const int n_st = offsets.shape(0) - 1;
+    const int* offsets_ptr = offsets.data();
+    if (offsets_ptr[0] != 0)
+        throw std::invalid_argument("offsets[0] must be zero.");
+    for (int i = 0; i < n_st; ++i){
+        if (offsets_ptr[i+1] < offsets_ptr[i])
+            throw std::invalid_argument("offsets must be non-decreasing.");
+    }
+
+    const py::ssize_t n_atom = offsets_ptr[n_st];
+    auto check_shape = [](const auto& array,
+                          const std::vector<py::ssize_t>& shape,
+                          const std::string& name){
+        bool valid = array.ndim() == py::ssize_t(shape.size());
+        for (size_t a = 0; valid and a < shape.size(); ++a){
+            valid = array.shape(a) == shape[a];
+        }
+        if (not valid)
+            throw std::invalid_argument("Inconsistent shape of " + name + ".");
+    };
+    check_shape(axis_array, {n_st, 3, 3}, "axis_array");
+    check_shape(positions_c, {3, n_atom}, "positions_c");
+    check_shape(types, {n_atom}, "types");
+    check_shape(energies, {n_st}, "energies");
+    if (mode_id != 2) check_shape(forces, {3, n_atom}, "forces");
+    if (mode_id == 0) check_shape(stresses, {n_st, 6}, "stresses");
+    if (per_atom == true){
+        check_shape(energies_atom, {n_atom}, "energies_atom");
+        if (mode_id == 0)
+            check_shape(virials_atom, {6, n_atom}, "virials_atom");
+    }
+}
+
+void PyPropertiesFast::eval_polymlp(const vector2d& positions_c,
+                                    const vector1i& types,
+                                    const vector2i& neighbor_half,
+                                    const vector3d& neighbor_diff,
+                                    const int mode,
+                                    const bool per_atom,
+                                    double& e,
+                                    vector2d& f,
+                                    vector1d& s,
+                                    vector1d& e_atom,
+                                    vector2d& v_atom){
+
+    /* components of hybrid potential are accumulated
+       using the shared neighbor list. */
+    eval_component(polymlps[0], positions_c, types, neighbor_half,
+                   neighbor_diff, mode, per_atom, e, f, s, e_atom, v_atom);
+
+    double e_k;
+    vector2d f_k, v_atom_k;
+    vector1d s_k, e_atom_k;
+    for (size_t k = 1; k < polymlps.size(); ++k){
+        eval_component(polymlps[k], positions_c, types, neighbor_half,
+                       neighbor_diff, mode, per_atom,
+                       e_k, f_k, s_k, e_atom_k, v_atom_k);
+        e += e_k;
+        for (size_t j = 0; j < e_atom.size(); ++j) e_atom[j] += e_atom_k[j];
+        for (size_t j = 0; j < v_atom.size(); ++j){
+            for (int a = 0; a < 6; ++a) v_atom[j][a] += v_atom_k[j][a];
+        }
+        if (mode != 2){
+            for (size_t j = 0; j < f.size(); ++j){
+                for (int a = 0; a < 3; ++a) f[j][a] += f_k[j][a];
+            }
+        }
+        if (mode == 0){
+            for (int a = 0; a < 6; ++a) s[a] += s_k[a];
+        }
+    }
+}
+
+void PyPropertiesFast::eval_component(PolymlpEval& polymlp,
+                                      const vector2d& positions_c,
+                                      const vector1i& types,
+                                      const vector2i& neighbor_half,
+                                      const vector3d& neighbor_diff,
+                                      const int mode,
+                                      const bool per_atom,
+                                      double& e,
+                                      vector2d& f,
+                                      vector1d& s,
+                                      vector1d& e_atom,
+                                      vector2d& v_atom){
+
+    /* mode = 0: all, 1: energy and forces, 2: energy */
+    if (per_atom == true){
+        if (mode == 2){
+            polymlp.eval_atom(positions_c, types, neighbor_half, neighbor_diff,
+                              e_atom);
+            f.clear();
+            v_atom.clear();
+        }
+        else if (mode == 1){
+            /* per-atom virials are not computed */
+            polymlp.eval_atom(positions_c, types, neighbor_half, neighbor_diff,
+                              e_atom, f);
+        }
+        else {
+            polymlp.eval_atom(positions_c, types, neighbor_half, neighbor_diff,
+                              e_atom, f, v_atom);
+        }
+
+        e = 0.0;
+        for (const auto& e_i: e_atom) e += e_i;
+        s.clear();
+        if (mode == 0){
+            s = vector1d(6, 0.0);
+            for (const auto& v_i: v_atom){
+                for (int a = 0; a < 6; ++a) s[a] += v_i[a];
+            }
+        }
+        else v_atom.clear();
+        return;
+    }
+
+    e_atom.clear();
+    v_atom.clear();
+    if (mode == 0){
+        polymlp.eval(positions_c, types, neighbor_half, neighbor_diff, e, f, s);
+    }
+    else if (mode == 1){
+        polymlp.eval(positions_c, types, neighbor_half, neighbor_diff, e, f);
+        s.clear();
+    }
+    else {
+        polymlp.eval(positions_c, types, neighbor_half, neighbor_diff, e);
+        f.clear();
+        s.clear();
     }
 }
 
+int PyPropertiesFast::get_mode_id(const std::string& mode) const {
+
+    if (mode == "all") return 0;
+    else if (mode == "energy_force") return 1;
+    else if (mode == "energy") return 2;
+    throw std::invalid_argument(
+        "mode must be 'all', 'energy_force', or 'energy'."
+    );
+}
+
+void PyPropertiesFast::set_skin(const double skin_i){
+
+    skin = skin_i;
+    n_neighbor_builds = 0;
+    axis_ref.clear();
+    axis_inv_ref.clear();
+    positions_ref.clear();
+    types_ref.clear();
+    half_list_ref.clear();
+    diff_list_ref.clear();
+    diff_list_skin.clear();
+}
+
+bool PyPropertiesFast::check_neighbor_list(const vector2d& axis,
+                                           const vector2d& positions_c,
+                                           const vector1i& types,
+                                           vector2d& disp) const {
+
+    /* Neighbor list is valid if the cell and types are unchanged and
+       no atom is displaced by more than skin / 2 from reference.
+       Displacements are reduced by lattice translations, so that atoms
+       wrapped into the cell are not regarded as displaced. */
+    if (types_ref.size() == 0 or types != types_ref) return false;
+
+    const double tol = 1e-10;
+    for (int a = 0; a < 3; ++a){
+        for (int b = 0; b < 3; ++b){
+            if (fabs(axis[a][b] - axis_ref[a][b]) > tol) return false;
+        }
+    }
+
+    const int n_atom = types.size();
+    const double max_disp_sq = 0.25 * skin * skin;
+    disp = vector2d(3, vector1d(n_atom));
+    double d[3], n[3];
+    for (int j = 0; j < n_atom; ++j){
+        for (int a = 0; a < 3; ++a){
+            d[a] = positions_c[a][j] - positions_ref[a][j];
+        }
+        for (int a = 0; a < 3; ++a){
+            n[a] = round(axis_inv_ref[a][0] * d[0]
+                         + axis_inv_ref[a][1] * d[1]
+                         + axis_inv_ref[a][2] * d[2]);
+        }
+        double norm_sq = 0.0;
+        for (int a = 0; a < 3; ++a){
+            disp[a][j] = d[a] - axis[a][0] * n[0]
+                              - axis[a][1] * n[1]
+                              - axis[a][2] * n[2];
+            norm_sq += disp[a][j] * disp[a][j];
+        }
+        if (norm_sq > max_disp_sq) return false;
+    }
+    return true;
+}
+
+void PyPropertiesFast::build_neighbor_list(const vector2d& axis,
+                                           const vector2d& positions_c,
+                                           const vector1i& types){
+
+    NeighborHalf neigh(axis, positions_c, types, cutoff + skin, linked_cell);
+    half_list_ref = neigh.get_half_list();
+    diff_list_ref = neigh.get_diff_list();
+    axis_ref = axis;
+    calc_inverse_axis(axis, axis_inv_ref);
+    positions_ref = positions_c;
+    types_ref = types;
+    ++n_neighbor_builds;
+}
+
+void PyPropertiesFast::update_diff_list(const vector2d& disp,
+                                        vector3d& diff_list) const {
+
+    /* diff = x_j + T - x_i */
+    diff_list = diff_list_ref;
+    const int n_atom = half_list_ref.size();
+    for (int i = 0; i < n_atom; ++i){
+        for (size_t jj = 0; jj < half_list_ref[i].size(); ++jj){
+            const int j = half_list_ref[i][jj];
+            auto& diff = diff_list[i][jj];
+            for (int a = 0; a < 3; ++a) diff[a] += disp[a][j] - disp[a][i];
+        }
+    }
+}
+
+const int& PyPropertiesFast::get_n_neighbor_builds() const {
+    return n_neighbor_builds;
+}
+
 /* force: (n_atom, 3) */
 const double& PyPropertiesFast::get_e() const { return energy; }
 const vector2d& PyPropertiesFast::get_f() const { return force; }
 const vector1d& PyPropertiesFast::get_s() const { return stress; }
-
-const vector1d& PyPropertiesFast::get_e_array() const { return e_array; }
-const vector3d& PyPropertiesFast::get_f_array() const { return f_array; }
-const vector2d& PyPropertiesFast::get_s_array() const { return s_array; }
+const vector1d& PyPropertiesFast::get_e_atom() const { return energy_atom; }
+const vector2d& PyPropertiesFast::get_v_atom() const { return virial_atom; }
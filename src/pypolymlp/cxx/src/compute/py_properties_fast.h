@@ -13,43 +13,136 @@
 #include "compute/polymlp_eval.h"
 
 #include <pybind11/pybind11.h>
+#include <pybind11/numpy.h>
 #include <pybind11/stl.h>
 
 namespace py = pybind11;
 
 class PyPropertiesFast {
 
-    vector1d e_array;
-    vector3d f_array;
-    vector2d s_array;
-
     double energy;
     vector2d force;
     vector1d stress;
-
-    struct feature_params fp;
-    PolymlpEval polymlp;
+    vector1d energy_atom;
+    vector2d virial_atom;
+
+    /* hybrid potential if polymlps.size() > 1.
+       Neighbor list is shared and constructed with the largest cutoff. */
+    std::vector<PolymlpEval> polymlps;
+    double cutoff;
+    bool linked_cell;
+
+    void set_neighbor_method(const py::dict& params_dict);
+    void read_binary(BinaryReader& reader);
+    void add_binary(const std::string& filename,
+                    const size_t offset,
+                    const bool use_mmap);
+    void add_potential(const py::dict& params_dict, const vector1d& coeffs);
+
+    /* neighbor list with Verlet skin (used if skin > 0) */
+    double skin;
+    int n_neighbor_builds;
+    vector2d axis_ref, axis_inv_ref, positions_ref;
+    vector1i types_ref;
+    vector2i half_list_ref;
+    vector3d diff_list_ref, diff_list_skin;
+
+    bool check_neighbor_list(const vector2d& axis,
+                             const vector2d& positions_c,
+                             const vector1i& types,
+                             vector2d& disp) const;
+    void build_neighbor_list(const vector2d& axis,
+                             const vector2d& positions_c,
+                             const vector1i& types);
+    void update_diff_list(const vector2d& disp, vector3d& diff_list) const;
+
+    void eval_component(PolymlpEval& polymlp,
+                        const vector2d& positions_c,
+                        const vector1i& types,
+                        const vector2i& neighbor_half,
+                        const vector3d& neighbor_diff,
+                        const int mode,
+                        const bool per_atom,
+                        double& e,
+                        vector2d& f,
+                        vector1d& s,
+                        vector1d& e_atom,
+                        vector2d& v_atom);
+    void eval_polymlp(const vector2d& positions_c,
+                      const vector1i& types,
+                      const vector2i& neighbor_half,
+                      const vector3d& neighbor_diff,
+                      const int mode,
+                      const bool per_atom,
+                      double& e,
+                      vector2d& f,
+                      vector1d& s,
+                      vector1d& e_atom,
+                      vector2d& v_atom);
+    int get_mode_id(const std::string& mode) const;
+    void check_arrays(
+        const py::array_t<double, py::array::c_style>& axis_array,
+        const py::array_t<double, py::array::c_style>& positions_c,
+        const py::array_t<int, py::array::c_style>& types,
+        const py::array_t<int, py::array::c_style>& offsets,
+        const py::array_t<double, py::array::c_style>& energies,
+        const py::array_t<double, py::array::c_style>& forces,
+        const py::array_t<double, py::array::c_style>& stresses,
+        const py::array_t<double, py::array::c_style>& energies_atom,
+        const py::array_t<double, py::array::c_style>& virials_atom,
+        const int mode_id,
+        const bool per_atom
+    ) const;
 
     public:
 
     PyPropertiesFast(const py::dict& params_dict, const vector1d& coeffs);
+    PyPropertiesFast(const py::list& params_dicts, const vector2d& coeffs);
+    /* potential from a binary file written by write_binary.
+       offset: Position of data in the file.
+       use_mmap: The file is memory-mapped instead of being read. */
+    PyPropertiesFast(const std::string& filename,
+                     const size_t offset,
+                     const bool use_mmap,
+                     const py::dict& params_dict);
+    /* hybrid potential from binary files. */
+    PyPropertiesFast(const std::vector<std::string>& filenames,
+                     const std::vector<size_t>& offsets,
+                     const bool use_mmap,
+                     const py::dict& params_dict);
     ~PyPropertiesFast();
 
     void eval(const vector2d& axis,
               const vector2d& positions_c,
-              const vector1i& types);
-
-    void eval_multiple(const vector3d& axis_array,
-                       const vector3d& positions_c_array,
-                       const vector2i& types_array);
+              const vector1i& types,
+              const std::string& mode,
+              const bool per_atom);
+
+    void eval_multiple_arrays(
+        const py::array_t<double, py::array::c_style>& axis_array,
+        const py::array_t<double, py::array::c_style>& positions_c,
+        const py::array_t<int, py::array::c_style>& types,
+        const py::array_t<int, py::array::c_style>& offsets,
+        py::array_t<double, py::array::c_style>& energies,
+        py::array_t<double, py::array::c_style>& forces,
+        py::array_t<double, py::array::c_style>& stresses,
+        py::array_t<double, py::array::c_style>& energies_atom,
+        py::array_t<double, py::array::c_style>& virials_atom,
+        const std::string& mode,
+        const bool per_atom
+    );
+
+    /* Append potential data to a binary file. */
+    void write_binary(const std::string& filename) const;
+
+    void set_skin(const double skin_i);
+    const int& get_n_neighbor_builds() const;
 
     const double& get_e() const;
     const vector2d& get_f() const;
     const vector1d& get_s() const;
-
-    const vector1d& get_e_array() const;
-    const vector3d& get_f_array() const;
-    const vector2d& get_s_array() const;
+    const vector1d& get_e_atom() const;
+    const vector2d& get_v_atom() const;
 
 };
 
@@ -0,0 +1,108 @@
+/****************************************************************************
+
+        Copyright (C) 2024 Atsuto Seko
+                seko@cms.mtl.kyoto-u.ac.jp
+
+****************************************************************************/
+
+#ifndef __POLYMLP_BINARY_IO
+#define __POLYMLP_BINARY_IO
+
+#include "polymlp_mlpcpp.h"
+
+#include <cstdint>
+#include <cstring>
+#include <stdexcept>
+#include <type_traits>
+
+/*
+    Binary serialization of potential data.
+
+    Trivially copyable values are written as raw bytes.
+    Vectors are written as (uint64 size, elements), where vectors of
+    trivially copyable values are written in a single block.
+    Data are read from a contiguous memory buffer, which can be
+    a memory-mapped file.
+*/
+
+template<typename T>
+typename std::enable_if<std::is_trivially_copyable<T>::value>::type
+binary_write(std::ostream& os, const T& val){
+    os.write(reinterpret_cast<const char*>(&val), sizeof(T));
+}
+
+inline void binary_write(std::ostream& os, const std::string& str){
+    const uint64_t size = str.size();
+    binary_write(os, size);
+    os.write(str.data(), size);
+}
+
+template<typename T>
+void binary_write(std::ostream& os, const std::vector<T>& vec){
+    const uint64_t size = vec.size();
+    binary_write(os, size);
+    if constexpr (std::is_trivially_copyable<T>::value
+                  and not std::is_same<T, bool>::value){
+        os.write(reinterpret_cast<const char*>(vec.data()),
+                 sizeof(T) * size);
+    }
+    else {
+        for (const auto& v: vec) binary_write(os, v);
+    }
+}
+
+class BinaryReader {
+
+    const char* data;
+    size_t size, pos;
+
+    void check(const size_t n) const {
+        if (pos + n > size)
+            throw std::runtime_error("Unexpected end of binary potential.");
+    }
+
+    public:
+
+    BinaryReader(const char* data_i, const size_t size_i, const size_t pos_i)
+    :data(data_i), size(size_i), pos(pos_i){}
+
+    ~BinaryReader(){}
+
+    template<typename T>
+    typename std::enable_if<std::is_trivially_copyable<T>::value>::type
+    read(T& val){
+        check(sizeof(T));
+        std::memcpy(&val, data + pos, sizeof(T));
+        pos += sizeof(T);
+    }
+
+    void read(std::string& str){
+        uint64_t n;
+        read(n);
+        check(n);
+        str.assign(data + pos, n);
+        pos += n;
+    }
+
+    template<typename T>
+    void read(std::vector<T>& vec){
+        uint64_t n;
+        read(n);
+        if constexpr (std::is_trivially_copyable<T>::value
+                      and not std::is_same<T, bool>::value){
+            check(sizeof(T) * n);
+            vec.resize(n);
+            std::memcpy(vec.data(), data + pos, sizeof(T) * n);
+            pos += sizeof(T) * n;
+        }
+        else {
+            vec.resize(n);
+            for (auto& v: vec) read(v);
+        }
+    }
+
+    const size_t& get_pos() const { return pos; }
+
+};
+
+#endif
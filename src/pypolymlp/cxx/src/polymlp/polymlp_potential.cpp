@@ -405,6 +405,40 @@ const vector2i& Potential::get_prod_map_erased_type() const {
 }
 */
 
+void Potential::write(std::ostream& os) const {
+
+    binary_write(os, n_type);
+    binary_write(os, n_nlmtc_all);
+    binary_write(os, eliminate_conj);
+    binary_write(os, separate_erased);
+    binary_write(os, lm_map);
+    binary_write(os, nlmtc_map_no_conjugate);
+    binary_write(os, nlmtc_map);
+    binary_write(os, ntc_map);
+    binary_write(os, prod_map);
+    binary_write(os, prod_map_erased);
+    binary_write(os, prod_features_map);
+    binary_write(os, linear_features);
+    binary_write(os, potential_model_each_key);
+}
+
+void Potential::read(BinaryReader& reader){
+
+    reader.read(n_type);
+    reader.read(n_nlmtc_all);
+    reader.read(eliminate_conj);
+    reader.read(separate_erased);
+    reader.read(lm_map);
+    reader.read(nlmtc_map_no_conjugate);
+    reader.read(nlmtc_map);
+    reader.read(ntc_map);
+    reader.read(prod_map);
+    reader.read(prod_map_erased);
+    reader.read(prod_features_map);
+    reader.read(linear_features);
+    reader.read(potential_model_each_key);
+}
+
 const MappedMultipleFeatures&
 Potential::get_linear_features(const int t) const {
     return linear_features[t];
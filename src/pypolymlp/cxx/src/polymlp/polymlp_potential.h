@@ -10,6 +10,7 @@
 
 #include "polymlp_mlpcpp.h"
 #include "polymlp_features.h"
+#include "polymlp_binary_io.h"
 
 
 struct MappedSingleTerm {
@@ -88,6 +89,10 @@ class Potential {
                                               const int head_key) const;
 
     const int get_n_nlmtc_all() const;
+
+    /* Binary serialization of mappings used in evaluation */
+    void write(std::ostream& os) const;
+    void read(BinaryReader& reader);
 };
 
 #endif
@@ -17,6 +17,16 @@ PYBIND11_MODULE(libmlpcpp, m) {
                       const vector1i&,
                       const std::vector<bool>&,
                       const vector1i&>())
+        .def(py::init<const py::dict&,
+                      const vector3d&,
+                      const vector3d&,
+                      const vector2i&,
+                      const vector1i&,
+                      const std::vector<bool>&,
+                      const vector1i&,
+                      py::array_t<double, py::array::c_style>&>(),
+                py::arg(), py::arg(), py::arg(), py::arg(),
+                py::arg(), py::arg(), py::arg(), py::arg().noconvert())
         .def("get_x", &PyModel::get_x,
                 py::return_value_policy::reference_internal)
         .def("get_fbegin", &PyModel::get_fbegin,
@@ -27,6 +37,31 @@ PYBIND11_MODULE(libmlpcpp, m) {
                 py::return_value_policy::reference_internal)
         ;
 
+    py::class_<PyModelProducts>(m, "PotentialModelProducts")
+        .def(py::init<const py::dict&,
+                      const vector3d&,
+                      const vector3d&,
+                      const vector2i&,
+                      const vector1i&,
+                      const std::vector<bool>&,
+                      const vector1i&>())
+        .def("accumulate", &PyModelProducts::accumulate,
+                py::arg("weights"),
+                py::arg("y"),
+                py::arg("xtx").noconvert(),
+                py::arg("xty").noconvert(),
+                py::arg("xe_sum").noconvert(),
+                py::arg("xe_sq_sum").noconvert())
+        .def("set_max_block_rows", &PyModelProducts::set_max_block_rows)
+        .def("get_n_features", &PyModelProducts::get_n_features)
+        .def("get_fbegin", &PyModelProducts::get_fbegin,
+                py::return_value_policy::reference_internal)
+        .def("get_sbegin", &PyModelProducts::get_sbegin,
+                py::return_value_policy::reference_internal)
+        .def("get_n_data", &PyModelProducts::get_n_data,
+                py::return_value_policy::reference_internal)
+        ;
+
     py::class_<PyAdditiveModel>(m, "PotentialAdditiveModel")
         .def(py::init<const std::vector<py::dict>&,
                       const vector3d&,
@@ -35,6 +70,16 @@ PYBIND11_MODULE(libmlpcpp, m) {
                       const vector1i&,
                       const std::vector<bool>&,
                       const vector1i&>())
+        .def(py::init<const std::vector<py::dict>&,
+                      const vector3d&,
+                      const vector3d&,
+                      const vector2i&,
+                      const vector1i&,
+                      const std::vector<bool>&,
+                      const vector1i&,
+                      py::array_t<double, py::array::c_style>&>(),
+                py::arg(), py::arg(), py::arg(), py::arg(),
+                py::arg(), py::arg(), py::arg(), py::arg().noconvert())
         .def("get_x", &PyAdditiveModel::get_x,
                 py::return_value_policy::reference_internal)
         .def("get_fbegin", &PyAdditiveModel::get_fbegin,
@@ -51,19 +96,54 @@ PYBIND11_MODULE(libmlpcpp, m) {
     py::class_<PyPropertiesFast>(m, "PotentialPropertiesFast")
         .def(py::init<const py::dict&,
                       const vector1d&>())
-        .def("eval", &PyPropertiesFast::eval)
-        .def("eval_multiple", &PyPropertiesFast::eval_multiple)
+        .def(py::init<const py::list&,
+                      const vector2d&>())
+        .def(py::init<const std::string&,
+                      const size_t,
+                      const bool,
+                      const py::dict&>(),
+                py::arg("filename"),
+                py::arg("offset"),
+                py::arg("use_mmap"),
+                py::arg("params_dict"))
+        .def(py::init<const std::vector<std::string>&,
+                      const std::vector<size_t>&,
+                      const bool,
+                      const py::dict&>(),
+                py::arg("filenames"),
+                py::arg("offsets"),
+                py::arg("use_mmap"),
+                py::arg("params_dict"))
+        .def("write_binary", &PyPropertiesFast::write_binary)
+        .def("eval", &PyPropertiesFast::eval,
+                py::arg("axis"),
+                py::arg("positions_c"),
+                py::arg("types"),
+                py::arg("mode") = "all",
+                py::arg("per_atom") = false)
+        .def("eval_multiple_arrays", &PyPropertiesFast::eval_multiple_arrays,
+                py::arg("axis_array"),
+                py::arg("positions_c"),
+                py::arg("types"),
+                py::arg("offsets"),
+                py::arg("energies").noconvert(),
+                py::arg("forces").noconvert(),
+                py::arg("stresses").noconvert(),
+                py::arg("energies_atom").noconvert(),
+                py::arg("virials_atom").noconvert(),
+                py::arg("mode") = "all",
+                py::arg("per_atom") = false)
+        .def("set_skin", &PyPropertiesFast::set_skin)
+        .def("get_n_neighbor_builds", &PyPropertiesFast::get_n_neighbor_builds)
         .def("get_e", &PyPropertiesFast::get_e,
                 py::return_value_policy::reference_internal)
         .def("get_f", &PyPropertiesFast::get_f,
                 py::return_value_policy::reference_internal)
         .def("get_s", &PyPropertiesFast::get_s,
                 py::return_value_policy::reference_internal)
-        .def("get_e_array", &PyPropertiesFast::get_e_array,
-                py::return_value_policy::reference_internal)
-        .def("get_f_array", &PyPropertiesFast::get_f_array,
+        .def("get_e_atom", &PyPropertiesFast::get_e_atom,
                 py::return_value_policy::reference_internal)
-        .def("get_s_array", &PyPropertiesFast::get_s_array,
+        .def("get_v_atom", &PyPropertiesFast::get_v_atom,
                 py::return_value_policy::reference_internal)
         ;
 
@@ -79,6 +159,7 @@ PYBIND11_MODULE(libmlpcpp, m) {
                 py::return_value_policy::reference_internal)
         .def("get_type_comb_pair", &PyFeaturesAttr::get_type_comb_pair,
                 py::return_value_policy::reference_internal)
+        .def("get_n_features", &PyFeaturesAttr::get_n_features)
         ;
 
     py::class_<Readgtinv>(m, "Readgtinv")
@@ -15,6 +15,7 @@
 
 #include "mlpcpp.h"
 #include "compute/py_model.h"
+#include "compute/py_model_products.h"
 #include "compute/py_additive_model.h"
 #include "compute/py_properties_fast.h"
 #include "compute/py_features_attr.h"
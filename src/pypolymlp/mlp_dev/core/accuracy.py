@@ -25,6 +25,7 @@ class PolymlpDevAccuracy:
         self.__test_dict = reg.test_dict
         self.__multiple_datasets = reg.is_multiple_datasets
         self.__hybrid = reg.is_hybrid
+        self.__cv = reg.best_model.get("cv")
         self.__error_train = dict()
         self.__error_test = dict()
 
@@ -53,6 +54,26 @@ class PolymlpDevAccuracy:
             filename=filename,
             initialize=False,
         )
+        if self.__cv is not None:
+            self.__write_cv_yaml(filename=filename)
+
+    def __write_cv_yaml(self, filename="polymlp_error.yaml"):
+        """Write rmse of cross validation for weighted data."""
+        cv = self.__cv
+        f = open(filename, "a")
+        print("cross_validation:", file=f)
+        print("  method:", cv["method"], file=f)
+        if cv["method"] == "kfold":
+            print("  n_folds:", cv["n_folds"], file=f)
+        idx = int(np.argmin(cv["rmse"]))
+        print("  alpha:", cv["alphas"][idx], file=f)
+        print("  rmse_weighted:", cv["rmse"][idx], file=f)
+        print("  scores:", file=f)
+        for alpha, score in zip(cv["alphas"], cv["rmse"]):
+            print("  - alpha:", alpha, file=f)
+            print("    rmse_weighted:", score, file=f)
+        print("", file=f)
+        f.close()
 
     def __write_error_yaml(
         self,
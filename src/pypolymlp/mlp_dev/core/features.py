@@ -1,7 +1,9 @@
 #!/usr/bin/env python
 import numpy as np
 
+from pypolymlp.core.structure import StructureBatch
 from pypolymlp.cxx.lib import libmlpcpp
+from pypolymlp.mlp_dev.core.features_attr import get_num_features
 
 
 def multiple_dft_dicts_to_mlpcpp_obj(multiple_dft_dicts):
@@ -32,6 +34,14 @@ def multiple_dft_dicts_to_mlpcpp_obj(multiple_dft_dicts):
 
 def structures_to_mlpcpp_obj(structures):
 
+    if isinstance(structures, StructureBatch):
+        sections = structures.offsets[1:-1]
+        axis_array = list(structures.axis_array)
+        positions_c_array = np.split(structures.positions_cartesian, sections, axis=1)
+        types_array = np.split(structures.types, sections)
+        n_atoms_sum_array = structures.total_n_atoms.tolist()
+        return (axis_array, positions_c_array, types_array, n_atoms_sum_array)
+
     axis_array = [st["axis"] for st in structures]
     positions_c_array = [np.dot(st["axis"], st["positions"]) for st in structures]
     types_array = [st["types"] for st in structures]
@@ -39,9 +49,44 @@ def structures_to_mlpcpp_obj(structures):
     return (axis_array, positions_c_array, types_array, n_atoms_sum_array)
 
 
+def compute_x_shape(n_st_dataset, force_dataset, n_atoms_sum_array, n_features):
+    """Return shape of X with rows of energies, stresses, and forces."""
+    n_data, begin = 0, 0
+    for n_st, force in zip(n_st_dataset, force_dataset):
+        n_data += n_st
+        if force:
+            n_data += 6 * n_st + 3 * sum(n_atoms_sum_array[begin : begin + n_st])
+        begin += n_st
+    return (n_data, n_features)
+
+
+def open_x_memmap(filename, shape):
+    """Create a .npy file of X that can be memory-mapped."""
+    return np.lib.format.open_memmap(
+        filename, mode="w+", dtype=np.float64, shape=shape
+    )
+
+
 class Features:
 
-    def __init__(self, params_dict, dft_dict, print_memory=True, element_swap=False):
+    def __init__(
+        self,
+        params_dict,
+        dft_dict,
+        print_memory=True,
+        element_swap=False,
+        neighbor_method="brute_force",
+        memmap_file=None,
+    ):
+        """
+        Parameters
+        ----------
+        neighbor_method: Algorithm for neighbor search,
+                         "brute_force" or "linked_cell".
+                         "linked_cell" is efficient for large structures.
+        memmap_file: If given, X is written into a memory-mapped .npy file
+                     and Features.x is a numpy memmap.
+        """
 
         if "structures" in dft_dict:
             structures = dft_dict["structures"]
@@ -66,7 +111,8 @@ class Features:
 
         params_dict["element_swap"] = element_swap
         params_dict["print_memory"] = print_memory
-        obj = libmlpcpp.PotentialModel(
+        params_dict["neighbor_method"] = neighbor_method
+        args = [
             params_dict,
             axis_array,
             positions_c_array,
@@ -74,8 +120,18 @@ class Features:
             n_st_dataset,
             force_dataset,
             n_atoms_sum_array,
-        )
-        self.__x = obj.get_x()
+        ]
+        if memmap_file is None:
+            obj = libmlpcpp.PotentialModel(*args)
+            self.__x = obj.get_x()
+        else:
+            n_features = get_num_features(params_dict, element_swap=element_swap)
+            shape = compute_x_shape(
+                n_st_dataset, force_dataset, n_atoms_sum_array, n_features
+            )
+            self.__x = open_x_memmap(memmap_file, shape)
+            obj = libmlpcpp.PotentialModel(*args, self.__x)
+            self.__x.flush()
         fbegin, sbegin = obj.get_fbegin(), obj.get_sbegin()
         ne, nf, ns = obj.get_n_data()
 
@@ -116,7 +172,15 @@ class FeaturesHybrid:
         dft_dicts,
         print_memory=True,
         element_swap=False,
+        neighbor_method="brute_force",
+        memmap_file=None,
     ):
+        """
+        Parameters
+        ----------
+        memmap_file: If given, X is written into a memory-mapped .npy file
+                     and FeaturesHybrid.x is a numpy memmap.
+        """
         if "structures" in dft_dicts:
             structures = dft_dicts["structures"]
             n_st_dataset = [len(structures)]
@@ -141,8 +205,9 @@ class FeaturesHybrid:
         for params_dict in hybrid_params_dicts:
             params_dict["element_swap"] = element_swap
             params_dict["print_memory"] = print_memory
+            params_dict["neighbor_method"] = neighbor_method
 
-        obj = libmlpcpp.PotentialAdditiveModel(
+        args = [
             hybrid_params_dicts,
             axis_array,
             positions_c_array,
@@ -150,9 +215,21 @@ class FeaturesHybrid:
             n_st_dataset,
             force_dataset,
             n_atoms_sum_array,
-        )
+        ]
+        if memmap_file is None:
+            obj = libmlpcpp.PotentialAdditiveModel(*args)
+            self.__x = obj.get_x()
+        else:
+            n_features = get_num_features(
+                hybrid_params_dicts, element_swap=element_swap
+            )
+            shape = compute_x_shape(
+                n_st_dataset, force_dataset, n_atoms_sum_array, n_features
+            )
+            self.__x = open_x_memmap(memmap_file, shape)
+            obj = libmlpcpp.PotentialAdditiveModel(*args, self.__x)
+            self.__x.flush()
 
-        self.__x = obj.get_x()
         fbegin, sbegin = obj.get_fbegin(), obj.get_sbegin()
         cumulative_n_features = obj.get_cumulative_n_features()
         ne, nf, ns = obj.get_n_data()
@@ -189,3 +266,100 @@ class FeaturesHybrid:
     @property
     def cumulative_n_features(self):
         return self.__reg_dict["cumulative_n_features"]
+
+
+class FeaturesProducts:
+
+    def __init__(
+        self,
+        params_dict,
+        dft_dict,
+        print_memory=True,
+        element_swap=False,
+        neighbor_method="brute_force",
+    ):
+        """Products of weighted X computed without returning X.
+
+        Rows of X are computed and accumulated into X.T @ X and X.T @ y
+        in C++ for blocks of structures. Row indices are the same as
+        those of Features.
+        """
+        if "structures" in dft_dict:
+            structures = dft_dict["structures"]
+            n_st_dataset = [len(structures)]
+            force_dataset = [params_dict["include_force"]]
+            (
+                axis_array,
+                positions_c_array,
+                types_array,
+                n_atoms_sum_array,
+            ) = structures_to_mlpcpp_obj(structures)
+        else:
+            res = multiple_dft_dicts_to_mlpcpp_obj(dft_dict)
+            (
+                axis_array,
+                positions_c_array,
+                types_array,
+                n_atoms_sum_array,
+                n_st_dataset,
+                force_dataset,
+            ) = res
+
+        params_dict["element_swap"] = element_swap
+        params_dict["print_memory"] = print_memory
+        params_dict["neighbor_method"] = neighbor_method
+        self.__obj = libmlpcpp.PotentialModelProducts(
+            params_dict,
+            axis_array,
+            positions_c_array,
+            types_array,
+            n_st_dataset,
+            force_dataset,
+            n_atoms_sum_array,
+        )
+        fbegin, sbegin = self.__obj.get_fbegin(), self.__obj.get_sbegin()
+        ne, nf, ns = self.__obj.get_n_data()
+
+        ebegin, ei = [], 0
+        for n in n_st_dataset:
+            ebegin.append(ei)
+            ei += n
+        ebegin = np.array(ebegin)
+
+        self.__first_indices = list(zip(ebegin, fbegin, sbegin))
+        self.__n_data = (ne, nf, ns)
+
+    def accumulate(self, w, y, xtx, xty, xe_sum, xe_sq_sum):
+        """Add products of weighted X to arrays in place.
+
+        Parameters
+        ----------
+        w: Weights of rows, (n_data).
+        y: Weighted observations, (n_data).
+        xtx: (n_features, n_features) or (n_features * (n_features + 1) / 2)
+             in upper packed storage, X.T @ X is added.
+        xty: (n_features), X.T @ y is added.
+        xe_sum, xe_sq_sum: (n_features), Sums of unweighted energy rows
+                           and their squares are added.
+        """
+        self.__obj.accumulate(
+            np.ascontiguousarray(w, dtype=np.float64),
+            np.ascontiguousarray(y, dtype=np.float64),
+            xtx,
+            xty,
+            xe_sum,
+            xe_sq_sum,
+        )
+        return self
+
+    @property
+    def n_features(self):
+        return self.__obj.get_n_features()
+
+    @property
+    def first_indices(self):
+        return self.__first_indices
+
+    @property
+    def n_data(self):
+        return self.__n_data
@@ -30,6 +30,21 @@ def get_features_attr(params_dict, element_swap=False):
     return features_attr, polynomial_attr, atomtype_pair_dict
 
 
+def get_num_features(params_dict, element_swap=False):
+    """Return number of features.
+
+    Parameters
+    ----------
+    params_dict: params_dict or list of params_dicts for hybrid models.
+    """
+    if isinstance(params_dict, (list, tuple)):
+        return sum([get_num_features(p, element_swap) for p in params_dict])
+
+    params_dict["element_swap"] = element_swap
+    obj = libmlpcpp.FeaturesAttr(params_dict)
+    return obj.get_n_features()
+
+
 def write_polymlp_params_yaml(params_dict, filename="polymlp_params.yaml"):
 
     f = open(filename, "w")
@@ -0,0 +1,288 @@
+#!/usr/bin/env python
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+
+import numpy as np
+
+CACHE_VERSION = 1
+
+
+def _to_json(obj):
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError("Object of type " + type(obj).__name__ + " is not hashable.")
+
+
+def _hash_json(obj):
+    dump = json.dumps(obj, sort_keys=True, default=_to_json)
+    return hashlib.sha1(dump.encode("utf-8")).hexdigest()
+
+
+def hash_model_params(params_dict):
+    """Hash of the part of params_dict used for computing features.
+
+    Parameters
+    ----------
+    params_dict: params_dict or list of params_dicts for hybrid models.
+    """
+    if isinstance(params_dict, (list, tuple)):
+        return _hash_json([hash_model_params(p) for p in params_dict])
+
+    attrs = {
+        "version": CACHE_VERSION,
+        "model": params_dict["model"],
+        "n_type": params_dict["n_type"],
+        "element_order": params_dict.get("element_order"),
+    }
+    return _hash_json(attrs)
+
+
+def hash_structure(st_dict):
+    """Hash of content of a structure used for computing features."""
+    sha = hashlib.sha1()
+    for key in ("axis", "positions", "types"):
+        sha.update(key.encode("utf-8"))
+        array = np.ascontiguousarray(st_dict[key])
+        if key == "types":
+            array = array.astype(np.int64)
+        else:
+            array = array.astype(np.float64)
+        sha.update(str(array.shape).encode("utf-8"))
+        sha.update(array.tobytes())
+    return sha.hexdigest()
+
+
+def hash_dataset(dft_dict, include_force=None, include_labels=False):
+    """Fingerprint of a dataset built from hashes of structures.
+
+    Parameters
+    ----------
+    include_force: Whether force rows are included.
+                   dft_dict["include_force"] is used if None.
+    include_labels: Include energies, forces, stress tensors, and weight,
+                    which are required for weighted products of X.
+    """
+    if include_force is None:
+        include_force = dft_dict.get("include_force", True)
+
+    sha = hashlib.sha1()
+    sha.update(str(bool(include_force)).encode("utf-8"))
+    for st in dft_dict["structures"]:
+        sha.update(hash_structure(st).encode("utf-8"))
+
+    if include_labels:
+        for key in ("energy", "force", "stress", "total_n_atoms"):
+            sha.update(key.encode("utf-8"))
+            sha.update(np.ascontiguousarray(dft_dict[key], dtype=np.float64))
+        sha.update(str(dft_dict.get("weight", 1.0)).encode("utf-8"))
+    return sha.hexdigest()
+
+
+def hash_structures_with_labels(dft_dict, include_force=None):
+    """Fingerprints of structures in a dataset including their labels.
+
+    Each fingerprint depends on the structure, its energy, forces,
+    and stress tensor, and the weight of the dataset.
+
+    Return
+    ------
+    hashes: List of hashes, (n_structures).
+    """
+    if include_force is None:
+        include_force = dft_dict.get("include_force", True)
+
+    common = str(bool(include_force)) + str(dft_dict.get("weight", 1.0))
+    energy = np.ascontiguousarray(dft_dict["energy"], dtype=np.float64)
+    force = np.ascontiguousarray(dft_dict["force"], dtype=np.float64)
+    stress = np.ascontiguousarray(dft_dict["stress"], dtype=np.float64)
+
+    hashes, fbegin = [], 0
+    for i, st in enumerate(dft_dict["structures"]):
+        fend = fbegin + 3 * int(dft_dict["total_n_atoms"][i])
+        sha = hashlib.sha1(common.encode("utf-8"))
+        sha.update(hash_structure(st).encode("utf-8"))
+        sha.update(energy[i : i + 1].tobytes())
+        sha.update(force[fbegin:fend].tobytes())
+        sha.update(stress[i * 6 : (i + 1) * 6].tobytes())
+        hashes.append(sha.hexdigest())
+        fbegin = fend
+    return hashes
+
+
+class FeaturesCache:
+    """Persistent cache of features in a directory.
+
+    Each entry is a subdirectory containing .npy files of arrays
+    and meta.json. Entries are evicted in least-recently-used order
+    when the total size exceeds max_size.
+    """
+
+    def __init__(self, cache_dir="polymlp_cache", max_size=10.0, verbose=True):
+        """
+        Parameters
+        ----------
+        cache_dir: Directory of cache.
+        max_size: Maximum size of cache in GB.
+        """
+        self.__cache_dir = cache_dir
+        self.__max_size = max_size * 1e9
+        self.__verbose = verbose
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, *items):
+        """Key of an entry from hashes and other JSON-serializable items."""
+        return _hash_json(list(items))
+
+    def key_features(self, params_dict, dft_dicts, element_swap=False):
+        """Key of X computed by Features or FeaturesHybrid.
+
+        Parameters
+        ----------
+        dft_dicts: Multiple datasets, {set_id: dft_dict}, or a single dataset.
+        """
+        if "structures" in dft_dicts:
+            if isinstance(params_dict, (list, tuple)):
+                include_force = params_dict[0]["include_force"]
+            else:
+                include_force = params_dict["include_force"]
+            dataset_hashes = [hash_dataset(dft_dicts, include_force=include_force)]
+        else:
+            dataset_hashes = [hash_dataset(d) for d in dft_dicts.values()]
+        return self.key(
+            "features",
+            hash_model_params(params_dict),
+            bool(element_swap),
+            dataset_hashes,
+        )
+
+    def __path(self, key):
+        return os.path.join(self.__cache_dir, key)
+
+    def contains(self, key):
+        return os.path.exists(os.path.join(self.__path(key), "meta.json"))
+
+    def load(self, key, mmap_mode=None):
+        """Load an entry.
+
+        Parameters
+        ----------
+        mmap_mode: mmap_mode of numpy.load. Use "r" so that cached arrays
+                   are not modified.
+
+        Return
+        ------
+        arrays: Dictionary of arrays.
+        meta: Dictionary of other attributes.
+        None is returned if the entry is not found.
+        """
+        path = self.__path(key)
+        try:
+            with open(os.path.join(path, "meta.json")) as f:
+                meta = json.load(f)
+            arrays = dict()
+            for name in meta["arrays"]:
+                filename = os.path.join(path, name + ".npy")
+                arrays[name] = np.load(filename, mmap_mode=mmap_mode)
+            # entry may be evicted by another process after it is read.
+            os.utime(os.path.join(path, "meta.json"))
+        except (OSError, ValueError, KeyError):
+            return None
+
+        if self.__verbose:
+            print("Features loaded from cache:", path, flush=True)
+        return arrays, meta["attrs"]
+
+    def save(self, key, arrays, attrs=None):
+        """Save an entry and evict old entries except for the saved one.
+
+        An entry larger than max_size is not saved.
+
+        Parameters
+        ----------
+        arrays: Dictionary of arrays.
+        attrs: Dictionary of JSON-serializable attributes.
+        """
+        path = self.__path(key)
+        size = sum(np.asarray(array).nbytes for array in arrays.values())
+        if size > self.__max_size:
+            if self.__verbose:
+                print("Features too large to be cached:", path, flush=True)
+            return self
+
+        tmp_path = path + ".tmp-" + uuid.uuid4().hex
+        os.makedirs(tmp_path)
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp_path, name + ".npy"), array)
+
+        meta = {
+            "version": CACHE_VERSION,
+            "arrays": list(arrays.keys()),
+            "attrs": dict() if attrs is None else attrs,
+            "created": time.time(),
+        }
+        with open(os.path.join(tmp_path, "meta.json"), "w") as f:
+            json.dump(meta, f, default=_to_json)
+
+        try:
+            os.rename(tmp_path, path)
+        except OSError:
+            # entry is written by another process.
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+        self.evict(keep=key)
+        return self
+
+    def __entries(self):
+
+        entries = []
+        for name in os.listdir(self.__cache_dir):
+            path = self.__path(name)
+            meta = os.path.join(path, "meta.json")
+            if ".tmp-" in name or not os.path.exists(meta):
+                continue
+            size = sum(
+                os.path.getsize(os.path.join(path, f)) for f in os.listdir(path)
+            )
+            entries.append((os.path.getmtime(meta), size, path))
+        return sorted(entries)
+
+    def evict(self, max_size=None, keep=None):
+        """Remove least-recently-used entries until total size <= max_size.
+
+        Parameters
+        ----------
+        max_size: Maximum size in GB. The value of constructor is used if None.
+        keep: Key of an entry that is not removed.
+        """
+        max_size = self.__max_size if max_size is None else max_size * 1e9
+        keep_path = None if keep is None else self.__path(keep)
+        entries = self.__entries()
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total_size <= max_size:
+                break
+            if path == keep_path:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            total_size -= size
+            if self.__verbose:
+                print("Features removed from cache:", path, flush=True)
+        return self
+
+    def clear(self):
+        return self.evict(max_size=0.0)
+
+    @property
+    def cache_dir(self):
+        return self.__cache_dir
+
+    @property
+    def size(self):
+        """Total size of cache in GB."""
+        return sum(size for _, size, _ in self.__entries()) * 1e-9
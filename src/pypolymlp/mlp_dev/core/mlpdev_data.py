@@ -3,6 +3,7 @@ import copy
 
 import numpy as np
 
+from pypolymlp.core.dataset_store import DatasetStore
 from pypolymlp.core.interface_vasp import parse_vaspruns
 from pypolymlp.core.parser_polymlp_params import ParamsParser
 from pypolymlp.mlp_dev.core.features_attr import write_polymlp_params_yaml
@@ -126,10 +127,18 @@ class PolymlpDevData:
 
         return self
 
-    def parse_datasets(self):
-        """todo: Must be revised"""
+    def parse_datasets(self, n_jobs=1, dataset_store: DatasetStore = None):
+        """todo: Must be revised
+
+        Parameters
+        ----------
+        n_jobs: Number of processes reading vasprun.xml files in parallel.
+        dataset_store: DatasetStore object. If given, vasprun.xml files are
+                       loaded from the store and only new or modified files
+                       are parsed.
+        """
         if "phono3py_yaml" in self.__params_dict["dft"]["train"]:
-            self.parse_single_dataset()
+            self.parse_single_dataset(n_jobs=n_jobs, dataset_store=dataset_store)
             self.__params_dict["dft"]["train"]["train1"] = self.__params_dict["dft"][
                 "train"
             ]
@@ -140,10 +149,10 @@ class PolymlpDevData:
             self.__test_dict = {"test1": self.__test_dict}
             self.__multiple_datasets = True
         else:
-            self.parse_multiple_datasets()
+            self.parse_multiple_datasets(n_jobs=n_jobs, dataset_store=dataset_store)
             self.__multiple_datasets = True
 
-    def parse_single_dataset(self):
+    def parse_single_dataset(self, n_jobs=1, dataset_store: DatasetStore = None):
 
         if self.__params_dict is None:
             raise ValueError("parse_dataset: params_dict is needed.")
@@ -153,10 +162,14 @@ class PolymlpDevData:
             self.__train_dict = parse_vaspruns(
                 self.__params_dict["dft"]["train"],
                 element_order=self.__params_dict["element_order"],
+                n_jobs=n_jobs,
+                dataset_store=dataset_store,
             )
             self.__test_dict = parse_vaspruns(
                 self.__params_dict["dft"]["test"],
                 element_order=self.__params_dict["element_order"],
+                n_jobs=n_jobs,
+                dataset_store=dataset_store,
             )
         elif dataset_type == "phono3py":
             from pypolymlp.core.interface_phono3py_ver3 import parse_phono3py_yaml
@@ -180,7 +193,7 @@ class PolymlpDevData:
         self.__test_dict = self.__apply_atomic_energy(self.__test_dict)
         return self
 
-    def parse_multiple_datasets(self):
+    def parse_multiple_datasets(self, n_jobs=1, dataset_store: DatasetStore = None):
 
         if self.__params_dict is None:
             raise ValueError("parse_dataset: params_dict is needed.")
@@ -191,13 +204,19 @@ class PolymlpDevData:
             self.__train_dict, self.__test_dict = dict(), dict()
             for set_id, dict1 in self.__params_dict["dft"]["train"].items():
                 self.__train_dict[set_id] = parse_vaspruns(
-                    dict1["vaspruns"], element_order=element_order
+                    dict1["vaspruns"],
+                    element_order=element_order,
+                    n_jobs=n_jobs,
+                    dataset_store=dataset_store,
                 )
                 self.__train_dict[set_id].update(dict1)
 
             for set_id, dict1 in self.__params_dict["dft"]["test"].items():
                 self.__test_dict[set_id] = parse_vaspruns(
-                    dict1["vaspruns"], element_order=element_order
+                    dict1["vaspruns"],
+                    element_order=element_order,
+                    n_jobs=n_jobs,
+                    dataset_store=dataset_store,
                 )
                 self.__test_dict[set_id].update(dict1)
         else:
@@ -212,6 +231,53 @@ class PolymlpDevData:
 
         return self
 
+    def eliminate_duplicates(self, tol=1e-3, energy_tol=None, verbose=True):
+        """Remove near-duplicate structures from training datasets.
+
+        Structures are compared using polymlp features averaged over atoms.
+        See pypolymlp.utils.dataset.duplicates.
+
+        Parameters
+        ----------
+        tol: Relative tolerance of fingerprints of structures.
+        energy_tol: Tolerance of energies per atom (eV/atom). If given,
+                    structures with different energies are kept.
+        """
+        from pypolymlp.utils.dataset.duplicates import eliminate_duplicates
+
+        if self.__train_dict is None:
+            raise ValueError("eliminate_duplicates: datasets are needed.")
+
+        if self.__hybrid:
+            params_dict = self.__hybrid_params_dicts[0]
+        else:
+            params_dict = self.__params_dict
+
+        if self.__multiple_datasets:
+            train_dicts = self.__train_dict
+        else:
+            train_dicts = {"train": self.__train_dict}
+
+        n_before, n_after = 0, 0
+        if verbose:
+            print("Elimination of near-duplicate structures:", flush=True)
+        for set_id, dft_dict in train_dicts.items():
+            n_str = len(dft_dict["structures"])
+            dft_dict_reduced, ids = eliminate_duplicates(
+                dft_dict, params_dict, tol=tol, energy_tol=energy_tol
+            )
+            train_dicts[set_id] = dft_dict_reduced
+            n_before += n_str
+            n_after += len(ids)
+            if verbose:
+                print("  -", set_id, ":", n_str, "->", len(ids), flush=True)
+
+        if not self.__multiple_datasets:
+            self.__train_dict = train_dicts["train"]
+        if verbose:
+            print("  Number of structures:", n_before, "->", n_after, flush=True)
+        return self
+
     def __apply_atomic_energy(self, dft_dict):
 
         energy = dft_dict["energy"]
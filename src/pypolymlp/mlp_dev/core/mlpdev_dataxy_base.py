@@ -4,14 +4,26 @@ from abc import ABC, abstractmethod
 import numpy as np
 
 from pypolymlp.mlp_dev.core.features import Features, FeaturesHybrid
+from pypolymlp.mlp_dev.core.features_cache import FeaturesCache
 from pypolymlp.mlp_dev.core.mlpdev_data import PolymlpDevData
+from pypolymlp.mlp_dev.core.utils_sequential import scale_columns
 from pypolymlp.mlp_dev.core.utils_weights import apply_weight_percentage
 
 
 class PolymlpDevDataXYBase(ABC):
 
-    def __init__(self, params: PolymlpDevData, verbose=True):
+    def __init__(
+        self,
+        params: PolymlpDevData,
+        verbose=True,
+        feature_cache: FeaturesCache = None,
+    ):
         """
+        Parameters
+        ----------
+        feature_cache: FeaturesCache object. If given, features are loaded
+                       from and stored in the persistent cache.
+
         Keys in reg_dict
         ----------------
         - x
@@ -23,6 +35,7 @@ class PolymlpDevDataXYBase(ABC):
         self.__params_dict = params.params_dict
         self.__common_params_dict = params.common_params_dict
         self.__verbose = verbose
+        self.__feature_cache = feature_cache
 
         self.__train_dict = params.train_dict
         self.__test_dict = params.test_dict
@@ -66,8 +79,8 @@ class PolymlpDevDataXYBase(ABC):
         ne, nf, ns = self.__train_reg_dict["n_data"]
         self.__scales = np.std(x[:ne], axis=0)
 
-        self.__train_reg_dict["x"] /= self.__scales
-        self.__test_reg_dict["x"] /= self.__scales
+        scale_columns(self.__train_reg_dict["x"], self.__scales)
+        scale_columns(self.__test_reg_dict["x"], self.__scales)
 
         self.__train_reg_dict["scales"] = self.__scales
         self.__test_reg_dict["scales"] = self.__scales
@@ -185,3 +198,7 @@ class PolymlpDevDataXYBase(ABC):
     @property
     def verbose(self):
         return self.__verbose
+
+    @property
+    def feature_cache(self):
+        return self.__feature_cache
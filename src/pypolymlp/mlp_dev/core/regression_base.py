@@ -1,13 +1,34 @@
 #!/usr/bin/env python
+import warnings
 from abc import ABC, abstractmethod
 from math import sqrt
 
 import numpy as np
+from scipy.linalg import cho_factor, cho_solve, eigh
 from scipy.linalg.lapack import get_lapack_funcs
 
-from pypolymlp.core.io_polymlp import save_mlp_lammps, save_multiple_mlp_lammps
+from pypolymlp.core.io_polymlp import (
+    convert_mlp_lammps_to_binary,
+    save_mlp_lammps,
+    save_multiple_mlp_lammps,
+)
 from pypolymlp.core.utils import rmse
 from pypolymlp.mlp_dev.core.mlpdev_dataxy_base import PolymlpDevDataXYBase
+from pypolymlp.mlp_dev.core.utils_sequential import (
+    compute_products_blockwise,
+    compute_xtx_blockwise,
+    diagonal_blocks_blockwise,
+    dot_blockwise,
+    normal_dot_blockwise,
+    tdot_blockwise,
+)
+from pypolymlp.mlp_dev.core.utils_symmetric import (
+    add_diagonal,
+    is_packed,
+    symmetric_diagonal_blocks,
+    symmetric_dot,
+    unpack_symmetric,
+)
 
 
 class RegressionBase(ABC):
@@ -24,6 +45,7 @@ class RegressionBase(ABC):
         self.__params_dict = polymlp_dev.params_dict
         self.__common_params_dict = polymlp_dev.common_params_dict
         self.__hybrid = polymlp_dev.is_hybrid
+        self.__solver = self.__common_params_dict["reg"].get("solver", "cholesky")
 
         self.__multiple_datasets = polymlp_dev.is_multiple_datasets
 
@@ -53,18 +75,220 @@ class RegressionBase(ABC):
         numpy and scipy implementations
         x = np.linalg.solve(A, b)
         x = scipy.linalg.solve(A, b, check_finite=False, assume_a='pos')
+
+        A in upper packed storage is solved by the packed Cholesky solver.
         """
+        if is_packed(A):
+            (ppsv,) = get_lapack_funcs(("ppsv",), (A, b))
+            n = b.shape[0]
+            # ppsv overwrites A with its Cholesky factor.
+            x, _ = ppsv(n, np.copy(A), b.reshape((n, -1)), lower=False)
+            return x.reshape(b.shape)
+
         (posv,) = get_lapack_funcs(("posv",), (A, b))
         _, x, _ = posv(A, b, lower=False, overwrite_a=False, overwrite_b=False)
         return x
 
+    def eigendecomposition(self, A):
+        """Eigenvalues and eigenvectors of symmetric A = X.T @ X.
+
+        A is not overwritten. Solutions of (A + shift * I) x = b are
+        then obtained for any number of shifts by diagonal rescaling.
+        """
+        if self.__verbose:
+            print("Regression: eigendecomposition ...")
+        eigvals, eigvecs = eigh(
+            unpack_symmetric(A), overwrite_a=False, check_finite=False
+        )
+        return eigvals, eigvecs
+
+    def solve_eigen(self, eigvals, eigvecs, b_rot, shifts):
+        """Solve (A + shift * I) x = b for shifts.
+
+        Parameters
+        ----------
+        eigvals, eigvecs: Eigendecomposition of A.
+        b_rot: eigvecs.T @ b, (n_features) or (n_features, n_shifts).
+        shifts: Diagonal shifts, (n_shifts).
+
+        Return
+        ------
+        coefs_array: Solutions, (n_features, n_shifts).
+        z_array: Solutions in eigenbasis, eigvecs.T @ coefs_array.
+        """
+        shifts = np.asarray(shifts, dtype=float)
+        if b_rot.ndim == 1:
+            b_rot = b_rot[:, np.newaxis]
+        z_array = b_rot / (eigvals[:, np.newaxis] + shifts[np.newaxis, :])
+        coefs_array = eigvecs @ z_array
+        return coefs_array, z_array
+
+    def solve_cg(
+        self,
+        shifts,
+        b,
+        X=None,
+        A=None,
+        tol=1e-8,
+        max_iter=None,
+        block_size=1024,
+        max_direct_features=8192,
+    ):
+        """Solve (X.T @ X + shift * I) c = b by preconditioned conjugate gradient.
+
+        X.T @ X is not formed if X is given, and products with X are
+        computed blockwise for memory-mapped X. The block Jacobi
+        preconditioner given by diagonal blocks of X.T @ X + shift * I
+        is used. Solutions for larger shifts are used as initial guesses
+        for smaller shifts. Iterations are stopped when both the relative
+        residual norm and the estimated relative error of the solution
+        in the norm of X.T @ X + shift * I are smaller than tol.
+        A warning is issued for shifts where iterations do not converge.
+
+        If n_features <= max_direct_features, the equations are solved
+        directly by Cholesky decomposition, which is faster and more
+        accurate than conjugate gradient for ill-conditioned X.T @ X.
+
+        Parameters
+        ----------
+        shifts: Diagonal shifts, (n_shifts).
+        b: Right-hand side, (n_features) or (n_features, n_shifts).
+        X: Matrix X. Memory-mapped X is accepted.
+        A: X.T @ X, used if X is None.
+        tol: Tolerance of relative residual norm and relative error.
+        max_iter: Maximum number of iterations for each shift.
+        block_size: Size of diagonal blocks in the preconditioner.
+        max_direct_features: Maximum number of features for direct solver.
+
+        Return
+        ------
+        coefs_array: Solutions, (n_features, n_shifts).
+        """
+        shifts = np.asarray(shifts, dtype=float)
+        n_features = b.shape[0]
+        if b.ndim == 1:
+            b = np.tile(b[:, np.newaxis], (1, len(shifts)))
+
+        if n_features <= max_direct_features:
+            return self.__solve_direct(shifts, b, X=X, A=A)
+
+        if max_iter is None:
+            max_iter = 10 * n_features
+        if X is not None:
+            blocks = diagonal_blocks_blockwise(X, block_size)
+        else:
+            blocks = symmetric_diagonal_blocks(A, block_size)
+
+        if self.__verbose:
+            print("Regression: conjugate gradient ...")
+        coefs_array = np.zeros((n_features, len(shifts)))
+        coefs = np.zeros(n_features)
+        for i in np.argsort(shifts)[::-1]:
+            shift = shifts[i]
+            precond = self.__block_jacobi(blocks, shift)
+            coefs, n_iter, converged = self.__pcg(
+                X, A, shift, b[:, i], precond, coefs, tol, max_iter
+            )
+            coefs_array[:, i] = coefs
+            if self.__verbose:
+                print(" shift =", "{:.3e}".format(shift), ": iterations =", n_iter)
+            if not converged:
+                warnings.warn(
+                    "Conjugate gradient did not converge for shift = "
+                    + "{:.3e}".format(shift)
+                    + " in "
+                    + str(n_iter)
+                    + " iterations."
+                )
+        return coefs_array
+
+    def __solve_direct(self, shifts, b, X=None, A=None):
+        """Solve (A + shift * I) c = b by Cholesky decomposition."""
+        if A is None:
+            if self.__verbose:
+                print("Regression: computing inner products ...")
+            A = compute_xtx_blockwise(X)
+
+        if self.__verbose:
+            print("Regression: cholesky decomposition ...")
+        coefs_array = np.zeros(b.shape)
+        shift_prev = 0.0
+        for i, shift in enumerate(shifts):
+            add_diagonal(A, shift - shift_prev)
+            coefs_array[:, i] = self.solve_linear_equation(A, b[:, i])
+            shift_prev = shift
+        add_diagonal(A, -shift_prev)
+        return coefs_array
+
+    def __block_jacobi(self, blocks, shift):
+        """Return preconditioner given by Cholesky factors of diagonal blocks."""
+        factors, begin = [], 0
+        for block in blocks:
+            end = begin + block.shape[0]
+            add_diagonal(block, shift)
+            factors.append((begin, end, cho_factor(block, check_finite=False)))
+            add_diagonal(block, -shift)
+            begin = end
+
+        def precond(r):
+            z = np.empty_like(r)
+            for begin, end, factor in factors:
+                z[begin:end] = cho_solve(factor, r[begin:end], check_finite=False)
+            return z
+
+        return precond
+
+    def __pcg(self, X, A, shift, b, precond, x0, tol, max_iter, delay=10):
+        """Preconditioned conjugate gradient.
+
+        The error of the solution in the norm of A + shift * I is
+        estimated from the sum of the last delay terms of step * (r @ z),
+        which approximates the error of the iterate delay steps before.
+        """
+
+        def matvec(v):
+            if X is not None:
+                return normal_dot_blockwise(X, v) + shift * v
+            return symmetric_dot(A, v) + shift * v
+
+        b_norm = np.linalg.norm(b)
+        if b_norm == 0.0:
+            return np.zeros_like(b), 0, True
+
+        x = x0.copy()
+        r = b - matvec(x)
+        z = precond(r)
+        p = z.copy()
+        rz = r @ z
+        errors = []
+        for n_iter in range(max_iter):
+            if rz == 0.0:
+                return x, n_iter, True
+            if np.linalg.norm(r) <= tol * b_norm:
+                error = sqrt(sum(errors[-delay:]))
+                if error <= tol * sqrt(abs(x @ b)):
+                    return x, n_iter, True
+            q = matvec(p)
+            step = rz / (p @ q)
+            x += step * p
+            r -= step * q
+            z = precond(r)
+            rz_new = r @ z
+            errors.append(step * rz)
+            p = z + (rz_new / rz) * p
+            rz = rz_new
+        return x, max_iter, False
+
+    def compute_xty(self, X, y):
+        """Return X.T @ y, computed blockwise for memory-mapped X."""
+        return tdot_blockwise(X, y)
+
     def compute_inner_products(self, X=None, y=None, A=None, Xy=None):
 
         if X is not None and y is not None:
             if self.__verbose:
                 print("Regression: computing inner products ...")
-            A = np.dot(X.T, X)
-            Xy = np.dot(X.T, y)
+            A, Xy = compute_products_blockwise(X, y)
         return A, Xy
 
     def rmse(self, true, pred):
@@ -75,8 +299,8 @@ class RegressionBase(ABC):
 
     def predict(self, coefs_array):
         """computing rmse using X and y"""
-        pred_train = np.dot(self.__vtrain["x"], coefs_array).T
-        pred_test = np.dot(self.__vtest["x"], coefs_array).T
+        pred_train = dot_blockwise(self.__vtrain["x"], coefs_array).T
+        pred_test = dot_blockwise(self.__vtest["x"], coefs_array).T
         rmse_train = self.rmse_list(self.__vtrain["y"], pred_train)
         rmse_test = self.rmse_list(self.__vtest["y"], pred_test)
         return pred_train, pred_test, rmse_train, rmse_test
@@ -108,14 +332,117 @@ class RegressionBase(ABC):
 
         return rmse_train_array, rmse_test_array
 
+    def predict_seq_eigen(self, z_array, eigvals, eigvecs):
+        """computing rmse using xtx, xty and y_sq in eigenbasis of train xtx
+
+        Parameters
+        ----------
+        z_array: Coefficients in eigenbasis, (n_features, n_coeffs),
+                 returned from solve_eigen.
+        """
+        vtrain, vtest = self.__vtrain, self.__vtest
+        xty_rot = eigvecs.T @ vtrain["xty"]
+        v1 = eigvals @ np.square(z_array)
+        v2 = -2 * xty_rot @ z_array
+        mse_train = (v1 + v2 + vtrain["y_sq_norm"]) / vtrain["total_n_data"]
+
+        xtx_rot = eigvecs.T @ symmetric_dot(vtest["xtx"], eigvecs)
+        xty_rot = eigvecs.T @ vtest["xty"]
+        v1 = np.sum(z_array * (xtx_rot @ z_array), axis=0)
+        v2 = -2 * xty_rot @ z_array
+        mse_test = (v1 + v2 + vtest["y_sq_norm"]) / vtest["total_n_data"]
+        del xtx_rot
+
+        rmse_train_array = list(np.sqrt(np.maximum(mse_train, 0.0)))
+        rmse_test_array = list(np.sqrt(mse_test))
+        return rmse_train_array, rmse_test_array
+
+    def cross_validation(self, alphas):
+        """Cross validation rmse of ridge regression for alphas.
+
+        Method is given by params_dict["reg"]["cv"], "kfold" or "gcv".
+        None is returned if cross validation is not required.
+        Products of the training dataset are required.
+        """
+        method = self.__common_params_dict["reg"].get("cv")
+        if method is None:
+            return None
+        if "xtx" not in self.__vtrain:
+            raise ValueError("Cross validation requires sequential regression.")
+
+        if method == "kfold":
+            return self.__kfold_rmse(alphas)
+        return self.__gcv_rmse(alphas)
+
+    def __solve_ridge_path(self, A, b, alphas):
+        """Solve (A + alpha * I) x = b for alphas. A is overwritten."""
+        if self.__solver == "eigen":
+            A = unpack_symmetric(A)
+            eigvals, eigvecs = eigh(A, overwrite_a=True, check_finite=False)
+            coefs_array, _ = self.solve_eigen(eigvals, eigvecs, eigvecs.T @ b, alphas)
+            return coefs_array
+
+        coefs_array = np.zeros((b.shape[0], len(alphas)))
+        alpha_prev = 0.0
+        for i, alpha in enumerate(alphas):
+            add_diagonal(A, alpha - alpha_prev)
+            coefs_array[:, i] = self.solve_linear_equation(A, b)
+            alpha_prev = alpha
+        return coefs_array
+
+    def __kfold_rmse(self, alphas):
+        """K-fold cross validation using products of folds."""
+        if "xtx_folds" not in self.__vtrain:
+            raise ValueError("Products of folds are required for k-fold CV.")
+
+        v = self.__vtrain
+        n_folds = len(v["xtx_folds"])
+        if self.__verbose:
+            print("Regression: k-fold cross validation, k =", n_folds, "...")
+
+        sq_error = np.zeros(len(alphas))
+        for i in range(n_folds):
+            xtx, xty = v["xtx_folds"][i], v["xty_folds"][i]
+            coefs_array = self.__solve_ridge_path(
+                v["xtx"] - xtx, v["xty"] - xty, alphas
+            )
+            v1 = np.sum(coefs_array * symmetric_dot(xtx, coefs_array), axis=0)
+            v2 = -2 * xty @ coefs_array
+            sq_error += v1 + v2 + v["y_sq_norm_folds"][i]
+
+        mse = sq_error / sum(v["total_n_data_folds"])
+        return list(np.sqrt(np.maximum(mse, 0.0)))
+
+    def __gcv_rmse(self, alphas):
+        """Generalized cross validation, RSS / n / (1 - tr(H) / n)^2."""
+        if self.__verbose:
+            print("Regression: generalized cross validation ...")
+
+        v = self.__vtrain
+        eigvals, eigvecs = eigh(unpack_symmetric(v["xtx"]), check_finite=False)
+        xty_rot = eigvecs.T @ v["xty"]
+        _, z_array = self.solve_eigen(eigvals, eigvecs, xty_rot, alphas)
+
+        rss = eigvals @ np.square(z_array) - 2 * xty_rot @ z_array + v["y_sq_norm"]
+        n_data = v["total_n_data"]
+        eigvals = np.maximum(eigvals, 0.0)
+        dof = np.array([np.sum(eigvals / (eigvals + a)) for a in alphas])
+        mse = np.maximum(rss, 0.0) / n_data / np.square(1.0 - dof / n_data)
+        return list(np.sqrt(mse))
+
     def __compute_mse(self, xtx, xty, y_sq_norm, size, coefs):
 
-        v1 = np.dot(coefs, np.dot(xtx, coefs))
+        v1 = np.dot(coefs, symmetric_dot(xtx, coefs))
         v2 = -2 * np.dot(coefs, xty)
         return (v1 + v2 + y_sq_norm) / size
 
-    def save_mlp_lammps(self, filename="polymlp.lammps"):
+    def save_mlp_lammps(self, filename="polymlp.lammps", binary=False):
+        """Save potential files.
 
+        If binary = True, precompiled binaries (polymlp.bin) are also saved
+        for fast loading in Properties. They can also be generated later
+        using pypolymlp-utils --binary_pot.
+        """
         if self.__hybrid is False:
             save_mlp_lammps(
                 self.__params_dict,
@@ -123,6 +450,8 @@ class RegressionBase(ABC):
                 self.__scales,
                 filename=filename,
             )
+            if binary:
+                convert_mlp_lammps_to_binary(filename)
         else:
             save_multiple_mlp_lammps(
                 self.__params_dict,
@@ -130,6 +459,9 @@ class RegressionBase(ABC):
                 self.__coeffs,
                 self.__scales,
             )
+            if binary:
+                for i in range(len(self.__params_dict)):
+                    convert_mlp_lammps_to_binary("polymlp.lammps." + str(i + 1))
         return self
 
     def hybrid_division(self, target):
@@ -217,6 +549,11 @@ class RegressionBase(ABC):
     def is_hybrid(self):
         return self.__hybrid
 
+    @property
+    def solver(self):
+        """Solver of linear equations, "cholesky", "eigen", or "cg"."""
+        return self.__solver
+
     @property
     def verbose(self):
         return self.__verbose
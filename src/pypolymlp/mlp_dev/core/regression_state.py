@@ -0,0 +1,230 @@
+#!/usr/bin/env python
+import json
+import os
+import shutil
+import uuid
+from collections import Counter
+
+import numpy as np
+
+STATE_VERSION = 1
+ARRAY_KEYS = ("xtx", "xty", "xe_sum", "xe_sq_sum")
+SCALAR_KEYS = ("y_sq_norm", "total_n_data", "n_energy")
+
+
+class RegressionState:
+    """Persistent state of incremental regression.
+
+    Unscaled sums of weighted products of X, X.T @ X, X.T @ y, y @ y,
+    and sums of energy rows and their squares, are stored for each
+    dataset together with fingerprints of structures included in them.
+    Products of new structures are added to the sums and those of removed
+    structures are subtracted from them, so that the other structures
+    are never recomputed.
+
+    The state is a directory containing meta.json and a subdirectory of
+    .npy files for each dataset.
+    """
+
+    def __init__(self, state_dir="polymlp_state", verbose=True):
+        """
+        Parameters
+        ----------
+        state_dir: Directory of state.
+        """
+        self.__state_dir = state_dir
+        self.__verbose = verbose
+
+        self.__attrs = None
+        self.__entries = {"train": dict(), "test": dict()}
+        self.__arrays = dict()
+        self.__obsolete = []
+        self.load()
+
+    def __path(self, name):
+        return os.path.join(self.__state_dir, name)
+
+    def load(self):
+        """Load meta data of state. Arrays are loaded when required."""
+        try:
+            with open(self.__path("meta.json")) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return self
+
+        if meta.get("version") != STATE_VERSION:
+            return self
+
+        self.__attrs = meta["attrs"]
+        self.__entries = meta["entries"]
+        self.__arrays = dict()
+        if self.__verbose:
+            print("Regression state loaded:", self.__state_dir, flush=True)
+        return self
+
+    def save(self):
+        """Save modified datasets and meta data of state."""
+        os.makedirs(self.__state_dir, exist_ok=True)
+        for (tag, set_id), arrays in self.__arrays.items():
+            entry = self.__entries[tag][set_id]
+            name = tag + "-" + uuid.uuid4().hex
+            os.makedirs(self.__path(name))
+            for key, array in arrays.items():
+                np.save(os.path.join(self.__path(name), key + ".npy"), array)
+            if entry.get("name") is not None:
+                self.__obsolete.append(entry["name"])
+            entry["name"] = name
+
+        meta = {
+            "version": STATE_VERSION,
+            "attrs": self.__attrs,
+            "entries": self.__entries,
+        }
+        tmp_file = self.__path("meta.json.tmp-" + uuid.uuid4().hex)
+        with open(tmp_file, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_file, self.__path("meta.json"))
+
+        for name in self.__obsolete:
+            shutil.rmtree(self.__path(name), ignore_errors=True)
+        self.__obsolete = []
+        self.__arrays = dict()
+
+        if self.__verbose:
+            print("Regression state saved:", self.__state_dir, flush=True)
+        return self
+
+    def reset(self, attrs):
+        """Remove all datasets and set attributes of state.
+
+        Parameters
+        ----------
+        attrs: Dictionary of JSON-serializable attributes that products
+               depend on, such as hash of model and min_energy.
+        """
+        for tag in self.__entries:
+            for set_id in list(self.__entries[tag]):
+                self.remove(tag, set_id)
+        self.__attrs = dict(attrs)
+        return self
+
+    def set_ids(self, tag="train"):
+        return list(self.__entries[tag].keys())
+
+    def fingerprints(self, tag, set_id):
+        """Fingerprints of structures included in products of a dataset.
+
+        None is returned if the dataset is not found.
+        """
+        if set_id not in self.__entries[tag]:
+            return None
+        return self.__entries[tag][set_id]["fingerprints"]
+
+    def __get_arrays(self, tag, set_id):
+
+        if (tag, set_id) in self.__arrays:
+            return self.__arrays[(tag, set_id)]
+
+        path = self.__path(self.__entries[tag][set_id]["name"])
+        return {
+            key: np.load(os.path.join(path, key + ".npy"), mmap_mode="r")
+            for key in ARRAY_KEYS
+        }
+
+    def add(self, tag, set_id, products, fingerprints, sign=1.0):
+        """Add products of structures to a dataset.
+
+        Parameters
+        ----------
+        products: Dictionary of unscaled products of structures,
+                  computed by PolymlpDevDataXYSequential.accumulate_products.
+        fingerprints: Fingerprints of the structures.
+        sign: -1.0 for subtracting products.
+        """
+        entry = self.__entries[tag].get(set_id)
+        if entry is None:
+            if sign < 0:
+                raise KeyError("Dataset not found in regression state.")
+            entry = {key: 0 for key in SCALAR_KEYS}
+            entry.update({"name": None, "fingerprints": []})
+            self.__entries[tag][set_id] = entry
+            arrays = {key: np.array(products[key]) for key in ARRAY_KEYS}
+        else:
+            arrays = self.__get_arrays(tag, set_id)
+            arrays = {
+                key: arrays[key] + sign * products[key] for key in ARRAY_KEYS
+            }
+
+        for key in SCALAR_KEYS:
+            entry[key] += sign * products[key]
+        entry["y_sq_norm"] = float(entry["y_sq_norm"])
+        entry["total_n_data"] = int(round(entry["total_n_data"]))
+        entry["n_energy"] = int(round(entry["n_energy"]))
+        if "cumulative_n_features" in products:
+            entry["cumulative_n_features"] = [
+                int(n) for n in products["cumulative_n_features"]
+            ]
+
+        if sign > 0:
+            entry["fingerprints"].extend(fingerprints)
+        else:
+            remaining = Counter(entry["fingerprints"])
+            remaining.subtract(Counter(fingerprints))
+            if min(remaining.values(), default=0) < 0:
+                raise ValueError("Structures not found in regression state.")
+            entry["fingerprints"] = list(remaining.elements())
+
+        self.__arrays[(tag, set_id)] = arrays
+        return self
+
+    def subtract(self, tag, set_id, products, fingerprints):
+        """Subtract products of structures from a dataset."""
+        return self.add(tag, set_id, products, fingerprints, sign=-1.0)
+
+    def remove(self, tag, set_id):
+        """Remove a dataset from state."""
+        entry = self.__entries[tag].pop(set_id)
+        self.__arrays.pop((tag, set_id), None)
+        if entry.get("name") is not None:
+            self.__obsolete.append(entry["name"])
+        return self
+
+    def products(self, tag="train", set_ids=None):
+        """Return sums of products over datasets.
+
+        Parameters
+        ----------
+        set_ids: Datasets included in sums. All datasets are used if None.
+
+        Return
+        ------
+        Dictionary of unscaled products. None is returned if no dataset.
+        """
+        if set_ids is None:
+            set_ids = self.set_ids(tag)
+        if len(set_ids) == 0:
+            return None
+
+        products = None
+        for set_id in set_ids:
+            entry = self.__entries[tag][set_id]
+            arrays = self.__get_arrays(tag, set_id)
+            if products is None:
+                products = {key: np.array(arrays[key]) for key in ARRAY_KEYS}
+                products.update({key: 0 for key in SCALAR_KEYS})
+            else:
+                for key in ARRAY_KEYS:
+                    products[key] += arrays[key]
+            for key in SCALAR_KEYS:
+                products[key] += entry[key]
+            if "cumulative_n_features" in entry:
+                products["cumulative_n_features"] = entry["cumulative_n_features"]
+        return products
+
+    @property
+    def attrs(self):
+        return self.__attrs
+
+    @property
+    def state_dir(self):
+        return self.__state_dir
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+import numpy as np
+
+
+def effective_n_jobs(n_jobs=1, backend=None):
+    """Number of workers used by joblib for n_jobs."""
+    if n_jobs == 1:
+        return 1
+
+    from joblib import effective_n_jobs as joblib_n_jobs
+    from joblib import parallel_backend
+
+    if backend is None:
+        return joblib_n_jobs(n_jobs)
+    with parallel_backend(backend):
+        return joblib_n_jobs(n_jobs)
+
+
+def split_work_items(costs, n_shards):
+    """Divide work items into shards with balanced total costs.
+
+    Items are assigned in decreasing order of costs to the shard
+    with the smallest total cost. Items in each shard are sorted
+    in the original order.
+
+    Return
+    ------
+    shards: List of lists of item indices. Empty shards are removed.
+    """
+    n_shards = max(1, min(n_shards, len(costs)))
+    shards = [[] for _ in range(n_shards)]
+    totals = np.zeros(n_shards)
+    for i in np.argsort(-np.asarray(costs), kind="stable"):
+        ishard = np.argmin(totals)
+        shards[ishard].append(int(i))
+        totals[ishard] += costs[i]
+    return [sorted(s) for s in shards if len(s) > 0]
+
+
+def tree_reduce(items, func):
+    """Reduce items by a binary function in a binary tree.
+
+    Pairs of neighboring items are reduced at each level, which keeps
+    rounding errors of sums of many partial results small.
+    """
+    items = list(items)
+    if len(items) == 0:
+        raise ValueError("No items to reduce.")
+
+    while len(items) > 1:
+        reduced = [func(items[i], items[i + 1]) for i in range(0, len(items) - 1, 2)]
+        if len(items) % 2 == 1:
+            reduced.append(items[-1])
+        items = reduced
+    return items[0]
+
+
+def run_parallel(func, args_list, n_jobs=1, backend=None, unordered=False):
+    """Return [func(*args) for args in args_list] computed using joblib.
+
+    Parameters
+    ----------
+    n_jobs: Number of workers. -1 uses all processors.
+    backend: Name of joblib backend. Default backend of joblib, i.e.,
+             processes on the local node, is used if None. Backends
+             distributing jobs over nodes, such as "dask" or "ray",
+             are available if they are registered in joblib.
+    unordered: If True, a generator yielding results in the order of
+               completion is returned, so that each result can be
+               consumed and released as soon as it is available.
+               Backends not returning generators yield results
+               after all of them are computed.
+    """
+    if n_jobs == 1:
+        results = (func(*args) for args in args_list)
+        return results if unordered else list(results)
+
+    from joblib import Parallel, delayed
+
+    tasks = (delayed(func)(*args) for args in args_list)
+    if not unordered:
+        return Parallel(n_jobs=n_jobs, backend=backend)(tasks)
+
+    try:
+        parallel = Parallel(
+            n_jobs=n_jobs, backend=backend, return_as="generator_unordered"
+        )
+    except ValueError:
+        return iter(Parallel(n_jobs=n_jobs, backend=backend)(tasks))
+    return parallel(tasks)
@@ -1,4 +1,7 @@
 #!/usr/bin/env python
+import numpy as np
+
+from pypolymlp.mlp_dev.core.utils_symmetric import compute_xtx, syrk_update
 
 
 def get_batch_slice(n_data, batch_size):
@@ -28,3 +31,167 @@ def slice_dft_dict(dft_dict, begin, end):
     dft_dict_sliced["weight"] = dft_dict["weight"]
 
     return dft_dict_sliced
+
+
+def select_dft_dict(dft_dict, ids):
+    """Return a dataset of structures with indices ids."""
+    n_atoms = np.array(dft_dict["total_n_atoms"])
+    fbegin = np.concatenate([[0], np.cumsum(n_atoms)]) * 3
+    force_ids = [np.arange(fbegin[i], fbegin[i + 1]) for i in ids]
+    stress_ids = [np.arange(i * 6, (i + 1) * 6) for i in ids]
+
+    dft_dict_selected = dict()
+    dft_dict_selected["structures"] = [dft_dict["structures"][i] for i in ids]
+    dft_dict_selected["energy"] = np.array(dft_dict["energy"])[ids]
+    dft_dict_selected["force"] = np.array(dft_dict["force"])[
+        np.concatenate(force_ids)
+    ]
+    dft_dict_selected["stress"] = np.array(dft_dict["stress"])[
+        np.concatenate(stress_ids)
+    ]
+    dft_dict_selected["volumes"] = dft_dict["volumes"]
+    dft_dict_selected["elements"] = dft_dict["elements"]
+    dft_dict_selected["total_n_atoms"] = n_atoms[ids]
+    for key in ("include_force", "weight"):
+        if key in dft_dict:
+            dft_dict_selected[key] = dft_dict[key]
+    return dft_dict_selected
+
+
+def get_block_size(n_features, max_memory=1.0):
+    """Number of rows of X in a block with max_memory (GB)."""
+    return max(1, int(max_memory * 1e9 / (8 * n_features)))
+
+
+def is_memmap(x):
+    return isinstance(x, np.memmap)
+
+
+def scale_columns(x, scales, max_memory=1.0):
+    """x /= scales, computed blockwise for memory-mapped x."""
+    if not is_memmap(x):
+        x /= scales
+        return x
+
+    block_size = get_block_size(x.shape[1], max_memory=max_memory)
+    begin_ids, end_ids = get_batch_slice(x.shape[0], block_size)
+    for begin, end in zip(begin_ids, end_ids):
+        x[begin:end] /= scales
+    return x
+
+
+def multiply_rows(x, w, begin, end, max_memory=1.0):
+    """x[begin:end] *= w[begin:end], computed blockwise for memory-mapped x."""
+    if not is_memmap(x):
+        x[begin:end] *= w[begin:end, np.newaxis]
+        return x
+
+    block_size = get_block_size(x.shape[1], max_memory=max_memory)
+    for b1 in range(begin, end, block_size):
+        e1 = min(b1 + block_size, end)
+        x[b1:e1] *= w[b1:e1, np.newaxis]
+    return x
+
+
+def compute_products_blockwise(x, y, max_memory=1.0):
+    """Return x.T @ x and x.T @ y, computed blockwise for memory-mapped x."""
+    if not is_memmap(x):
+        return compute_xtx(x), np.dot(x.T, y)
+
+    n_features = x.shape[1]
+    xtx = np.zeros((n_features, n_features))
+    xty = np.zeros(n_features)
+    block_size = get_block_size(n_features, max_memory=max_memory)
+    begin_ids, end_ids = get_batch_slice(x.shape[0], block_size)
+    for begin, end in zip(begin_ids, end_ids):
+        x_block = np.asarray(x[begin:end])
+        syrk_update(xtx, x_block)
+        xty += np.dot(x_block.T, y[begin:end])
+    return xtx, xty
+
+
+def dot_blockwise(x, coeffs, max_memory=1.0):
+    """Return x @ coeffs, computed blockwise for memory-mapped x."""
+    if not is_memmap(x):
+        return np.dot(x, coeffs)
+
+    res = np.zeros((x.shape[0],) + coeffs.shape[1:])
+    block_size = get_block_size(x.shape[1], max_memory=max_memory)
+    begin_ids, end_ids = get_batch_slice(x.shape[0], block_size)
+    for begin, end in zip(begin_ids, end_ids):
+        res[begin:end] = np.dot(np.asarray(x[begin:end]), coeffs)
+    return res
+
+
+def tdot_blockwise(x, y, max_memory=1.0):
+    """Return x.T @ y, computed blockwise for memory-mapped x."""
+    if not is_memmap(x):
+        return np.dot(x.T, y)
+
+    res = np.zeros(x.shape[1])
+    block_size = get_block_size(x.shape[1], max_memory=max_memory)
+    begin_ids, end_ids = get_batch_slice(x.shape[0], block_size)
+    for begin, end in zip(begin_ids, end_ids):
+        res += np.dot(np.asarray(x[begin:end]).T, y[begin:end])
+    return res
+
+
+def column_sq_sum(x, max_memory=1.0):
+    """Return diagonal of x.T @ x, computed blockwise for memory-mapped x."""
+    if not is_memmap(x):
+        return np.einsum("ij,ij->j", x, x)
+
+    res = np.zeros(x.shape[1])
+    block_size = get_block_size(x.shape[1], max_memory=max_memory)
+    begin_ids, end_ids = get_batch_slice(x.shape[0], block_size)
+    for begin, end in zip(begin_ids, end_ids):
+        x_block = np.asarray(x[begin:end])
+        res += np.einsum("ij,ij->j", x_block, x_block)
+    return res
+
+
+def diagonal_blocks_blockwise(x, block_size, max_memory=1.0):
+    """Return diagonal blocks of x.T @ x of size block_size at most.
+
+    Blocks are computed blockwise for memory-mapped x.
+    """
+    n_features = x.shape[1]
+    col_ids = [
+        (c0, min(c0 + block_size, n_features))
+        for c0 in range(0, n_features, block_size)
+    ]
+    blocks = [np.zeros((c1 - c0, c1 - c0)) for c0, c1 in col_ids]
+    row_size = get_block_size(n_features, max_memory=max_memory)
+    begin_ids, end_ids = get_batch_slice(x.shape[0], row_size)
+    for begin, end in zip(begin_ids, end_ids):
+        x_block = np.asarray(x[begin:end])
+        for block, (c0, c1) in zip(blocks, col_ids):
+            block += x_block[:, c0:c1].T @ x_block[:, c0:c1]
+    return blocks
+
+
+def compute_xtx_blockwise(x, max_memory=1.0):
+    """Return x.T @ x, computed blockwise for memory-mapped x."""
+    if not is_memmap(x):
+        return compute_xtx(x)
+
+    xtx = np.zeros((x.shape[1], x.shape[1]))
+    block_size = get_block_size(x.shape[1], max_memory=max_memory)
+    begin_ids, end_ids = get_batch_slice(x.shape[0], block_size)
+    for begin, end in zip(begin_ids, end_ids):
+        syrk_update(xtx, np.asarray(x[begin:end]))
+    return xtx
+
+
+def normal_dot_blockwise(x, v, max_memory=1.0):
+    """Return x.T @ (x @ v) without x.T @ x, in a single pass over x."""
+    if not is_memmap(x):
+        return np.dot(x.T, np.dot(x, v))
+
+    res = np.zeros(x.shape[1])
+    block_size = get_block_size(x.shape[1], max_memory=max_memory)
+    begin_ids, end_ids = get_batch_slice(x.shape[0], block_size)
+    for begin, end in zip(begin_ids, end_ids):
+        x_block = np.asarray(x[begin:end])
+        res += np.dot(x_block.T, np.dot(x_block, v))
+    return res
@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+"""Symmetric matrices X.T @ X in full or packed storage.
+
+Packed storage is the LAPACK upper packed format, i.e., a one-dimensional
+array of size n * (n + 1) / 2 in which column j of the upper triangle,
+A[0:j+1, j], is stored at [j * (j + 1) / 2 : (j + 1) * (j + 2) / 2].
+It halves the memory of X.T @ X and is directly used by the packed
+Cholesky solver, ppsv.
+"""
+import numpy as np
+from scipy.linalg.blas import dspmv, dsyrk
+
+
+def packed_size(n):
+    return n * (n + 1) // 2
+
+
+def packed_offsets(n):
+    """Offsets of columns in packed storage, (n + 1)."""
+    j = np.arange(n + 1)
+    return j * (j + 1) // 2
+
+
+def is_packed(a):
+    return a.ndim == 1
+
+
+def symmetric_size(a):
+    """Number of rows of a symmetric matrix in full or packed storage."""
+    if not is_packed(a):
+        return a.shape[0]
+    return int(round((np.sqrt(8 * a.shape[0] + 1) - 1) / 2))
+
+
+def zeros_symmetric(n, packed=False):
+    if packed:
+        return np.zeros(packed_size(n))
+    return np.zeros((n, n))
+
+
+def pack_symmetric(a):
+    """Return upper packed storage of symmetric a."""
+    n = a.shape[0]
+    offsets = packed_offsets(n)
+    ap = np.zeros(offsets[-1])
+    for j in range(n):
+        ap[offsets[j] : offsets[j + 1]] = a[j, : j + 1]
+    return ap
+
+
+def unpack_symmetric(ap):
+    """Return full storage of symmetric matrix in upper packed storage."""
+    if not is_packed(ap):
+        return ap
+
+    n = symmetric_size(ap)
+    offsets = packed_offsets(n)
+    a = np.zeros((n, n))
+    for j in range(n):
+        a[j, : j + 1] = ap[offsets[j] : offsets[j + 1]]
+    return symmetrize_lower(a)
+
+
+def symmetrize_lower(a, block_size=1024):
+    """Copy the lower triangle of a to its upper triangle in place."""
+    n = a.shape[0]
+    for begin in range(0, n, block_size):
+        end = min(begin + block_size, n)
+        a[begin:end, end:] = a[end:, begin:end].T
+        block = a[begin:end, begin:end]
+        upper = np.triu_indices(end - begin, 1)
+        block[upper] = block.T[upper]
+    return a
+
+
+def syrk_update(xtx, x, tile_size=512):
+    """xtx += x.T @ x in place, computing only one triangle.
+
+    For full storage, BLAS syrk updates the lower triangle without
+    a temporary matrix and the upper triangle is copied from it.
+    For packed storage, tiles of columns of the upper triangle are
+    computed by matrix products of size (n_rows, tile_size) at most.
+    """
+    x = np.ascontiguousarray(x, dtype=np.float64)
+    if not is_packed(xtx):
+        # x.T is Fortran-contiguous and the lower triangle of C-ordered
+        # xtx is the upper triangle of its Fortran-ordered transpose.
+        res = dsyrk(1.0, x.T, beta=1.0, c=xtx.T, trans=0, lower=0, overwrite_c=1)
+        if not np.shares_memory(res, xtx):
+            xtx[:] = res.T
+        return symmetrize_lower(xtx)
+
+    n = x.shape[1]
+    offsets = packed_offsets(n)
+    for c0 in range(0, n, tile_size):
+        c1 = min(c0 + tile_size, n)
+        tile = x[:, :c1].T @ x[:, c0:c1]
+        for j in range(c0, c1):
+            xtx[offsets[j] : offsets[j + 1]] += tile[: j + 1, j - c0]
+    return xtx
+
+
+def compute_xtx(x, packed=False):
+    """Return x.T @ x in full or packed storage."""
+    xtx = zeros_symmetric(x.shape[1], packed=packed)
+    return syrk_update(xtx, x)
+
+
+def symmetric_diagonal(a):
+    """Return a view (full) or a copy (packed) of diagonal elements."""
+    if not is_packed(a):
+        return np.diag(a)
+    n = symmetric_size(a)
+    return a[packed_offsets(n)[1:] - 1]
+
+
+def symmetric_diagonal_blocks(a, block_size):
+    """Return diagonal blocks a[c0:c1, c0:c1] of size block_size at most."""
+    n = symmetric_size(a)
+    if not is_packed(a):
+        return [
+            np.array(a[c0 : c0 + block_size, c0 : c0 + block_size])
+            for c0 in range(0, n, block_size)
+        ]
+
+    offsets = packed_offsets(n)
+    blocks = []
+    for c0 in range(0, n, block_size):
+        c1 = min(c0 + block_size, n)
+        block = np.zeros((c1 - c0, c1 - c0))
+        for j in range(c0, c1):
+            block[: j - c0 + 1, j - c0] = a[offsets[j] + c0 : offsets[j + 1]]
+        blocks.append(symmetrize_lower(block.T.copy()))
+    return blocks
+
+
+def add_diagonal(a, value):
+    """a += value * I in place."""
+    if not is_packed(a):
+        a.flat[:: a.shape[0] + 1] += value
+    else:
+        n = symmetric_size(a)
+        a[packed_offsets(n)[1:] - 1] += value
+    return a
+
+
+def scale_symmetric(a, scales):
+    """a /= scales[:, None] * scales[None, :] in place."""
+    if not is_packed(a):
+        a /= scales[:, np.newaxis]
+        a /= scales[np.newaxis, :]
+        return a
+
+    offsets = packed_offsets(len(scales))
+    for j in range(len(scales)):
+        a[offsets[j] : offsets[j + 1]] /= scales[: j + 1] * scales[j]
+    return a
+
+
+def symmetric_dot(a, v):
+    """Return a @ v for symmetric a in full or packed storage."""
+    if not is_packed(a):
+        return a @ v
+
+    n = symmetric_size(a)
+    if v.ndim == 1:
+        return dspmv(n, 1.0, a, v)
+    return np.array([dspmv(n, 1.0, a, v1) for v1 in v.T]).T
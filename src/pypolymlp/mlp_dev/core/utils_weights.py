@@ -1,6 +1,8 @@
 #!/usr/bin/env python
 import numpy as np
 
+from pypolymlp.mlp_dev.core.utils_sequential import multiply_rows
+
 
 def __set_weight_energy_data(energy, total_n_atoms, min_e=None):
 
@@ -33,8 +35,7 @@ def __set_weight_stress_data(stress, weight_stress):
     return weight_s
 
 
-def apply_weight_percentage(
-    x,
+def set_weight_percentage(
     y,
     w,
     dft_dict,
@@ -43,7 +44,10 @@ def apply_weight_percentage(
     weight_stress=0.1,
     min_e=None,
 ):
+    """Set weights and weighted y of a dataset without touching X.
 
+    Rows of X must be multiplied by w, as in apply_weight_percentage.
+    """
     if "include_force" in dft_dict:
         include_force = dft_dict["include_force"]
     else:
@@ -68,12 +72,6 @@ def apply_weight_percentage(
     w[ebegin:eend] = weight_e
     y[ebegin:eend] = weight_e * energy
 
-    x[ebegin:eend] *= weight_e[:, np.newaxis]
-    """ numba version
-    import pypolymlp.mlp_gen.numba_support as numba_support
-    numba_support.mat_prod_vec(x[ebegin:eend], weight_e, axis=0)
-    """
-
     if include_force:
         force = dft_dict["force"]
         weight_f = __set_weight_force_data(force)
@@ -81,10 +79,6 @@ def apply_weight_percentage(
             weight_f *= dft_dict["weight"]
         w[fbegin:fend] = weight_f
         y[fbegin:fend] = weight_f * force
-        x[fbegin:fend] *= weight_f[:, np.newaxis]
-        """ numba version
-        numba_support.mat_prod_vec(x[fbegin:fend], weight_f, axis=0)
-        """
 
         if include_stress:
             stress = dft_dict["stress"]
@@ -95,12 +89,55 @@ def apply_weight_percentage(
             weight_s = __set_weight_stress_data(stress, weight_const)
             w[sbegin:send] = weight_s
             y[sbegin:send] = weight_s * stress
-            x[sbegin:send] *= weight_s[:, np.newaxis]
-            """ numba version
-            numba_support.mat_prod_vec(x[sbegin:send], weight_s, axis=0)
-            """
         else:
-            x[sbegin:send, :] = 0.0
             y[sbegin:send] = 0.0
             w[sbegin:send] = 0.0
+    return y, w
+
+
+def apply_weight_percentage(
+    x,
+    y,
+    w,
+    dft_dict,
+    params_dict,
+    first_indices,
+    weight_stress=0.1,
+    min_e=None,
+):
+
+    y, w = set_weight_percentage(
+        y,
+        w,
+        dft_dict,
+        params_dict,
+        first_indices,
+        weight_stress=weight_stress,
+        min_e=min_e,
+    )
+
+    if "include_force" in dft_dict:
+        include_force = dft_dict["include_force"]
+    else:
+        include_force = params_dict["include_force"]
+
+    ebegin, fbegin, sbegin = first_indices
+    eend = ebegin + len(dft_dict["energy"])
+    multiply_rows(x, w, ebegin, eend)
+    """ numba version
+    import pypolymlp.mlp_gen.numba_support as numba_support
+    numba_support.mat_prod_vec(x[ebegin:eend], weight_e, axis=0)
+    """
+
+    if include_force:
+        fend = fbegin + len(dft_dict["force"])
+        send = sbegin + len(dft_dict["stress"])
+        multiply_rows(x, w, fbegin, fend)
+        """ numba version
+        numba_support.mat_prod_vec(x[fbegin:fend], weight_f, axis=0)
+        """
+        if params_dict["include_stress"]:
+            multiply_rows(x, w, sbegin, send)
+        else:
+            x[sbegin:send, :] = 0.0
     return x, y, w
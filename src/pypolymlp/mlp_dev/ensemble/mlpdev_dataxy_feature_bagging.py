@@ -5,12 +5,26 @@ import numpy as np
 
 from pypolymlp.mlp_dev.core.mlpdev_data import PolymlpDevData
 from pypolymlp.mlp_dev.core.utils_sequential import get_batch_slice, slice_dft_dict
+from pypolymlp.mlp_dev.core.utils_symmetric import (
+    compute_xtx,
+    packed_size,
+    scale_symmetric,
+    syrk_update,
+    zeros_symmetric,
+)
 from pypolymlp.mlp_dev.core.utils_weights import apply_weight_percentage
 from pypolymlp.mlp_dev.ensemble.mlpdev_dataxy_ensemble_base import (
     PolymlpDevDataXYEnsembleBase,
 )
 
 
+def estimate_xtx_memory(n_features, n_models, packed=True):
+    """Memory of X.T @ X for n_models in GB."""
+    if packed:
+        return packed_size(n_features) * 8e-9 * n_models
+    return n_features * n_features * 8e-9 * n_models
+
+
 class PolymlpDevDataXYFeatureBagging(PolymlpDevDataXYEnsembleBase):
 
     def __init__(self, params: PolymlpDevData):
@@ -23,7 +37,14 @@ class PolymlpDevDataXYFeatureBagging(PolymlpDevDataXYEnsembleBase):
         ratio_feature_samples=0.1,
         verbose=True,
         bootstrap_data=False,
+        packed=True,
     ):
+        """
+        Parameters
+        ----------
+        packed: Store X.T @ X of each model in upper packed storage.
+        """
+        self.__packed = packed
 
         self.compute_features()
         self.apply_scales()
@@ -84,7 +105,11 @@ class PolymlpDevDataXYFeatureBagging(PolymlpDevDataXYEnsembleBase):
             print("Size (X.T @ X):", n_features_samples, "** 2")
             print(
                 "Estimated memory allocation (X.T @ X):",
-                "{:.2f}".format(pow(n_features_samples, 2) * 16e-9 * n_models),
+                "{:.2f}".format(
+                    estimate_xtx_memory(
+                        n_features_samples, n_models, packed=self.__packed
+                    )
+                ),
                 "(GB)",
             )
 
@@ -100,7 +125,7 @@ class PolymlpDevDataXYFeatureBagging(PolymlpDevDataXYEnsembleBase):
             x_samp = x[:, r_indices]
             y_samp = y
             reg_dict_add = {
-                "xtx": x_samp.T @ x_samp,
+                "xtx": compute_xtx(x_samp, packed=self.__packed),
                 "xty": x_samp.T @ y_samp,
                 "y_sq_norm": y_samp @ y_samp,
                 "total_n_data": y_samp.shape[0],
@@ -126,7 +151,7 @@ class PolymlpDevDataXYFeatureBagging(PolymlpDevDataXYEnsembleBase):
             x_samp = x[np.ix_(row_indices, r_indices)]
             y_samp = y[row_indices]
             reg_dict_add = {
-                "xtx": x_samp.T @ x_samp,
+                "xtx": compute_xtx(x_samp, packed=self.__packed),
                 "xty": x_samp.T @ y_samp,
                 "y_sq_norm": y_samp @ y_samp,
                 "total_n_data": y_samp.shape[0],
@@ -151,7 +176,14 @@ class PolymlpDevDataXYFeatureBaggingSequential(PolymlpDevDataXYEnsembleBase):
         batch_size=64,
         verbose=True,
         element_swap=False,
+        packed=True,
     ):
+        """
+        Parameters
+        ----------
+        packed: Store X.T @ X of each model in upper packed storage.
+        """
+        self.__packed = packed
         self.__sample(
             self.train_dict,
             n_models=n_models,
@@ -201,7 +233,9 @@ class PolymlpDevDataXYFeatureBaggingSequential(PolymlpDevDataXYEnsembleBase):
             print(
                 "Estimated memory allocation (X.T @ X):",
                 "{:.2f}".format(
-                    n_features_samples * n_features_samples * 16e-9 * n_models
+                    estimate_xtx_memory(
+                        n_features_samples, n_models, packed=self.__packed
+                    )
                 ),
                 "(GB)",
             )
@@ -285,7 +319,11 @@ class PolymlpDevDataXYFeatureBaggingSequential(PolymlpDevDataXYEnsembleBase):
                         first_indices,
                         min_e=self.min_energy,
                     )
-                    xtx[i] = self.__sum_array(xtx[i], x_samp.T @ x_samp)
+                    if xtx[i] is None:
+                        xtx[i] = zeros_symmetric(
+                            len(r_indices), packed=self.__packed
+                        )
+                    syrk_update(xtx[i], x_samp)
                     xty[i] = self.__sum_array(xty[i], x_samp.T @ y)
                     y_sq_norm[i] += y @ y
 
@@ -302,8 +340,7 @@ class PolymlpDevDataXYFeatureBaggingSequential(PolymlpDevDataXYEnsembleBase):
         reg_dict_array = []
         for i in range(self.n_models):
             scales = self.scales_list[i]
-            xtx[i] /= scales[:, np.newaxis]
-            xtx[i] /= scales[np.newaxis, :]
+            scale_symmetric(xtx[i], scales)
             xty[i] /= scales
             reg_dict = {
                 "xtx": xtx[i],
@@ -3,12 +3,15 @@ import itertools
 
 import numpy as np
 
+from pypolymlp.core.dataset_store import DatasetStore
 from pypolymlp.core.displacements import convert_disps_to_positions, set_dft_dict
 from pypolymlp.cxx.lib import libmlpcpp
 from pypolymlp.mlp_dev.core.accuracy import PolymlpDevAccuracy
+from pypolymlp.mlp_dev.core.features_cache import FeaturesCache
 from pypolymlp.mlp_dev.core.mlpdev_data import PolymlpDevData
 from pypolymlp.mlp_dev.standard.mlpdev_dataxy import (
     PolymlpDevDataXY,
+    PolymlpDevDataXYIncremental,
     PolymlpDevDataXYSequential,
 )
 from pypolymlp.mlp_dev.standard.regression import Regression
@@ -42,6 +45,9 @@ class Pypolymlp:
         - reg
           - method
           - alpha
+          - solver
+          - cv
+          - n_folds
         - dft
           - train (dataset locations)
           - test (dataset locations)
@@ -82,6 +88,9 @@ class Pypolymlp:
         gaussian_params1=(1.0, 1.0, 1),
         gaussian_params2=(0.0, 5.0, 7),
         reg_alpha_params=(-3.0, 1.0, 5),
+        reg_solver="cholesky",
+        reg_cv=None,
+        reg_cv_folds=5,
         gtinv_order=3,
         gtinv_maxl=(4, 4, 2, 1, 1),
         gtinv_version=1,
@@ -113,6 +122,17 @@ class Pypolymlp:
         reg_alpha_params: Parameters for penalty term in
             linear ridge regression. Parameters are given as
             np.linspace(p[0], p[1], p[2]).
+        reg_solver: Solver of linear ridge regression, "cholesky", "eigen",
+            or "cg". "eigen" decomposes X.T @ X once and solves the
+            regression for all penalty values, which is efficient for
+            a fine grid of reg_alpha_params. "cg" uses preconditioned
+            conjugate gradient without X.T @ X if sequential = False,
+            which is applicable to a very large number of features.
+            For up to 8192 features, "cg" falls back to the direct solver.
+        reg_cv: Cross validation used for selecting the penalty value,
+            None, "kfold", or "gcv". If None, the test dataset is used.
+            "kfold" is available in sequential regression.
+        reg_cv_folds: Number of folds in k-fold cross validation.
         gtinv_order: Maximum order of polynomial invariants.
         gtinv_maxl: Maximum angular numbers of polynomial invariants.
             [maxl for order=2, maxl for order=3, ...]
@@ -209,6 +229,17 @@ class Pypolymlp:
             raise ValueError("len(reg_alpha_params) != 3")
         self.__params_dict["reg"]["method"] = "ridge"
         self.__params_dict["reg"]["alpha"] = self.__sequence(reg_alpha_params)
+        reg_solver = self.__set_param("reg_solver", params, reg_solver)
+        if reg_solver not in ("cholesky", "eigen", "cg"):
+            raise ValueError("reg_solver must be cholesky, eigen, or cg.")
+        self.__params_dict["reg"]["solver"] = reg_solver
+        reg_cv = self.__set_param("reg_cv", params, reg_cv)
+        if reg_cv not in (None, "kfold", "gcv"):
+            raise ValueError("reg_cv must be kfold or gcv.")
+        self.__params_dict["reg"]["cv"] = reg_cv
+        self.__params_dict["reg"]["n_folds"] = self.__set_param(
+            "reg_cv_folds", params, reg_cv_folds
+        )
 
         atomic_energy = self.__set_param("atomic_energy", params, atomic_energy)
         if atomic_energy is None:
@@ -374,8 +405,38 @@ class Pypolymlp:
         path_output="./",
         verbose=False,
         output_files=False,
+        cache_dir=None,
+        cache_size=10.0,
+        memmap_dir=None,
+        state_dir=None,
+        n_jobs=1,
+        backend=None,
+        dataset_dir=None,
+        duplicate_tol=None,
+        packed=False,
     ):
-        """Running linear ridge regression to estimate MLP coefficients."""
+        """Running linear ridge regression to estimate MLP coefficients.
+
+        Parameters
+        ----------
+        cache_dir: Directory of persistent cache of features.
+                   Features are reused for the same model and datasets.
+        cache_size: Maximum size of cache of features in GB.
+        memmap_dir: Directory of memory-mapped X used if sequential = False.
+        state_dir: Directory of regression state used if sequential = True.
+                   Products of X are computed only for structures
+                   that are not included in the state.
+        n_jobs: Number of parallel jobs reading datasets and computing
+                products of X if sequential = True. -1 uses all processors.
+        backend: Name of joblib backend used if n_jobs != 1.
+        dataset_dir: Directory of persistent store of parsed vasprun.xml
+                     files. Only new or modified files are parsed.
+        duplicate_tol: If given, near-duplicate structures in training
+                       datasets are removed using this relative tolerance.
+                       See PolymlpDevData.eliminate_duplicates.
+        packed: Store X.T @ X in upper packed storage if sequential = True.
+                It halves the memory of X.T @ X in regression.
+        """
         polymlp_in = PolymlpDevData()
         if file_params is not None:
             polymlp_in.parse_infiles(file_params, verbose=True)
@@ -384,20 +445,45 @@ class Pypolymlp:
             polymlp_in.params_dict = self.__params_dict
 
         if self.train_dft_dict is None:
-            polymlp_in.parse_datasets()
+            store = None
+            if dataset_dir is not None:
+                store = DatasetStore(dataset_dir, verbose=verbose)
+            polymlp_in.parse_datasets(n_jobs=n_jobs, dataset_store=store)
         else:
             polymlp_in.train_dict = self.train_dft_dict
             polymlp_in.test_dict = self.test_dft_dict
 
+        if duplicate_tol is not None:
+            polymlp_in.eliminate_duplicates(tol=duplicate_tol, verbose=verbose)
+
         if output_files:
             polymlp_in.write_polymlp_params_yaml(
                 filename=path_output + "/polymlp_params.yaml"
             )
 
-        if sequential:
-            polymlp = PolymlpDevDataXYSequential(polymlp_in, verbose=verbose).run()
+        cache = None
+        if cache_dir is not None:
+            cache = FeaturesCache(cache_dir, max_size=cache_size, verbose=verbose)
+
+        if sequential and state_dir is not None:
+            polymlp = PolymlpDevDataXYIncremental(
+                polymlp_in,
+                state_dir=state_dir,
+                verbose=verbose,
+                feature_cache=cache,
+                packed=packed,
+            ).run(n_jobs=n_jobs, backend=backend)
+        elif sequential:
+            polymlp = PolymlpDevDataXYSequential(
+                polymlp_in, verbose=verbose, feature_cache=cache, packed=packed
+            ).run(n_jobs=n_jobs, backend=backend)
         else:
-            polymlp = PolymlpDevDataXY(polymlp_in, verbose=verbose).run()
+            polymlp = PolymlpDevDataXY(
+                polymlp_in,
+                verbose=verbose,
+                feature_cache=cache,
+                memmap_dir=memmap_dir,
+            ).run()
             if verbose:
                 polymlp.print_data_shape()
 
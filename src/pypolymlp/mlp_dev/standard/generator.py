@@ -3,11 +3,14 @@ import argparse
 import signal
 import time
 
+from pypolymlp.core.dataset_store import DatasetStore
 from pypolymlp.mlp_dev.core.accuracy import PolymlpDevAccuracy
+from pypolymlp.mlp_dev.core.features_cache import FeaturesCache
 from pypolymlp.mlp_dev.core.mlpdev_data import PolymlpDevData
 from pypolymlp.mlp_dev.standard.learning_curve import learning_curve
 from pypolymlp.mlp_dev.standard.mlpdev_dataxy import (
     PolymlpDevDataXY,
+    PolymlpDevDataXYIncremental,
     PolymlpDevDataXYSequential,
 )
 from pypolymlp.mlp_dev.standard.regression import Regression
@@ -35,19 +38,83 @@ if __name__ == "__main__":
         action="store_true",
         help="Learning curve calculations",
     )
+    parser.add_argument(
+        "--cache_dir",
+        type=str,
+        default=None,
+        help="Directory of persistent cache of features",
+    )
+    parser.add_argument(
+        "--cache_size",
+        type=float,
+        default=10.0,
+        help="Maximum size of cache of features in GB",
+    )
+    parser.add_argument(
+        "--dataset_dir",
+        type=str,
+        default=None,
+        help="Directory of persistent store of parsed vasprun.xml files",
+    )
+    parser.add_argument(
+        "--duplicate_tol",
+        type=float,
+        default=None,
+        help="Relative tolerance for eliminating near-duplicate structures",
+    )
+    parser.add_argument(
+        "--memmap_dir",
+        type=str,
+        default=None,
+        help="Directory of memory-mapped X used with --no_sequential",
+    )
+    parser.add_argument(
+        "--state_dir",
+        type=str,
+        default=None,
+        help="Directory of regression state for incremental training",
+    )
+    parser.add_argument(
+        "--binary",
+        action="store_true",
+        help="Save precompiled binary potential (polymlp.bin) in addition",
+    )
+    parser.add_argument(
+        "--n_jobs",
+        type=int,
+        default=1,
+        help="Number of parallel jobs reading datasets and computing products",
+    )
+    parser.add_argument(
+        "--backend",
+        type=str,
+        default=None,
+        help="Name of joblib backend used with --n_jobs",
+    )
     args = parser.parse_args()
 
     verbose = True
 
     polymlp_in = PolymlpDevData()
     polymlp_in.parse_infiles(args.infile, verbose=True)
-    polymlp_in.parse_datasets()
+    store = None
+    if args.dataset_dir is not None:
+        store = DatasetStore(args.dataset_dir)
+    polymlp_in.parse_datasets(n_jobs=args.n_jobs, dataset_store=store)
+    if args.duplicate_tol is not None:
+        polymlp_in.eliminate_duplicates(tol=args.duplicate_tol)
     polymlp_in.write_polymlp_params_yaml(filename="polymlp_params.yaml")
 
+    cache = None
+    if args.cache_dir is not None:
+        cache = FeaturesCache(args.cache_dir, max_size=args.cache_size)
+
     if args.learning_curve:
         if len(polymlp_in.train_dict) == 1:
             args.no_sequential = True
-            polymlp = PolymlpDevDataXY(polymlp_in).run()
+            polymlp = PolymlpDevDataXY(
+                polymlp_in, feature_cache=cache, memmap_dir=args.memmap_dir
+            ).run()
             learning_curve(polymlp)
         else:
             raise ValueError(
@@ -57,14 +124,22 @@ if __name__ == "__main__":
     t1 = time.time()
     if args.no_sequential:
         if not args.learning_curve:
-            polymlp = PolymlpDevDataXY(polymlp_in).run()
+            polymlp = PolymlpDevDataXY(
+                polymlp_in, feature_cache=cache, memmap_dir=args.memmap_dir
+            ).run()
         polymlp.print_data_shape()
+    elif args.state_dir is not None:
+        polymlp = PolymlpDevDataXYIncremental(
+            polymlp_in, state_dir=args.state_dir, feature_cache=cache
+        ).run(n_jobs=args.n_jobs, backend=args.backend)
     else:
-        polymlp = PolymlpDevDataXYSequential(polymlp_in).run()
+        polymlp = PolymlpDevDataXYSequential(polymlp_in, feature_cache=cache).run(
+            n_jobs=args.n_jobs, backend=args.backend
+        )
     t2 = time.time()
 
     reg = Regression(polymlp).fit(seq=not args.no_sequential)
-    reg.save_mlp_lammps(filename="polymlp.lammps")
+    reg.save_mlp_lammps(filename="polymlp.lammps", binary=args.binary)
     t3 = time.time()
 
     if verbose:
@@ -1,18 +1,212 @@
 #!/usr/bin/env python
 import gc
+import os
+from collections import Counter
 
 import numpy as np
 
+from pypolymlp.mlp_dev.core.features import (
+    FeaturesHybrid,
+    FeaturesProducts,
+    open_x_memmap,
+)
+from pypolymlp.mlp_dev.core.features_cache import (
+    FeaturesCache,
+    hash_dataset,
+    hash_model_params,
+    hash_structures_with_labels,
+)
 from pypolymlp.mlp_dev.core.mlpdev_data import PolymlpDevData
 from pypolymlp.mlp_dev.core.mlpdev_dataxy_base import PolymlpDevDataXYBase
-from pypolymlp.mlp_dev.core.utils_sequential import get_batch_slice, slice_dft_dict
-from pypolymlp.mlp_dev.core.utils_weights import apply_weight_percentage
+from pypolymlp.mlp_dev.core.regression_state import (
+    ARRAY_KEYS,
+    SCALAR_KEYS,
+    RegressionState,
+)
+from pypolymlp.mlp_dev.core.utils_parallel import (
+    effective_n_jobs,
+    run_parallel,
+    split_work_items,
+)
+from pypolymlp.mlp_dev.core.utils_sequential import (
+    get_batch_slice,
+    get_block_size,
+    select_dft_dict,
+    slice_dft_dict,
+)
+from pypolymlp.mlp_dev.core.utils_symmetric import (
+    compute_xtx,
+    scale_symmetric,
+    syrk_update,
+    zeros_symmetric,
+)
+from pypolymlp.mlp_dev.core.utils_weights import set_weight_percentage
+
+
+def init_products(products=None):
+    """Return an empty dictionary of products if products is None."""
+    if products is None:
+        products = {key: None for key in ARRAY_KEYS}
+        products.update({key: 0 for key in SCALAR_KEYS})
+    return products
+
+
+def sum_products(products1, products2):
+    """Add products2 to products1 in place."""
+    for key in ARRAY_KEYS:
+        if products1[key] is None:
+            products1[key] = products2[key]
+        elif products2[key] is not None:
+            products1[key] += products2[key]
+    for key in SCALAR_KEYS:
+        products1[key] += products2[key]
+    if "cumulative_n_features" in products2:
+        products1["cumulative_n_features"] = products2["cumulative_n_features"]
+    return products1
+
+
+def accumulate_batch_products(
+    products,
+    dft_dict,
+    params_dict,
+    common_params_dict,
+    min_energy=None,
+    hybrid=False,
+    verbose=True,
+    element_swap=False,
+    packed=False,
+):
+    """Add unscaled products of weighted X for a batch of structures.
+
+    Products are accumulated in C++ without returning X, except for
+    hybrid models where X of the batch is computed.
+
+    Parameters
+    ----------
+    products: Dictionary of products updated in place.
+    dft_dict: Single dataset of a batch of structures.
+    packed: Allocate X.T @ X in upper packed storage.
+    """
+    dft_dict_tmp = {"tmp": dft_dict}
+    if hybrid:
+        features = FeaturesHybrid(
+            params_dict,
+            dft_dict_tmp,
+            print_memory=verbose,
+            element_swap=element_swap,
+        )
+    else:
+        features = FeaturesProducts(
+            params_dict,
+            dft_dict_tmp,
+            print_memory=verbose,
+            element_swap=element_swap,
+        )
+        if products["xtx"] is None:
+            n_features = features.n_features
+            products["xtx"] = zeros_symmetric(n_features, packed=packed)
+            products["xty"] = np.zeros(n_features)
+            products["xe_sum"] = np.zeros(n_features)
+            products["xe_sq_sum"] = np.zeros(n_features)
+
+    n_data = sum(features.n_data)
+    y = np.zeros(n_data)
+    w = np.ones(n_data)
+    products["total_n_data"] += n_data
+
+    y, w = set_weight_percentage(
+        y,
+        w,
+        dft_dict,
+        common_params_dict,
+        features.first_indices[0],
+        min_e=min_energy,
+    )
+    if hybrid:
+        x = features.x
+        if verbose:
+            print(
+                " Estimated memory allocation (X.T @ X):",
+                "{:.2f}".format(x.shape[1] * x.shape[1] * 8e-9),
+                "(GB)",
+            )
+        xe = x[: features.n_data[0]]
+        local1 = np.sum(xe, axis=0)
+        local2 = np.sum(np.square(xe), axis=0)
+        x *= w[:, np.newaxis]
+        if products["xtx"] is None:
+            products["xtx"] = compute_xtx(x, packed=packed)
+            for key in ARRAY_KEYS[1:]:
+                products[key] = np.zeros(x.shape[1])
+        else:
+            syrk_update(products["xtx"], x)
+        products["xty"] += x.T @ y
+        products["xe_sum"] += local1
+        products["xe_sq_sum"] += local2
+        products["cumulative_n_features"] = features.cumulative_n_features
+        del x, xe
+    else:
+        features.accumulate(
+            w,
+            y,
+            products["xtx"],
+            products["xty"],
+            products["xe_sum"],
+            products["xe_sq_sum"],
+        )
+    products["y_sq_norm"] += y @ y
+    products["n_energy"] += len(dft_dict["structures"])
+    return products
+
+
+def compute_products_shard(
+    batches,
+    params_dict,
+    common_params_dict,
+    min_energy=None,
+    hybrid=False,
+    element_swap=False,
+    packed=False,
+):
+    """Return unscaled products of weighted X for a list of batches.
+
+    This function is called in workers of
+    PolymlpDevDataXYSequential.accumulate_products_parallel.
+    """
+    products = init_products()
+    for dft_dict in batches:
+        accumulate_batch_products(
+            products,
+            dft_dict,
+            params_dict,
+            common_params_dict,
+            min_energy=min_energy,
+            hybrid=hybrid,
+            verbose=False,
+            element_swap=element_swap,
+            packed=packed,
+        )
+        gc.collect()
+    return products
 
 
 class PolymlpDevDataXY(PolymlpDevDataXYBase):
 
-    def __init__(self, params: PolymlpDevData, verbose=True):
+    def __init__(
+        self,
+        params: PolymlpDevData,
+        verbose=True,
+        feature_cache: FeaturesCache = None,
+        memmap_dir=None,
+    ):
         """
+        Parameters
+        ----------
+        memmap_dir: If given, X of training and test datasets are written
+                    into memory-mapped files, polymlp_x_train.npy and
+                    polymlp_x_test.npy, in memmap_dir. Scaling, weighting,
+                    and regression are then computed blockwise.
+
         Keys in reg_dict
         ----------------
         - x
@@ -21,7 +215,10 @@ class PolymlpDevDataXY(PolymlpDevDataXYBase):
         - first_indices [(ebegin, fbegin, sbegin), ...]
         - n_data (ne, nf, ns)
         """
-        super().__init__(params, verbose=verbose)
+        super().__init__(params, verbose=verbose, feature_cache=feature_cache)
+        self.__memmap_dir = memmap_dir
+        if memmap_dir is not None:
+            os.makedirs(memmap_dir, exist_ok=True)
 
     def run(self):
 
@@ -32,26 +229,79 @@ class PolymlpDevDataXY(PolymlpDevDataXYBase):
 
     def compute_features(self):
 
-        f_obj_train = self.features_class(
-            self.params_dict,
-            self.train_dict,
-            print_memory=self.verbose,
+        self.train_regression_dict = self.__compute_regression_dict(
+            self.train_dict, tag="train"
+        )
+        self.test_regression_dict = self.__compute_regression_dict(
+            self.test_dict, tag="test"
         )
-        f_obj_test = self.features_class(
+        return self
+
+    def __compute_regression_dict(self, dft_dicts, tag="train"):
+        """Compute X or load X from cache."""
+        memmap_file = None
+        if self.__memmap_dir is not None:
+            memmap_file = os.path.join(
+                self.__memmap_dir, "polymlp_x_" + tag + ".npy"
+            )
+
+        cache = self.feature_cache
+        if cache is not None:
+            key = cache.key_features(self.params_dict, dft_dicts)
+            mmap_mode = None if memmap_file is None else "r"
+            res = cache.load(key, mmap_mode=mmap_mode)
+            if res is not None:
+                arrays, attrs = res
+                x = arrays["x"]
+                if memmap_file is not None:
+                    x = self.__copy_to_memmap(x, memmap_file)
+                reg_dict = {
+                    "x": x,
+                    "first_indices": [tuple(v) for v in attrs["first_indices"]],
+                    "n_data": tuple(attrs["n_data"]),
+                }
+                if "cumulative_n_features" in attrs:
+                    reg_dict["cumulative_n_features"] = attrs["cumulative_n_features"]
+                return reg_dict
+
+        f_obj = self.features_class(
             self.params_dict,
-            self.test_dict,
+            dft_dicts,
             print_memory=self.verbose,
+            memmap_file=memmap_file,
         )
+        reg_dict = f_obj.regression_dict
+
+        if cache is not None:
+            attrs = {
+                "first_indices": reg_dict["first_indices"],
+                "n_data": reg_dict["n_data"],
+            }
+            if "cumulative_n_features" in reg_dict:
+                attrs["cumulative_n_features"] = reg_dict["cumulative_n_features"]
+            cache.save(key, {"x": reg_dict["x"]}, attrs=attrs)
+        return reg_dict
 
-        self.train_regression_dict = f_obj_train.regression_dict
-        self.test_regression_dict = f_obj_test.regression_dict
-
-        return self
+    def __copy_to_memmap(self, x, memmap_file):
+        """Copy x to a new memory-mapped file blockwise."""
+        x_memmap = open_x_memmap(memmap_file, x.shape)
+        block_size = get_block_size(x.shape[1])
+        begin_ids, end_ids = get_batch_slice(x.shape[0], block_size)
+        for begin, end in zip(begin_ids, end_ids):
+            x_memmap[begin:end] = x[begin:end]
+        x_memmap.flush()
+        return x_memmap
 
 
 class PolymlpDevDataXYSequential(PolymlpDevDataXYBase):
 
-    def __init__(self, params: PolymlpDevData, verbose=True):
+    def __init__(
+        self,
+        params: PolymlpDevData,
+        verbose=True,
+        feature_cache: FeaturesCache = None,
+        packed=False,
+    ):
         """
         Keys in reg_dict
         ----------------
@@ -60,8 +310,19 @@ class PolymlpDevDataXYSequential(PolymlpDevDataXYBase):
         - y_sq_norm,
         - scales
         - total_n_data,
+
+        If feature_cache is given, products accumulated over all datasets
+        are stored in the cache once. They are reused if the same datasets
+        are given, or if datasets are appended to them.
+
+        Parameters
+        ----------
+        packed: Store X.T @ X in upper packed storage. It halves the memory
+                of X.T @ X, and the packed Cholesky solver is then used
+                in regression.
         """
-        super().__init__(params, verbose=verbose)
+        super().__init__(params, verbose=verbose, feature_cache=feature_cache)
+        self.__packed = packed
 
         if not self.is_multiple_datasets:
             raise ValueError(
@@ -69,14 +330,31 @@ class PolymlpDevDataXYSequential(PolymlpDevDataXYBase):
                 "for PolymlpDevParams with multiple datasets."
             )
 
-    def run(self, batch_size=64, verbose=True, element_swap=False):
-
+    def run(
+        self,
+        batch_size=64,
+        verbose=True,
+        element_swap=False,
+        n_jobs=1,
+        backend=None,
+    ):
+        """
+        Parameters
+        ----------
+        n_jobs: Number of workers computing products of batches in parallel.
+        backend: Name of joblib backend used if n_jobs != 1.
+        """
+        reg = self.common_params_dict["reg"]
+        n_folds = reg["n_folds"] if reg.get("cv") == "kfold" else None
         self.train_regression_dict = self.compute_products(
             self.train_dict,
             scales=None,
             batch_size=batch_size,
             verbose=verbose,
             element_swap=element_swap,
+            n_folds=n_folds,
+            n_jobs=n_jobs,
+            backend=backend,
         )
 
         self.test_regression_dict = self.compute_products(
@@ -85,6 +363,8 @@ class PolymlpDevDataXYSequential(PolymlpDevDataXYBase):
             batch_size=batch_size,
             verbose=verbose,
             element_swap=element_swap,
+            n_jobs=n_jobs,
+            backend=backend,
         )
 
         return self
@@ -96,94 +376,529 @@ class PolymlpDevDataXYSequential(PolymlpDevDataXYBase):
         batch_size=64,
         verbose=True,
         element_swap=False,
+        n_folds=None,
+        seed=0,
+        n_jobs=1,
+        backend=None,
     ):
+        """Compute scaled products of weighted X over datasets.
+
+        Parameters
+        ----------
+        n_folds: If given, structures are randomly divided into n_folds folds
+                 and products of each fold are also returned for k-fold
+                 cross validation, with keys xtx_folds, xty_folds,
+                 y_sq_norm_folds, and total_n_data_folds.
+        seed: Seed of random division into folds.
+        n_jobs: Number of workers. If n_jobs != 1, batches of all datasets
+                are computed in parallel by accumulate_products_parallel.
+        backend: Name of joblib backend used if n_jobs != 1.
+        """
+        if n_folds is not None:
+            return self.__compute_products_folds(
+                dft_dicts,
+                n_folds,
+                scales=scales,
+                batch_size=batch_size,
+                verbose=verbose,
+                element_swap=element_swap,
+                seed=seed,
+                n_jobs=n_jobs,
+                backend=backend,
+            )
 
-        xtx, xty, y_sq_norm = None, None, 0.0
-        xe_sum, xe_sq_sum = None, None
-        total_n_data = 0
-        for set_id, dft_dict in dft_dicts.items():
+        products = None
+        cache_keys, n_cached = None, 0
+        if self.feature_cache is not None:
+            cache_keys = self.__products_cache_keys(dft_dicts, element_swap)
+            for i in reversed(range(len(cache_keys))):
+                res = self.feature_cache.load(cache_keys[i])
+                if res is not None:
+                    arrays, attrs = res
+                    products = dict(arrays)
+                    products.update(attrs)
+                    n_cached = i + 1
+                    products["n_energy"] = sum(
+                        [len(d["energy"]) for d in list(dft_dicts.values())[:n_cached]]
+                    )
+                    break
+
+        if n_jobs != 1:
+            set_ids = list(dft_dicts.keys())[n_cached:]
+            if len(set_ids) > 0:
+                products = self.accumulate_products_parallel(
+                    {set_id: dft_dicts[set_id] for set_id in set_ids},
+                    products=products,
+                    batch_size=batch_size,
+                    verbose=verbose,
+                    element_swap=element_swap,
+                    n_jobs=n_jobs,
+                    backend=backend,
+                )
+                if cache_keys is not None:
+                    self.__save_products(cache_keys[-1], products)
+            return self.regression_dict_from_products(products, scales=scales)
+
+        for i_set, (set_id, dft_dict) in enumerate(dft_dicts.items()):
+            if i_set < n_cached:
+                continue
+            if verbose:
+                print("----- Dataset:", set_id, "-----")
+
+            products = self.accumulate_products(
+                dft_dict,
+                products=products,
+                batch_size=batch_size,
+                verbose=verbose,
+                element_swap=element_swap,
+            )
+
+        if cache_keys is not None and n_cached < len(cache_keys):
+            self.__save_products(cache_keys[-1], products)
+        return self.regression_dict_from_products(products, scales=scales)
+
+    def __save_products(self, cache_key, products):
+        """Save unscaled products accumulated up to a dataset in cache."""
+        arrays = {key: products[key] for key in ARRAY_KEYS}
+        attrs = {key: products[key] for key in products if key not in ARRAY_KEYS}
+        self.feature_cache.save(cache_key, arrays, attrs=attrs)
+        return self
+
+    def __compute_products_folds(
+        self,
+        dft_dicts,
+        n_folds,
+        scales=None,
+        batch_size=64,
+        verbose=True,
+        element_swap=False,
+        seed=0,
+        n_jobs=1,
+        backend=None,
+    ):
+        """Compute products of folds and their sums."""
+        rng = np.random.default_rng(seed)
+        products_folds = [None for _ in range(n_folds)]
+        for i_set, (set_id, dft_dict) in enumerate(dft_dicts.items()):
             if verbose:
                 print("----- Dataset:", set_id, "-----")
 
             n_str = len(dft_dict["structures"])
-            begin_ids, end_ids = get_batch_slice(n_str, batch_size)
-            for begin, end in zip(begin_ids, end_ids):
-                if verbose:
-                    print("Number of structures:", end - begin)
-
-                dft_dict_sliced = slice_dft_dict(dft_dict, begin, end)
-                dft_dict_tmp = {"tmp": dft_dict_sliced}
-                features = self.features_class(
-                    self.params_dict,
-                    dft_dict_tmp,
-                    print_memory=verbose,
+            fold_ids = (rng.permutation(n_str) + i_set) % n_folds
+            for i_fold in range(n_folds):
+                ids = np.where(fold_ids == i_fold)[0]
+                if len(ids) == 0:
+                    continue
+                products_folds[i_fold] = self.accumulate_products(
+                    select_dft_dict(dft_dict, ids),
+                    products=products_folds[i_fold],
+                    batch_size=batch_size,
+                    verbose=verbose,
                     element_swap=element_swap,
+                    n_jobs=n_jobs,
+                    backend=backend,
                 )
-                x = features.x
-                first_indices = features.first_indices[0]
-                ne, nf, ns = features.regression_dict["n_data"]
 
-                if verbose:
-                    print(
-                        " Estimated memory allocation (X.T @ X):",
-                        "{:.2f}".format(x.shape[1] * x.shape[1] * 16e-9),
-                        "(GB)",
-                    )
+        if any([p is None for p in products_folds]):
+            raise ValueError("Number of structures is smaller than n_folds.")
 
-                if scales is None:
-                    xe = x[:ne]
-                    local1 = np.sum(xe, axis=0)
-                    local2 = np.sum(np.square(xe), axis=0)
-                    xe_sum = self.__sum_array(xe_sum, local1)
-                    xe_sq_sum = self.__sum_array(xe_sq_sum, local2)
-
-                n_data, n_features = x.shape
-                y = np.zeros(n_data)
-                w = np.ones(n_data)
-                total_n_data += n_data
-
-                x, y, w = apply_weight_percentage(
-                    x,
-                    y,
-                    w,
-                    dft_dict_sliced,
-                    self.common_params_dict,
-                    first_indices,
-                    min_e=self.min_energy,
-                )
-                xtx = self.__sum_array(xtx, x.T @ x)
-                xty = self.__sum_array(xty, x.T @ y)
-                y_sq_norm += y @ y
+        products = {key: np.copy(products_folds[0][key]) for key in ARRAY_KEYS}
+        for key in SCALAR_KEYS:
+            products[key] = sum([p[key] for p in products_folds])
+        for p in products_folds[1:]:
+            for key in ARRAY_KEYS:
+                products[key] += p[key]
+        if self.is_hybrid:
+            products["cumulative_n_features"] = products_folds[0][
+                "cumulative_n_features"
+            ]
+
+        reg_dict = self.regression_dict_from_products(products, scales=scales)
+        scales = reg_dict["scales"]
+        for p in products_folds:
+            scale_symmetric(p["xtx"], scales)
+            p["xty"] /= scales
+        reg_dict["xtx_folds"] = [p["xtx"] for p in products_folds]
+        reg_dict["xty_folds"] = [p["xty"] for p in products_folds]
+        reg_dict["y_sq_norm_folds"] = [p["y_sq_norm"] for p in products_folds]
+        reg_dict["total_n_data_folds"] = [p["total_n_data"] for p in products_folds]
+        return reg_dict
 
-                del x, y, w
-                gc.collect()
+    def accumulate_products(
+        self,
+        dft_dict,
+        products=None,
+        batch_size=64,
+        verbose=True,
+        element_swap=False,
+        n_jobs=1,
+        backend=None,
+    ):
+        """Add unscaled products of weighted X for a dataset to products.
+
+        Parameters
+        ----------
+        dft_dict: Single dataset.
+        products: Dictionary of products updated in place.
+                  A new dictionary is returned if None.
+        n_jobs: Number of workers. Batches are computed in parallel
+                by accumulate_products_parallel if n_jobs != 1.
+        backend: Name of joblib backend used if n_jobs != 1.
+
+        Keys in products
+        ----------------
+        - xtx, xty, xe_sum, xe_sq_sum
+        - y_sq_norm, total_n_data, n_energy
+        - cumulative_n_features (hybrid models)
+        """
+        if n_jobs != 1:
+            return self.accumulate_products_parallel(
+                {"tmp": dft_dict},
+                products=products,
+                batch_size=batch_size,
+                verbose=verbose,
+                element_swap=element_swap,
+                n_jobs=n_jobs,
+                backend=backend,
+            )
 
+        products = init_products(products)
+        n_str = len(dft_dict["structures"])
+        begin_ids, end_ids = get_batch_slice(n_str, batch_size)
+        for begin, end in zip(begin_ids, end_ids):
+            if verbose:
+                print("Number of structures:", end - begin)
+
+            accumulate_batch_products(
+                products,
+                slice_dft_dict(dft_dict, begin, end),
+                self.params_dict,
+                self.common_params_dict,
+                min_energy=self.min_energy,
+                hybrid=self.is_hybrid,
+                verbose=verbose,
+                element_swap=element_swap,
+                packed=self.__packed,
+            )
+            gc.collect()
+        return products
+
+    def accumulate_products_parallel(
+        self,
+        dft_dicts,
+        products=None,
+        batch_size=64,
+        verbose=True,
+        element_swap=False,
+        n_jobs=-1,
+        backend=None,
+    ):
+        """Add unscaled products of weighted X for datasets using workers.
+
+        Batches of all datasets are divided into shards with balanced
+        numbers of atoms, one for each worker. Each worker returns
+        partial products of its shard, which are added to products
+        in the order of completion. Partial products are therefore
+        released as soon as they are added, instead of being gathered
+        for all shards.
+
+        Parameters
+        ----------
+        dft_dicts: Multiple datasets, {set_id: dft_dict}.
+        products: Dictionary of products updated in place.
+                  A new dictionary is returned if None.
+        n_jobs: Number of workers. -1 uses all processors.
+        backend: Name of joblib backend, such as "loky", "dask", or "ray".
+                 Processes on the local node are used if None.
+        """
+        batches, costs = [], []
+        for dft_dict in dft_dicts.values():
+            n_str = len(dft_dict["structures"])
+            begin_ids, end_ids = get_batch_slice(n_str, batch_size)
+            for begin, end in zip(begin_ids, end_ids):
+                batches.append(slice_dft_dict(dft_dict, begin, end))
+                costs.append(sum(batches[-1]["total_n_atoms"]) + end - begin)
+
+        n_workers = effective_n_jobs(n_jobs, backend=backend)
+        shards = split_work_items(costs, n_workers)
+        if verbose:
+            print("Number of batches:", len(batches))
+            print("Number of shards: ", len(shards))
+
+        args_list = [
+            (
+                [batches[i] for i in shard],
+                self.params_dict,
+                self.common_params_dict,
+                self.min_energy,
+                self.is_hybrid,
+                element_swap,
+                self.__packed,
+            )
+            for shard in shards
+        ]
+        results = run_parallel(
+            compute_products_shard,
+            args_list,
+            n_jobs=n_jobs,
+            backend=backend,
+            unordered=True,
+        )
+        products = init_products(products)
+        for products_shard in results:
+            sum_products(products, products_shard)
+            del products_shard
+        return products
+
+    def regression_dict_from_products(self, products, scales=None):
+        """Scale products and return reg_dict.
+
+        Parameters
+        ----------
+        products: Dictionary of unscaled products. Arrays are scaled in place.
+        scales: Scales of features. If None, scales are computed
+                from sums of energy rows in products.
+        """
         if scales is None:
-            n_data = sum([len(d["energy"]) for d in dft_dicts.values()])
+            n_data = products["n_energy"]
+            xe_sum, xe_sq_sum = products["xe_sum"], products["xe_sq_sum"]
             variance = xe_sq_sum / n_data - np.square(xe_sum / n_data)
             self.__scales = np.sqrt(variance)
         else:
             self.__scales = scales
 
-        xtx /= self.__scales[:, np.newaxis]
-        xtx /= self.__scales[np.newaxis, :]
+        xtx, xty = products["xtx"], products["xty"]
+        scale_symmetric(xtx, self.__scales)
         xty /= self.__scales
 
         reg_dict = {
             "xtx": xtx,
             "xty": xty,
-            "y_sq_norm": y_sq_norm,
-            "total_n_data": total_n_data,
+            "y_sq_norm": products["y_sq_norm"],
+            "total_n_data": products["total_n_data"],
             "scales": self.__scales,
         }
         if self.is_hybrid:
-            reg_dict["cumulative_n_features"] = features.cumulative_n_features
+            reg_dict["cumulative_n_features"] = products["cumulative_n_features"]
 
         return reg_dict
 
-    def __sum_array(self, array1, array2):
+    def __products_cache_keys(self, dft_dicts, element_swap=False):
+        """Keys of products accumulated up to each dataset.
+
+        Products depend on labels and weights of datasets
+        in addition to features.
+        """
+        cache = self.feature_cache
+        common = self.common_params_dict
+        key = cache.key(
+            "products",
+            hash_model_params(self.params_dict),
+            bool(element_swap),
+            common["include_force"],
+            common["include_stress"],
+            self.min_energy,
+            bool(self.__packed),
+        )
+        keys = []
+        for dft_dict in dft_dicts.values():
+            key = cache.key(key, hash_dataset(dft_dict, include_labels=True))
+            keys.append(key)
+        return keys
+
+    @property
+    def packed(self):
+        return self.__packed
+
+
+class PolymlpDevDataXYIncremental(PolymlpDevDataXYSequential):
+
+    def __init__(
+        self,
+        params: PolymlpDevData,
+        state_dir="polymlp_state",
+        verbose=True,
+        feature_cache: FeaturesCache = None,
+        packed=False,
+    ):
+        """Sequential version with a persistent regression state.
+
+        Products of X are stored for each dataset in state_dir.
+        In the next run, products are computed only for new structures
+        and added to the stored products. Datasets not found in params
+        are removed from the state. If structures are removed from
+        a dataset, products of the dataset are recomputed unless they
+        are subtracted using remove_structures in advance.
+
+        min_energy used for weights is kept fixed to the value
+        in the state.
+
+        Parameters
+        ----------
+        state_dir: Directory of regression state.
+        packed: Store X.T @ X in upper packed storage.
+        """
+        super().__init__(
+            params, verbose=verbose, feature_cache=feature_cache, packed=packed
+        )
+        self.__state = RegressionState(state_dir, verbose=verbose)
+        self.__min_energy = None
+
+    def run(
+        self,
+        batch_size=64,
+        verbose=True,
+        element_swap=False,
+        n_jobs=1,
+        backend=None,
+    ):
+
+        self.__load_state(element_swap=element_swap, verbose=verbose)
+        for tag, dft_dicts in (("train", self.train_dict), ("test", self.test_dict)):
+            self.__update_state(
+                tag,
+                dft_dicts,
+                batch_size=batch_size,
+                verbose=verbose,
+                element_swap=element_swap,
+                n_jobs=n_jobs,
+                backend=backend,
+            )
+        self.__state.save()
+
+        self.train_regression_dict = self.regression_dict_from_products(
+            self.__state.products("train")
+        )
+        self.test_regression_dict = self.regression_dict_from_products(
+            self.__state.products("test"),
+            scales=self.train_regression_dict["scales"],
+        )
+        return self
+
+    def remove_structures(
+        self,
+        dft_dict,
+        set_id,
+        tag="train",
+        batch_size=64,
+        verbose=True,
+        element_swap=False,
+        n_jobs=1,
+        backend=None,
+    ):
+        """Subtract products of structures from a dataset in the state.
+
+        Parameters
+        ----------
+        dft_dict: Dataset of structures removed from dataset set_id.
+        set_id: ID of dataset in the state.
+        tag: "train" or "test".
+        """
+        self.__load_state(element_swap=element_swap, verbose=verbose)
+        if self.__state.fingerprints(tag, set_id) is None:
+            raise KeyError("Dataset " + str(set_id) + " not found in state.")
+
+        products = self.accumulate_products(
+            dft_dict,
+            batch_size=batch_size,
+            verbose=verbose,
+            element_swap=element_swap,
+            n_jobs=n_jobs,
+            backend=backend,
+        )
+        fingerprints = hash_structures_with_labels(dft_dict)
+        self.__state.subtract(tag, set_id, products, fingerprints)
+        self.__state.save()
+        return self
+
+    def __state_attrs(self, element_swap=False):
+
+        common = self.common_params_dict
+        return {
+            "model": hash_model_params(self.params_dict),
+            "element_swap": bool(element_swap),
+            "include_force": bool(common["include_force"]),
+            "include_stress": bool(common["include_stress"]),
+            "packed": bool(self.packed),
+        }
+
+    def __load_state(self, element_swap=False, verbose=True):
+        """Reset state if it is computed using different settings."""
+        attrs = self.__state_attrs(element_swap=element_swap)
+        stored = self.__state.attrs
+        if stored is not None and all(stored.get(k) == v for k, v in attrs.items()):
+            self.__min_energy = stored["min_energy"]
+            if verbose and not np.isclose(self.__min_energy, super().min_energy):
+                print("min_energy in regression state is used:", self.__min_energy)
+            return self
+
+        if verbose and stored is not None:
+            print("Regression state is reset due to different settings.")
+        self.__min_energy = float(super().min_energy)
+        attrs["min_energy"] = self.__min_energy
+        self.__state.reset(attrs)
+        return self
+
+    def __update_state(
+        self,
+        tag,
+        dft_dicts,
+        batch_size=64,
+        verbose=True,
+        element_swap=False,
+        n_jobs=1,
+        backend=None,
+    ):
+        """Add products of new structures to the state."""
+        state = self.__state
+        for set_id in state.set_ids(tag):
+            if set_id not in dft_dicts:
+                if verbose:
+                    print("Dataset removed from regression state:", set_id)
+                state.remove(tag, set_id)
+
+        for set_id, dft_dict in dft_dicts.items():
+            fingerprints = hash_structures_with_labels(dft_dict)
+            stored = state.fingerprints(tag, set_id)
+            if stored is None:
+                ids = list(range(len(fingerprints)))
+            else:
+                remaining = Counter(stored)
+                ids = []
+                for i, fp in enumerate(fingerprints):
+                    if remaining[fp] > 0:
+                        remaining[fp] -= 1
+                    else:
+                        ids.append(i)
+                if sum(remaining.values()) > 0:
+                    if verbose:
+                        print("Structures removed from dataset:", set_id)
+                    state.remove(tag, set_id)
+                    ids = list(range(len(fingerprints)))
+
+            if verbose:
+                print("----- Dataset:", set_id, "-----")
+                print("Number of new structures:", len(ids))
+            if len(ids) == 0:
+                continue
+
+            products = self.accumulate_products(
+                select_dft_dict(dft_dict, ids),
+                batch_size=batch_size,
+                verbose=verbose,
+                element_swap=element_swap,
+                n_jobs=n_jobs,
+                backend=backend,
+            )
+            state.add(tag, set_id, products, [fingerprints[i] for i in ids])
+        return self
+
+    @property
+    def min_energy(self):
+        if self.__min_energy is None:
+            return super().min_energy
+        return self.__min_energy
 
-        if array1 is None:
-            return array2
-        array1 += array2
-        return array1
+    @property
+    def state(self):
+        return self.__state
@@ -2,6 +2,7 @@
 import numpy as np
 
 from pypolymlp.mlp_dev.core.regression_base import RegressionBase
+from pypolymlp.mlp_dev.core.utils_symmetric import add_diagonal
 from pypolymlp.mlp_dev.standard.mlpdev_dataxy import PolymlpDevDataXY
 
 
@@ -24,17 +25,35 @@ class Regression(RegressionBase):
         self.__alphas = [
             pow(10, a) for a in polymlp_dev.common_params_dict["reg"]["alpha"]
         ]
+        self.__cv = polymlp_dev.common_params_dict["reg"].get("cv")
+        self.__n_folds = polymlp_dev.common_params_dict["reg"].get("n_folds")
 
     def fit(self, seq=False):
 
+        if self.__cv is not None and not seq:
+            raise ValueError("Cross validation requires sequential regression.")
+
         vtrain = self.train_regression_dict
-        if seq:
+        if seq and self.solver == "eigen":
+            XTX, XTy = vtrain["xtx"], vtrain["xty"]
+            coefs_array, rmse = self.__ridge_fit_eigen(A=XTX, Xy=XTy, seq=True)
+            self.__ridge_model_selection_seq(coefs_array, rmse=rmse)
+        elif seq and self.solver == "cg":
+            XTX, XTy = vtrain["xtx"], vtrain["xty"]
+            coefs_array = self.solve_cg(self.__alphas, XTy, A=XTX)
+            self.__ridge_model_selection_seq(coefs_array)
+        elif seq:
             XTX, XTy = vtrain["xtx"], vtrain["xty"]
             coefs_array = self.__ridge_fit(A=XTX, Xy=XTy)
             self.__ridge_model_selection_seq(coefs_array)
         else:
             X, y = vtrain["x"], vtrain["y"]
-            coefs_array = self.__ridge_fit(X=X, y=y)
+            if self.solver == "eigen":
+                coefs_array, _ = self.__ridge_fit_eigen(X=X, y=y)
+            elif self.solver == "cg":
+                coefs_array = self.solve_cg(self.__alphas, self.compute_xty(X, y), X=X)
+            else:
+                coefs_array = self.__ridge_fit(X=X, y=y)
             self.__ridge_model_selection(coefs_array)
 
         return self
@@ -42,7 +61,7 @@ class Regression(RegressionBase):
     def __ridge_fit(self, X=None, y=None, A=None, Xy=None):
 
         A, Xy = self.compute_inner_products(X=X, y=y, A=A, Xy=Xy)
-        n_features = A.shape[0]
+        n_features = Xy.shape[0]
 
         if self.verbose:
             print("Regression: cholesky decomposition ...")
@@ -50,13 +69,28 @@ class Regression(RegressionBase):
         alpha_prev = 0.0
         for i, alpha in enumerate(self.__alphas):
             add = alpha - alpha_prev
-            A.flat[:: n_features + 1] += add
+            add_diagonal(A, add)
             coefs_array[:, i] = self.solve_linear_equation(A, Xy)
             alpha_prev = alpha
-        A.flat[:: n_features + 1] -= alpha
+        add_diagonal(A, -alpha)
 
         return coefs_array
 
+    def __ridge_fit_eigen(self, X=None, y=None, A=None, Xy=None, seq=False):
+        """Ridge regression for all alphas using eigendecomposition of A.
+
+        If seq = True, rmse values are also computed in eigenbasis.
+        """
+        A, Xy = self.compute_inner_products(X=X, y=y, A=A, Xy=Xy)
+        eigvals, eigvecs = self.eigendecomposition(A)
+        coefs_array, z_array = self.solve_eigen(
+            eigvals, eigvecs, eigvecs.T @ Xy, self.__alphas
+        )
+        rmse = None
+        if seq:
+            rmse = self.predict_seq_eigen(z_array, eigvals, eigvecs)
+        return coefs_array, rmse
+
     def __ridge_model_selection(self, coefs_array):
 
         pred_train, pred_test, rmse_train, rmse_test = self.predict(coefs_array)
@@ -75,29 +109,56 @@ class Regression(RegressionBase):
 
         return self
 
-    def __ridge_model_selection_seq(self, coefs_array):
+    def __ridge_model_selection_seq(self, coefs_array, rmse=None):
 
-        rmse_train, rmse_test = self.predict_seq(coefs_array)
-        idx = np.argmin(rmse_test)
-        self.best_model = {
+        if rmse is None:
+            rmse = self.predict_seq(coefs_array)
+        rmse_train, rmse_test = rmse
+        rmse_cv = self.cross_validation(self.__alphas)
+        if rmse_cv is None:
+            idx = np.argmin(rmse_test)
+        else:
+            idx = np.argmin(rmse_cv)
+
+        best_model = {
             "rmse": rmse_test[idx],
             "coeffs": coefs_array[:, idx],
             "alpha": self.__alphas[idx],
         }
+        if rmse_cv is not None:
+            best_model["cv"] = {
+                "method": self.__cv,
+                "n_folds": self.__n_folds,
+                "alphas": self.__alphas,
+                "rmse": rmse_cv,
+            }
+        self.best_model = best_model
         if self.verbose:
-            self.__print_log(rmse_train, rmse_test)
+            self.__print_log(rmse_train, rmse_test, rmse_cv=rmse_cv)
 
         return self
 
-    def __print_log(self, rmse_train, rmse_test):
+    def __print_log(self, rmse_train, rmse_test, rmse_cv=None):
 
         print("Regression: model selection ...")
-        for a, rmse1, rmse2 in zip(self.__alphas, rmse_train, rmse_test):
-            print(
-                "  - alpha =",
-                "{:.3e}".format(a),
-                ": rmse (train, test) =",
-                "{:.5f}".format(rmse1),
-                "{:.5f}".format(rmse2),
-            )
+        for i, (a, rmse1, rmse2) in enumerate(
+            zip(self.__alphas, rmse_train, rmse_test)
+        ):
+            if rmse_cv is None:
+                print(
+                    "  - alpha =",
+                    "{:.3e}".format(a),
+                    ": rmse (train, test) =",
+                    "{:.5f}".format(rmse1),
+                    "{:.5f}".format(rmse2),
+                )
+            else:
+                print(
+                    "  - alpha =",
+                    "{:.3e}".format(a),
+                    ": rmse (train, test, cv) =",
+                    "{:.5f}".format(rmse1),
+                    "{:.5f}".format(rmse2),
+                    "{:.5f}".format(rmse_cv[i]),
+                )
         return self
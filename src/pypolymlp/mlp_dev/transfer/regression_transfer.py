@@ -4,6 +4,7 @@ import itertools
 import numpy as np
 
 from pypolymlp.mlp_dev.core.regression_base import RegressionBase
+from pypolymlp.mlp_dev.core.utils_symmetric import add_diagonal
 from pypolymlp.mlp_dev.standard.mlpdev_dataxy import PolymlpDevDataXY
 
 
@@ -47,8 +48,24 @@ class RegressionTransfer(RegressionBase):
         vtrain = self.train_regression_dict
         if seq is False:
             X, y = vtrain["x"], vtrain["y"]
-            coefs_array = self.__regularization_fit(X=X, y=y)
+            if self.solver == "eigen":
+                coefs_array, _ = self.__regularization_fit_eigen(X=X, y=y)
+            elif self.solver == "cg":
+                Xy = self.compute_xty(X, y)
+                coefs_array = self.__regularization_fit_cg(X=X, Xy=Xy)
+            else:
+                coefs_array = self.__regularization_fit(X=X, y=y)
             self.__model_selection(coefs_array, iprint=iprint)
+        elif self.solver == "eigen":
+            XTX, XTy = vtrain["xtx"], vtrain["xty"]
+            coefs_array, rmse = self.__regularization_fit_eigen(
+                A=XTX, Xy=XTy, seq=True
+            )
+            self.__model_selection_seq(coefs_array, rmse=rmse, iprint=iprint)
+        elif self.solver == "cg":
+            XTX, XTy = vtrain["xtx"], vtrain["xty"]
+            coefs_array = self.__regularization_fit_cg(A=XTX, Xy=XTy)
+            self.__model_selection_seq(coefs_array, iprint=iprint)
         else:
             XTX, XTy = vtrain["xtx"], vtrain["xty"]
             coefs_array = self.__regularization_fit(A=XTX, Xy=XTy)
@@ -59,7 +76,7 @@ class RegressionTransfer(RegressionBase):
     def __regularization_fit(self, X=None, y=None, A=None, Xy=None):
 
         A, Xy = self.compute_inner_products(X=X, y=y, A=A, Xy=Xy)
-        n_features = A.shape[0]
+        n_features = Xy.shape[0]
 
         print("Regression: cholesky decomposition ...")
         coefs_array = np.zeros((n_features, len(self.__params)))
@@ -72,18 +89,51 @@ class RegressionTransfer(RegressionBase):
             )
             add1 = (alpha + beta) - (alpha_prev + beta_prev)
             add2 = beta - beta_prev
-            A.flat[:: n_features + 1] += add1
+            add_diagonal(A, add1)
             Xy += add2 * self.__coeffs_regular
 
             coefs_array[:, i] = self.solve_linear_equation(A, Xy)
             alpha_prev = alpha
             beta_prev = beta
 
-        A.flat[:: n_features + 1] -= alpha + beta
+        add_diagonal(A, -(alpha + beta))
         Xy -= beta * self.__coeffs_regular
 
         return coefs_array
 
+    def __regularization_fit_eigen(self, X=None, y=None, A=None, Xy=None, seq=False):
+        """Regularized regression for all (alpha, beta) using eigendecomposition.
+
+        (A + (alpha + beta) I) c = Xy + beta * c_regular is solved
+        by diagonal rescaling in eigenbasis of A.
+        """
+        A, Xy = self.compute_inner_products(X=X, y=y, A=A, Xy=Xy)
+        eigvals, eigvecs = self.eigendecomposition(A)
+        xy_rot = eigvecs.T @ Xy
+        coeffs_rot = eigvecs.T @ self.__coeffs_regular
+
+        alphas = np.array([alpha for alpha, _ in self.__params])
+        betas = np.array([beta for _, beta in self.__params])
+        b_rot = xy_rot[:, np.newaxis] + coeffs_rot[:, np.newaxis] * betas
+        coefs_array, z_array = self.solve_eigen(
+            eigvals, eigvecs, b_rot, alphas + betas
+        )
+        rmse = None
+        if seq:
+            rmse = self.predict_seq_eigen(z_array, eigvals, eigvecs)
+        return coefs_array, rmse
+
+    def __regularization_fit_cg(self, X=None, A=None, Xy=None):
+        """Regularized regression for all (alpha, beta) using conjugate gradient.
+
+        (A + (alpha + beta) I) c = Xy + beta * c_regular is solved
+        without forming A if X is given.
+        """
+        alphas = np.array([alpha for alpha, _ in self.__params])
+        betas = np.array([beta for _, beta in self.__params])
+        b = Xy[:, np.newaxis] + self.__coeffs_regular[:, np.newaxis] * betas
+        return self.solve_cg(alphas + betas, b, X=X, A=A)
+
     def __model_selection(self, coefs_array, iprint=True):
 
         pred_train, pred_test, rmse_train, rmse_test = self.predict(coefs_array)
@@ -103,9 +153,11 @@ class RegressionTransfer(RegressionBase):
 
         return self
 
-    def __model_selection_seq(self, coefs_array, iprint=True):
+    def __model_selection_seq(self, coefs_array, rmse=None, iprint=True):
 
-        rmse_train, rmse_test = self.predict_seq(coefs_array)
+        if rmse is None:
+            rmse = self.predict_seq(coefs_array)
+        rmse_train, rmse_test = rmse
         idx = np.argmin(rmse_test)
         self.best_model = {
             "rmse": rmse_test[idx],
@@ -17,7 +17,14 @@ def structures_to_mlpcpp_obj(structures):
 
 class Features:
 
-    def __init__(self, params_dict, structures, print_memory=True, element_swap=False):
+    def __init__(
+        self,
+        params_dict,
+        structures,
+        print_memory=True,
+        element_swap=False,
+        neighbor_method="brute_force",
+    ):
 
         n_st_dataset = [len(structures)]
         force_dataset = [params_dict["include_force"]]
@@ -31,6 +38,7 @@ class Features:
 
         params_dict["element_swap"] = element_swap
         params_dict["print_memory"] = print_memory
+        params_dict["neighbor_method"] = neighbor_method
         obj = libmlpcpp.PotentialModel(
             params_dict,
             axis_array,
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+import argparse
+import signal
+import time
+
+import numpy as np
+
+from pypolymlp.calculator.compute_features import update_types
+from pypolymlp.calculator.properties import Properties
+from pypolymlp.core.interface_vasp import Poscar
+from pypolymlp.core.io_polymlp import load_mlp_lammps
+from pypolymlp.mlp_gen.features import Features
+from pypolymlp.utils.structure_utils import supercell_diagonal
+
+
+def eval_time(prop, st_dict, n_repeat=1):
+    t1 = time.time()
+    for _ in range(n_repeat):
+        e, f, s = prop.eval(st_dict)
+    t2 = time.time()
+    return (t2 - t1) / n_repeat, (e, f, s)
+
+
+def features_time(params_dict, st_dict, neighbor_method="brute_force"):
+    t1 = time.time()
+    features = Features(
+        params_dict,
+        [st_dict],
+        print_memory=False,
+        neighbor_method=neighbor_method,
+    )
+    t2 = time.time()
+    return t2 - t1, features.get_x()
+
+
+if __name__ == "__main__":
+
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--poscar", type=str, default="POSCAR", help="unitcell")
+    parser.add_argument(
+        "--pot", type=str, default="polymlp.lammps", help="polymlp file"
+    )
+    parser.add_argument(
+        "--sizes",
+        nargs="*",
+        type=int,
+        default=[1, 2, 3, 4, 6, 8],
+        help="Supercell sizes (size x size x size)",
+    )
+    parser.add_argument(
+        "--features", action="store_true", help="Benchmark feature calculations"
+    )
+    args = parser.parse_args()
+
+    np.random.seed(0)
+    unitcell = Poscar(args.poscar).get_structure()
+    prop_bf = Properties(pot=args.pot, neighbor_method="brute_force")
+    prop_lc = Properties(pot=args.pot, neighbor_method="linked_cell")
+
+    if args.features:
+        params_dict, _ = load_mlp_lammps(filename=args.pot)
+        params_dict["include_force"] = True
+        params_dict["include_stress"] = True
+
+    print(
+        " n_atom  t(brute_force)  t(linked_cell)  speedup"
+        "  max|dE|  max|dF|  max|dS|"
+    )
+    for size in args.sizes:
+        st_dict = supercell_diagonal(unitcell, size=[size, size, size])
+        st_dict["positions"] += np.random.normal(
+            scale=0.002, size=st_dict["positions"].shape
+        )
+        n_atom = sum(st_dict["n_atoms"])
+
+        t_bf, (e1, f1, s1) = eval_time(prop_bf, st_dict)
+        t_lc, (e2, f2, s2) = eval_time(prop_lc, st_dict)
+        print(
+            "{:7d}  {:14.5f}  {:14.5f}  {:7.2f}  {:.1e}  {:.1e}  {:.1e}".format(
+                n_atom,
+                t_bf,
+                t_lc,
+                t_bf / t_lc,
+                abs(e1 - e2),
+                np.max(np.abs(f1 - f2)),
+                np.max(np.abs(s1 - s2)),
+            )
+        )
+
+        if args.features:
+            st_dict = update_types([st_dict], params_dict["elements"])[0]
+            t_bf, x1 = features_time(params_dict, st_dict, "brute_force")
+            t_lc, x2 = features_time(params_dict, st_dict, "linked_cell")
+            print(
+                "  (features) {:14.5f}  {:14.5f}  {:7.2f}  max|dX| = {:.1e}".format(
+                    t_bf, t_lc, t_bf / t_lc, np.max(np.abs(x1 - x2))
+                )
+            )
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+import argparse
+import signal
+import time
+
+import numpy as np
+
+from pypolymlp.calculator.properties import Properties
+from pypolymlp.core.interface_vasp import Poscar
+from pypolymlp.utils.structure_utils import supercell_diagonal
+
+
+def eval_time(prop, st_dicts, mode="all", n_repeat=1):
+    t1 = time.time()
+    for _ in range(n_repeat):
+        e, f, s = prop.eval_multiple(st_dicts, mode=mode)
+    t2 = time.time()
+    return (t2 - t1) / n_repeat, (e, f, s)
+
+
+if __name__ == "__main__":
+
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--poscar", type=str, default="POSCAR", help="unitcell")
+    parser.add_argument(
+        "--pot", nargs="*", type=str, default=["polymlp.lammps"], help="polymlp file"
+    )
+    parser.add_argument(
+        "--size", nargs=3, type=int, default=[2, 2, 2], help="Supercell size"
+    )
+    parser.add_argument("--n_str", type=int, default=200, help="Number of structures")
+    parser.add_argument("--n_repeat", type=int, default=1, help="Number of repeats")
+    args = parser.parse_args()
+
+    np.random.seed(0)
+    unitcell = Poscar(args.poscar).get_structure()
+    supercell = supercell_diagonal(unitcell, size=args.size)
+
+    st_dicts = []
+    for _ in range(args.n_str):
+        st = dict(supercell)
+        st["positions"] = supercell["positions"] + np.random.normal(
+            scale=0.005, size=supercell["positions"].shape
+        )
+        st_dicts.append(st)
+
+    prop = Properties(pot=args.pot)
+    n_atom = sum(supercell["n_atoms"])
+    print("Number of structures:", args.n_str, ", number of atoms:", n_atom)
+
+    t_all, (e_all, f_all, _) = eval_time(prop, st_dicts, "all", args.n_repeat)
+    print("        mode   time (s)  structures/s  speedup  max|dE|  max|dF|")
+    print(
+        "{:>12s}  {:9.4f}  {:12.1f}  {:7.2f}".format(
+            "all", t_all, args.n_str / t_all, 1.0
+        )
+    )
+    for mode in ["energy_force", "energy"]:
+        t, (e, f, _) = eval_time(prop, st_dicts, mode, args.n_repeat)
+        df = "    -"
+        if f is not None:
+            df = max(np.max(np.abs(f1 - f2)) for f1, f2 in zip(f, f_all))
+            df = "{:.1e}".format(df)
+        print(
+            "{:>12s}  {:9.4f}  {:12.1f}  {:7.2f}  {:.1e}  {:s}".format(
+                mode,
+                t,
+                args.n_str / t,
+                t_all / t,
+                np.max(np.abs(e - e_all)),
+                df,
+            )
+        )
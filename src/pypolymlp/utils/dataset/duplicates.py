@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+"""Elimination of near-duplicate structures in datasets.
+
+Structures are compared using fingerprints given by polynomial invariants
+averaged over atoms, i.e., energy rows of X divided by numbers of atoms,
+which are invariant to rotations, translations, and permutations of atoms.
+Each fingerprint column is normalized by its root mean square over
+structures in the dataset. Two structures are regarded as near-duplicates
+if the root mean square difference of their normalized fingerprints
+is smaller than tol, i.e., tol is a relative tolerance.
+"""
+import copy
+
+import numpy as np
+from scipy.sparse.linalg import svds
+from scipy.spatial import cKDTree
+
+from pypolymlp.calculator.compute_features import compute_from_polymlp_lammps
+from pypolymlp.mlp_dev.core.utils_sequential import select_dft_dict
+
+
+def compute_fingerprints(structures, params_dict, batch_size=1000):
+    """Return fingerprints of structures, (n_str, n_features).
+
+    Parameters
+    ----------
+    params_dict: Parameters of polymlp features.
+    batch_size: Number of structures for which features are computed at once.
+    """
+    params = copy.copy(params_dict)
+    fingerprints = []
+    for begin in range(0, len(structures), batch_size):
+        # Types of structures are reassigned in compute_from_polymlp_lammps.
+        st_dicts = [dict(st) for st in structures[begin : begin + batch_size]]
+        x = compute_from_polymlp_lammps(
+            st_dicts, params_dict=params, return_mlp_dict=False
+        )
+        n_atoms = np.array([len(st["types"]) for st in st_dicts])
+        fingerprints.append(x / n_atoms[:, np.newaxis])
+    return np.vstack(fingerprints)
+
+
+def normalize_fingerprints(fingerprints):
+    """Normalize fingerprint columns by their root mean squares.
+
+    Columns that are zero for all structures are removed.
+    """
+    rms = np.sqrt(np.mean(np.square(fingerprints), axis=0))
+    cols = rms > 1e-12 * max(np.max(rms), 1e-300)
+    return fingerprints[:, cols] / rms[cols]
+
+
+def find_duplicates(
+    fingerprints, tol=1e-3, energies=None, energy_tol=None, n_components=16
+):
+    """Find near-duplicate structures.
+
+    Candidates within tol are searched using a KD-tree of fingerprints
+    projected onto their first principal components, and then checked
+    using the full fingerprints. Since the projection does not increase
+    distances, no near-duplicates are missed. Structures are visited
+    in the given order, and the first structure in a group of
+    near-duplicates is kept.
+
+    Parameters
+    ----------
+    fingerprints: (n_str, n_features)
+    tol: Tolerance of the root mean square difference of normalized
+         fingerprints.
+    energies: Energies per atom, (n_str).
+    energy_tol: If given, structures with energies per atom differing more
+                than energy_tol are not regarded as near-duplicates.
+    n_components: Number of principal components used for the KD-tree.
+
+    Return
+    ------
+    representatives: (n_str), Index of the structure kept for each structure.
+                     Structure i is kept if representatives[i] == i.
+    """
+    fp = normalize_fingerprints(np.asarray(fingerprints, dtype=float))
+    n_str, n_features = fp.shape
+    representatives = np.arange(n_str)
+    if n_str < 2 or n_features == 0:
+        return representatives
+
+    fp_centered = fp - np.mean(fp, axis=0)
+    if min(n_str, n_features) > n_components + 1:
+        _, _, vt = svds(fp_centered, k=n_components)
+    else:
+        _, _, vt = np.linalg.svd(fp_centered, full_matrices=False)
+    proj = fp_centered @ vt.T
+
+    radius = tol * np.sqrt(n_features)
+    tree = cKDTree(proj)
+    candidates = tree.query_ball_point(proj, radius)
+    removed = np.zeros(n_str, dtype=bool)
+    for i in range(n_str):
+        if removed[i]:
+            continue
+        ids = np.array([j for j in candidates[i] if j > i and not removed[j]])
+        if len(ids) == 0:
+            continue
+        match = np.linalg.norm(fp[ids] - fp[i], axis=1) <= radius
+        if energy_tol is not None:
+            match &= np.abs(energies[ids] - energies[i]) <= energy_tol
+        removed[ids[match]] = True
+        representatives[ids[match]] = i
+    return representatives
+
+
+def eliminate_duplicates(
+    dft_dict, params_dict, tol=1e-3, energy_tol=None, batch_size=1000
+):
+    """Remove near-duplicate structures from a dataset.
+
+    Parameters
+    ----------
+    dft_dict: Dataset.
+    params_dict: Parameters of polymlp features used for fingerprints.
+    tol: Tolerance of fingerprints. See find_duplicates.
+    energy_tol: Tolerance of energies per atom. See find_duplicates.
+
+    Return
+    ------
+    dft_dict_reduced: Dataset of kept structures. Keys that are not
+                      related to structures, such as weight, are kept.
+    ids: Indices of kept structures.
+    """
+    if len(dft_dict["structures"]) == 0:
+        return dft_dict, np.zeros(0, dtype=int)
+
+    fingerprints = compute_fingerprints(
+        dft_dict["structures"], params_dict, batch_size=batch_size
+    )
+    energies = np.array(dft_dict["energy"]) / np.array(dft_dict["total_n_atoms"])
+    representatives = find_duplicates(
+        fingerprints, tol=tol, energies=energies, energy_tol=energy_tol
+    )
+    ids = np.where(representatives == np.arange(len(representatives)))[0]
+
+    dft_dict_reduced = copy.copy(dft_dict)
+    dft_dict_reduced.update(select_dft_dict(dft_dict, ids))
+    for key in ("volumes", "filenames", "vaspruns"):
+        if key in dft_dict and len(dft_dict[key]) == len(representatives):
+            dft_dict_reduced[key] = [dft_dict[key][i] for i in ids]
+    if "volumes" in dft_dict_reduced:
+        dft_dict_reduced["volumes"] = np.array(dft_dict_reduced["volumes"])
+    return dft_dict_reduced, ids
@@ -3,6 +3,9 @@ import argparse
 from xml.dom import minidom
 from xml.etree import ElementTree as ET
 
+from pypolymlp.core.interface_vasp import read_vasprun, save_vasprun_record
+from pypolymlp.core.io_compressed import open_compressed, strip_compression_suffix
+
 
 def prettify(elem):
     """
@@ -13,14 +16,36 @@ def prettify(elem):
     return reparsed.toprettyxml(indent="", newl="")
 
 
-def convert(vasprun):
+def convert(vasprun, output_format="npz"):
+    """Convert vasprun.xml into a file with only data used for datasets.
+
+    vasprun.xml may be compressed by gzip, xz, or zstd.
 
+    Parameters
+    ----------
+    output_format: "npz": Record of energy, forces, stress tensor, and
+                          structure in a compressed binary file,
+                          vasprun.xml.polymlp.npz.
+                   "xml": Trimmed XML file, vasprun.xml.polymlp.
+    """
+    if output_format not in ("npz", "xml"):
+        raise ValueError("output_format must be npz or xml.")
+
+    output = strip_compression_suffix(vasprun) + ".polymlp"
     try:
-        root = ET.parse(vasprun).getroot()
-    except ET.ParseError:
-        print("ET.ParseError:", vasprun)
+        if output_format == "npz":
+            property_dict, structure_dict = read_vasprun(vasprun)
+        else:
+            with open_compressed(vasprun) as fp:
+                root = ET.parse(fp).getroot()
+    except (ET.ParseError, EOFError, ValueError) as e:
+        print(type(e).__name__ + ":", vasprun, e)
         return False
 
+    if output_format == "npz":
+        save_vasprun_record(output + ".npz", property_dict, structure_dict)
+        return True
+
     e = root.find("calculation").find("energy")
     f = root.find("calculation").find(".//*[@name='forces']")
     s = root.find("calculation").find(".//*[@name='stress']")
@@ -36,7 +61,7 @@ def convert(vasprun):
     c1.append(st2)
     c1.append(st3)
     m1.append(c1)
-    f = open(vasprun + ".polymlp", "w")
+    f = open(output, "w")
     print(prettify(m1), file=f)
     f.close()
 
@@ -48,14 +73,21 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--vaspruns", nargs="*", type=str, help="vasprun.xml files")
     parser.add_argument("--n_jobs", type=int, default=1, help="number of parallel jobs")
+    parser.add_argument(
+        "--format",
+        type=str,
+        default="npz",
+        choices=["npz", "xml"],
+        help="Output format, compressed binary record or trimmed XML",
+    )
     args = parser.parse_args()
 
     if args.n_jobs == 1:
         for vasp in args.vaspruns:
-            convert(vasp)
+            convert(vasp, output_format=args.format)
     else:
         from joblib import Parallel, delayed
 
         res = Parallel(n_jobs=args.n_jobs)(
-            delayed(convert)(vasp) for vasp in args.vaspruns
+            delayed(convert)(vasp, output_format=args.format) for vasp in args.vaspruns
         )
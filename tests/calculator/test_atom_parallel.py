@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+SCRIPT = """
+import sys
+import numpy as np
+from pypolymlp.calculator.properties import Properties
+from pypolymlp.core.interface_vasp import Poscar
+from pypolymlp.utils.structure_utils import supercell_diagonal
+
+pot, poscar, output = sys.argv[1:]
+unitcell = Poscar(poscar).get_structure()
+rng = np.random.default_rng(0)
+st_dicts = []
+for _ in range(2):
+    st = supercell_diagonal(unitcell, size=[3, 3, 2])
+    st["positions"] = st["positions"] + 0.01 * rng.random(st["positions"].shape)
+    st_dicts.append(st)
+
+prop = Properties(pot=pot)
+e, f, s = prop.eval(st_dicts[0])
+e_multiple, f_multiple, s_multiple = prop.eval_multiple(st_dicts)
+np.savez(
+    output, e=e, f=f, s=s, e_multiple=e_multiple, f_multiple=f_multiple,
+    s_multiple=s_multiple,
+)
+"""
+
+
+def run_eval(pot, poscar, output, n_threads):
+
+    env = dict(os.environ, OMP_NUM_THREADS=str(n_threads))
+    subprocess.run(
+        [sys.executable, "-c", SCRIPT, pot, poscar, output], env=env, check=True
+    )
+    return np.load(output)
+
+
+def test_atom_parallel(pot_aln, unitcell_aln, tmp_path):
+    """Atom-parallel and structure-parallel loops agree with serial ones."""
+    res1 = run_eval(pot_aln, unitcell_aln, str(tmp_path / "res1.npz"), 1)
+    res3 = run_eval(pot_aln, unitcell_aln, str(tmp_path / "res3.npz"), 3)
+
+    for key in res1.files:
+        np.testing.assert_allclose(res3[key], res1[key], rtol=1e-10, atol=1e-10)
+    np.testing.assert_allclose(res1["e_multiple"][0], res1["e"], rtol=1e-12)
+    np.testing.assert_allclose(res1["f_multiple"][0], res1["f"], atol=1e-10)
+    np.testing.assert_allclose(res1["s_multiple"][0], res1["s"], atol=1e-10)
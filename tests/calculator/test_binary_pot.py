@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+import shutil
+
+import pytest
+
+import pypolymlp.calculator.properties as properties
+from pypolymlp.calculator.properties import Properties
+from pypolymlp.core.io_polymlp import convert_mlp_lammps_to_binary
+
+
+def copy_pots(pot, tmp_path, n_pots):
+
+    pots = []
+    for i in range(n_pots):
+        pots.append(str(tmp_path / ("polymlp.lammps." + str(i + 1))))
+        shutil.copy(pot, pots[-1])
+    return pots
+
+
+def text_only(monkeypatch):
+    """Raise an error if text potential files are parsed."""
+
+    def load_mlp_lammps(filename=None):
+        raise RuntimeError(filename + " is parsed.")
+
+    monkeypatch.setattr(properties, "load_mlp_lammps", load_mlp_lammps)
+
+
+@pytest.mark.parametrize("mmap", [False, True])
+def test_binary_pot(
+    tmp_path, monkeypatch, pot_aln, structures_aln, assert_results_equal, mmap
+):
+
+    pot = copy_pots(pot_aln, tmp_path, 1)[0]
+    res_ref = Properties(pot=pot).eval_multiple(structures_aln)
+
+    convert_mlp_lammps_to_binary(pot)
+    text_only(monkeypatch)
+    res = Properties(pot=pot, mmap=mmap).eval_multiple(structures_aln)
+    assert_results_equal(res, res_ref)
+
+
+@pytest.mark.parametrize("fused", [True, False])
+def test_binary_pot_hybrid(
+    tmp_path, monkeypatch, pot_aln, structures_aln, assert_results_equal, fused
+):
+
+    pots = copy_pots(pot_aln, tmp_path, 2)
+    res_ref = Properties(pot=pots[0]).eval_multiple(structures_aln)
+
+    for pot in pots:
+        convert_mlp_lammps_to_binary(pot)
+    text_only(monkeypatch)
+    prop = properties.PropertiesHybrid(pot=pots, fused=fused)
+    assert len(prop.props) == (1 if fused else 2)
+    assert_results_equal(prop.eval_multiple(structures_aln), res_ref, scale=2.0)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+import numpy as np
+import pytest
+
+from pypolymlp.calculator.properties import (
+    Properties,
+    PropertiesHybrid,
+    split_results,
+    structures_to_arrays,
+)
+from pypolymlp.core.io_polymlp import load_mlp_lammps
+
+
+def eval_with_buffers(prop, st_dicts, per_atom=False):
+
+    arrays = structures_to_arrays(st_dicts)
+    n_str, n_atom_total = len(st_dicts), arrays[-1][-1]
+    buffers = {
+        "energies": np.zeros(n_str),
+        "forces": np.zeros((3, n_atom_total)),
+        "stresses": np.zeros((n_str, 6)),
+    }
+    if per_atom:
+        buffers["energies_atom"] = np.zeros(n_atom_total)
+        buffers["virials_atom"] = np.zeros((6, n_atom_total))
+    res = prop.eval_multiple_arrays(*arrays, per_atom=per_atom, **buffers)
+    return res, buffers
+
+
+@pytest.mark.parametrize("per_atom", [False, True])
+def test_eval_multiple_arrays(pot_aln, structures_aln, assert_results_equal, per_atom):
+
+    prop = Properties(pot=pot_aln)
+    res_ref = prop.eval_multiple(structures_aln, per_atom=per_atom)
+    res, buffers = eval_with_buffers(prop, structures_aln, per_atom=per_atom)
+
+    assert_results_equal(res, res_ref, rtol=1e-10)
+    assert np.shares_memory(res[0], buffers["energies"])
+    assert all(np.shares_memory(f, buffers["forces"]) for f in res[1])
+    assert np.shares_memory(res[2], buffers["stresses"])
+    np.testing.assert_array_equal(prop.energies, buffers["energies"])
+    assert all(f1 is f2 for f1, f2 in zip(prop.forces, res[1]))
+
+
+@pytest.mark.parametrize("fused", [True, False])
+def test_eval_multiple_arrays_hybrid(
+    pot_aln, structures_aln, assert_results_equal, fused
+):
+
+    params_dict, mlp_dict = load_mlp_lammps(filename=pot_aln)
+    coeffs = mlp_dict["coeffs"] / mlp_dict["scales"]
+    res_ref = Properties(pot=pot_aln).eval_multiple(structures_aln, per_atom=True)
+
+    prop = PropertiesHybrid(
+        params_dict=[params_dict] * 2, coeffs=[coeffs] * 2, fused=fused
+    )
+    res, buffers = eval_with_buffers(prop, structures_aln, per_atom=True)
+    assert all(res[i] is buffers[k] for i, k in enumerate(buffers))
+    res = split_results(res, structures_to_arrays(structures_aln)[-1])
+    assert_results_equal(res, res_ref, rtol=1e-10, scale=2.0)
+
+
+@pytest.mark.parametrize("offsets", [[0, 20, 8], [4, 8], [2, 0, 8]])
+def test_eval_multiple_arrays_invalid_offsets(pot_aln, structures_aln, offsets):
+
+    prop = Properties(pot=pot_aln)
+    axis_array, positions_c, types, _ = structures_to_arrays(structures_aln[:2])
+    offsets = np.array(offsets, dtype=np.int32)
+    axis_array = axis_array[: len(offsets) - 1]
+    with pytest.raises(ValueError):
+        prop.eval_multiple_arrays(axis_array, positions_c, types, offsets)
+
+    n_str, n_atom = len(offsets) - 1, types.shape[0]
+    with pytest.raises(ValueError):
+        prop.prop.obj.eval_multiple_arrays(
+            axis_array,
+            positions_c,
+            types,
+            offsets,
+            np.zeros(n_str),
+            np.zeros((3, n_atom)),
+            np.zeros((n_str, 6)),
+            np.zeros(0),
+            np.zeros((6, 0)),
+            "all",
+            False,
+        )
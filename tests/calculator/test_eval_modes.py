@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+import numpy as np
+import pytest
+
+from pypolymlp.calculator.properties import Properties
+
+
+@pytest.fixture(params=["gtinv", "pair"])
+def pot(request, pot_aln, pot_aln_pair):
+    return pot_aln if request.param == "gtinv" else pot_aln_pair
+
+
+@pytest.mark.parametrize("mode", ["energy_force", "energy"])
+def test_eval_mode(pot, supercells_aln, mode):
+    """Quantities computed in reduced modes are equal to those of mode all."""
+    prop = Properties(pot=pot)
+    energy, force, stress = prop.eval(supercells_aln[0])
+    e, f, s = prop.eval(supercells_aln[0], mode=mode)
+
+    np.testing.assert_allclose(e, energy, rtol=1e-12)
+    assert s is None
+    assert prop.stresses_gpa is None
+    if mode == "energy":
+        assert f is None
+    else:
+        np.testing.assert_allclose(f, force, atol=1e-12)
+
+
+@pytest.mark.parametrize("mode", ["energy_force", "energy"])
+def test_eval_multiple_mode(pot, supercells_aln, mode):
+
+    prop = Properties(pot=pot)
+    energies, forces, stresses = prop.eval_multiple(supercells_aln)
+    e, f, s = prop.eval_multiple(supercells_aln, mode=mode)
+
+    np.testing.assert_allclose(e, energies, rtol=1e-12)
+    assert s is None
+    assert prop.stresses_gpa is None
+    if mode == "energy":
+        assert f is None
+    else:
+        np.testing.assert_allclose(f, forces, atol=1e-12)
+
+
+def test_eval_invalid_mode(pot_aln, supercells_aln):
+
+    prop = Properties(pot=pot_aln)
+    st = supercells_aln[0]
+    with pytest.raises(ValueError):
+        prop.eval(st, mode="forces")
+    with pytest.raises(ValueError):
+        prop.prop.obj.eval(
+            st["axis"], st["axis"] @ st["positions"], st["types"], "forces", False
+        )
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+SCRIPT = """
+import sys
+import numpy as np
+from pypolymlp.calculator.compute_features import compute_from_polymlp_lammps
+from pypolymlp.core.interface_vasp import Poscar
+from pypolymlp.core.io_polymlp import load_mlp_lammps
+from pypolymlp.mlp_dev.core.features import FeaturesProducts
+from pypolymlp.utils.structure_utils import supercell_diagonal
+
+pot, poscar, output = sys.argv[1:]
+unitcell = Poscar(poscar).get_structure()
+rng = np.random.default_rng(0)
+st_dicts = []
+for size in ([2, 2, 2], [2, 1, 1]):
+    st = supercell_diagonal(unitcell, size=size)
+    st["positions"] = st["positions"] + 0.01 * rng.random(st["positions"].shape)
+    st_dicts.append(st)
+
+res = dict()
+for threshold in (1, 10000):
+    params_dict, _ = load_mlp_lammps(filename=pot)
+    params_dict["atom_parallel_threshold"] = threshold
+    x = compute_from_polymlp_lammps(
+        st_dicts, params_dict=params_dict, force=True, stress=True,
+        return_mlp_dict=False,
+    )
+    features = FeaturesProducts(
+        params_dict, {"structures": st_dicts}, print_memory=False
+    )
+    n_features = features.n_features
+    xtx, xty = np.zeros((n_features, n_features)), np.zeros(n_features)
+    xe_sum, xe_sq_sum = np.zeros(n_features), np.zeros(n_features)
+    y = rng.random(x.shape[0])
+    features.accumulate(np.ones(x.shape[0]), y, xtx, xty, xe_sum, xe_sq_sum)
+    res["x_" + str(threshold)] = x
+    res["y_" + str(threshold)] = y
+    res["xtx_" + str(threshold)] = xtx
+    res["xty_" + str(threshold)] = xty
+np.savez(output, **res)
+"""
+
+
+def run_features(pot, poscar, output, n_threads):
+
+    env = dict(os.environ, OMP_NUM_THREADS=str(n_threads))
+    subprocess.run(
+        [sys.executable, "-c", SCRIPT, pot, poscar, output], env=env, check=True
+    )
+    return np.load(output)
+
+
+def test_features_atom_parallel(pot_aln, unitcell_aln, tmp_path):
+    """Atom-parallel feature rows agree with structure-parallel ones."""
+    res1 = run_features(pot_aln, unitcell_aln, str(tmp_path / "res1.npz"), 1)
+    res3 = run_features(pot_aln, unitcell_aln, str(tmp_path / "res3.npz"), 3)
+
+    x = res1["x_10000"]
+    for res in (res1, res3):
+        for threshold in (1, 10000):
+            tag = "_" + str(threshold)
+            x1, y = res["x" + tag], res["y" + tag]
+            np.testing.assert_allclose(x1, x, rtol=1e-10, atol=1e-12)
+            np.testing.assert_allclose(
+                res["xtx" + tag], x.T @ x, rtol=1e-10, atol=1e-12
+            )
+            np.testing.assert_allclose(res["xty" + tag], x.T @ y, rtol=1e-10)
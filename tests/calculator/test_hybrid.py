@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+import numpy as np
+import pytest
+
+from pypolymlp.calculator.properties import Properties, PropertiesHybrid
+
+
+@pytest.mark.parametrize("fused", [True, False])
+@pytest.mark.parametrize("mode", ["all", "energy_force", "energy"])
+def test_hybrid(pot_aln, pot_aln_pair, supercells_aln, fused, mode):
+    """Hybrid of components with cutoffs 6.0 and 5.0 is their sum."""
+    res1 = Properties(pot=pot_aln).eval_multiple(supercells_aln, mode=mode)
+    res2 = Properties(pot=pot_aln_pair).eval_multiple(supercells_aln, mode=mode)
+
+    prop = PropertiesHybrid(pot=[pot_aln, pot_aln_pair], fused=fused)
+    assert len(prop.props) == (1 if fused else 2)
+    res = prop.eval_multiple(supercells_aln, mode=mode)
+    for v, v1, v2 in zip(res, res1, res2):
+        if v1 is None:
+            assert v is None
+        else:
+            np.testing.assert_allclose(v, np.array(v1) + v2, rtol=1e-12, atol=1e-12)
+
+    e, f, s = prop.eval(supercells_aln[0], mode=mode)
+    np.testing.assert_allclose(e, res[0][0], rtol=1e-12)
+
+
+def test_hybrid_verlet_skin(pot_aln, pot_aln_pair, supercells_aln):
+    """A fused hybrid builds one neighbor list with the largest cutoff."""
+    pot = [pot_aln, pot_aln_pair]
+    res_ref = Properties(pot=pot).eval_multiple(supercells_aln)
+    prop = Properties(pot=pot, verlet_skin=0.4)
+    for st, e_ref, f_ref, s_ref in zip(supercells_aln, *res_ref):
+        e, f, s = prop.eval(st)
+        np.testing.assert_allclose(e, e_ref, rtol=1e-12)
+        np.testing.assert_allclose(f, f_ref, atol=1e-10)
+        np.testing.assert_allclose(s, s_ref, atol=1e-10)
+    assert prop.n_neighbor_builds == 1
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+import numpy as np
+import pytest
+
+from pypolymlp.calculator.compute_features import compute_from_polymlp_lammps
+from pypolymlp.calculator.properties import Properties
+from pypolymlp.core.interface_vasp import Poscar
+from pypolymlp.core.io_polymlp import load_mlp_lammps
+from pypolymlp.cxx.lib import libmlpcpp
+from pypolymlp.utils.structure_utils import supercell_diagonal
+
+
+@pytest.mark.parametrize("size", [[2, 2, 2], [5, 5, 5], [6, 6, 4]])
+def test_linked_cell(pot_aln, unitcell_aln, size):
+    """Linked-cell and brute-force neighbor lists give the same results."""
+    unitcell = Poscar(unitcell_aln).get_structure()
+    prop_bf = Properties(pot=pot_aln, neighbor_method="brute_force")
+    prop_lc = Properties(pot=pot_aln, neighbor_method="linked_cell")
+    e_unit = prop_bf.eval(unitcell)[0] / len(unitcell["types"])
+
+    st = supercell_diagonal(unitcell, size=size)
+    n_atom = len(st["types"])
+    for prop in (prop_bf, prop_lc):
+        e = prop.eval(st)[0]
+        np.testing.assert_allclose(e / n_atom, e_unit, rtol=1e-12)
+
+    rng = np.random.default_rng(0)
+    st["positions"] = st["positions"] + 0.003 * rng.standard_normal((3, n_atom))
+    e_bf, f_bf, s_bf = prop_bf.eval(st)
+    e_lc, f_lc, s_lc = prop_lc.eval(st)
+    np.testing.assert_allclose(e_lc, e_bf, rtol=1e-12)
+    np.testing.assert_allclose(f_lc, f_bf, atol=1e-10)
+    np.testing.assert_allclose(s_lc, s_bf, atol=1e-9)
+
+
+@pytest.mark.parametrize("neighbor_method", ["brute_force", "linked_cell"])
+def test_wrapped_positions(pot_aln, unitcell_aln, neighbor_method):
+    """Results do not depend on lattice translations of atoms."""
+    st = supercell_diagonal(Poscar(unitcell_aln).get_structure(), size=[3, 3, 2])
+    st_wrapped = dict(st)
+    st_wrapped["positions"] = st["positions"].copy()
+    st_wrapped["positions"][:, 0] += [1.0, -1.0, 0.0]
+    st_wrapped["positions"][:, 1] += [0.0, 2.0, -1.0]
+
+    prop = Properties(pot=pot_aln, neighbor_method=neighbor_method)
+    for v1, v2 in zip(prop.eval(st), prop.eval(st_wrapped)):
+        np.testing.assert_allclose(v1, v2, rtol=1e-12, atol=1e-10)
+
+    x = compute_from_polymlp_lammps(
+        [st, st_wrapped], pot=pot_aln, return_mlp_dict=False
+    )
+    np.testing.assert_allclose(x[1], x[0], rtol=1e-10, atol=1e-10)
+
+
+def test_invalid_neighbor_method(pot_aln):
+    """Unknown neighbor methods are rejected instead of using brute force."""
+    with pytest.raises(ValueError):
+        Properties(pot=pot_aln, neighbor_method="brute")
+    with pytest.raises(ValueError):
+        Properties(pot=[pot_aln, pot_aln], neighbor_method="linked-cell")
+
+    params_dict, mlp_dict = load_mlp_lammps(filename=pot_aln)
+    params_dict["element_swap"] = False
+    params_dict["neighbor_method"] = "brute"
+    with pytest.raises(ValueError):
+        libmlpcpp.PotentialPropertiesFast(params_dict, mlp_dict["coeffs"])
@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+import numpy as np
+import pytest
+
+from pypolymlp.calculator.properties import Properties
+from pypolymlp.core.interface_vasp import Poscar
+from pypolymlp.utils.structure_utils import supercell_diagonal
+
+
+@pytest.fixture
+def structure(unitcell_aln):
+
+    st = supercell_diagonal(Poscar(unitcell_aln).get_structure(), size=[2, 2, 2])
+    rng = np.random.default_rng(0)
+    st["positions"] = st["positions"] + 0.02 * rng.random(st["positions"].shape)
+    return st
+
+
+@pytest.mark.parametrize("mode", ["all", "energy_force", "energy"])
+def test_per_atom(pot_aln, structure, mode):
+    """Sums of per-atom energies and virials are equal to energy and stress."""
+    prop = Properties(pot=pot_aln)
+    energy, force, stress = prop.eval(structure)
+    e, f, s, e_atom, v_atom = prop.eval(structure, mode=mode, per_atom=True)
+
+    assert e_atom.shape == (len(structure["types"]),)
+    np.testing.assert_allclose(np.sum(e_atom), energy, rtol=1e-12)
+    np.testing.assert_allclose(e, energy, rtol=1e-12)
+    if mode == "energy":
+        assert f is None
+    else:
+        np.testing.assert_allclose(f, force, atol=1e-12)
+
+    if mode == "all":
+        assert v_atom.shape == (6, len(structure["types"]))
+        np.testing.assert_allclose(np.sum(v_atom, axis=1), stress, atol=1e-10)
+        np.testing.assert_allclose(s, stress, atol=1e-10)
+    else:
+        assert s is None
+        assert v_atom is None
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+import pytest
+
+from pypolymlp.calculator.properties import Properties
+
+
+def test_properties_cache(pot_aln, structures_aln, assert_results_equal):
+
+    prop_ref = Properties(pot=pot_aln)
+    prop = Properties(pot=pot_aln, cache_size=2)
+    st1, st2, st3 = structures_aln[:3]
+
+    res = prop.eval(st1)
+    assert_results_equal(prop.eval(st1), prop_ref.eval(st1))
+    assert prop.cache_info["hits"] == 1
+    assert prop.cache_info["misses"] == 1
+
+    # Returned arrays are copies of stored ones.
+    res[1][:] = 0.0
+    assert_results_equal(prop.eval(st1), prop_ref.eval(st1))
+
+    # Results of mode all are reused for reduced modes, not vice versa.
+    assert_results_equal(prop.eval(st1, mode="energy"), prop_ref.eval(st1, "energy"))
+    assert prop.cache_info["hits"] == 3
+    prop.eval(st2, mode="energy")
+    assert_results_equal(prop.eval(st2), prop_ref.eval(st2))
+    assert prop.cache_info["misses"] == 3
+
+    # Per-atom results are computed only if they are not stored.
+    res = prop.eval(st2, per_atom=True)
+    assert_results_equal(res, prop_ref.eval(st2, per_atom=True))
+    assert prop.cache_info["misses"] == 4
+
+    # Least recently used structure is evicted.
+    prop.eval(st3)
+    assert prop.cache_info["size"] == 2
+    prop.eval(st2)
+    assert prop.cache_info["hits"] == 4
+    prop.eval(st1)
+    assert prop.cache_info["misses"] == 6
+
+    prop.clear_cache()
+    assert prop.cache_info == {"hits": 0, "misses": 0, "size": 0, "maxsize": 2}
+
+
+@pytest.mark.parametrize("per_atom", [False, True])
+def test_properties_cache_multiple(
+    pot_aln, structures_aln, assert_results_equal, per_atom
+):
+
+    prop_ref = Properties(pot=pot_aln)
+    res_ref = prop_ref.eval_multiple(structures_aln, per_atom=per_atom)
+    prop = Properties(pot=pot_aln, cache_size=10)
+    prop.eval(structures_aln[1], per_atom=per_atom)
+    res = prop.eval_multiple(structures_aln, per_atom=per_atom)
+
+    assert prop.cache_info["hits"] == 1
+    assert prop.cache_info["misses"] == 4
+    assert_results_equal(res, res_ref)
+    res = prop.eval_multiple(structures_aln, per_atom=per_atom)
+    assert_results_equal(res, res_ref)
+    assert prop.cache_info["hits"] == 5
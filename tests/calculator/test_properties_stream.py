@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+import numpy as np
+import pytest
+
+from pypolymlp.calculator.properties import Properties, convert_stresses_in_gpa
+from pypolymlp.calculator.properties_stream import (
+    NpyAppendWriter,
+    PropertiesStreamWriter,
+    iterate_chunks,
+)
+from pypolymlp.core.interface_vasp import Poscar
+from pypolymlp.utils.structure_utils import supercell_diagonal
+
+
+def test_npy_append_writer(tmp_path):
+
+    filename = str(tmp_path / "a.npy")
+    writer = NpyAppendWriter(filename, shape_tail=(3,))
+    arrays = [np.arange(6.0).reshape((2, 3)), np.ones((0, 3)), np.ones((3, 3))]
+    for array in arrays:
+        writer.append(array)
+    with pytest.raises(ValueError):
+        writer.append(np.ones((2, 2)))
+    writer.close()
+
+    assert writer.n_rows == 5
+    np.testing.assert_array_equal(np.load(filename), np.vstack(arrays))
+    np.testing.assert_array_equal(np.load(filename, mmap_mode="r"), np.vstack(arrays))
+
+    NpyAppendWriter(filename, shape_tail=(3,)).close()
+    assert np.load(filename).shape == (0, 3)
+
+
+def test_iterate_chunks():
+
+    chunks = list(iterate_chunks(range(5), chunk_size=2))
+    assert chunks == [[0, 1], [2, 3], [4]]
+    with pytest.raises(ValueError):
+        list(iterate_chunks(range(5), chunk_size=0))
+
+
+@pytest.mark.parametrize("per_atom", [False, True])
+def test_eval_stream(pot_aln, unitcell_aln, tmp_path, per_atom):
+    """Results written in chunks are equal to those of eval_multiple."""
+    unitcell = Poscar(unitcell_aln).get_structure()
+    st_dicts = [unitcell, supercell_diagonal(unitcell, size=[2, 1, 1])] * 3
+    rng = np.random.default_rng(0)
+    for i, st in enumerate(st_dicts):
+        st_dicts[i] = dict(st)
+        st_dicts[i]["positions"] = st["positions"] + 0.01 * rng.random(
+            st["positions"].shape
+        )
+    prop = Properties(pot=pot_aln)
+    res_ref = prop.eval_multiple(st_dicts, per_atom=per_atom)
+
+    chunks = prop.eval_stream(iter(st_dicts), chunk_size=4, per_atom=per_atom)
+    assert [len(res[0]) for res in chunks] == [4, 2]
+
+    prefix = str(tmp_path / "polymlp")
+    with PropertiesStreamWriter(prefix=prefix) as writer:
+        res = prop.eval_stream(
+            iter(st_dicts), chunk_size=4, per_atom=per_atom, writer=writer
+        )
+        assert res is writer
+        assert writer.n_structures == len(st_dicts)
+
+    np.testing.assert_allclose(np.load(prefix + "_energies.npy"), res_ref[0])
+    n_atoms = np.load(prefix + "_n_atoms.npy")
+    np.testing.assert_array_equal(n_atoms, [len(st["types"]) for st in st_dicts])
+    forces = np.concatenate(res_ref[1], axis=1).T
+    np.testing.assert_allclose(np.load(prefix + "_forces.npy"), forces)
+    stresses = convert_stresses_in_gpa(res_ref[2], st_dicts)
+    np.testing.assert_allclose(np.load(prefix + "_stress_tensors.npy"), stresses)
+    if per_atom:
+        e_atom = np.load(prefix + "_energies_atom.npy")
+        np.testing.assert_allclose(e_atom, np.concatenate(res_ref[3]))
+        v_atom = np.load(prefix + "_virials_atom.npy")
+        np.testing.assert_allclose(v_atom, np.concatenate(res_ref[4], axis=1).T)
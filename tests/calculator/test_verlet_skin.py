@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+import numpy as np
+import pytest
+
+from pypolymlp.calculator.properties import Properties
+from pypolymlp.core.interface_vasp import Poscar
+from pypolymlp.utils.structure_utils import supercell_diagonal
+
+
+@pytest.fixture
+def supercell(unitcell_aln):
+    return supercell_diagonal(Poscar(unitcell_aln).get_structure(), size=[3, 3, 2])
+
+
+def displace(st, amplitude, seed=0):
+    """Return structure with atoms displaced by amplitude (in angstrom)."""
+    rng = np.random.default_rng(seed)
+    disp_c = amplitude * rng.uniform(-1, 1, st["positions"].shape) / np.sqrt(3)
+    st = dict(st)
+    st["positions"] = st["positions"] + np.linalg.inv(st["axis"]) @ disp_c
+    return st
+
+
+def assert_eval_equal(prop, prop_ref, st):
+    for v, v_ref in zip(prop.eval(st), prop_ref.eval(st)):
+        np.testing.assert_allclose(v, v_ref, rtol=1e-10, atol=1e-10)
+
+
+def test_verlet_skin(pot_aln, supercell):
+    """Neighbor lists are reused for small displacements and rebuilt."""
+    prop_ref = Properties(pot=pot_aln)
+    prop = Properties(pot=pot_aln, verlet_skin=0.4)
+
+    assert_eval_equal(prop, prop_ref, supercell)
+    assert prop.n_neighbor_builds == 1
+
+    for seed in range(3):
+        assert_eval_equal(prop, prop_ref, displace(supercell, 0.1, seed=seed))
+    assert prop.n_neighbor_builds == 1
+
+    # Atoms wrapped into the cell are not regarded as displaced.
+    st = displace(supercell, 0.1)
+    st["positions"][:, 0] += [1.0, -1.0, 0.0]
+    assert_eval_equal(prop, prop_ref, st)
+    assert prop.n_neighbor_builds == 1
+
+    assert_eval_equal(prop, prop_ref, displace(supercell, 0.6))
+    assert prop.n_neighbor_builds == 2
+
+    st = dict(supercell)
+    st["axis"] = supercell["axis"] * 1.01
+    assert_eval_equal(prop, prop_ref, st)
+    assert prop.n_neighbor_builds == 3
+
+
+def test_verlet_skin_multiple(pot_aln, supercell):
+    """Structures close to the first one reuse its neighbor list."""
+    st_dicts = [displace(supercell, 0.1, seed=seed) for seed in range(4)]
+    res_ref = Properties(pot=pot_aln).eval_multiple(st_dicts)
+    prop = Properties(pot=pot_aln, verlet_skin=0.4)
+    res = prop.eval_multiple(st_dicts)
+
+    for v, v_ref in zip(res, res_ref):
+        np.testing.assert_allclose(v, v_ref, rtol=1e-10, atol=1e-10)
+    assert prop.n_neighbor_builds == 1
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+import glob
+import os
+
+import numpy as np
+import pytest
+
+EXAMPLES = os.path.join(os.path.dirname(os.path.dirname(__file__)), "examples")
+ALN_VASPRUNS = os.path.join(
+    EXAMPLES, "calculator/force_constants/with_mlp_dev/AlN_from_vaspruns"
+)
+ALN_POSCAR = os.path.join(EXAMPLES, "calculator/properties/AlN_from_poscar")
+
+
+@pytest.fixture
+def vaspruns_aln():
+    """vasprun.xml.polymlp files of AlN."""
+    return sorted(glob.glob(ALN_VASPRUNS + "/vaspruns/train/vasprun.xml.polymlp.*"))
+
+
+@pytest.fixture
+def infile_aln():
+    """Input file of AlN polymlp development."""
+    return os.path.join(ALN_VASPRUNS, "polymlp.in")
+
+
+@pytest.fixture
+def pot_aln():
+    """Polymlp of AlN."""
+    return os.path.join(ALN_POSCAR, "polymlp.lammps")
+
+
+@pytest.fixture
+def unitcell_aln():
+    """POSCAR of AlN unit cell."""
+    return os.path.join(ALN_POSCAR, "POSCAR-unitcell")
+
+
+def displaced_structures(st_dict, n_str, amplitude):
+    """Structures with random displacements generated with a fixed seed."""
+    rng = np.random.default_rng(0)
+    st_dicts = []
+    for _ in range(n_str):
+        st = dict(st_dict)
+        st["positions"] = st_dict["positions"] + amplitude * rng.random(
+            st_dict["positions"].shape
+        )
+        st_dicts.append(st)
+    return st_dicts
+
+
+def _assert_results_equal(res1, res2, rtol=1e-12, atol=1e-14, scale=1.0):
+    """Compare results of eval or eval_multiple, which may contain None."""
+    assert len(res1) == len(res2)
+    for v1, v2 in zip(res1, res2):
+        if v2 is None:
+            assert v1 is None
+        elif isinstance(v2, (list, tuple)):
+            _assert_results_equal(v1, v2, rtol=rtol, atol=atol, scale=scale)
+        else:
+            np.testing.assert_allclose(v1, scale * np.array(v2), rtol=rtol, atol=atol)
+
+
+@pytest.fixture
+def structures_aln(unitcell_aln):
+    """AlN unit cells with random displacements."""
+    from pypolymlp.core.interface_vasp import Poscar
+
+    unitcell = Poscar(unitcell_aln).get_structure()
+    return displaced_structures(unitcell, 4, 0.02)
+
+
+@pytest.fixture
+def supercells_aln(unitcell_aln):
+    """AlN 2x2x2 supercells with random displacements."""
+    from pypolymlp.core.interface_vasp import Poscar
+    from pypolymlp.utils.structure_utils import supercell_diagonal
+
+    supercell = supercell_diagonal(Poscar(unitcell_aln).get_structure())
+    return displaced_structures(supercell, 3, 0.01)
+
+
+@pytest.fixture
+def assert_results_equal():
+    """Function comparing results of property calculations."""
+    return _assert_results_equal
+
+
+@pytest.fixture
+def infile_aln_small(tmp_path):
+    """Input file of a small AlN polymlp with two training datasets."""
+    vaspruns = ALN_VASPRUNS + "/vaspruns/"
+    lines = [
+        "n_type 2",
+        "elements Al N",
+        "feature_type gtinv",
+        "cutoff 5.0",
+        "model_type 1",
+        "max_p 1",
+        "gtinv_order 2",
+        "gtinv_maxl 2",
+        "gaussian_params1 1.0 1.0 1",
+        "gaussian_params2 0.0 4.0 3",
+        "reg_alpha_params -4 -1 4",
+        "atomic_energy -0.31455471 -3.12561282",
+        "include_stress True",
+        "train_data " + vaspruns + "train/vasprun.xml.polymlp.000* True 1.0",
+        "train_data " + vaspruns + "train/vasprun.xml.polymlp.001* True 1.0",
+        "test_data " + vaspruns + "test/vasprun.xml.polymlp.* True 1.0",
+    ]
+    filename = tmp_path / "polymlp.in"
+    filename.write_text("\n".join(lines) + "\n")
+    return str(filename)
+
+
+@pytest.fixture(scope="session")
+def pot_aln_pair(tmp_path_factory):
+    """Polymlp of AlN with pair features, trained from vasprun.xml files."""
+    from pypolymlp.mlp_dev.pypolymlp import Pypolymlp
+
+    vaspruns = ALN_VASPRUNS + "/vaspruns/"
+    path_output = str(tmp_path_factory.mktemp("pot_pair"))
+    polymlp = Pypolymlp()
+    polymlp.set_params(
+        elements=["Al", "N"],
+        feature_type="pair",
+        cutoff=5.0,
+        model_type=3,
+        max_p=2,
+        gaussian_params2=(0.0, 4.0, 5),
+        include_stress=True,
+        atomic_energy=(-0.31455471, -3.12561282),
+    )
+    polymlp.set_multiple_datasets_vasp(
+        [glob.glob(vaspruns + "train/vasprun.xml.polymlp.*")],
+        [glob.glob(vaspruns + "test/vasprun.xml.polymlp.*")],
+    )
+    polymlp.run(output_files=True, path_output=path_output)
+    return os.path.join(path_output, "polymlp.lammps")
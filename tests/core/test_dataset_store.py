@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+import os
+
+import numpy as np
+
+from pypolymlp.core.dataset_store import DatasetStore
+from pypolymlp.core.interface_vasp import read_vasprun
+
+
+def assert_records_equal(records, vaspruns):
+
+    for (prop, st), vasp in zip(records, vaspruns):
+        prop_ref, st_ref = read_vasprun(vasp)
+        assert prop["energy"] == prop_ref["energy"]
+        np.testing.assert_array_equal(prop["force"], prop_ref["force"])
+        np.testing.assert_array_equal(prop["stress"], prop_ref["stress"])
+        for key in ("axis", "positions", "volume"):
+            np.testing.assert_array_equal(st[key], st_ref[key])
+        for key in ("n_atoms", "elements", "types"):
+            assert list(st[key]) == list(st_ref[key])
+
+
+def chunks(store_dir):
+    return [f for f in os.listdir(store_dir) if f.startswith("chunk-")]
+
+
+def test_dataset_store(tmp_path, vaspruns_aln):
+
+    store_dir = str(tmp_path / "store")
+    store = DatasetStore(store_dir, verbose=False)
+    assert_records_equal(store.read_vaspruns(vaspruns_aln), vaspruns_aln)
+    assert len(chunks(store_dir)) == 1
+
+    store = DatasetStore(store_dir, verbose=False)
+    assert store.n_files == len(vaspruns_aln)
+    records = store.read_vaspruns(vaspruns_aln[::-1])
+    assert_records_equal(records, vaspruns_aln[::-1])
+    assert len(chunks(store_dir)) == 1
+
+
+def test_dataset_store_shared(tmp_path, vaspruns_aln):
+    """Two stores on the same directory do not remove files of each other."""
+
+    store_dir = str(tmp_path / "store")
+    store1 = DatasetStore(store_dir, verbose=False)
+    store2 = DatasetStore(store_dir, verbose=False)
+    store1.read_vaspruns(vaspruns_aln[:5])
+    store2.read_vaspruns(vaspruns_aln[5:8])
+    assert len(chunks(store_dir)) == 2
+
+    store = DatasetStore(store_dir, verbose=False)
+    assert store.n_files == 8
+    assert_records_equal(store.read_vaspruns(vaspruns_aln[:8]), vaspruns_aln[:8])
+    assert len(chunks(store_dir)) == 2
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+import gzip
+import lzma
+import shutil
+
+import numpy as np
+import pytest
+
+from pypolymlp.core.interface_vasp import (
+    VasprunRecord,
+    load_vasprun,
+    parse_vaspruns,
+    read_vasprun,
+)
+from pypolymlp.core.io_compressed import (
+    compression_format,
+    glob_compressed,
+    open_compressed,
+    strip_compression_suffix,
+)
+from pypolymlp.utils.vasprun_compress import convert
+
+OPENERS = {"gzip": (".gz", gzip.open), "xz": (".xz", lzma.open)}
+
+
+def compress(filename, output_dir, fmt):
+    suffix, opener = OPENERS[fmt]
+    output = str(output_dir / (filename.split("/")[-1] + suffix))
+    with open(filename, "rb") as f_in, opener(output, "wb") as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    return output
+
+
+def assert_read_equal(res, res_ref):
+
+    (prop, st), (prop_ref, st_ref) = res, res_ref
+    assert prop["energy"] == prop_ref["energy"]
+    np.testing.assert_array_equal(prop["force"], prop_ref["force"])
+    np.testing.assert_array_equal(prop["stress"], prop_ref["stress"])
+    for key in ("axis", "positions", "volume"):
+        np.testing.assert_array_equal(st[key], st_ref[key])
+    for key in ("n_atoms", "elements", "types"):
+        assert list(st[key]) == list(st_ref[key])
+
+
+@pytest.mark.parametrize("fmt", ["gzip", "xz"])
+def test_open_compressed(tmp_path, fmt):
+
+    filename = tmp_path / "data.txt"
+    filename.write_bytes(b"polymlp\n" * 100)
+    compressed = compress(str(filename), tmp_path, fmt)
+
+    assert compression_format(str(filename)) is None
+    assert compression_format(compressed) == fmt
+    assert strip_compression_suffix(compressed) == str(filename)
+    with open_compressed(compressed) as f:
+        assert f.read() == filename.read_bytes()
+
+
+def test_glob_compressed(tmp_path):
+
+    names = ("a.xml", "a.xml.gz", "b.xml.xz", "c.xml.zst", "d.txt.gz")
+    names += ("e.xml.gz", "e.xml.npz", "f.xml.npz")
+    for name in names:
+        (tmp_path / name).write_bytes(b"")
+    files = glob_compressed(str(tmp_path / "*.xml"))
+    expected = ("a.xml", "b.xml.xz", "c.xml.zst", "e.xml.npz", "f.xml.npz")
+    assert files == [str(tmp_path / f) for f in expected]
+
+
+@pytest.mark.parametrize("fmt", ["gzip", "xz"])
+@pytest.mark.parametrize("streaming", [False, True])
+def test_read_vasprun_compressed(vaspruns_aln, tmp_path, fmt, streaming):
+    """Compressed vasprun.xml files are read as the original files."""
+    vasprun = vaspruns_aln[0]
+    compressed = compress(vasprun, tmp_path, fmt)
+    assert_read_equal(
+        read_vasprun(compressed, streaming=streaming), read_vasprun(vasprun)
+    )
+
+
+@pytest.mark.parametrize("output_format", ["npz", "xml"])
+def test_vasprun_compress(vaspruns_aln, tmp_path, output_format):
+    """Files from vasprun_compress are read as the original files."""
+    vaspruns = vaspruns_aln[:3]
+    inputs = [compress(v, tmp_path, "gzip") for v in vaspruns]
+    for vasp in inputs:
+        assert convert(vasp, output_format=output_format)
+
+    suffix = ".polymlp.npz" if output_format == "npz" else ".polymlp"
+    outputs = [strip_compression_suffix(v) + suffix for v in inputs]
+    if output_format == "npz":
+        assert isinstance(load_vasprun(outputs[0]), VasprunRecord)
+    for output, vasp in zip(outputs, vaspruns):
+        assert_read_equal(read_vasprun(output), read_vasprun(vasp))
+
+    dft_dict = parse_vaspruns(outputs)
+    dft_dict_ref = parse_vaspruns(vaspruns)
+    for key in ("energy", "force", "stress", "volumes", "total_n_atoms"):
+        np.testing.assert_array_equal(dft_dict[key], dft_dict_ref[key])
+
+
+def test_vasprun_compress_invalid(vaspruns_aln, tmp_path):
+    """Invalid vasprun.xml files are skipped without exceptions."""
+    text = open(vaspruns_aln[0]).read()
+    filename = tmp_path / "vasprun.xml"
+    # Files larger than 1 MB are read using VasprunStream.
+    padding = "<!--" + " " * 1100000 + "-->"
+    invalid = text.replace('name="forces"', 'name="removed"')
+    filename.write_text(invalid.replace("</modeling>", padding + "</modeling>"))
+    assert not convert(str(filename), output_format="npz")
+    filename.write_text(text[: len(text) // 2])
+    assert not convert(str(filename), output_format="npz")
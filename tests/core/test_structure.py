@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+import numpy as np
+import pytest
+
+from pypolymlp.calculator.properties import Properties
+from pypolymlp.core.displacements import (
+    get_structures_from_multiple_positions,
+    set_dft_dict,
+)
+from pypolymlp.core.interface_vasp import Poscar
+from pypolymlp.core.structure import Structure, StructureBatch
+from pypolymlp.core.utils import permute_atoms
+from pypolymlp.utils.structure_utils import supercell_diagonal
+
+
+@pytest.fixture
+def structures(unitcell_aln):
+    """Structures with different numbers of atoms and element orders."""
+    unitcell = Poscar(unitcell_aln).get_structure()
+    supercell = supercell_diagonal(unitcell, size=[2, 1, 1])
+    rng = np.random.default_rng(0)
+    supercell["positions"] = supercell["positions"] + 0.01 * rng.random(
+        supercell["positions"].shape
+    )
+    ids = np.arange(len(unitcell["types"]))[::-1]
+    unitcell_rev = {
+        "axis": unitcell["axis"],
+        "positions": unitcell["positions"][:, ids],
+        "n_atoms": unitcell["n_atoms"][::-1],
+        "elements": [unitcell["elements"][i] for i in ids],
+        "types": [1 - unitcell["types"][i] for i in ids],
+        "volume": unitcell["volume"],
+    }
+    return [unitcell, supercell, unitcell_rev]
+
+
+def assert_structure_equal(st, st_ref):
+
+    for key in ("axis", "positions", "volume"):
+        np.testing.assert_allclose(st[key], st_ref[key], rtol=1e-15)
+    for key in ("n_atoms", "elements", "types"):
+        assert list(st[key]) == list(st_ref[key])
+
+
+def test_structure(structures):
+
+    st_dict = dict(structures[0], comment="AlN")
+    st = Structure.from_dict(st_dict)
+    assert_structure_equal(st, st_dict)
+    assert st["comment"] == "AlN"
+    assert st.get("missing") is None
+    with pytest.raises(KeyError):
+        st["missing"]
+
+    st_copy = st.copy()
+    st_copy["positions"] = st_copy["positions"] + 0.1
+    np.testing.assert_array_equal(st.positions, st_dict["positions"])
+
+    st_dict_back = st.to_dict()
+    assert st_dict_back.keys() == st_dict.keys()
+    assert_structure_equal(st_dict_back, st_dict)
+    np.testing.assert_allclose(
+        st.positions_cartesian, st_dict["axis"] @ st_dict["positions"]
+    )
+
+    st = Structure(
+        st_dict["axis"],
+        st_dict["positions"],
+        st_dict["n_atoms"],
+        types=st_dict["types"],
+        element_codes=(["Al", "N"], np.array(st_dict["types"])),
+    )
+    assert st.elements == st_dict["elements"]
+    assert st.volume == pytest.approx(st_dict["volume"])
+
+
+def test_structure_batch(structures):
+    """Structures converted into StructureBatch are recovered."""
+    batch = StructureBatch.from_structures(structures)
+    assert len(batch) == 3
+    np.testing.assert_array_equal(batch.total_n_atoms, [4, 8, 4])
+    for st, st_ref in zip(batch, structures):
+        assert_structure_equal(st, st_ref)
+    for st, st_ref in zip(batch.to_dicts(), structures):
+        assert_structure_equal(st, st_ref)
+
+    subsets = ((batch[1:], [1, 2]), (batch[::2], [0, 2]), (batch[[2, 0]], [2, 0]))
+    for sub, ids in subsets:
+        assert isinstance(sub, StructureBatch)
+        assert len(sub) == len(ids)
+        for st, i in zip(sub, ids):
+            assert_structure_equal(st, structures[i])
+    assert_structure_equal(batch[-1], structures[-1])
+
+    positions_c = np.concatenate(
+        [st["axis"] @ st["positions"] for st in structures], axis=1
+    )
+    np.testing.assert_allclose(batch.positions_cartesian, positions_c, atol=1e-14)
+    types = [int(e == "N") for st in structures for e in st["elements"]]
+    np.testing.assert_array_equal(batch.get_types(["Al", "N"]), types)
+    np.testing.assert_array_equal(batch.get_types(["N", "Al"]), 1 - np.array(types))
+    with pytest.raises(ValueError):
+        batch.get_types(["Al"])
+
+
+def test_structure_batch_positions(structures):
+
+    st_dict = structures[1]
+    rng = np.random.default_rng(1)
+    positions_all = st_dict["positions"] + 0.01 * rng.random((5, 3, 8))
+    batch = get_structures_from_multiple_positions(st_dict, positions_all)
+    assert len(batch) == 5
+    for st, positions in zip(batch, positions_all):
+        assert_structure_equal(st, dict(st_dict, positions=positions))
+
+
+def test_set_dft_dict(structures):
+    """Atoms are permuted once into element_order as permute_atoms does."""
+    st_dict = structures[2]
+    rng = np.random.default_rng(2)
+    positions_all = st_dict["positions"] + 0.01 * rng.random((3, 3, 4))
+    forces = rng.random((3, 3, 4))
+    energies = rng.random(3)
+
+    dft_dict = set_dft_dict(
+        forces, energies, positions_all, st_dict, element_order=["Al", "N"]
+    )
+    force_ref = []
+    for st, positions, f in zip(dft_dict["structures"], positions_all, forces):
+        st_ref, f_ref = permute_atoms(
+            dict(st_dict, positions=positions), f, ["Al", "N"]
+        )
+        assert_structure_equal(st, st_ref)
+        force_ref.extend(f_ref.T.reshape(-1))
+    np.testing.assert_array_equal(dft_dict["force"], force_ref)
+    np.testing.assert_array_equal(dft_dict["total_n_atoms"], [4, 4, 4])
+    assert dft_dict["elements"] == ["Al", "N"]
+
+
+def test_eval_multiple_batch(pot_aln, structures):
+
+    prop = Properties(pot=pot_aln)
+    res_ref = prop.eval_multiple(structures)
+    res = Properties(pot=pot_aln).eval_multiple(
+        StructureBatch.from_structures(structures)
+    )
+    np.testing.assert_allclose(res[0], res_ref[0], rtol=1e-12)
+    for f, f_ref in zip(res[1], res_ref[1]):
+        np.testing.assert_allclose(f, f_ref, atol=1e-10)
+    np.testing.assert_allclose(res[2], res_ref[2], atol=1e-10)
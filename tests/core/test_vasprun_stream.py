@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+import copy
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import pytest
+
+from pypolymlp.core.interface_vasp import (
+    Vasprun,
+    VasprunStream,
+    load_vasprun,
+    parse_vaspruns,
+)
+
+
+def assert_vasprun_equal(v, v_ref):
+
+    prop, prop_ref = v.get_properties(), v_ref.get_properties()
+    assert prop["energy"] == prop_ref["energy"]
+    np.testing.assert_array_equal(prop["force"], prop_ref["force"])
+    np.testing.assert_array_equal(prop["stress"], prop_ref["stress"])
+
+    st, st_ref = v.get_structure(), v_ref.get_structure()
+    assert st.keys() == st_ref.keys()
+    for key in ("axis", "positions", "volume"):
+        np.testing.assert_array_equal(st[key], st_ref[key])
+    for key in ("n_atoms", "elements", "types"):
+        assert st[key] == st_ref[key]
+
+
+def write_full_vasprun(vasprun, filename):
+    """Write vasprun.xml in the layout of VASP from a compressed one.
+
+    Elements not used for datasets, an initial structure, electronic
+    steps, and a second ionic step with modified values are added.
+    """
+    root = ET.parse(vasprun).getroot()
+    energy = root.find("calculation").find("energy")
+    forces, stress, finalpos = (
+        root.find(".//*[@name='" + name + "']")
+        for name in ("forces", "stress", "finalpos")
+    )
+
+    full = ET.Element("modeling")
+    ET.SubElement(full, "generator").text = "vasp"
+    ET.SubElement(ET.SubElement(full, "incar"), "i", name="ENCUT").text = "400"
+    atominfo = ET.SubElement(full, "atominfo")
+    atominfo.append(root.find(".//*[@name='atoms']"))
+    atominfo.append(root.find(".//*[@name='atomtypes']"))
+    initialpos = copy.deepcopy(finalpos)
+    initialpos.set("name", "initialpos")
+    for v in initialpos.iter("v"):
+        v.text = " 0.0 0.0 0.0 "
+    full.append(initialpos)
+
+    for step in range(2):
+        calc = ET.SubElement(full, "calculation")
+        for i in range(2):
+            scstep_energy = copy.deepcopy(energy)
+            for e in scstep_energy:
+                e.text = str(float(e.text) + 1.0 + i)
+            ET.SubElement(calc, "scstep").append(scstep_energy)
+        structure = copy.deepcopy(finalpos)
+        structure.attrib.clear()
+        calc.append(structure)
+        for elem in (forces, stress, energy):
+            elem = copy.deepcopy(elem)
+            if step > 0:
+                for v in elem.iter():
+                    if v.tag in ("i", "v"):
+                        v.text = " ".join(str(2 * float(x)) for x in v.text.split())
+            calc.append(elem)
+    full.append(finalpos)
+    ET.ElementTree(full).write(filename)
+    return filename
+
+
+def test_vasprun_stream(vaspruns_aln):
+    """VasprunStream reads the same values as Vasprun."""
+    for vasprun in vaspruns_aln[:5]:
+        assert_vasprun_equal(VasprunStream(vasprun), Vasprun(vasprun))
+
+
+def test_vasprun_stream_full(vaspruns_aln, tmp_path):
+    """Values of the first ionic step are read from a full vasprun.xml."""
+    filename = write_full_vasprun(vaspruns_aln[0], str(tmp_path / "vasprun.xml"))
+    v_stream = load_vasprun(filename, streaming=True)
+    assert isinstance(v_stream, VasprunStream)
+    assert_vasprun_equal(v_stream, Vasprun(filename))
+    assert_vasprun_equal(v_stream, Vasprun(vaspruns_aln[0]))
+
+
+def test_vasprun_stream_missing(tmp_path):
+
+    filename = tmp_path / "vasprun.xml"
+    filename.write_text("<modeling><calculation></calculation></modeling>")
+    with pytest.raises(ValueError, match="Elements not found"):
+        VasprunStream(str(filename))
+
+
+@pytest.mark.parametrize("n_jobs", [1, 2])
+def test_parse_vaspruns_streaming(vaspruns_aln, n_jobs):
+
+    dft_dict_ref = parse_vaspruns(vaspruns_aln, streaming=False)
+    dft_dict = parse_vaspruns(vaspruns_aln, streaming=True, n_jobs=n_jobs)
+    for key in ("energy", "force", "stress", "volumes", "total_n_atoms"):
+        np.testing.assert_array_equal(dft_dict[key], dft_dict_ref[key])
+    assert dft_dict["elements"] == dft_dict_ref["elements"]
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+import numpy as np
+import pytest
+from scipy.spatial.transform import Rotation
+
+from pypolymlp.mlp_dev.core.mlpdev_data import PolymlpDevData
+from pypolymlp.mlp_dev.core.utils_sequential import select_dft_dict
+from pypolymlp.utils.dataset.duplicates import (
+    find_duplicates,
+    normalize_fingerprints,
+)
+
+
+def find_duplicates_reference(fingerprints, tol):
+    """Find near-duplicates by comparing all pairs of structures."""
+    fp = normalize_fingerprints(fingerprints)
+    radius = tol * np.sqrt(fp.shape[1])
+    representatives = np.arange(len(fp))
+    for i in range(len(fp)):
+        if representatives[i] != i:
+            continue
+        for j in range(i + 1, len(fp)):
+            if representatives[j] == j and np.linalg.norm(fp[j] - fp[i]) <= radius:
+                representatives[j] = i
+    return representatives
+
+
+@pytest.mark.parametrize("n_features", [5, 60])
+def test_find_duplicates(n_features):
+    """KD-tree search finds the same near-duplicates as all-pair search."""
+    rng = np.random.default_rng(0)
+    fp = rng.random((200, n_features)) + 1.0
+    copies = rng.choice(200, 50)
+    fp_copies = fp[copies] * (1.0 + 1e-4 * rng.uniform(-1, 1, (50, n_features)))
+    fp = np.vstack([fp, fp_copies])[rng.permutation(250)]
+
+    for tol in (1e-3, 3e-2):
+        ref = find_duplicates_reference(fp, tol)
+        np.testing.assert_array_equal(find_duplicates(fp, tol=tol), ref)
+    assert np.sum(find_duplicates(fp, tol=1e-3) == np.arange(250)) == 200
+
+
+def test_find_duplicates_energy():
+
+    fp = np.array([[1.0, 2.0], [1.0, 2.0], [1.0, 2.0], [2.0, 1.0]])
+    energies = np.array([-1.0, -1.0 + 1e-4, -0.5, -1.0])
+    res = find_duplicates(fp, tol=1e-6, energies=energies, energy_tol=1e-3)
+    np.testing.assert_array_equal(res, [0, 0, 2, 3])
+    np.testing.assert_array_equal(find_duplicates(fp, tol=1e-6), [0, 0, 0, 3])
+
+
+def transform(st, seed):
+    """Rotate, translate, and permute atoms of structure."""
+    rng = np.random.default_rng(seed)
+    types = np.array(st["types"])
+    ids = np.concatenate([rng.permutation(np.where(types == t)[0]) for t in (0, 1)])
+    st = dict(st)
+    st["axis"] = Rotation.random(random_state=seed).as_matrix() @ st["axis"]
+    st["positions"] = (st["positions"][:, ids] + rng.random((3, 1))) % 1.0
+    st["types"] = [st["types"][i] for i in ids]
+    st["elements"] = [st["elements"][i] for i in ids]
+    return st
+
+
+def test_eliminate_duplicates(infile_aln_small):
+    """Transformed copies of structures are removed from datasets."""
+    polymlp_in = PolymlpDevData()
+    polymlp_in.parse_infiles([infile_aln_small], verbose=False)
+    polymlp_in.parse_datasets()
+    set_id = next(iter(polymlp_in.train_dict))
+    dft_dict = polymlp_in.train_dict[set_id]
+    n_st = len(dft_dict["structures"])
+
+    dft_dict = select_dft_dict(dft_dict, list(range(n_st)) + [3, 1])
+    dft_dict["structures"][n_st:] = [
+        transform(st, seed) for seed, st in enumerate(dft_dict["structures"][n_st:])
+    ]
+    energies = dft_dict["energy"].copy()
+    polymlp_in.train_dict[set_id] = dft_dict
+    polymlp_in.eliminate_duplicates(tol=1e-8, verbose=False)
+
+    dft_dict_reduced = polymlp_in.train_dict[set_id]
+    assert len(dft_dict_reduced["structures"]) == n_st
+    np.testing.assert_array_equal(dft_dict_reduced["energy"], energies[:n_st])
+    assert len(dft_dict_reduced["force"]) == 3 * sum(dft_dict_reduced["total_n_atoms"])
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+import os
+
+import numpy as np
+import pytest
+
+from pypolymlp.mlp_dev.core.features_cache import FeaturesCache
+from pypolymlp.mlp_dev.core.mlpdev_data import PolymlpDevData
+from pypolymlp.mlp_dev.core.utils_symmetric import unpack_symmetric
+from pypolymlp.mlp_dev.standard.mlpdev_dataxy import PolymlpDevDataXYSequential
+
+
+def test_features_cache(tmp_path):
+
+    cache = FeaturesCache(str(tmp_path / "cache"), verbose=False)
+    arrays = {"x": np.arange(12.0).reshape((3, 4)), "y": np.ones(3)}
+    cache.save("a", arrays, attrs={"n": 3})
+    assert cache.contains("a")
+
+    arrays_loaded, attrs = cache.load("a")
+    for key, array in arrays.items():
+        np.testing.assert_array_equal(arrays_loaded[key], array)
+    assert attrs == {"n": 3}
+    assert cache.load("b") is None
+
+
+def test_features_cache_evict(tmp_path):
+
+    array = np.zeros(1000)
+    cache = FeaturesCache(str(tmp_path / "cache"), max_size=1.5e-5, verbose=False)
+    cache.save("a", {"x": array})
+    cache.save("b", {"x": array})
+    assert not cache.contains("a")
+    assert cache.contains("b")
+
+    cache.save("c", {"x": np.zeros(10000)})
+    assert not cache.contains("c")
+    assert cache.contains("b")
+
+
+def test_features_cache_load_evicted(tmp_path, monkeypatch):
+    """Entry evicted while it is loaded is regarded as not found."""
+
+    cache = FeaturesCache(str(tmp_path / "cache"), verbose=False)
+    cache.save("a", {"x": np.zeros(3)})
+
+    def utime(path, *args, **kwargs):
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr(os, "utime", utime)
+    assert cache.load("a") is None
+
+
+def compute_products(infile, cache=None):
+
+    polymlp_in = PolymlpDevData()
+    polymlp_in.parse_infiles([infile], verbose=False)
+    polymlp_in.parse_datasets()
+    return PolymlpDevDataXYSequential(
+        polymlp_in, feature_cache=cache, verbose=False
+    ).run()
+
+
+def test_products_cache(tmp_path, monkeypatch, infile_aln_small):
+
+    ref = compute_products(infile_aln_small).train_regression_dict
+
+    cache = FeaturesCache(str(tmp_path / "cache"), verbose=False)
+    n_saved = []
+    save = cache.save
+
+    def save_counted(*args, **kwargs):
+        n_saved.append(args[0])
+        return save(*args, **kwargs)
+
+    monkeypatch.setattr(cache, "save", save_counted)
+
+    # Products of training and test datasets are saved once for each.
+    for _ in range(2):
+        polymlp = compute_products(infile_aln_small, cache=cache)
+        reg_dict = polymlp.train_regression_dict
+        assert len(n_saved) == 2
+        np.testing.assert_allclose(
+            unpack_symmetric(reg_dict["xtx"]), unpack_symmetric(ref["xtx"]), rtol=1e-12
+        )
+        for key in ("xty", "scales"):
+            np.testing.assert_allclose(reg_dict[key], ref[key], rtol=1e-12)
+        assert reg_dict["y_sq_norm"] == pytest.approx(ref["y_sq_norm"], rel=1e-12)
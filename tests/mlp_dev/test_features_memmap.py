@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+import numpy as np
+import pytest
+
+from pypolymlp.mlp_dev.core.mlpdev_data import PolymlpDevData
+from pypolymlp.mlp_dev.core.utils_sequential import (
+    column_sq_sum,
+    compute_products_blockwise,
+    dot_blockwise,
+    multiply_rows,
+    scale_columns,
+    tdot_blockwise,
+)
+from pypolymlp.mlp_dev.standard.mlpdev_dataxy import PolymlpDevDataXY
+from pypolymlp.mlp_dev.standard.regression import Regression
+
+
+def fit(infile, memmap_dir=None):
+
+    polymlp_in = PolymlpDevData()
+    polymlp_in.parse_infiles([infile], verbose=False)
+    polymlp_in.parse_datasets()
+    polymlp = PolymlpDevDataXY(
+        polymlp_in, verbose=False, memmap_dir=memmap_dir
+    ).run()
+    reg = Regression(polymlp, verbose=False).fit()
+    return polymlp, reg
+
+
+def test_features_memmap(infile_aln_small, tmp_path):
+    """Regression with memory-mapped X is equal to that with X in memory."""
+    polymlp, reg = fit(infile_aln_small)
+    polymlp_mm, reg_mm = fit(infile_aln_small, memmap_dir=str(tmp_path))
+
+    for tag in ("train", "test"):
+        reg_dict = getattr(polymlp, tag + "_regression_dict")
+        reg_dict_mm = getattr(polymlp_mm, tag + "_regression_dict")
+        assert isinstance(reg_dict_mm["x"], np.memmap)
+        assert (tmp_path / ("polymlp_x_" + tag + ".npy")).exists()
+        np.testing.assert_allclose(reg_dict_mm["x"], reg_dict["x"], rtol=1e-12)
+        np.testing.assert_allclose(reg_dict_mm["y"], reg_dict["y"], rtol=1e-12)
+
+    # Coefficients for small alphas are sensitive to rounding errors in X.T @ X.
+    assert reg_mm.best_model["alpha"] == reg.best_model["alpha"]
+    assert reg_mm.best_model["rmse"] == pytest.approx(reg.best_model["rmse"], rel=1e-6)
+    for tag in ("train", "test"):
+        np.testing.assert_allclose(
+            reg_mm.best_model["predictions"][tag],
+            reg.best_model["predictions"][tag],
+            rtol=1e-6,
+            atol=1e-6,
+        )
+
+
+@pytest.fixture
+def x_memmap(tmp_path):
+
+    rng = np.random.default_rng(0)
+    x = rng.standard_normal((50, 8))
+    x_mm = np.lib.format.open_memmap(
+        str(tmp_path / "x.npy"), mode="w+", dtype=np.float64, shape=x.shape
+    )
+    x_mm[:] = x
+    return x, x_mm
+
+
+def test_blockwise(x_memmap):
+    """Blockwise operations on memmaps are equal to whole-array ones."""
+    x, x_mm = x_memmap
+    max_memory = 8 * 8 * 7 / 1e9
+    rng = np.random.default_rng(1)
+    y, w = rng.standard_normal(50), rng.random(50)
+    scales = rng.random(8) + 0.5
+
+    xtx, xty = compute_products_blockwise(x_mm, y, max_memory=max_memory)
+    np.testing.assert_allclose(xtx, x.T @ x, rtol=1e-12)
+    np.testing.assert_allclose(xty, x.T @ y, rtol=1e-12)
+    np.testing.assert_allclose(
+        dot_blockwise(x_mm, scales, max_memory=max_memory), x @ scales, rtol=1e-12
+    )
+    np.testing.assert_allclose(
+        tdot_blockwise(x_mm, y, max_memory=max_memory), x.T @ y, rtol=1e-12
+    )
+    np.testing.assert_allclose(
+        column_sq_sum(x_mm, max_memory=max_memory), np.sum(x**2, axis=0)
+    )
+
+    scale_columns(x_mm, scales, max_memory=max_memory)
+    multiply_rows(x_mm, w, 3, 40, max_memory=max_memory)
+    x_ref = x / scales
+    x_ref[3:40] *= w[3:40, np.newaxis]
+    np.testing.assert_allclose(x_mm, x_ref, rtol=1e-12)
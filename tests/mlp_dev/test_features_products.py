@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+import numpy as np
+import pytest
+
+from pypolymlp.mlp_dev.core.mlpdev_data import PolymlpDevData
+from pypolymlp.mlp_dev.core.utils_symmetric import unpack_symmetric
+from pypolymlp.mlp_dev.standard.mlpdev_dataxy import (
+    PolymlpDevDataXY,
+    PolymlpDevDataXYSequential,
+)
+from pypolymlp.mlp_dev.standard.regression import Regression
+
+
+@pytest.fixture
+def polymlp_in(infile_aln_small):
+
+    polymlp_in = PolymlpDevData()
+    polymlp_in.parse_infiles([infile_aln_small], verbose=False)
+    polymlp_in.parse_datasets()
+    return polymlp_in
+
+
+def unscaled_products(reg_dict):
+    """Return X.T @ X and X.T @ y before scaling features."""
+    scales = reg_dict["scales"]
+    xtx = unpack_symmetric(reg_dict["xtx"]) * np.outer(scales, scales)
+    return xtx, reg_dict["xty"] * scales
+
+
+@pytest.mark.parametrize("batch_size", [64, 3])
+def test_features_products(polymlp_in, batch_size):
+    """Products accumulated without X are equal to those of weighted X."""
+    polymlp = PolymlpDevDataXY(polymlp_in, verbose=False).run()
+    polymlp_seq = PolymlpDevDataXYSequential(polymlp_in, verbose=False).run(
+        batch_size=batch_size, verbose=False
+    )
+
+    scales = polymlp.train_regression_dict["scales"]
+    scales_seq = polymlp_seq.train_regression_dict["scales"]
+    # Scales are accumulated from sums of squares in sequential runs.
+    np.testing.assert_allclose(scales_seq, scales, rtol=1e-5)
+
+    for tag in ("train", "test"):
+        reg_dict = getattr(polymlp, tag + "_regression_dict")
+        reg_dict_seq = getattr(polymlp_seq, tag + "_regression_dict")
+        x, y = reg_dict["x"] * scales, reg_dict["y"]
+        xtx, xty = unscaled_products(reg_dict_seq)
+
+        np.testing.assert_allclose(xtx, x.T @ x, rtol=1e-10, atol=1e-12)
+        np.testing.assert_allclose(xty, x.T @ y, rtol=1e-10, atol=1e-12)
+        assert reg_dict_seq["y_sq_norm"] == pytest.approx(y @ y, rel=1e-12)
+        assert reg_dict_seq["total_n_data"] == len(y)
+
+
+def test_features_products_folds(infile_aln_small):
+    """Products of folds are summed to those of the training dataset."""
+    with open(infile_aln_small, "a") as f:
+        f.write("reg_cv kfold\nreg_cv_folds 3\n")
+    polymlp_in = PolymlpDevData()
+    polymlp_in.parse_infiles([infile_aln_small], verbose=False)
+    polymlp_in.parse_datasets()
+    polymlp = PolymlpDevDataXYSequential(polymlp_in, verbose=False).run(verbose=False)
+
+    reg_dict = polymlp.train_regression_dict
+    assert len(reg_dict["xtx_folds"]) == 3
+    assert sum(reg_dict["total_n_data_folds"]) == reg_dict["total_n_data"]
+    np.testing.assert_allclose(
+        sum(unpack_symmetric(xtx) for xtx in reg_dict["xtx_folds"]),
+        unpack_symmetric(reg_dict["xtx"]),
+        rtol=1e-10,
+        atol=1e-12,
+    )
+    np.testing.assert_allclose(
+        sum(reg_dict["xty_folds"]), reg_dict["xty"], rtol=1e-10, atol=1e-12
+    )
+    assert sum(reg_dict["y_sq_norm_folds"]) == pytest.approx(reg_dict["y_sq_norm"])
+
+    reg = Regression(polymlp, verbose=False).fit(seq=True)
+    assert reg.best_model["cv"]["method"] == "kfold"
+    assert len(reg.best_model["cv"]["rmse"]) == len(reg.best_model["cv"]["alphas"])
+
+
+def test_features_products_parallel(polymlp_in):
+    """Products computed over shards are equal to those computed serially."""
+    polymlp = PolymlpDevDataXYSequential(polymlp_in, verbose=False).run(
+        batch_size=3, verbose=False
+    )
+    polymlp_par = PolymlpDevDataXYSequential(polymlp_in, verbose=False).run(
+        batch_size=3, verbose=False, n_jobs=2
+    )
+    for tag in ("train", "test"):
+        reg_dict = getattr(polymlp, tag + "_regression_dict")
+        reg_dict_par = getattr(polymlp_par, tag + "_regression_dict")
+        xtx, xty = unscaled_products(reg_dict)
+        xtx_par, xty_par = unscaled_products(reg_dict_par)
+        scales, scales_par = reg_dict["scales"], reg_dict_par["scales"]
+        np.testing.assert_allclose(scales_par, scales, rtol=1e-5)
+        np.testing.assert_allclose(xtx_par, xtx, rtol=1e-10, atol=1e-12)
+        np.testing.assert_allclose(xty_par, xty, rtol=1e-10, atol=1e-12)
+        assert reg_dict_par["y_sq_norm"] == pytest.approx(reg_dict["y_sq_norm"])
+        assert reg_dict_par["total_n_data"] == reg_dict["total_n_data"]
+
+
+@pytest.mark.parametrize("n_jobs", [1, 2])
+def test_features_products_packed(polymlp_in, n_jobs):
+    """Products in packed storage give the same products and coefficients."""
+    polymlp = PolymlpDevDataXYSequential(polymlp_in, verbose=False).run(
+        batch_size=3, verbose=False
+    )
+    polymlp_packed = PolymlpDevDataXYSequential(
+        polymlp_in, verbose=False, packed=True
+    ).run(batch_size=3, verbose=False, n_jobs=n_jobs)
+    for tag in ("train", "test"):
+        reg_dict = getattr(polymlp, tag + "_regression_dict")
+        reg_dict_packed = getattr(polymlp_packed, tag + "_regression_dict")
+        n_features = reg_dict["xty"].shape[0]
+        assert reg_dict_packed["xtx"].shape == (n_features * (n_features + 1) // 2,)
+        xtx, xty = unscaled_products(reg_dict)
+        xtx_packed, xty_packed = unscaled_products(reg_dict_packed)
+        np.testing.assert_allclose(xtx_packed, xtx, rtol=1e-10, atol=1e-12)
+        np.testing.assert_allclose(xty_packed, xty, rtol=1e-10, atol=1e-12)
+
+    reg = Regression(polymlp, verbose=False).fit(seq=True)
+    reg_packed = Regression(polymlp_packed, verbose=False).fit(seq=True)
+    assert reg_packed.best_model["alpha"] == reg.best_model["alpha"]
+    rmse = reg.best_model["rmse"]
+    assert reg_packed.best_model["rmse"] == pytest.approx(rmse, rel=1e-6)
+    # X.T @ X is ill-conditioned for small alpha.
+    np.testing.assert_allclose(reg_packed.coeffs, reg.coeffs, rtol=1e-3, atol=1e-6)
@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from pypolymlp.mlp_dev.core.utils_symmetric import pack_symmetric
+from pypolymlp.mlp_dev.standard.regression import Regression
+
+
+def make_regression(n_features, train=None, test=None, **reg):
+
+    train = dict() if train is None else train
+    polymlp_dev = SimpleNamespace(
+        params_dict=dict(),
+        common_params_dict={"reg": {"alpha": [-2.0, -1.0, 0.0], **reg}},
+        is_hybrid=False,
+        is_multiple_datasets=False,
+        train_regression_dict={"scales": np.ones(n_features), **train},
+        test_regression_dict=dict() if test is None else test,
+        train_dict=dict(),
+        test_dict=dict(),
+    )
+    return Regression(polymlp_dev, verbose=False)
+
+
+def make_xy(n_data=400, n_features=60, seed=0):
+
+    rng = np.random.default_rng(seed)
+    X = rng.standard_normal((n_data, n_features))
+    X[:, 1] = X[:, 0] + 1e-3 * X[:, 1]
+    y = X @ rng.standard_normal(n_features) + 1e-2 * rng.standard_normal(n_data)
+    return X, y
+
+
+def solve_reference(reg, X, y, shifts):
+
+    A, b = X.T @ X, X.T @ y
+    n = b.shape[0]
+    return np.array([reg.solve_linear_equation(A + s * np.eye(n), b) for s in shifts]).T
+
+
+@pytest.mark.parametrize("use_x", [True, False])
+def test_solve_cg(use_x):
+
+    X, y = make_xy()
+    reg = make_regression(X.shape[1])
+    shifts = [1e-2, 1e-1, 1.0]
+    ref = solve_reference(reg, X, y, shifts)
+
+    kwargs = {"X": X} if use_x else {"A": pack_symmetric(X.T @ X)}
+    coefs = reg.solve_cg(
+        shifts, X.T @ y, block_size=16, max_direct_features=0, **kwargs
+    )
+    np.testing.assert_allclose(coefs, ref, rtol=0, atol=1e-6 * np.abs(ref).max())
+
+
+def test_solve_cg_direct():
+
+    X, y = make_xy()
+    reg = make_regression(X.shape[1])
+    shifts = [1e-6, 1e-2, 1.0]
+    ref = solve_reference(reg, X, y, shifts)
+
+    A = X.T @ X
+    A_copy = A.copy()
+    coefs = reg.solve_cg(shifts, X.T @ y, A=A)
+    np.testing.assert_allclose(coefs, ref, rtol=1e-8)
+    np.testing.assert_allclose(A, A_copy, rtol=0, atol=1e-10)
+
+    coefs = reg.solve_cg(shifts, X.T @ y, X=X)
+    np.testing.assert_allclose(coefs, ref, rtol=1e-8)
+
+
+def test_solve_cg_not_converged():
+
+    X, y = make_xy()
+    reg = make_regression(X.shape[1])
+    with pytest.warns(UserWarning, match="did not converge"):
+        reg.solve_cg(
+            [1e-6], X.T @ y, X=X, block_size=1, max_iter=5, max_direct_features=0
+        )
+
+
+def products(X, y):
+    return {
+        "xtx": X.T @ X,
+        "xty": X.T @ y,
+        "y_sq_norm": y @ y,
+        "total_n_data": len(y),
+    }
+
+
+def test_solve_eigen():
+
+    X, y = make_xy()
+    reg = make_regression(X.shape[1])
+    shifts = [1e-2, 1e-1, 1.0]
+    ref = solve_reference(reg, X, y, shifts)
+
+    eigvals, eigvecs = reg.eigendecomposition(X.T @ X)
+    coefs, z = reg.solve_eigen(eigvals, eigvecs, eigvecs.T @ (X.T @ y), shifts)
+    np.testing.assert_allclose(coefs, ref, rtol=1e-8)
+    np.testing.assert_allclose(eigvecs @ z, coefs, rtol=1e-12)
+
+
+def test_fit_eigen():
+    """Eigen solver gives the same regularization path as Cholesky solver."""
+    X, y = make_xy()
+    X_test, y_test = make_xy(n_data=100, seed=1)
+    train, test = products(X, y), products(X_test, y_test)
+    reg = make_regression(X.shape[1], train=train, test=test)
+    reg_eigen = make_regression(X.shape[1], train=train, test=test, solver="eigen")
+
+    alphas = [1e-2, 1e-1, 1.0]
+    ref = solve_reference(reg, X, y, alphas)
+    eigvals, eigvecs = reg_eigen.eigendecomposition(train["xtx"])
+    _, z = reg_eigen.solve_eigen(eigvals, eigvecs, eigvecs.T @ train["xty"], alphas)
+    rmse_train, rmse_test = reg_eigen.predict_seq_eigen(z, eigvals, eigvecs)
+    rmse_train_ref, rmse_test_ref = reg.predict_seq(ref)
+    np.testing.assert_allclose(rmse_train, rmse_train_ref, rtol=1e-8)
+    np.testing.assert_allclose(rmse_test, rmse_test_ref, rtol=1e-8)
+
+    reg.fit(seq=True)
+    reg_eigen.fit(seq=True)
+    assert reg_eigen.best_model["alpha"] == reg.best_model["alpha"]
+    np.testing.assert_allclose(
+        reg_eigen.best_model["coeffs"], reg.best_model["coeffs"], rtol=1e-8
+    )
+
+
+@pytest.mark.parametrize("solver", ["cholesky", "eigen"])
+def test_kfold(solver):
+    """K-fold CV from products of folds is equal to explicit refitting."""
+    X, y = make_xy()
+    n_folds, alphas = 4, [1e-2, 1e-1, 1.0]
+    fold_ids = np.arange(len(y)) % n_folds
+    folds = [products(X[fold_ids == i], y[fold_ids == i]) for i in range(n_folds)]
+    train = products(X, y)
+    for key in ("xtx", "xty", "y_sq_norm", "total_n_data"):
+        train[key + "_folds"] = [f[key] for f in folds]
+    reg = make_regression(X.shape[1], train=train, cv="kfold", solver=solver)
+
+    sq_error = np.zeros(len(alphas))
+    for i in range(n_folds):
+        train_ids, test_ids = fold_ids != i, fold_ids == i
+        coefs = solve_reference(reg, X[train_ids], y[train_ids], alphas)
+        residuals = X[test_ids] @ coefs - y[test_ids][:, np.newaxis]
+        sq_error += np.sum(np.square(residuals), axis=0)
+    ref = np.sqrt(sq_error / len(y))
+    np.testing.assert_allclose(reg.cross_validation(alphas), ref, rtol=1e-8)
+
+
+def test_gcv():
+    """GCV in eigenbasis is equal to that using the hat matrix."""
+    X, y = make_xy()
+    n_data, alphas = len(y), [1e-2, 1e-1, 1.0]
+    reg = make_regression(X.shape[1], train=products(X, y), cv="gcv")
+
+    ref = []
+    for alpha in alphas:
+        H = X @ np.linalg.solve(X.T @ X + alpha * np.eye(X.shape[1]), X.T)
+        rss = np.sum(np.square(y - H @ y))
+        ref.append(np.sqrt(rss / n_data / (1.0 - np.trace(H) / n_data) ** 2))
+    np.testing.assert_allclose(reg.cross_validation(alphas), ref, rtol=1e-8)
+
+
+def test_fit_cv():
+
+    X, y = make_xy()
+    X_test, y_test = make_xy(n_data=100, seed=1)
+    train, test = products(X, y), products(X_test, y_test)
+    reg = make_regression(X.shape[1], train=train, test=test, cv="gcv")
+    reg.fit(seq=True)
+
+    rmse_cv = reg.best_model["cv"]["rmse"]
+    assert reg.best_model["alpha"] == reg.best_model["cv"]["alphas"][np.argmin(rmse_cv)]
+    with pytest.raises(ValueError):
+        make_regression(X.shape[1], train=train, test=test, cv="gcv").fit(seq=False)
+
+
+def test_solve_packed():
+
+    X, y = make_xy()
+    reg = make_regression(X.shape[1])
+    A, b = X.T @ X + 1e-2 * np.eye(X.shape[1]), X.T @ y
+    Ap = pack_symmetric(A)
+    Ap_copy = Ap.copy()
+    ref = reg.solve_linear_equation(A, b)
+    np.testing.assert_allclose(reg.solve_linear_equation(Ap, b), ref, rtol=1e-8)
+    np.testing.assert_array_equal(Ap, Ap_copy)
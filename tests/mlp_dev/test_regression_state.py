@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+import numpy as np
+
+from pypolymlp.mlp_dev.core.mlpdev_data import PolymlpDevData
+from pypolymlp.mlp_dev.core.utils_sequential import select_dft_dict
+from pypolymlp.mlp_dev.core.utils_symmetric import unpack_symmetric
+from pypolymlp.mlp_dev.standard.mlpdev_dataxy import (
+    PolymlpDevDataXYIncremental,
+    PolymlpDevDataXYSequential,
+)
+
+
+def parse(infile, ids=None):
+    """Parse datasets, keeping structures ids in the first training dataset."""
+    polymlp_in = PolymlpDevData()
+    polymlp_in.parse_infiles([infile], verbose=False)
+    polymlp_in.parse_datasets()
+    set_id = next(iter(polymlp_in.train_dict))
+    if ids is not None:
+        dft_dict = polymlp_in.train_dict[set_id]
+        polymlp_in.train_dict[set_id] = select_dft_dict(dft_dict, ids)
+    return polymlp_in, set_id
+
+
+def assert_products_equal(polymlp, polymlp_ref):
+
+    for tag in ("train", "test"):
+        reg_dict = getattr(polymlp, tag + "_regression_dict")
+        reg_dict_ref = getattr(polymlp_ref, tag + "_regression_dict")
+        s, s_ref = reg_dict["scales"], reg_dict_ref["scales"]
+        # Scales are computed from sums of squares of energy rows.
+        np.testing.assert_allclose(s, s_ref, rtol=1e-5)
+        np.testing.assert_allclose(
+            unpack_symmetric(reg_dict["xtx"]) * np.outer(s, s),
+            unpack_symmetric(reg_dict_ref["xtx"]) * np.outer(s_ref, s_ref),
+            rtol=1e-10,
+            atol=1e-12,
+        )
+        np.testing.assert_allclose(
+            reg_dict["xty"] * s, reg_dict_ref["xty"] * s_ref, rtol=1e-10, atol=1e-12
+        )
+        np.testing.assert_allclose(reg_dict["y_sq_norm"], reg_dict_ref["y_sq_norm"])
+        assert reg_dict["total_n_data"] == reg_dict_ref["total_n_data"]
+
+
+def test_regression_state_add(infile_aln_small, tmp_path, capsys):
+    """Products of new structures are added to those in the state."""
+    state_dir = str(tmp_path / "state")
+    polymlp_in, set_id = parse(infile_aln_small)
+    n_st = len(polymlp_in.train_dict[set_id]["structures"])
+
+    polymlp_in_half, _ = parse(infile_aln_small, ids=list(range(n_st // 2)))
+    PolymlpDevDataXYIncremental(polymlp_in_half, state_dir=state_dir).run()
+    capsys.readouterr()
+
+    polymlp = PolymlpDevDataXYIncremental(polymlp_in, state_dir=state_dir).run()
+    out = capsys.readouterr().out
+    assert "Number of new structures: " + str(n_st - n_st // 2) in out
+    assert len(polymlp.state.fingerprints("train", set_id)) == n_st
+
+    polymlp_ref = PolymlpDevDataXYSequential(polymlp_in, verbose=False).run(
+        verbose=False
+    )
+    assert_products_equal(polymlp, polymlp_ref)
+
+
+def test_regression_state_remove(infile_aln_small, tmp_path, capsys):
+    """Products of removed structures are subtracted from those in the state."""
+    state_dir = str(tmp_path / "state")
+    polymlp_in, set_id = parse(infile_aln_small)
+    n_st = len(polymlp_in.train_dict[set_id]["structures"])
+    removed, kept = [0, 2], list(range(1, 2)) + list(range(3, n_st))
+
+    polymlp = PolymlpDevDataXYIncremental(polymlp_in, state_dir=state_dir).run()
+    polymlp.remove_structures(
+        select_dft_dict(polymlp_in.train_dict[set_id], removed), set_id
+    )
+    capsys.readouterr()
+
+    polymlp_in_kept, _ = parse(infile_aln_small, ids=kept)
+    polymlp = PolymlpDevDataXYIncremental(polymlp_in_kept, state_dir=state_dir).run()
+    out = capsys.readouterr().out
+    assert "Structures removed from dataset" not in out
+    assert "Number of new structures: 0" in out
+    assert len(polymlp.state.fingerprints("train", set_id)) == len(kept)
+
+    polymlp_ref = PolymlpDevDataXYSequential(polymlp_in_kept, verbose=False).run(
+        verbose=False
+    )
+    assert_products_equal(polymlp, polymlp_ref)
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+import operator
+
+import numpy as np
+import pytest
+
+from pypolymlp.mlp_dev.core.utils_parallel import (
+    run_parallel,
+    split_work_items,
+    tree_reduce,
+)
+
+
+def test_split_work_items():
+
+    costs = [5, 1, 4, 2, 3, 3]
+    shards = split_work_items(costs, 3)
+    assert sorted(sum(shards, [])) == list(range(len(costs)))
+    assert all(s == sorted(s) for s in shards)
+    assert sorted(sum(costs[i] for i in s) for s in shards) == [6, 6, 6]
+
+    assert sorted(split_work_items(costs, 10)) == [[i] for i in range(len(costs))]
+    assert split_work_items(costs, 0) == [list(range(len(costs)))]
+
+
+@pytest.mark.parametrize("n_items", [1, 2, 5, 8])
+def test_tree_reduce(n_items):
+
+    items = [[i] for i in range(n_items)]
+    assert tree_reduce(items, operator.add) == list(range(n_items))
+
+    arrays = [np.full(3, float(i)) for i in range(n_items)]
+    np.testing.assert_allclose(tree_reduce(arrays, np.add), sum(arrays))
+
+
+def test_tree_reduce_empty():
+
+    with pytest.raises(ValueError):
+        tree_reduce([], operator.add)
+
+
+@pytest.mark.parametrize("n_jobs", [1, 2])
+def test_run_parallel(n_jobs):
+
+    args_list = [(i, i + 1) for i in range(5)]
+    res = run_parallel(operator.mul, args_list, n_jobs=n_jobs, backend="threading")
+    assert res == [i * (i + 1) for i in range(5)]
+
+
+@pytest.mark.parametrize("n_jobs", [1, 2])
+def test_run_parallel_unordered(n_jobs):
+
+    args_list = [(i, i + 1) for i in range(5)]
+    res = run_parallel(
+        operator.mul, args_list, n_jobs=n_jobs, backend="threading", unordered=True
+    )
+    assert not isinstance(res, list)
+    assert sorted(res) == [i * (i + 1) for i in range(5)]
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+import numpy as np
+import pytest
+
+from pypolymlp.mlp_dev.core.utils_symmetric import (
+    add_diagonal,
+    compute_xtx,
+    is_packed,
+    pack_symmetric,
+    scale_symmetric,
+    symmetric_diagonal,
+    symmetric_diagonal_blocks,
+    symmetric_dot,
+    symmetric_size,
+    syrk_update,
+    unpack_symmetric,
+    zeros_symmetric,
+)
+
+
+@pytest.fixture
+def x():
+    return np.random.default_rng(0).standard_normal((40, 11))
+
+
+def test_pack_symmetric(x):
+
+    a = x.T @ x
+    ap = pack_symmetric(a)
+    assert is_packed(ap)
+    assert ap.shape == (66,)
+    assert symmetric_size(ap) == symmetric_size(a) == 11
+    np.testing.assert_array_equal(unpack_symmetric(ap), a)
+    np.testing.assert_array_equal(symmetric_diagonal(ap), np.diag(a))
+
+
+@pytest.mark.parametrize("packed", [False, True])
+def test_syrk_update(x, packed):
+    """In-place rank-k updates are equal to x.T @ x."""
+    xtx = compute_xtx(x[:15], packed=packed)
+    syrk_update(xtx, x[15:], tile_size=4)
+    syrk_update(xtx, np.asfortranarray(x[::2]), tile_size=4)
+    ref = x.T @ x + x[::2].T @ x[::2]
+    assert is_packed(xtx) == packed
+    np.testing.assert_allclose(unpack_symmetric(xtx), ref, rtol=1e-12)
+
+    xtx = zeros_symmetric(11, packed=packed)
+    syrk_update(xtx, x)
+    np.testing.assert_allclose(unpack_symmetric(xtx), x.T @ x, rtol=1e-12)
+
+
+@pytest.mark.parametrize("packed", [False, True])
+def test_symmetric_operations(x, packed):
+    """Operations in full and packed storage are equal to dense ones."""
+    a = x.T @ x
+    a_sym = pack_symmetric(a) if packed else a.copy()
+    rng = np.random.default_rng(1)
+    scales, v = rng.random(11) + 0.5, rng.standard_normal((11, 3))
+
+    np.testing.assert_allclose(symmetric_dot(a_sym, v[:, 0]), a @ v[:, 0])
+    np.testing.assert_allclose(symmetric_dot(a_sym, v), a @ v)
+    for block, c0 in zip(symmetric_diagonal_blocks(a_sym, 4), range(0, 11, 4)):
+        np.testing.assert_array_equal(block, a[c0 : c0 + 4, c0 : c0 + 4])
+
+    add_diagonal(a_sym, 0.5)
+    scale_symmetric(a_sym, scales)
+    ref = (a + 0.5 * np.eye(11)) / np.outer(scales, scales)
+    np.testing.assert_allclose(unpack_symmetric(a_sym), ref, rtol=1e-12)